@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Cold-start budget check — fails if importing app.py gets slow again.
+
+Imports app.py in fresh interpreters (so nothing is cached in-process) and
+checks three things:
+
+  1. Median wall time of `import app` is under the budget
+     (--budget-ms, or AXKAN_IMPORT_BUDGET_MS; default 400ms).
+  2. No heavy or lazily-loaded module is imported at cold start: PIL, the
+     Gemini SDK, the upload-ingest pool, or any subsystems.* module.
+  3. Every row in subsystems.ROUTES points at a function that exists, so a
+     lazy route can't 500 the first time someone hits it.
+
+On failure it prints the slowest imports from `python -X importtime`:
+
+    python check_import_budget.py
+    python check_import_budget.py --runs 10 --budget-ms 300
+
+Exit code 0 = pass, 1 = fail.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+STUDIO_DIR = Path(__file__).resolve().parent
+
+# Must never be imported just by starting the server.
+FORBIDDEN_PREFIXES = ("PIL", "google.generativeai", "subsystems.", "ingest")
+
+_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import app
+elapsed = time.perf_counter() - t
+mods = sorted(m for m in sys.modules if m.startswith(%r))
+print(json.dumps({"elapsed": elapsed, "modules": mods}))
+""" % (FORBIDDEN_PREFIXES,)
+
+_ROUTES_PROBE = """
+import json
+from subsystems import ROUTES, load
+missing = []
+for sub, routes in ROUTES.items():
+    mod = load(sub)
+    for rule, name, _methods in routes:
+        if not callable(getattr(mod, name, None)):
+            missing.append(f"{rule} -> subsystems.{sub}.{name}")
+print(json.dumps(missing))
+"""
+
+
+def _env(state_dir: str) -> dict:
+    env = dict(os.environ)
+    env["AXKAN_STATE_DIR"] = state_dir  # never touch a live Studio's state
+    return env
+
+
+def _run(python: str, code: str, env: dict, extra=()) -> subprocess.CompletedProcess:
+    return subprocess.run([python, *extra, "-c", code], cwd=str(STUDIO_DIR), env=env,
+                          capture_output=True, text=True, timeout=120)
+
+
+def slowest_imports(python: str, env: dict, top: int = 12) -> list[tuple[int, str]]:
+    """(cumulative µs, module) for the slowest top-level imports under app."""
+    proc = _run(python, "import app", env, extra=("-X", "importtime"))
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _self, cum, name = [p.strip() for p in line[len("import time:"):].split("|")]
+        if cum.isdigit():
+            rows.append((int(cum), name))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--runs", type=int, default=5, help="fresh interpreters to time (median is used)")
+    ap.add_argument("--budget-ms", type=float,
+                    default=float(os.environ.get("AXKAN_IMPORT_BUDGET_MS", "400")))
+    ap.add_argument("--python", default=sys.executable, help="interpreter to test with")
+    args = ap.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory(prefix="axkan-importcheck-") as state_dir:
+        env = _env(state_dir)
+
+        # Warm-up run writes .pyc files so we time imports, not compilation.
+        _run(args.python, "import app", env)
+
+        timings, loaded = [], set()
+        for _ in range(max(1, args.runs)):
+            proc = _run(args.python, _PROBE, env)
+            if proc.returncode != 0:
+                print(proc.stderr)
+                print("[FAIL] import app raised")
+                sys.exit(1)
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            timings.append(result["elapsed"] * 1000)
+            loaded.update(result["modules"])
+
+        median = statistics.median(timings)
+        print(f"import app: median {median:.0f}ms over {len(timings)} runs "
+              f"(min {min(timings):.0f}, max {max(timings):.0f}) — budget {args.budget_ms:.0f}ms")
+        if median > args.budget_ms:
+            failures.append(f"cold start {median:.0f}ms exceeds budget {args.budget_ms:.0f}ms")
+        if loaded:
+            failures.append("imported at cold start (should be lazy): " + ", ".join(sorted(loaded)))
+
+        proc = _run(args.python, _ROUTES_PROBE, env)
+        if proc.returncode != 0:
+            print(proc.stderr)
+            failures.append("importing a subsystem raised")
+        else:
+            missing = json.loads(proc.stdout.strip().splitlines()[-1])
+            if missing:
+                failures.append("routes without a view function: " + "; ".join(missing))
+
+        if failures:
+            print("\nSlowest imports (cumulative):")
+            for cum, name in slowest_imports(args.python, env):
+                print(f"  {cum / 1000:8.1f}ms  {name}")
+            print()
+            for f in failures:
+                print(f"[FAIL] {f}")
+            sys.exit(1)
+    print("[PASS] cold start within budget, heavy modules lazy, all routes resolve")
+
+
+if __name__ == "__main__":
+    main()
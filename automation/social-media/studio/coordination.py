@@ -0,0 +1,223 @@
+"""
+AXKAN Studio — cross-process coordination
+==========================================
+Shared state for running app.py under a multi-worker WSGI server
+(`gunicorn -w N app:app`). Anything that used to be a process global and has to
+be seen by every worker lives here, in one local SQLite database (WAL mode):
+
+    kv        small JSON values — prompt progress, watchdog on/off, last DOM dump
+    sessions  the session notebook (destination, prompts, uploaded files, ...)
+    procs     claude / osascript children, so /api/abort on ANY worker can kill
+              what the OTHER workers started
+    leases    named singleton leases (the Envato watchdog must run exactly once)
+
+All workers must be on the same machine — the AppleScript side drives the local
+Chrome anyway. A single `python app.py` uses the same code path with one worker.
+
+Usage from core.py:
+    coord = Coordinator(STATE_DIR / "studio.db")
+    coord.update("progress", lambda p: {**p, "done": p["done"] + 1}, default={...})
+    if coord.acquire("watchdog", ttl=30): ...scan...
+"""
+
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv       (key  TEXT PRIMARY KEY, value TEXT NOT NULL, updated REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS sessions (id   TEXT PRIMARY KEY, data  TEXT NOT NULL, updated REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS procs    (pid  INTEGER PRIMARY KEY, kind TEXT NOT NULL, owner TEXT NOT NULL, started REAL NOT NULL);
+CREATE TABLE IF NOT EXISTS leases   (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL);
+"""
+
+_HOST = socket.gethostname()
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _owner_alive(owner: str) -> bool:
+    """Owners are `host:pid`. Anything on another host is assumed alive."""
+    host, _, pid = owner.rpartition(":")
+    if host != _HOST or not pid.isdigit():
+        return True
+    return _pid_alive(int(pid))
+
+
+class Coordinator:
+    """Thin, thread-safe and fork-safe wrapper around the shared SQLite file.
+
+    Each (process, thread) pair gets its own connection, so it is safe to use
+    from request threads, worker pools and after gunicorn forks its workers.
+    """
+
+    def __init__(self, db_path: Path, busy_timeout: float = 10.0):
+        self.path = Path(db_path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.busy_timeout = busy_timeout
+        self._local = threading.local()
+        self._conn().executescript(_SCHEMA)
+
+    @property
+    def owner(self) -> str:
+        # Computed on every call — a preloaded app forks after import.
+        return f"{_HOST}:{os.getpid()}"
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(str(self.path), timeout=self.busy_timeout,
+                                   isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    @contextmanager
+    def _tx(self):
+        """Write transaction. BEGIN IMMEDIATE takes the write lock up front, so
+        read-modify-write sequences can't interleave across workers."""
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    # -- key/value -----------------------------------------------------------
+    def get(self, key: str, default=None):
+        row = self._conn().execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set(self, key: str, value) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO kv (key, value, updated) VALUES (?, ?, ?)",
+            (key, json.dumps(value, default=str), time.time()),
+        )
+
+    def prune(self, prefix: str, max_age: float) -> int:
+        """Delete kv entries under `prefix` not written for `max_age` seconds."""
+        cur = self._conn().execute(
+            "DELETE FROM kv WHERE substr(key, 1, ?) = ? AND updated < ?",
+            (len(prefix), prefix, time.time() - max_age),
+        )
+        return cur.rowcount
+
+    def update(self, key: str, fn, default=None):
+        """Atomically replace kv[key] with fn(current). Returns the new value."""
+        with self._tx() as conn:
+            row = conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+            value = fn(json.loads(row[0]) if row else default)
+            conn.execute(
+                "INSERT OR REPLACE INTO kv (key, value, updated) VALUES (?, ?, ?)",
+                (key, json.dumps(value, default=str), time.time()),
+            )
+        return value
+
+    # -- sessions ------------------------------------------------------------
+    def load_session(self, sid: str) -> dict | None:
+        row = self._conn().execute("SELECT data FROM sessions WHERE id = ?", (sid,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def create_session(self, sess: dict) -> dict:
+        """Insert a fresh session unless another worker beat us to it; returns
+        whichever copy is stored."""
+        with self._tx() as conn:
+            conn.execute(
+                "INSERT OR IGNORE INTO sessions (id, data, updated) VALUES (?, ?, ?)",
+                (sess["id"], json.dumps(sess, default=str), time.time()),
+            )
+            row = conn.execute("SELECT data FROM sessions WHERE id = ?", (sess["id"],)).fetchone()
+        return json.loads(row[0])
+
+    def merge_session(self, sid: str, changes: dict) -> dict:
+        """Merge only the given fields, so two workers writing different parts
+        of the same session (uploads vs. prompts) don't clobber each other."""
+        with self._tx() as conn:
+            row = conn.execute("SELECT data FROM sessions WHERE id = ?", (sid,)).fetchone()
+            data = {**(json.loads(row[0]) if row else {"id": sid}), **changes}
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (id, data, updated) VALUES (?, ?, ?)",
+                (sid, json.dumps(data, default=str), time.time()),
+            )
+        return data
+
+    def update_session(self, sid: str, fn) -> dict | None:
+        """Atomically replace a session with fn(current). For edits inside a
+        field (one entry of uploaded_files) that merge_session can't express.
+        Returns None, without calling fn, if the session doesn't exist."""
+        with self._tx() as conn:
+            row = conn.execute("SELECT data FROM sessions WHERE id = ?", (sid,)).fetchone()
+            if not row:
+                return None
+            data = fn(json.loads(row[0]))
+            conn.execute(
+                "UPDATE sessions SET data = ?, updated = ? WHERE id = ?",
+                (json.dumps(data, default=str), time.time(), sid),
+            )
+        return data
+
+    # -- child processes -----------------------------------------------------
+    def track(self, pid: int, kind: str) -> None:
+        self._conn().execute(
+            "INSERT OR REPLACE INTO procs (pid, kind, owner, started) VALUES (?, ?, ?, ?)",
+            (pid, kind, self.owner, time.time()),
+        )
+
+    def untrack(self, pid: int) -> None:
+        self._conn().execute("DELETE FROM procs WHERE pid = ?", (pid,))
+
+    def tracked(self, kind: str | None = None) -> list[dict]:
+        """Live tracked children across all workers. Rows whose child exited or
+        whose worker died are purged on the way out, so a recycled PID is never
+        reported (and never killed) on behalf of a dead worker."""
+        rows = self._conn().execute("SELECT pid, kind, owner, started FROM procs").fetchall()
+        live, dead = [], []
+        for pid, k, owner, started in rows:
+            if not _owner_alive(owner) or not _pid_alive(pid):
+                dead.append((pid,))
+            elif kind is None or k == kind:
+                live.append({"pid": pid, "kind": k, "owner": owner, "started": started})
+        if dead:
+            self._conn().executemany("DELETE FROM procs WHERE pid = ?", dead)
+        return live
+
+    # -- leases --------------------------------------------------------------
+    def acquire(self, name: str, ttl: float) -> bool:
+        """Take or renew a lease. A lease held by a dead worker on this host is
+        up for grabs immediately rather than after its TTL."""
+        now = time.time()
+        with self._tx() as conn:
+            row = conn.execute("SELECT owner, expires FROM leases WHERE name = ?", (name,)).fetchone()
+            if row and row[0] != self.owner and row[1] > now and _owner_alive(row[0]):
+                return False
+            conn.execute(
+                "INSERT OR REPLACE INTO leases (name, owner, expires) VALUES (?, ?, ?)",
+                (name, self.owner, now + ttl),
+            )
+        return True
+
+    def release(self, name: str) -> None:
+        self._conn().execute("DELETE FROM leases WHERE name = ? AND owner = ?", (name, self.owner))
+
+    def holder(self, name: str) -> str | None:
+        row = self._conn().execute("SELECT owner, expires FROM leases WHERE name = ?", (name,)).fetchone()
+        if not row or row[1] <= time.time() or not _owner_alive(row[0]):
+            return None
+        return row[0]
@@ -0,0 +1,268 @@
+"""
+AXKAN Content Studio — shared core
+===================================
+Paths, shared state and helpers used by app.py and every subsystem under
+subsystems/. Kept free of heavy imports (no PIL, no Gemini SDK) so it can be
+loaded on the cold-start path.
+"""
+
+import os
+import uuid
+import signal
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+from datetime import datetime
+
+from coordination import Coordinator
+from routing import Router
+
+BASE_DIR = Path(__file__).resolve().parent
+SESSIONS_DIR = BASE_DIR / "sessions"
+SESSIONS_DIR.mkdir(exist_ok=True)
+TMP_REF_DIR = BASE_DIR / "tmp-ref"
+TMP_REF_DIR.mkdir(exist_ok=True)
+ABORT_FILE = Path(tempfile.gettempdir()) / "axkan-abort-automation"
+STUDIO_PORT = int(os.environ.get("AXKAN_STUDIO_PORT", "8080"))
+GEMINI_API_KEY = os.environ.get("GEMINI_API_KEY", "")
+
+# Ensure claude CLI is findable in subprocess calls
+_extra_paths = [
+    os.path.expanduser("~/.npm-global/bin"),
+    os.path.expanduser("~/.local/bin"),
+    "/usr/local/bin",
+    "/opt/homebrew/bin",
+]
+for p in _extra_paths:
+    if p not in os.environ.get("PATH", ""):
+        os.environ["PATH"] = p + ":" + os.environ.get("PATH", "")
+
+# Shared state. Everything that has to be seen by every worker when the app
+# runs under a multi-worker WSGI server (sessions, progress, tracked children,
+# the watchdog lease) lives in one SQLite file — see coordination.py.
+STATE_DIR = Path(os.environ.get("AXKAN_STATE_DIR", str(BASE_DIR / "state")))
+coord = Coordinator(STATE_DIR / "studio.db")
+
+# Picks model / --max-turns for every `claude -p` call — see routing.py.
+router = Router(coord)
+
+# Progress tracking for prompt generation
+IDLE_PROGRESS = {"total": 0, "done": 0, "phase": "idle"}  # phase: idle, analyzing, generating, complete
+
+
+def set_progress(**fields):
+    coord.update("progress", lambda p: {**p, **fields}, default=IDLE_PROGRESS)
+
+
+def bump_progress():
+    coord.update("progress", lambda p: {**p, "done": p["done"] + 1}, default=IDLE_PROGRESS)
+
+
+def communicate(proc, input=None, timeout=None, kind="claude"):
+    """proc.communicate() with the child registered in the shared process table,
+    so /api/abort on any worker can kill it. Kills the child on timeout (like
+    subprocess.run) before re-raising."""
+    coord.track(proc.pid, kind)
+    try:
+        return proc.communicate(input=input, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.communicate()
+        raise
+    finally:
+        coord.untrack(proc.pid)
+
+
+def kill_automation():
+    """Kill all running automation (AppleScript, Claude CLI, clipboard helpers)
+    across every worker process."""
+
+    # 1. Create sentinel file (checked by AppleScript abort loops)
+    try:
+        ABORT_FILE.write_text("abort")
+    except Exception:
+        pass
+
+    # 2. Kill tracked Claude CLI / osascript children, whichever worker started them
+    for child in coord.tracked():
+        try:
+            os.kill(child["pid"], signal.SIGKILL)
+            print(f"[!] ABORT: killed {child['kind']} pid={child['pid']} (worker {child['owner']})")
+        except Exception:
+            pass
+        coord.untrack(child["pid"])
+
+    # 3. Kill osascript and System Events
+    for cmd in [
+        "killall -9 osascript 2>/dev/null || true",
+        'killall -9 "System Events" 2>/dev/null || true',
+        "pkill -9 -f clipboard_image 2>/dev/null || true",
+    ]:
+        try:
+            subprocess.run(cmd, shell=True, timeout=5)
+        except Exception:
+            pass
+
+    print("[!] ABORT: Killed all automation")
+
+    # Notification
+    try:
+        subprocess.Popen([
+            "osascript", "-e",
+            'display notification "All automation stopped" with title "ABORTED"',
+        ])
+    except Exception:
+        pass
+
+
+# ---------------------------------------------------------------------------
+# Gemini SDK (optional) — `google.generativeai` is imported and configured the
+# first time a caller asks for it, never on the cold-start path
+# ---------------------------------------------------------------------------
+_sdk_lock = threading.Lock()
+_sdk = {"loaded": False, "genai": None, "model": None}
+
+
+def _load_sdk():
+    with _sdk_lock:
+        if _sdk["loaded"]:
+            return _sdk
+        _sdk["loaded"] = True
+        if not GEMINI_API_KEY:
+            print("[AXKAN Studio] No GEMINI_API_KEY — using template fallbacks")
+            return _sdk
+        try:
+            import google.generativeai as genai
+            genai.configure(api_key=GEMINI_API_KEY)
+            _sdk["genai"] = genai
+            _sdk["model"] = genai.GenerativeModel("gemini-2.0-flash")
+            print("[AXKAN Studio] Gemini API configured OK")
+        except Exception as e:
+            print(f"[AXKAN Studio] Gemini setup failed: {e}")
+            _sdk["genai"] = _sdk["model"] = None
+        return _sdk
+
+
+def gemini_model():
+    """The shared GenerativeModel, or None without a key / if setup failed."""
+    return _load_sdk()["model"]
+
+
+def gemini_sdk():
+    """The configured `google.generativeai` module, or None."""
+    return _load_sdk()["genai"]
+
+
+# ---------------------------------------------------------------------------
+# AXKAN Brand constants
+# ---------------------------------------------------------------------------
+AXKAN_COLORS = {
+    "rosa": "#E72A88",
+    "turquesa": "#09ADC2",
+    "naranja": "#F39223",
+    "verde": "#8AB73B",
+}
+ACCENT_CYCLE = list(AXKAN_COLORS.values())
+
+
+# ---------------------------------------------------------------------------
+# Helper: get or create session
+# ---------------------------------------------------------------------------
+def get_session(session_id: str | None = None) -> tuple[str, dict]:
+    """Return the shared copy of a session (creating it if needed). The dict is
+    a snapshot — call save_session() with the fields you changed."""
+    if session_id:
+        shared = coord.load_session(session_id)
+        if shared is not None:
+            return session_id, shared
+    sid = session_id or uuid.uuid4().hex[:12]
+    sess = {
+        "id": sid,
+        "destination": "",
+        "content_type": "carousel",
+        "prompts": [],
+        "uploaded_files": [],
+        "clean_files": [],
+        "overlay_specs": [],
+        "created": datetime.now().isoformat(),
+    }
+    sess = coord.create_session(sess)
+    (SESSIONS_DIR / sid).mkdir(parents=True, exist_ok=True)
+    return sid, sess
+
+
+def save_session(sid: str, sess: dict, *fields: str) -> None:
+    """Publish the given session fields to every worker."""
+    coord.merge_session(sid, {k: sess[k] for k in fields})
+
+
+# ---------------------------------------------------------------------------
+# Upload ingest — see ingest.py. Entries in sess["uploaded_files"] carry
+# "ingest": "pending" | "ready" | "failed"; readers call wait_for_ingest().
+# ---------------------------------------------------------------------------
+INGEST_WAIT = 60  # seconds a reader waits for pending working copies
+
+
+def _ingest_done(sid: str, file_id: str, src: Path, dst: Path, fut) -> None:
+    import ingest
+
+    try:
+        meta, status = fut.result(), "ready"
+    except Exception as e:
+        meta, status = {"ingest_error": str(e)}, "failed"
+        print(f"[Ingest] session={sid} file={file_id} failed: {e}")
+        try:
+            ingest.copy_original(str(src), str(dst))   # serve the original rather than nothing
+        except OSError as copy_error:
+            print(f"[Ingest] session={sid} file={file_id} fallback copy failed: {copy_error}")
+
+    def apply(sess):
+        for entry in sess.get("uploaded_files", []):
+            if entry.get("id") == file_id:
+                entry.update(meta, ingest=status)
+        return sess
+
+    coord.update_session(sid, apply)
+
+
+def ingest_uploads(sid: str, entries: list[dict]) -> None:
+    """Queue working copies for freshly saved originals. Returns immediately;
+    each entry flips from "pending" to "ready"/"failed" in the shared session."""
+    import ingest  # first upload only — keeps multiprocessing off the cold-start path
+
+    for entry in entries:
+        src = SESSIONS_DIR.parent / entry["original_path"].lstrip("/")
+        dst = SESSIONS_DIR.parent / entry["path"].lstrip("/")
+        fut = ingest.pool().submit(ingest.normalize_image, str(src), str(dst))
+        fut.add_done_callback(lambda f, file_id=entry["id"], src=src, dst=dst: _ingest_done(sid, file_id, src, dst, f))
+
+
+def wait_for_ingest(sid: str, timeout: float = INGEST_WAIT) -> bool:
+    """Block until no upload of the session is pending. Works across workers,
+    since it polls the shared session. False on timeout (e.g. the worker that
+    owned the job was restarted) — callers then use whatever is on disk."""
+    deadline = time.time() + timeout
+    while True:
+        sess = coord.load_session(sid) or {}
+        if not any(f.get("ingest") == "pending" for f in sess.get("uploaded_files", [])):
+            return True
+        if time.time() > deadline:
+            print(f"[Ingest] session={sid} still pending after {timeout}s")
+            return False
+        time.sleep(0.1)
+
+
+def session_file(url_path: str) -> Path:
+    """Filesystem path for a "/sessions/<sid>/..." URL, waiting for the working
+    copy if it is an upload that is still being ingested. The path may not
+    exist (unknown file, or ingest timed out); callers check."""
+    rel = url_path.lstrip("/")
+    if rel.startswith("sessions/"):
+        rel = rel[len("sessions/"):]
+    path = SESSIONS_DIR / rel
+    parts = Path(rel).parts
+    if not path.exists() and len(parts) >= 2 and parts[1] == "uploads":
+        wait_for_ingest(parts[0])
+    return path
@@ -0,0 +1,37 @@
+"""
+Gunicorn settings for running AXKAN Studio with several worker processes.
+
+    ./venv/bin/pip install gunicorn
+    ./venv/bin/gunicorn -c gunicorn.conf.py app:app
+
+Workers share sessions, progress, the abort process table and the watchdog
+lease through coordination.py, so any request can land on any worker.
+"""
+
+import multiprocessing
+import os
+import sys
+from pathlib import Path
+
+bind = f"0.0.0.0:{os.environ.get('AXKAN_STUDIO_PORT', '8080')}"
+workers = int(os.environ.get("AXKAN_WORKERS", min(4, multiprocessing.cpu_count())))
+# Requests mostly sit on claude/osascript children, so each worker also runs a
+# thread pool (same as app.run(threaded=True) in single-process mode).
+threads = int(os.environ.get("AXKAN_THREADS", "8"))
+# Prompt generation waits up to ~90s per Claude call plus the Phase 0 analysis.
+timeout = 300
+graceful_timeout = 30
+# Don't preload: each worker should import app.py itself so it starts its own
+# standby watchdog thread after the fork.
+preload_app = False
+accesslog = "-"
+
+
+def on_starting(server):
+    """Fresh boot → watchdog on, as with `python app.py`."""
+    base = Path(__file__).resolve().parent
+    sys.path.insert(0, str(base))
+    from coordination import Coordinator
+
+    state_dir = Path(os.environ.get("AXKAN_STATE_DIR", str(base / "state")))
+    Coordinator(state_dir / "studio.db").set("watchdog_enabled", True)
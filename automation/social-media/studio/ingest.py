@@ -0,0 +1,144 @@
+"""
+AXKAN Studio — upload ingest
+=============================
+Phone uploads arrive as 3-12 MB HEIC/JPEG/PNG files, often stored sideways
+with an EXIF orientation flag. Every consumer (Claude Reads, Envato refs,
+browser previews, the watermark step) used to decode that raw file again.
+
+/api/images/upload now keeps the file untouched under sessions/<sid>/originals/
+(it only goes into the zip export) and queues it here. A small process pool
+then writes the *working copy* that everything downstream reads, under
+sessions/<sid>/uploads/:
+
+    - EXIF orientation applied to the pixels (and EXIF/GPS stripped)
+    - longest side capped at MAX_SIDE
+    - JPEG, or WebP for formats that can carry transparency (PNG/WebP/GIF/TIFF)
+    - HEIC/HEIF read through pillow-heif when it is installed
+
+normalize_image() returns the dimensions and SHA-256 of both files. core.py
+records them in the session; if it fails, copy_original() puts the untouched
+file at the working path instead.
+
+This module only imports the standard library at import time. The pool
+children import it by name, and PIL loads on their first job.
+"""
+
+import hashlib
+import os
+import shutil
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from pathlib import Path
+
+MAX_SIDE = int(os.environ.get("AXKAN_INGEST_MAX_SIDE", "2048"))
+JPEG_QUALITY = 88
+WEBP_QUALITY = 90
+POOL_SIZE = int(os.environ.get("AXKAN_INGEST_WORKERS", str(max(1, min(4, (os.cpu_count() or 2) // 2)))))
+
+# Source formats that may carry alpha get a WebP working copy, the rest JPEG.
+_ALPHA_SUFFIXES = {".png", ".webp", ".gif", ".tif", ".tiff"}
+
+_pool = None
+_pool_lock = threading.Lock()
+_heif_ready = False
+
+
+def working_suffix(original_name: str) -> str:
+    """Extension of the working copy for an upload. Known before decoding, so
+    the upload response can hand out the final path straight away."""
+    return ".webp" if Path(original_name).suffix.lower() in _ALPHA_SUFFIXES else ".jpg"
+
+
+def _sha256(path: Path) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _register_heif():
+    global _heif_ready
+    if _heif_ready:
+        return
+    _heif_ready = True
+    try:
+        from pillow_heif import register_heif_opener
+        register_heif_opener()
+    except ImportError:
+        pass  # HEIC uploads then fail with "cannot identify image file"
+
+
+def normalize_image(src: str, dst: str, max_side: int = MAX_SIDE) -> dict:
+    """Write the working copy of `src` to `dst` (runs in a pool process).
+
+    The write is atomic (temp file + rename), so a reader never sees a
+    half-written working copy.
+    """
+    from PIL import Image, ImageOps
+
+    _register_heif()
+    src_path, dst_path = Path(src), Path(dst)
+    tmp_path = dst_path.with_name(f".{dst_path.name}.part")
+
+    with Image.open(src_path) as img:
+        orig_w, orig_h = img.size
+        orientation = img.getexif().get(0x0112, 1)  # EXIF Orientation
+        icc = img.info.get("icc_profile")
+
+        if (img.format == "JPEG" and dst_path.suffix == ".jpg"
+                and orientation == 1 and max(orig_w, orig_h) <= max_side):
+            # Already a small, upright JPEG: re-encoding would only lose quality.
+            shutil.copyfile(src_path, tmp_path)
+            width, height = orig_w, orig_h
+        else:
+            # JPEG draft mode decodes at 1/2, 1/4 or 1/8 scale straight from
+            # the DCT coefficients — far cheaper than a full 12 MP decode.
+            img.draft("RGB", (max_side, max_side))
+            out = ImageOps.exif_transpose(img)
+            out.thumbnail((max_side, max_side), Image.LANCZOS, reducing_gap=3.0)
+            if dst_path.suffix == ".webp":
+                if out.mode not in ("RGB", "RGBA"):
+                    out = out.convert("RGBA" if "A" in out.getbands() or "transparency" in out.info else "RGB")
+                out.save(tmp_path, "WEBP", quality=WEBP_QUALITY, method=4, icc_profile=icc)
+            else:
+                if out.mode != "RGB":
+                    out = out.convert("RGB")
+                out.save(tmp_path, "JPEG", quality=JPEG_QUALITY, optimize=True, icc_profile=icc)
+            width, height = out.size
+
+    os.replace(tmp_path, dst_path)
+    return {
+        "width": width,
+        "height": height,
+        "bytes": dst_path.stat().st_size,
+        "sha256": _sha256(dst_path),
+        "orig_width": orig_w,
+        "orig_height": orig_h,
+        "orig_bytes": src_path.stat().st_size,
+        "orig_sha256": _sha256(src_path),
+    }
+
+
+def copy_original(src: str, dst: str) -> None:
+    """Fallback working copy when normalize_image() fails (corrupt file, HEIC
+    without pillow-heif): the original bytes, so uploads/<id> still exists
+    for the browser, Envato refs and the watermark step."""
+    src_path, dst_path = Path(src), Path(dst)
+    tmp_path = dst_path.with_name(f".{dst_path.name}.part")
+    shutil.copyfile(src_path, tmp_path)
+    os.replace(tmp_path, dst_path)
+
+
+def pool() -> ProcessPoolExecutor:
+    """The shared ingest pool, started on first upload.
+
+    Uses "spawn" rather than fork: a Flask/gunicorn worker has live threads
+    (and, once Gemini has been used, gRPC state) that must not be forked.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=POOL_SIZE, mp_context=get_context("spawn"))
+        return _pool
@@ -0,0 +1,511 @@
+#!/usr/bin/env python3
+"""
+Offline load test — measures Studio throughput without Claude or Chrome.
+
+Puts stub `claude` and `osascript` executables first on PATH, starts app.py on
+a scratch port, then drives N concurrent simulated users through the main
+flow:
+
+  1. /api/images/upload        → multipart phone-style upload (needed for zip)
+  2. /api/prompts/generate     → N parallel `claude -p` calls (stubbed)
+  3. /api/chat                 → one `claude --model haiku` call (stubbed)
+  4. /api/envato/send-all      → background tab automation, many `osascript`
+  5. /api/download/zip         → zips the session dir in-process
+
+Reports requests/s, p50/p95/max latency per endpoint, peak child-process
+count and peak RSS of the server process tree. `--json` saves the report and
+`--baseline` prints deltas against a saved one, so a change to app.py can be
+compared on a plain Linux box:
+
+    python loadtest_studio.py --users 8 --json before.json
+    # ...edit app.py...
+    python loadtest_studio.py --users 8 --baseline before.json
+
+`--workers N` runs the app under gunicorn (gunicorn.conf.py) with N worker
+processes instead of the single `python app.py` process, to check that the
+shared-state layer lets concurrent users spread across cores.
+
+Stub behaviour (also settable via env when running app.py by hand):
+  AXKAN_FAKE_CLAUDE_LATENCY / AXKAN_FAKE_OSA_LATENCY     mean seconds per call
+  AXKAN_FAKE_CLAUDE_FAIL_RATE / AXKAN_FAKE_OSA_FAIL_RATE  0..1, exit 1 + empty stdout
+  AXKAN_FAKE_JITTER                                       ± fraction of latency
+  AXKAN_FAKE_CANNED                                       JSON file of canned outputs:
+      {"claude": [{"match": "substring", "output": "..."}], "osascript": [...]}
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+from PIL import Image, ImageDraw
+
+STUDIO_DIR = Path(__file__).resolve().parent
+
+# Directories core.py prepends to PATH if missing. Listing them at the END of
+# our PATH makes core.py skip them, so a real claude in ~/.npm-global/bin can't
+# shadow the stub.
+_APP_EXTRA_PATHS = [
+    os.path.expanduser("~/.npm-global/bin"),
+    os.path.expanduser("~/.local/bin"),
+    "/usr/local/bin",
+    "/opt/homebrew/bin",
+]
+
+# ---------------------------------------------------------------------------
+# Stub executables
+# ---------------------------------------------------------------------------
+_STUB_COMMON = r'''
+import json, os, random, sys, time
+
+def _env(name, default):
+    try:
+        return float(os.environ.get(name, default))
+    except ValueError:
+        return float(default)
+
+def _delay(name, default):
+    base = _env(name, default)
+    jitter = _env("AXKAN_FAKE_JITTER", "0.2")
+    time.sleep(max(0.0, base * (1 + random.uniform(-jitter, jitter))))
+
+def _canned(kind, haystack):
+    path = os.environ.get("AXKAN_FAKE_CANNED")
+    if not path:
+        return None
+    try:
+        with open(path) as f:
+            rules = json.load(f).get(kind, [])
+    except (OSError, ValueError):
+        return None
+    for rule in rules:
+        if rule.get("match", "") in haystack:
+            return rule.get("output", "")
+    return None
+'''
+
+_CLAUDE_STUB = _STUB_COMMON + r'''
+args = sys.argv[1:]
+system = ""
+if "--system-prompt-file" in args:
+    with open(args[args.index("--system-prompt-file") + 1]) as f:
+        system = f.read()
+elif "--system-prompt" in args:
+    system = args[args.index("--system-prompt") + 1]
+user = sys.stdin.read() if not sys.stdin.isatty() else ""
+if "-p" in args and args.index("-p") + 1 < len(args) and not args[args.index("-p") + 1].startswith("--"):
+    user = args[args.index("-p") + 1]
+
+_delay("AXKAN_FAKE_CLAUDE_LATENCY", "1.0")
+if random.random() < _env("AXKAN_FAKE_CLAUDE_FAIL_RATE", "0"):
+    sys.stderr.write("fake claude: simulated failure\n")
+    sys.exit(1)
+
+out = _canned("claude", system + "\n" + user)
+if out is None:
+    if "visual analysis expert" in system:
+        out = "IMAGE 1:\n" + ("Flat illustrated magnet, rosa mexicano palette, bold outlines. " * 6)
+    elif "helps plan social media content" in system:
+        out = json.dumps({"message": "Va, cuentame mas del destino.", "suggestions": ["a", "b"],
+                          "ready": False, "config": None})
+    elif "video animation prompt engineer" in system:
+        out = json.dumps({"slide_name": "Clip", "video_prompt": "Slow dolly-in over the magnet. " * 8,
+                          "speech": "Hola desde AXKAN", "estimated_time": "~5s"})
+    elif "Generate exactly ONE prompt for SLIDE" in system:
+        num = 1
+        for tok in user.replace(":", " ").split():
+            if tok.isdigit():
+                num = int(tok)
+                break
+        out = json.dumps({"slide_number": num, "slide_name": f"Slide {num}",
+                          "prompt_text": "Stub prompt, 35mm f/2.8, golden hour. " * 10,
+                          "speech": "", "estimated_time": "~30s"})
+    else:
+        out = "Stub enhanced prompt with camera movement and lighting. " * 6
+print(out)
+'''
+
+_OSASCRIPT_STUB = _STUB_COMMON + r'''
+args = sys.argv[1:]
+script = ""
+if "-e" in args:
+    script = "\n".join(args[i + 1] for i, a in enumerate(args) if a == "-e" and i + 1 < len(args))
+elif args:
+    try:
+        with open(args[0]) as f:
+            script = f.read()
+    except OSError:
+        pass
+
+_delay("AXKAN_FAKE_OSA_LATENCY", "0.05")
+if random.random() < _env("AXKAN_FAKE_OSA_FAIL_RATE", "0"):
+    sys.stderr.write("fake osascript: execution error\n")
+    sys.exit(1)
+
+out = _canned("osascript", script)
+if out is None:
+    # First match wins — mirrors the `expected=` values _poll_until waits for.
+    rules = [
+        ("return (id of front window", f"1,{random.randint(1000, 999999)}"),
+        ("__axkanFastDrop", "dropped"),
+        ("__axkanRefUp", "uploaded"),
+        ("__axkanUpload", "ok"),
+        ("__axkanTiles", "done"),
+        ("?'disabled':'enabled'", "enabled"),
+        ("return 'clicked'", "clicked"),
+        ("display notification", ""),
+        ("javascript", "y"),
+    ]
+    out = next((v for k, v in rules if k in script), "done")
+print(out)
+'''
+
+
+def write_stubs(bin_dir: Path) -> None:
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    for name, body in (("claude", _CLAUDE_STUB), ("osascript", _OSASCRIPT_STUB)):
+        path = bin_dir / name
+        path.write_text(f"#!{sys.executable}\n{body}")
+        path.chmod(0o755)
+
+
+# ---------------------------------------------------------------------------
+# Process-tree sampling (ps works on both Linux and macOS)
+# ---------------------------------------------------------------------------
+def _process_table():
+    out = subprocess.run(["ps", "-A", "-o", "pid=,ppid=,rss=,comm="],
+                         capture_output=True, text=True).stdout
+    rows = []
+    for line in out.splitlines():
+        parts = line.split(None, 3)
+        if len(parts) >= 3:
+            try:
+                rows.append((int(parts[0]), int(parts[1]), int(parts[2]),
+                             parts[3] if len(parts) > 3 else ""))
+            except ValueError:
+                continue
+    return rows
+
+
+def sample_tree(root_pid: int) -> dict:
+    rows = _process_table()
+    children = {}
+    for pid, ppid, rss, comm in rows:
+        children.setdefault(ppid, []).append((pid, rss, comm))
+    root_rss = next((rss for pid, _pp, rss, _c in rows if pid == root_pid), 0)
+    stack, descendants = [root_pid], []
+    while stack:
+        for pid, rss, comm in children.get(stack.pop(), []):
+            descendants.append((pid, rss, comm))
+            stack.append(pid)
+    names = [os.path.basename(c) for _p, _r, c in descendants]
+    return {
+        "server_rss_kb": root_rss,
+        "tree_rss_kb": root_rss + sum(r for _p, r, _c in descendants),
+        "children": len(descendants),
+        "claude": sum(1 for n in names if "claude" in n),
+        "osascript": sum(1 for n in names if "osascript" in n),
+    }
+
+
+class TreeMonitor(threading.Thread):
+    def __init__(self, root_pid: int, interval: float = 0.25):
+        super().__init__(daemon=True)
+        self.root_pid = root_pid
+        self.interval = interval
+        self.peak = {"server_rss_kb": 0, "tree_rss_kb": 0, "children": 0, "claude": 0, "osascript": 0}
+        self._stop = threading.Event()
+
+    def run(self):
+        while not self._stop.is_set():
+            try:
+                s = sample_tree(self.root_pid)
+            except Exception:
+                s = None
+            if s:
+                for k in self.peak:
+                    self.peak[k] = max(self.peak[k], s[k])
+            self._stop.wait(self.interval)
+
+    def stop(self):
+        self._stop.set()
+
+
+# ---------------------------------------------------------------------------
+# Simulated user
+# ---------------------------------------------------------------------------
+def make_upload_image(seed: int, size=(2400, 3200)) -> bytes:
+    """Phone-sized JPEG — the upload path is where real users send big files."""
+    rng = random.Random(seed)
+    img = Image.new("RGB", size, (rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+    draw = ImageDraw.Draw(img)
+    for _ in range(20):
+        x0, y0 = rng.randint(0, size[0]), rng.randint(0, size[1])
+        draw.rectangle([x0, y0, x0 + 400, y0 + 400],
+                       fill=(rng.randint(0, 255), rng.randint(0, 255), rng.randint(0, 255)))
+    buf = io.BytesIO()
+    img.save(buf, format="JPEG", quality=90)
+    return buf.getvalue()
+
+
+class Recorder:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = {}   # endpoint -> list[(latency_s, ok)]
+
+    def add(self, endpoint: str, latency: float, ok: bool):
+        with self.lock:
+            self.samples.setdefault(endpoint, []).append((latency, ok))
+
+
+def run_user(user_idx: int, args, base: str, rec: Recorder, images: list, session_ids: list):
+    http = requests.Session()
+
+    def call(endpoint, method="post", **kw):
+        t0 = time.perf_counter()
+        ok = False
+        resp = None
+        try:
+            resp = getattr(http, method)(f"{base}{endpoint}", timeout=args.timeout, **kw)
+            ok = resp.status_code < 400
+        except requests.RequestException:
+            pass
+        rec.add(endpoint, time.perf_counter() - t0, ok)
+        return resp
+
+    for it in range(args.iterations):
+        files = [("files", (f"IMG_{user_idx}_{it}_{i}.jpg", images[i % len(images)], "image/jpeg"))
+                 for i in range(args.uploads)]
+        r = call("/api/images/upload", files=files, data={})
+        sid = r.json().get("session_id") if r is not None and r.ok else None
+        if sid:
+            session_ids.append(sid)
+
+        prompts = []
+        if "prompts" in args.scenario:
+            r = call("/api/prompts/generate", json={
+                "session_id": sid, "destination": "Oaxaca", "slides": args.slides,
+                "content_type": "carousel", "theme": f"loadtest u{user_idx} i{it}",
+            })
+            if r is not None and r.ok:
+                prompts = [p.get("prompt_text", "") for p in r.json().get("prompts", [])]
+
+        if "chat" in args.scenario:
+            call("/api/chat", json={"message": "Quiero un carrusel de Oaxaca", "history": []})
+
+        if "send_all" in args.scenario:
+            call("/api/envato/send-all", json={
+                "prompts": prompts or [f"stub prompt {i}" for i in range(args.slides)],
+                "aspectRatios": ["1:2"] * args.slides,
+            })
+
+        if "zip" in args.scenario and sid:
+            call("/api/download/zip", json={"session_id": sid})
+
+
+# ---------------------------------------------------------------------------
+# Reporting
+# ---------------------------------------------------------------------------
+def _pct(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    k = max(0, min(len(values) - 1, int(round(q * (len(values) - 1)))))
+    return values[k]
+
+
+def build_report(rec: Recorder, wall: float, peak: dict, args) -> dict:
+    endpoints = {}
+    total = 0
+    for ep, samples in sorted(rec.samples.items()):
+        lat = [s for s, _ok in samples]
+        errors = sum(1 for _s, ok in samples if not ok)
+        total += len(samples)
+        endpoints[ep] = {
+            "count": len(samples),
+            "errors": errors,
+            "rps": round(len(samples) / wall, 2) if wall else 0.0,
+            "p50_ms": round(statistics.median(lat) * 1000, 1),
+            "p95_ms": round(_pct(lat, 0.95) * 1000, 1),
+            "max_ms": round(max(lat) * 1000, 1),
+        }
+    return {
+        "config": {
+            "users": args.users, "workers": args.workers, "iterations": args.iterations, "slides": args.slides,
+            "uploads": args.uploads, "scenario": args.scenario,
+            "claude_latency": args.claude_latency, "claude_fail_rate": args.claude_fail_rate,
+            "osa_latency": args.osa_latency, "osa_fail_rate": args.osa_fail_rate,
+        },
+        "wall_s": round(wall, 2),
+        "total_requests": total,
+        "rps": round(total / wall, 2) if wall else 0.0,
+        "peak": {
+            "children": peak["children"],
+            "claude_procs": peak["claude"],
+            "osascript_procs": peak["osascript"],
+            "server_rss_mb": round(peak["server_rss_kb"] / 1024, 1),
+            "tree_rss_mb": round(peak["tree_rss_kb"] / 1024, 1),
+        },
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report: dict, baseline: dict | None = None):
+    def delta(cur, old, lower_is_better=True):
+        if old in (None, 0):
+            return ""
+        pct = 100.0 * (cur - old) / old
+        better = pct < 0 if lower_is_better else pct > 0
+        return f"  ({'+' if pct >= 0 else ''}{pct:.0f}% {'better' if better else 'worse'})"
+
+    b_eps = (baseline or {}).get("endpoints", {})
+    print("=" * 78)
+    print(f"  {report['total_requests']} requests in {report['wall_s']}s → {report['rps']} req/s"
+          + delta(report["rps"], (baseline or {}).get("rps"), lower_is_better=False))
+    print("=" * 78)
+    print(f"  {'endpoint':<26}{'count':>6}{'err':>5}{'rps':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}")
+    for ep, s in report["endpoints"].items():
+        line = f"  {ep:<26}{s['count']:>6}{s['errors']:>5}{s['rps']:>8}{s['p50_ms']:>10}{s['p95_ms']:>10}{s['max_ms']:>10}"
+        if ep in b_eps:
+            line += delta(s["p95_ms"], b_eps[ep]["p95_ms"])
+        print(line)
+    p = report["peak"]
+    bp = (baseline or {}).get("peak", {})
+    print("-" * 78)
+    print(f"  peak child processes: {p['children']} (claude {p['claude_procs']}, osascript {p['osascript_procs']})"
+          + delta(p["children"], bp.get("children")))
+    print(f"  peak RSS: server {p['server_rss_mb']} MB, tree {p['tree_rss_mb']} MB"
+          + delta(p["server_rss_mb"], bp.get("server_rss_mb")))
+    print("=" * 78)
+
+
+# ---------------------------------------------------------------------------
+# Main
+# ---------------------------------------------------------------------------
+def wait_for_server(base: str, proc: subprocess.Popen, timeout: float = 30.0) -> bool:
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            return False
+        try:
+            if requests.get(f"{base}/api/progress", timeout=1).ok:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    return False
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--users", "-u", type=int, default=4, help="concurrent simulated users")
+    ap.add_argument("--iterations", "-n", type=int, default=2, help="flows per user")
+    ap.add_argument("--slides", type=int, default=4, help="prompts per generate / send-all")
+    ap.add_argument("--uploads", type=int, default=2, help="images per upload")
+    ap.add_argument("--scenario", default="prompts,chat,send_all,zip",
+                    help="comma list of: prompts, chat, send_all, zip (upload always runs)")
+    ap.add_argument("--claude-latency", type=float, default=1.0)
+    ap.add_argument("--claude-fail-rate", type=float, default=0.0)
+    ap.add_argument("--osa-latency", type=float, default=0.05)
+    ap.add_argument("--osa-fail-rate", type=float, default=0.0)
+    ap.add_argument("--jitter", type=float, default=0.2)
+    ap.add_argument("--canned", help="JSON file of canned stub outputs")
+    ap.add_argument("--port", type=int, default=18080)
+    ap.add_argument("--timeout", type=float, default=180.0, help="per-request timeout (s)")
+    ap.add_argument("--drain", type=float, default=3.0,
+                    help="seconds to keep sampling after the last request (background automation)")
+    ap.add_argument("--json", help="write the report to this file")
+    ap.add_argument("--baseline", help="compare against a report saved with --json")
+    ap.add_argument("--python", default=sys.executable, help="interpreter used to run app.py")
+    ap.add_argument("--workers", type=int, default=1,
+                    help="run under gunicorn with this many workers (1 = plain python app.py)")
+    args = ap.parse_args()
+    args.scenario = [s.strip() for s in args.scenario.split(",") if s.strip()]
+
+    work = Path(tempfile.mkdtemp(prefix="axkan-loadtest-"))
+    bin_dir = work / "bin"
+    write_stubs(bin_dir)
+
+    env = dict(os.environ)
+    env["PATH"] = ":".join([str(bin_dir), env.get("PATH", "")] + _APP_EXTRA_PATHS)
+    env.update({
+        "AXKAN_STUDIO_PORT": str(args.port),
+        "AXKAN_FAKE_CLAUDE_LATENCY": str(args.claude_latency),
+        "AXKAN_FAKE_CLAUDE_FAIL_RATE": str(args.claude_fail_rate),
+        "AXKAN_FAKE_OSA_LATENCY": str(args.osa_latency),
+        "AXKAN_FAKE_OSA_FAIL_RATE": str(args.osa_fail_rate),
+        "AXKAN_FAKE_JITTER": str(args.jitter),
+        "GEMINI_API_KEY": "",
+        # Own shared-state DB, so the run never touches a live Studio's sessions or watchdog lease
+        "AXKAN_STATE_DIR": str(work / "state"),
+        "AXKAN_WORKERS": str(args.workers),
+        "PYTHONUNBUFFERED": "1",
+    })
+    if args.canned:
+        env["AXKAN_FAKE_CANNED"] = str(Path(args.canned).resolve())
+
+    base = f"http://127.0.0.1:{args.port}"
+    log_path = work / "server.log"
+    if args.workers > 1:
+        cmd = [args.python, "-m", "gunicorn", "-c", "gunicorn.conf.py", "app:app"]
+    else:
+        cmd = [args.python, str(STUDIO_DIR / "app.py")]
+    print(f"Starting Studio on :{args.port} ({args.workers} worker(s)) with stub claude/osascript (log: {log_path})")
+    with open(log_path, "w") as log:
+        server = subprocess.Popen(cmd, cwd=str(STUDIO_DIR), env=env, stdout=log, stderr=subprocess.STDOUT)
+    session_ids: list = []
+    try:
+        if not wait_for_server(base, server):
+            print(f"[FAIL] Studio did not come up — see {log_path}")
+            sys.exit(1)
+
+        images = [make_upload_image(i) for i in range(max(1, args.uploads))]
+        rec = Recorder()
+        monitor = TreeMonitor(server.pid)
+        monitor.start()
+
+        print(f"Driving {args.users} users × {args.iterations} flows ({', '.join(args.scenario)})...")
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.users) as pool:
+            futures = [pool.submit(run_user, u, args, base, rec, images, session_ids)
+                       for u in range(args.users)]
+            for f in futures:
+                f.result()
+        wall = time.perf_counter() - t0
+        time.sleep(args.drain)
+        monitor.stop()
+
+        report = build_report(rec, wall, monitor.peak, args)
+        baseline = None
+        if args.baseline:
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        print_report(report, baseline)
+        if args.json:
+            Path(args.json).write_text(json.dumps(report, indent=2))
+            print(f"Report saved to {args.json}")
+    finally:
+        server.send_signal(signal.SIGINT)
+        try:
+            server.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            server.kill()
+        for sid in session_ids:
+            shutil.rmtree(STUDIO_DIR / "sessions" / sid, ignore_errors=True)
+        shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
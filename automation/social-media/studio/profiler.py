@@ -0,0 +1,185 @@
+"""
+AXKAN Studio — per-request sampling profiler
+=============================================
+Opt-in profiling for slow Studio endpoints. A background thread samples the
+Python stack of the request thread every few milliseconds and the result is
+stored in "folded" (collapsed-stack) format — one `frame;frame;frame count`
+line per unique stack — which flamegraph.pl, speedscope.app and inferno all
+read directly.
+
+Every profile also gets a small JSON sidecar with the endpoint, wall time and
+a rough breakdown of where the samples landed (python / subprocess / PIL /
+sleep / wait), so the common question "is it Claude, Chrome or us?" can be
+answered without opening a flamegraph.
+
+Usage from app.py:
+    prof = SamplingProfiler(threading.get_ident())
+    prof.start()
+    ...handle request...
+    prof.stop()
+    profile_id = store.save(prof, endpoint="/api/prompts/generate", ...)
+"""
+
+import json
+import linecache
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from pathlib import Path
+
+DEFAULT_INTERVAL = 0.005  # 5ms → ~200 samples/s, negligible overhead
+DEFAULT_KEEP = 50         # profiles kept on disk before the oldest are pruned
+
+
+def _frame_label(frame) -> str:
+    """`func (file.py:firstline)` — stable per function, safe for folded format."""
+    code = frame.f_code
+    fname = os.path.basename(code.co_filename)
+    return f"{code.co_name} ({fname}:{code.co_firstlineno})".replace(";", ":")
+
+
+def _classify(frame) -> str:
+    """Bucket a sampled stack by what the thread was actually doing.
+
+    Sampling only sees Python frames, so C calls like time.sleep() show up as
+    the calling line. We peek at that source line to tell sleeps apart from
+    pure-Python work. Heuristic, but good enough for a first look.
+    """
+    leaf_line = linecache.getline(frame.f_code.co_filename, frame.f_lineno)
+    if "sleep(" in leaf_line:
+        return "sleep"
+    f = frame
+    while f is not None:
+        path = f.f_code.co_filename
+        if path.endswith("subprocess.py"):
+            return "subprocess"
+        if f"{os.sep}PIL{os.sep}" in path:
+            return "pil"
+        if path.endswith("threading.py") and f.f_code.co_name == "wait":
+            return "wait"
+        f = f.f_back
+    if ".communicate(" in leaf_line or ".wait(" in leaf_line:
+        return "subprocess"
+    if "Image." in leaf_line or ".resize(" in leaf_line or ".save(" in leaf_line:
+        return "pil"
+    return "python"
+
+
+class SamplingProfiler:
+    """Periodically snapshot the stacks of one thread (or all threads).
+
+    thread_ids: set of thread idents to sample; None samples every thread
+                except the sampler itself.
+    """
+
+    def __init__(self, thread_ids=None, interval: float = DEFAULT_INTERVAL):
+        if isinstance(thread_ids, int):
+            thread_ids = {thread_ids}
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.categories: Counter = Counter()
+        self.samples = 0
+        self.started_at = 0.0
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self) -> "SamplingProfiler":
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="axkan-profiler", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> "SamplingProfiler":
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+        self.duration = time.time() - self.started_at
+        return self
+
+    def _run(self):
+        own = threading.get_ident()
+        names = {}
+        while not self._stop.wait(self.interval):
+            for tid, frame in sys._current_frames().items():
+                if tid == own:
+                    continue
+                if self.thread_ids is not None and tid not in self.thread_ids:
+                    continue
+                if tid not in names:
+                    live = {t.ident: t.name for t in threading.enumerate()}
+                    names[tid] = live.get(tid, f"thread-{tid}").replace(";", ":").replace(" ", "_")
+                stack = []
+                f = frame
+                while f is not None:
+                    stack.append(_frame_label(f))
+                    f = f.f_back
+                stack.append(names[tid])
+                self.stacks[";".join(reversed(stack))] += 1
+                self.categories[_classify(frame)] += 1
+                self.samples += 1
+
+    def folded(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def breakdown(self) -> dict:
+        """Share of samples per category, as percentages."""
+        total = sum(self.categories.values()) or 1
+        return {k: round(100.0 * v / total, 1) for k, v in self.categories.most_common()}
+
+
+class ProfileStore:
+    """Bounded on-disk store: `<id>.folded` + `<id>.json`, oldest pruned first."""
+
+    def __init__(self, directory: Path, keep: int = DEFAULT_KEEP):
+        self.directory = Path(directory)
+        self.keep = keep
+        self._lock = threading.Lock()
+
+    def save(self, prof: SamplingProfiler, **meta) -> str:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profile_id = datetime.now().strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        info = {
+            "id": profile_id,
+            "created": datetime.now().isoformat(),
+            "duration_ms": int(prof.duration * 1000),
+            "samples": prof.samples,
+            "interval_ms": prof.interval * 1000,
+            "breakdown": prof.breakdown(),
+            **meta,
+        }
+        with self._lock:
+            (self.directory / f"{profile_id}.folded").write_text(prof.folded())
+            (self.directory / f"{profile_id}.json").write_text(json.dumps(info, indent=2))
+            self._prune()
+        return profile_id
+
+    def _prune(self):
+        metas = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime)
+        for old in metas[:max(0, len(metas) - self.keep)]:
+            old.unlink(missing_ok=True)
+            old.with_suffix(".folded").unlink(missing_ok=True)
+
+    def list(self, limit: int = 50) -> list[dict]:
+        if not self.directory.exists():
+            return []
+        metas = sorted(self.directory.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True)
+        out = []
+        for p in metas[:limit]:
+            try:
+                out.append(json.loads(p.read_text()))
+            except (OSError, json.JSONDecodeError):
+                continue
+        return out
+
+    def path_for(self, profile_id: str) -> Path | None:
+        """Resolve a profile id to its folded file, rejecting anything path-like."""
+        if not profile_id or "/" in profile_id or "\\" in profile_id or profile_id.startswith("."):
+            return None
+        p = self.directory / f"{profile_id}.folded"
+        return p if p.is_file() else None
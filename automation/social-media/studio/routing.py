@@ -0,0 +1,226 @@
+"""
+AXKAN Studio — latency-budgeted routing for Claude CLI calls
+=============================================================
+Every `claude -p` call used to hardcode its model and --max-turns. Each call
+site now asks the router for a (model, max_turns) configuration for its task.
+The router records how long that configuration took and whether it failed;
+failed calls count in the latency window too, so a configuration that keeps
+timing out doesn't look fast.
+
+Per task, the router picks the CHEAPEST candidate whose recent p90 latency
+fits the task's budget and whose failure rate is acceptable. Cost is ordered by
+model (haiku < sonnet < opus = CLI default), then by turns. Until a candidate
+has MIN_SAMPLES calls it is "unproven". The router falls back to the task's
+default (the configuration the Studio always used) and, with probability
+EXPLORE_RATE, tries an unproven candidate instead so the table fills in.
+
+Stats, overrides and a short decision log live in the shared state DB, so all
+workers learn together and the data survives restarts.
+
+Usage from a subsystem:
+    with router.route("slide", reads=has_refs) as r:
+        cmd = ["claude", "-p", "--system-prompt-file", sys_file, *r.args("Read,Glob")]
+        stdout, _ = communicate(proc, input=msg, timeout=90)
+        if not stdout.strip():
+            r.fail("empty output")          # soft failure, no exception
+    # an exception inside the block is recorded as a failure and re-raised
+
+GET /api/routing shows budgets, current decisions and stats. POST /api/routing
+pins a configuration or changes a budget (see app.py).
+"""
+
+import os
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+MIN_SAMPLES = 5        # calls before a candidate's stats are trusted
+MAX_FAIL_RATE = 0.2    # above this a candidate never counts as "within budget"
+WINDOW = 50            # latencies kept per (task, model, max_turns)
+LOG_SIZE = 100         # decisions kept for GET /api/routing
+EXPLORE_RATE = float(os.environ.get("AXKAN_ROUTE_EXPLORE", "0.1"))
+
+MODEL_COST = {"haiku": 0, "sonnet": 1, "opus": 2, "default": 2}
+
+
+@dataclass(frozen=True)
+class Task:
+    budget_s: float             # p90 latency target, seconds
+    models: tuple               # candidate models, "default" = no --model flag
+    turns: tuple                # --max-turns candidates without file reads
+    read_turns: tuple           # --max-turns candidates when the call reads images
+    default: str                # model the Studio used before routing
+
+
+# Creative output (slides, video prompts, character prompts) stays on sonnet or
+# better; quick utility calls may also drop to haiku.
+TASKS = {
+    "chat":         Task(15, ("haiku", "sonnet"), (1,), (2, 3), "haiku"),
+    "analysis":     Task(40, ("haiku", "sonnet", "default"), (1,), (2, 3), "default"),
+    "slide":        Task(45, ("sonnet", "default"), (1,), (3, 2), "default"),
+    "video_prompt": Task(45, ("sonnet", "default"), (1,), (3, 2), "default"),
+    "enhance":      Task(30, ("haiku", "sonnet", "default"), (1,), (2,), "default"),
+    "character":    Task(45, ("sonnet", "default"), (1,), (2,), "default"),
+}
+
+
+def _cost(model: str, turns: int) -> tuple:
+    return (MODEL_COST.get(model, 2), turns)
+
+
+def _p(values: list, q: float) -> float | None:
+    if not values:
+        return None
+    s = sorted(values)
+    return s[min(len(s) - 1, int(q * len(s)))]
+
+
+@dataclass
+class Route:
+    task: str
+    model: str
+    max_turns: int
+    reads: bool
+    reason: str
+    failure: str | None = field(default=None, repr=False)
+
+    def args(self, tools: str | None = None) -> list[str]:
+        """CLI flags for this configuration (tools only apply to read calls)."""
+        a = [] if self.model == "default" else ["--model", self.model]
+        a += ["--max-turns", str(self.max_turns)]
+        if self.reads and tools:
+            a += ["--allowedTools", tools]
+        return a
+
+    def fail(self, why: str) -> None:
+        self.failure = why
+
+
+class Router:
+    def __init__(self, coord):
+        self.coord = coord
+
+    # -- state ---------------------------------------------------------------
+    @staticmethod
+    def _key(task, model, turns) -> str:
+        return f"route:stats:{task}|{model}|{turns}"
+
+    def overrides(self) -> dict:
+        return self.coord.get("route:overrides", {})
+
+    def stats(self, task, model, turns) -> dict:
+        s = self.coord.get(self._key(task, model, turns)) or {"n": 0, "fail": 0, "lat": []}
+        n = s["n"]
+        return {
+            "model": model, "max_turns": turns, "n": n, "failures": s["fail"],
+            "fail_rate": round(s["fail"] / n, 3) if n else None,
+            "p50_s": _p(s["lat"], 0.5), "p90_s": _p(s["lat"], 0.9),
+            "last_error": s.get("last_error"),
+        }
+
+    def _record(self, route: Route, seconds: float, failure: str | None) -> None:
+        def apply(s):
+            s["n"] += 1
+            if failure:
+                s["fail"] += 1
+                s["last_error"] = failure[:200]
+            s["lat"] = (s["lat"] + [round(seconds, 2)])[-WINDOW:]
+            return s
+        self.coord.update(self._key(route.task, route.model, route.max_turns), apply,
+                          default={"n": 0, "fail": 0, "lat": []})
+        entry = {"t": round(time.time()), "task": route.task, "model": route.model,
+                 "max_turns": route.max_turns, "reason": route.reason,
+                 "seconds": round(seconds, 2), "ok": failure is None}
+        self.coord.update("route:log", lambda log: (log + [entry])[-LOG_SIZE:], default=[])
+
+    # -- decisions -----------------------------------------------------------
+    def candidates(self, task: str, reads: bool) -> list[tuple[str, int]]:
+        t = TASKS[task]
+        return [(m, n) for m in t.models for n in (t.read_turns if reads else t.turns)]
+
+    def budget(self, task: str) -> float:
+        return float(self.overrides().get(task, {}).get("budget_s", TASKS[task].budget_s))
+
+    def decide(self, task: str, reads: bool = False, explore: bool = True) -> tuple[str, int, str]:
+        """(model, max_turns, reason) for the next call of `task`."""
+        t = TASKS[task]
+        turn_options = t.read_turns if reads else t.turns
+        pin = self.overrides().get(task, {})
+        if pin.get("model") or pin.get("max_turns"):
+            turns = int(pin.get("max_turns") or turn_options[0])
+            if reads:
+                turns = max(turns, 2)  # a Read needs at least one tool turn
+            return pin.get("model") or t.default, turns, "override"
+
+        budget = self.budget(task)
+        cands = self.candidates(task, reads)
+        stats = {c: self.stats(task, *c) for c in cands}
+        proven = [c for c in cands if stats[c]["n"] >= MIN_SAMPLES]
+        healthy = [c for c in proven
+                   if stats[c]["fail_rate"] <= MAX_FAIL_RATE and stats[c]["p90_s"] is not None]
+        within = [c for c in healthy if stats[c]["p90_s"] <= budget]
+
+        if within:
+            choice = min(within, key=lambda c: _cost(*c))
+            reason = f"cheapest within {budget:g}s (p90 {stats[choice]['p90_s']}s)"
+        elif healthy:
+            choice = min(healthy, key=lambda c: stats[c]["p90_s"])
+            reason = f"none within {budget:g}s — fastest healthy (p90 {stats[choice]['p90_s']}s)"
+        else:
+            choice = (t.default, turn_options[0])
+            reason = "not enough data — default"
+
+        unproven = [c for c in cands if c not in proven and c != choice]
+        if explore and unproven and random.random() < EXPLORE_RATE:
+            return (*random.choice(unproven), f"explore (instead of {choice[0]}/{choice[1]})")
+        return (*choice, reason)
+
+    @contextmanager
+    def route(self, task: str, reads: bool = False):
+        model, turns, reason = self.decide(task, reads)
+        r = Route(task, model, turns, reads, reason)
+        t0 = time.monotonic()
+        try:
+            yield r
+        except BaseException as e:
+            r.fail(r.failure or f"{type(e).__name__}: {e}")
+            raise
+        finally:
+            try:
+                self._record(r, time.monotonic() - t0, r.failure)
+            except Exception as e:  # stats must never break a request
+                print(f"[Routing] could not record {task}: {e}")
+
+    # -- admin ---------------------------------------------------------------
+    def report(self) -> dict:
+        tasks = {}
+        for name in TASKS:
+            tasks[name] = {
+                "budget_s": self.budget(name),
+                "default_model": TASKS[name].default,
+                "override": self.overrides().get(name),
+                "decision": dict(zip(("model", "max_turns", "reason"), self.decide(name, explore=False))),
+                "decision_reads": dict(zip(("model", "max_turns", "reason"), self.decide(name, True, explore=False))),
+                "stats": [self.stats(name, *c) for c in
+                          dict.fromkeys(self.candidates(name, False) + self.candidates(name, True))],
+            }
+        return {"min_samples": MIN_SAMPLES, "max_fail_rate": MAX_FAIL_RATE, "explore_rate": EXPLORE_RATE,
+                "tasks": tasks, "recent": self.coord.get("route:log", [])[-20:]}
+
+    def set_override(self, task: str, **fields) -> dict:
+        """Pin model/max_turns and/or set budget_s for a task. A value of None
+        removes that field; an empty result removes the override."""
+        def apply(o):
+            cur = {**o.get(task, {}), **fields}
+            cur = {k: v for k, v in cur.items() if v is not None}
+            if cur:
+                o[task] = cur
+            else:
+                o.pop(task, None)
+            return o
+        return self.coord.update("route:overrides", apply, default={}).get(task, {})
+
+    def reset(self, task: str) -> None:
+        for c in dict.fromkeys(self.candidates(task, False) + self.candidates(task, True)):
+            self.coord.set(self._key(task, *c), {"n": 0, "fail": 0, "lat": []})
@@ -0,0 +1,89 @@
+"""
+Lazily-loaded Studio subsystems.
+
+app.py only registers the URL rules listed in ROUTES. Each rule points at a
+LazyView, which imports `subsystems.<name>` the first time one of its URLs is
+hit. A cold start therefore imports Flask and core.py, not ~4k lines of
+prompt templates, AppleScript and diagnostics, and never PIL or the Gemini SDK.
+
+To add a route: write the view function in the subsystem module (no
+@app.route decorator) and add a (rule, endpoint, methods) row here.
+`python check_import_budget.py` fails if a row points at a missing function.
+"""
+
+from functools import cached_property
+from importlib import import_module
+
+# subsystem → [(rule, view function name, methods)]
+ROUTES = {
+    "prompts": [
+        ("/api/chat", "chat", ["POST"]),
+        ("/api/prompts/generate", "prompts_generate", ["POST"]),
+        ("/api/video-prompts/generate", "video_prompts_generate", ["POST"]),
+    ],
+    "envato": [
+        ("/tmp-ref/<path:filename>", "serve_tmp_ref", None),
+        ("/api/watchdog/start", "watchdog_start", ["POST"]),
+        ("/api/watchdog/stop", "watchdog_stop", ["POST"]),
+        ("/api/watchdog/status", "watchdog_status", None),
+        ("/api/watchdog/block-tab", "watchdog_block_tab", ["POST"]),
+        ("/api/watchdog/block-all", "watchdog_block_all", ["POST"]),
+        ("/api/envato/send", "envato_send", ["POST"]),
+        ("/api/envato/send-video", "envato_send_video", ["POST"]),
+        ("/api/envato/send-all", "envato_send_all", ["POST"]),
+        ("/api/envato/send-all-video", "envato_send_all_video", ["POST"]),
+        ("/api/envato/bulk-image-to-video", "envato_bulk_image_to_video", ["POST"]),
+        ("/api/character/generate", "character_generate", ["POST"]),
+    ],
+    "gemini": [
+        ("/api/gemini/send", "gemini_send", ["POST"]),
+        ("/api/gemini/send-all", "gemini_send_all", ["POST"]),
+        ("/api/gemini/generate-images", "gemini_generate_images", ["POST"]),
+    ],
+    "overlays": [
+        ("/api/overlays/specs", "overlays_specs", ["POST"]),
+        ("/api/overlays/ai-variation", "overlays_ai_variation", ["POST"]),
+        ("/api/overlays/preview", "overlays_preview", ["POST"]),
+        ("/api/overlays/apply-all", "overlays_apply_all", ["POST"]),
+        ("/api/caption/generate", "caption_generate", ["POST"]),
+    ],
+    "diagnostics": [
+        ("/envato-debug", "envato_debug", None),
+        ("/v2/diag", "serve_diag", None),
+        ("/test", "serve_test_page", None),
+        ("/api/test/inspect-envato", "test_inspect_envato", None),
+        ("/api/test/receive-dump", "test_receive_dump", ["POST", "OPTIONS"]),
+        ("/api/test/get-last-dump", "test_get_last_dump", None),
+        ("/api/test/dump-modal-dom", "test_dump_modal_dom", None),
+        ("/api/test/close-envato-tabs", "test_close_envato_tabs", ["POST"]),
+    ],
+}
+
+
+class LazyView:
+    """View function stand-in that imports its module on first call
+    (the "lazily loading views" pattern from the Flask docs)."""
+
+    def __init__(self, module: str, name: str):
+        self.__module__ = module
+        self.__name__ = name
+        self.import_name = f"{module}.{name}"
+
+    @cached_property
+    def view(self):
+        return getattr(import_module(self.__module__), self.__name__)
+
+    def __call__(self, *args, **kwargs):
+        return self.view(*args, **kwargs)
+
+
+def register(app) -> None:
+    for subsystem, routes in ROUTES.items():
+        for rule, name, methods in routes:
+            app.add_url_rule(rule, endpoint=name, view_func=LazyView(f"{__name__}.{subsystem}", name),
+                             methods=methods)
+
+
+def load(subsystem: str):
+    """Import a subsystem eagerly (e.g. from a background thread)."""
+    return import_module(f"{__name__}.{subsystem}")
@@ -0,0 +1,309 @@
+"""
+Diagnostics subsystem — /test harness, /v2/diag, /envato-debug and the
+/api/test/* DOM-inspection endpoints. Never needed for normal operation, so it
+is only imported when one of these URLs is hit.
+"""
+
+import json
+import subprocess
+from datetime import datetime
+
+from flask import request, jsonify, send_file
+
+from core import BASE_DIR, coord
+
+
+def envato_debug():
+    step = request.args.get("step", "?")
+    status = request.args.get("status", "?")
+    print(f"[ENVATO-DEBUG] step={step} status={status}")
+    return "ok"
+
+
+def serve_diag():
+    """Diagnostic page: tests localStorage persistence across refresh."""
+    return """<!DOCTYPE html><html><head><title>AXKAN Persistence Test</title></head><body>
+<h2>AXKAN Persistence Diagnostic</h2>
+<pre id="out">loading...</pre>
+<script>
+var LS_KEY = 'axkan.studio.state.v2';
+var raw = localStorage.getItem(LS_KEY);
+var el = document.getElementById('out');
+if (!raw) {
+  el.textContent = 'localStorage is EMPTY — no saved state found.\\nKey: ' + LS_KEY;
+} else {
+  try {
+    var d = JSON.parse(raw);
+    el.textContent = JSON.stringify({
+      currentScreen: d.currentScreen,
+      contentType: d.contentType,
+      subType: d.subType,
+      destination: d.destination,
+      theme: d.theme,
+      phase: d.phase,
+      sessionId: d.sessionId,
+      filePaths: (d.filePaths||[]).length,
+      imagePrompts: (d.imagePrompts||[]).length,
+      videoPrompts: (d.videoPrompts||[]).length,
+      generatedPaths: (d.generatedPaths||[]).length,
+      prompts: (d.prompts||[]).length,
+      flowStamp: d.flowStamp,
+      totalKeys: Object.keys(d).length,
+      rawSize: raw.length + ' chars',
+    }, null, 2);
+  } catch(e) {
+    el.textContent = 'PARSE ERROR: ' + e.message + '\\nRaw: ' + raw.substring(0,200);
+  }
+}
+</script></body></html>""", 200, {"Content-Type": "text/html", "Cache-Control": "no-store"}
+
+# ---------------------------------------------------------------------------
+# Test harness endpoints (served at /test)
+# ---------------------------------------------------------------------------
+def serve_test_page():
+    return send_file(str(BASE_DIR / "test_envato.html"))
+
+
+_INSPECT_JS = r"""
+(function(){
+  function size(el){var r=el.getBoundingClientRect();return {w:Math.round(r.width),h:Math.round(r.height)};}
+  var out = {};
+  var p = document.querySelector('textarea') || document.querySelector('[contenteditable=true]') || document.querySelector('[role=textbox]');
+  var val = p ? (p.value || p.textContent || p.innerText || '') : '';
+  out.prompt_chars = val.length;
+  out.prompt_sample = val.substring(0, 100);
+  // File inputs
+  var fis = document.querySelectorAll('input[type=file]');
+  out.file_inputs = {count: fis.length, details: []};
+  for (var i = 0; i < fis.length; i++) {
+    var s = size(fis[i]);
+    out.file_inputs.details.push({files: fis[i].files.length, w: s.w, h: s.h, accept: fis[i].accept || '-'});
+  }
+  // Frame cards
+  out.frames = [];
+  var spans = document.querySelectorAll('span');
+  var seen = {};
+  for (var i = 0; i < spans.length; i++) {
+    var t = spans[i].textContent.trim();
+    if ((t === 'Start Frame' || t === 'End Frame' || t === 'Start Frame(optional)' || t === 'End Frame(optional)') && !seen[t]) {
+      seen[t] = 1;
+      var card = spans[i].closest('div');
+      // Walk up 6 parents max
+      for (var u = 0; u < 6 && card && card.parentElement; u++) {
+        var r = card.getBoundingClientRect();
+        if (r.width > 100 && r.height > 100) break;
+        card = card.parentElement;
+      }
+      var hasThumb = false, thumbSize = '';
+      if (card) {
+        var imgs = card.querySelectorAll('img');
+        for (var j = 0; j < imgs.length; j++) {
+          if (imgs[j].naturalWidth > 50 && imgs[j].naturalHeight > 50) {
+            hasThumb = true;
+            thumbSize = imgs[j].naturalWidth + 'x' + imgs[j].naturalHeight;
+            break;
+          }
+        }
+      }
+      out.frames.push({label: t, has_thumb: hasThumb, thumb_size: thumbSize});
+    }
+  }
+  // Preview images (blob/data URLs, real size)
+  var blobs = document.querySelectorAll('img[src^="blob:"], img[src^="data:"]');
+  var samples = [];
+  var bigCount = 0;
+  for (var i = 0; i < blobs.length; i++) {
+    if (blobs[i].naturalWidth > 100) {
+      bigCount++;
+      if (samples.length < 5) samples.push(blobs[i].naturalWidth + 'x' + blobs[i].naturalHeight + ' ' + blobs[i].src.substring(0, 50));
+    }
+  }
+  out.preview_imgs = {big_count: bigCount, samples: samples};
+  // Visible modal-relevant buttons
+  var texts = ['Upload an image', 'Upload animage', 'Cancel', 'Generate', 'X', '✕', 'Sound', 'Speech'];
+  var buttons = document.querySelectorAll('div, span, button');
+  var seenB = {};
+  var mb = [];
+  for (var i = 0; i < buttons.length; i++) {
+    var t = buttons[i].textContent.trim();
+    if (texts.indexOf(t) >= 0) {
+      var r = buttons[i].getBoundingClientRect();
+      if (r.width > 20 && r.height > 20) {
+        var key = t + '@' + Math.round(r.width) + 'x' + Math.round(r.height);
+        if (!seenB[key]) {
+          seenB[key] = 1;
+          mb.push(t + ' (' + Math.round(r.width) + 'x' + Math.round(r.height) + ')');
+        }
+      }
+    }
+  }
+  out.modal_buttons = mb;
+  return JSON.stringify(out);
+})();
+"""
+
+
+def test_inspect_envato():
+    """Run inspection JS in the active Envato tab and return structured data."""
+    # Build AppleScript that runs our inspection JS on the video-gen or image-gen tab
+    js_escaped = _INSPECT_JS.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+    script = (
+        'tell application "Google Chrome"\n'
+        '  repeat with w in windows\n'
+        '    repeat with t in tabs of w\n'
+        '      set u to URL of t\n'
+        '      if u contains "video-gen" or u contains "image-gen" then\n'
+        f'        set r to (execute t javascript "{js_escaped}")\n'
+        '        return u & "||" & r\n'
+        '      end if\n'
+        '    end repeat\n'
+        '  end repeat\n'
+        '  return ""\n'
+        'end tell\n'
+    )
+    try:
+        proc = subprocess.run(["osascript", "-e", script], capture_output=True, text=True, timeout=10)
+        raw = (proc.stdout or "").strip()
+        if not raw:
+            return jsonify({"success": False, "error": "No Envato tab open"})
+        if "||" not in raw:
+            return jsonify({"success": False, "error": f"Unexpected output: {raw[:200]}"})
+        url, payload = raw.split("||", 1)
+        try:
+            data = json.loads(payload)
+        except json.JSONDecodeError as e:
+            return jsonify({"success": False, "error": f"JS result not JSON: {payload[:200]}"})
+        data["success"] = True
+        data["url"] = url
+        return jsonify(data)
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
+
+
+# Last DOM dump posted from the floating DUMP button in Envato tabs (shared
+# state, so whichever worker gets the GET can serve it)
+_LAST_DUMP_KEY = "last_dom_dump"
+
+
+def test_receive_dump():
+    """Receive a DOM snapshot POSTed from the floating DUMP button in an Envato tab."""
+    if request.method == "OPTIONS":
+        resp = jsonify({"ok": True})
+    else:
+        data = request.get_json(silent=True) or {}
+        received_at = datetime.utcnow().isoformat() + "Z"
+        coord.set(_LAST_DUMP_KEY, {"received_at": received_at, "data": data})
+        print(f"[DumpRecv] {received_at} url={data.get('url','?')} elements={len(data.get('elements',[]))}")
+        resp = jsonify({"ok": True, "count": len(data.get("elements", []))})
+    resp.headers["Access-Control-Allow-Origin"] = "*"
+    resp.headers["Access-Control-Allow-Methods"] = "POST, GET, OPTIONS"
+    resp.headers["Access-Control-Allow-Headers"] = "Content-Type"
+    return resp
+
+
+def test_get_last_dump():
+    dump = coord.get(_LAST_DUMP_KEY) or {}
+    if not dump.get("data"):
+        return jsonify({"success": False, "error": "no dump received yet"})
+    return jsonify({"success": True, "received_at": dump["received_at"], **dump["data"]})
+
+
+def test_dump_modal_dom():
+    """Dump info about clickable elements visible on the page — find X button candidates."""
+    # Keep JS simple — no regex, no complex escaping. Find every visible element with short text.
+    simple_js = (
+        "JSON.stringify((function(){"
+        "var out=[];"
+        "var els=document.querySelectorAll('div,span,button,a,svg,path');"
+        "for(var i=0;i<els.length;i++){"
+        "var e=els[i];"
+        "var r=e.getBoundingClientRect();"
+        "if(r.width<20||r.height<20||r.width>500||r.height>500)continue;"
+        "var tx=(e.textContent||'').trim();"
+        "if(tx.length>40)continue;"
+        "var aria=(e.getAttribute&&e.getAttribute('aria-label'))||'';"
+        "var role=(e.getAttribute&&e.getAttribute('role'))||'';"
+        "var cls=(typeof e.className==='string'?e.className:'')||'';"
+        "if(cls.length>60)cls=cls.substring(0,60);"
+        "out.push({tag:e.tagName,w:Math.round(r.width),h:Math.round(r.height),x:Math.round(r.left),y:Math.round(r.top),text:tx.substring(0,30),aria:aria.substring(0,30),role:role,cls:cls});"
+        "}"
+        "return out.slice(0,300);"
+        "})());"
+    )
+    js_escaped = simple_js.replace('"', '\\"')
+    script = (
+        'tell application "Google Chrome"\n'
+        '  repeat with w in windows\n'
+        '    repeat with t in tabs of w\n'
+        '      set u to URL of t\n'
+        '      if u contains "video-gen" or u contains "image-gen" then\n'
+        f'        return (execute t javascript "{js_escaped}")\n'
+        '      end if\n'
+        '    end repeat\n'
+        '  end repeat\n'
+        '  return ""\n'
+        'end tell\n'
+    )
+    try:
+        proc = subprocess.run(["osascript", "-e", script], capture_output=True, text=True, timeout=10)
+        raw = (proc.stdout or "").strip()
+        if not raw or raw == "missing value":
+            return jsonify({"success": False, "error": "no Envato tab or JS returned nothing"})
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError as e:
+            return jsonify({"success": False, "error": f"bad JSON: {str(e)[:80]}", "raw": raw[:500]})
+        # Filter the noise: keep only candidates likely to be X / Upload / Generate or modal buttons
+        interesting = []
+        upload_els = []
+        x_candidates = []
+        for d in data:
+            tx = d.get("text", "")
+            aria = d.get("aria", "").lower()
+            tag = d.get("tag", "")
+            # Likely upload button
+            if tx == "Upload an image" or tx == "Upload animage":
+                upload_els.append(d)
+            # Likely close/X button
+            if tx in ("X", "x", "×", "✕", "") and ("close" in aria or "cancel" in aria or tag in ("SVG", "PATH")):
+                x_candidates.append(d)
+            # Short text that's not "Generate" — near any upload element
+            if tx and len(tx) <= 5 and tx != "Generate":
+                interesting.append(d)
+        return jsonify({
+            "success": True,
+            "upload_elements": upload_els,
+            "x_candidates": x_candidates,
+            "short_text_elements": interesting[:30],
+            "total_scanned": len(data),
+        })
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
+
+
+def test_close_envato_tabs():
+    script = (
+        'tell application "Google Chrome"\n'
+        '  set closedCount to 0\n'
+        '  repeat with w in windows\n'
+        '    set tabsToClose to {}\n'
+        '    repeat with t in tabs of w\n'
+        '      set u to URL of t\n'
+        '      if u contains "video-gen" or u contains "image-gen" or u contains "labs.envato" then\n'
+        '        set end of tabsToClose to t\n'
+        '      end if\n'
+        '    end repeat\n'
+        '    repeat with t in tabsToClose\n'
+        '      close t\n'
+        '      set closedCount to closedCount + 1\n'
+        '    end repeat\n'
+        '  end repeat\n'
+        '  return closedCount\n'
+        'end tell\n'
+    )
+    try:
+        proc = subprocess.run(["osascript", "-e", script], capture_output=True, text=True, timeout=10)
+        n = int((proc.stdout or "0").strip() or "0")
+        return jsonify({"success": True, "closed": n})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
@@ -0,0 +1,2032 @@
+"""
+Envato automation subsystem — AppleScript → Chrome for Envato ImageGen and
+VideoGen, the queue watchdog, and the character-speaking flow.
+
+Loaded on first request to one of its routes, or by the boot-time watchdog
+thread a few seconds after startup (see app.py).
+"""
+
+import os
+import json
+import uuid
+import shutil
+import base64
+import subprocess
+import time
+import threading
+
+import re
+import tempfile
+
+from flask import request, jsonify, send_from_directory
+
+from core import TMP_REF_DIR, ABORT_FILE, STUDIO_PORT, coord, communicate, session_file
+
+
+# ---------------------------------------------------------------------------
+# ENVATO AUTOMATION (embedded — no external server needed)
+# AppleScript → Chrome for Envato ImageGen and VideoGen.
+# ---------------------------------------------------------------------------
+
+# No-op stubs — the AXKAN: DUMP and AXKAN: ACTIVO floating buttons were removed.
+# Kept as empty strings so existing _osa_js(BLOCKER_JS) / _osa_js(DUMP_BTN_JS) call
+# sites stay valid without needing to be edited out individually.
+DUMP_BTN_JS = ""
+BLOCKER_JS = ""
+
+
+def _inject_blocker_applescript(tab_ref):
+    """No-op — blocker button has been removed."""
+    return ""
+
+
+def sanitize_prompt(text):
+    """Strip non-ASCII and banned words for safe AppleScript clipboard paste."""
+    if not text:
+        return text
+    t = text
+    # Unicode punctuation → ASCII
+    for chars, rep in [
+        ("\u2022\u2023\u25E6\u2043\u2219", "-"),
+        ("\u2013\u2014\u2015", "-"),
+        ("\u2018\u2019\u201A", "'"),
+        ("\u201C\u201D\u201E", '"'),
+    ]:
+        for c in chars:
+            t = t.replace(c, rep)
+    t = t.replace("\u2026", "...").replace("\u00A0", " ").replace("\u00D7", "x")
+    # Accented → ASCII
+    replacements = {
+        "áàâäã": "a", "ÁÀÂÄÃ": "A", "éèêë": "e", "ÉÈÊË": "E",
+        "íìîï": "i", "ÍÌÎÏ": "I", "óòôöõ": "o", "ÓÒÔÖÕ": "O",
+        "úùûü": "u", "ÚÙÛÜ": "U", "ñ": "n", "Ñ": "N", "ç": "c", "Ç": "C",
+    }
+    for chars, rep in replacements.items():
+        for c in chars:
+            t = t.replace(c, rep)
+    # Strip remaining non-ASCII
+    t = re.sub(r"[^\x00-\x7F]", "", t)
+    # Word corrections
+    t = re.sub(r"\baxkan\b", "AXKAN", t, flags=re.IGNORECASE)
+    t = re.sub(r"\bsouvenirs?\b", "suvenirs", t, flags=re.IGNORECASE)
+    # Banned words
+    for word in ["punta", "sexo", "necked"]:
+        t = re.sub(rf"\b{word}\b", "", t, flags=re.IGNORECASE)
+    t = re.sub(r"  +", " ", t).strip()
+    return t
+
+
+def _sanitize_video_prompt(text):
+    """Sanitize for video prompts — preserve accents, fix AXKAN terms."""
+    if not text:
+        return text
+    t = text
+    for chars, rep in [
+        ("\u2022\u2023\u25E6\u2043\u2219", "-"),
+        ("\u2013\u2014\u2015", "-"),
+        ("\u2018\u2019\u201A", "'"),
+        ("\u201C\u201D\u201E", '"'),
+    ]:
+        for c in chars:
+            t = t.replace(c, rep)
+    t = t.replace("\u2026", "...").replace("\u00A0", " ")
+    t = re.sub(r"\biman\b", "imán", t, flags=re.IGNORECASE)
+    t = re.sub(r"\bimanes\b", "imánes", t, flags=re.IGNORECASE)
+    t = re.sub(r"\baxkan\b", "AXKÁN", t, flags=re.IGNORECASE)
+    t = re.sub(r"\bsouvenirs?\b", "suvenirs", t, flags=re.IGNORECASE)
+    for word in ["punta", "sexo", "necked"]:
+        t = re.sub(rf"\b{word}\b", "", t, flags=re.IGNORECASE)
+    t = re.sub(r"  +", " ", t).strip()
+    return t
+
+
+def _resize_image_for_envato(src_path: str, dst_path: str, max_px: int = 1200):
+    """Resize an image so its longest side is max_px. Saves as JPEG for smaller size."""
+    from PIL import Image  # first use only — keeps PIL off the cold-start path
+
+    try:
+        img = Image.open(src_path)
+        if img.mode == "RGBA":
+            img = img.convert("RGB")
+        w, h = img.size
+        if max(w, h) > max_px:
+            ratio = max_px / max(w, h)
+            img = img.resize((int(w * ratio), int(h * ratio)), Image.LANCZOS)
+        img.save(dst_path, "JPEG", quality=85)
+    except Exception as e:
+        print(f"[WARN] Image resize failed: {e}, using original")
+        shutil.copy2(src_path, dst_path)
+
+
+def _write_ref_images(reference_images):
+    """Decode base64 data URLs → write to tmp-ref/, return list of filenames."""
+    # Clean old files
+    for f in os.listdir(str(TMP_REF_DIR)):
+        try:
+            os.unlink(str(TMP_REF_DIR / f))
+        except OSError:
+            pass
+    written = []
+    for i, data_url in enumerate(reference_images[:3]):
+        if not data_url or not data_url.startswith("data:"):
+            continue
+        m = re.match(r"^data:image/([^;]+);base64,(.+)$", data_url, re.DOTALL)
+        if not m:
+            continue
+        ext = "jpg" if m.group(1) == "jpeg" else m.group(1)
+        raw = base64.b64decode(m.group(2))
+        if len(raw) > 20 * 1024 * 1024:
+            continue
+        fname = f"img-{i}.{ext}"
+        (TMP_REF_DIR / fname).write_bytes(raw)
+        written.append(fname)
+    return written
+
+
+def _generate_ref_upload_js(filenames):
+    """Reference-image upload JS for Envato ImageGen (validated 2026-04-21).
+
+    Flow (discovered via live DOM inspection):
+      1. Click <button aria-label="Imágenes de referencia"> to OPEN the dialog
+      2. Wait for <input type="file" accept="image/jpeg,image/png,image/webp">
+      3. Use native HTMLInputElement.prototype.files setter + dispatch 'change'
+         (programmatic fi.files = dt.files is silently ignored by React)
+      4. Wait for the uploaded file to appear as a tile
+         (button[aria-label="Seleccionar imagen como referencia"])
+      5. Click the FIRST tile — most recent upload — to commit as active reference
+      6. Click the same toggle button AGAIN to CLOSE the dialog
+    """
+    urls = [f"http://localhost:{STUDIO_PORT}/tmp-ref/{f}" for f in filenames]
+    urls_json = json.dumps(urls)
+    return f"""
+window.__refUploadDone = false;
+window.__refUploadStatus = 'starting';
+(async function() {{
+  function sleep(ms){{ return new Promise(function(r){{ setTimeout(r, ms); }}); }}
+  function findToggleButton(){{
+    return Array.from(document.querySelectorAll('button')).find(function(b){{
+      return b.getAttribute('aria-label') === 'Imágenes de referencia';
+    }}) || null;
+  }}
+  try {{
+    var urls = {urls_json};
+    if (!urls || urls.length === 0) {{
+      window.__refUploadStatus = 'no_urls';
+      window.__refUploadDone = true;
+      return;
+    }}
+
+    // --- Step 1: Open dialog ---
+    var toggle = findToggleButton();
+    if (!toggle) {{ window.__refUploadStatus = 'no_toggle'; window.__refUploadDone = true; return; }}
+    toggle.click();
+    // Wait for file input to mount
+    var fi = null;
+    for (var i = 0; i < 40; i++) {{
+      await sleep(100);
+      fi = document.querySelector('[role=dialog] input[type=file]');
+      if (fi) break;
+    }}
+    if (!fi) {{ window.__refUploadStatus = 'no_file_input'; window.__refUploadDone = true; return; }}
+
+    // --- Step 2: Fetch images as blobs ---
+    window.__refUploadStatus = 'fetching';
+    var blobs = await Promise.all(urls.map(function(u) {{
+      return fetch(u).then(function(r) {{ return r.ok ? r.blob() : null; }}).catch(function() {{ return null; }});
+    }}));
+    var files = [];
+    blobs.forEach(function(blob, idx) {{
+      if (!blob) return;
+      var ext = (blob.type && blob.type.split('/')[1]) || 'png';
+      if (ext === 'jpeg') ext = 'jpg';
+      files.push(new File([blob], 'axkan-ref-' + idx + '.' + ext, {{ type: blob.type || 'image/png' }}));
+    }});
+    if (files.length === 0) {{
+      window.__refUploadStatus = 'no_blobs';
+      toggle.click();  // close dialog
+      window.__refUploadDone = true;
+      return;
+    }}
+
+    // --- Step 3: Upload via native setter ---
+    window.__refUploadStatus = 'uploading';
+    var dt = new DataTransfer();
+    files.forEach(function(f){{ dt.items.add(f); }});
+    var setter = Object.getOwnPropertyDescriptor(window.HTMLInputElement.prototype, 'files').set;
+    setter.call(fi, dt.files);
+    fi.dispatchEvent(new Event('change', {{ bubbles: true }}));
+
+    // --- Step 4: Wait for Envato to process the upload into a tile ---
+    // Tile count starts at some number (existing "Recientes"); after upload it
+    // grows by files.length. We need the first tile to be our new upload.
+    // Poll until new tile appears and its image src is an envatousercontent URL.
+    await sleep(1500);
+    var tiles = [];
+    for (var j = 0; j < 80; j++) {{
+      await sleep(250);
+      tiles = Array.from(document.querySelectorAll(
+        '[role=dialog] button[aria-label=\"Seleccionar imagen como referencia\"]'
+      ));
+      if (tiles.length > 0) {{
+        var firstImg = tiles[0].querySelector('img');
+        if (firstImg && /envatousercontent|user-uploads/.test(firstImg.src || '')) break;
+      }}
+    }}
+    if (tiles.length === 0) {{
+      window.__refUploadStatus = 'no_tiles_after_upload';
+      toggle.click();
+      window.__refUploadDone = true;
+      return;
+    }}
+
+    // --- Step 5: Click the first N tiles (our uploads) to commit as references ---
+    // Envato allows up to 3 references. Click up to files.length tiles.
+    var toClick = Math.min(files.length, tiles.length, 3);
+    for (var k = 0; k < toClick; k++) {{
+      tiles[k].click();
+      await sleep(250);
+    }}
+
+    // --- Step 6: Close the dialog by toggling the button again ---
+    await sleep(400);
+    var toggleNow = findToggleButton();
+    if (toggleNow) toggleNow.click();
+    await sleep(250);
+
+    window.__refUploadStatus = 'done';
+  }} catch(e) {{
+    window.__refUploadStatus = 'err:' + (e && e.message ? e.message : String(e));
+  }}
+  window.__refUploadDone = true;
+}})();
+"""
+
+
+def run_applescript(script, timeout=30):
+    """Run AppleScript via osascript in background (fire-and-forget)."""
+
+    # Clear stale abort file
+    try:
+        ABORT_FILE.unlink(missing_ok=True)
+    except Exception:
+        pass
+
+    tmp = tempfile.mkdtemp(prefix="envato-")
+    script_file = os.path.join(tmp, "automate.scpt")
+    with open(script_file, "w") as f:
+        f.write(script)
+
+    def _run():
+        try:
+            proc = subprocess.Popen(
+                ["osascript", script_file],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            )
+            communicate(proc, timeout=timeout, kind="osascript")
+        except subprocess.TimeoutExpired:
+            print("[WARN] AppleScript timed out")
+        except Exception as e:
+            print(f"[WARN] AppleScript error: {e}")
+        finally:
+            try:
+                shutil.rmtree(tmp, ignore_errors=True)
+            except Exception:
+                pass
+
+    threading.Thread(target=_run, daemon=True).start()
+
+
+def _build_imagegen_applescript(prompt_file, aspect, ref_js_file=None):
+    """Build AppleScript for a single Envato ImageGen tab — optimized for speed."""
+    ref_section = ""
+    if ref_js_file:
+        # Ref upload polls for up to 30s — dialog mount + Envato CDN upload
+        # + tile render can take 15-25s for multiple images.
+        ref_section = f"""
+  set refJS to do shell script "cat " & quoted form of "{ref_js_file}"
+  execute active tab of front window javascript refJS
+  repeat 300 times
+    set isDone to (execute active tab of front window javascript "window.__refUploadDone ? 'yes' : 'no'")
+    if isDone is "yes" then exit repeat
+    delay 0.1
+  end repeat
+  delay 0.3"""
+
+    # Envato ImageGen (as of 2026-04-21) DOM:
+    #   - Prompt:      <div role="textbox" contenteditable="true">
+    #   - Hidden sync: <input name="prompt"> (React auto-mirrors on execCommand insertText)
+    #   - Upload:      <button aria-label="Imágenes de referencia"> opens a
+    #                  dialog with <input type="file" accept="image/jpeg,image/png,image/webp" multiple>
+    #   - Ref tiles:   <button aria-label="Seleccionar imagen como referencia">
+    #                  — click to commit a recent upload as an active reference.
+    #   - Aspect:      <button role="combobox"> with text "Vertical"/"Horizontal"/"Cuadrado"
+    #   - Generate:    <button> with text "Generar" — two exist in DOM, only the
+    #                  visible one (rect.width > 0) is real.
+    with open(prompt_file, 'r') as _pf:
+        prompt_js = (
+            _pf.read()
+            .replace("\\", "\\\\")
+            .replace("'", "\\'")
+            .replace('"', '\\"')
+            .replace("\n", "\\n")
+            .replace("\r", "")
+        )
+
+    # Path to ref_js_file becomes a shell-read; ref_section handles the whole
+    # image-upload dance if we have reference files to add.
+    return f'''
+tell application "Google Chrome"
+  activate
+  tell front window to make new tab with properties {{URL:"https://app.envato.com/image-gen"}}
+  -- Page load poll
+  repeat 40 times
+    if not (loading of active tab of front window) then exit repeat
+    delay 0.15
+  end repeat
+  -- Poll for the real prompt contenteditable (role=textbox)
+  repeat 40 times
+    if (execute active tab of front window javascript "document.querySelector('[contenteditable=\\"true\\"][role=\\"textbox\\"]')?'1':'0'") is "1" then exit repeat
+    delay 0.15
+  end repeat
+  -- Inject AXKAN blocker + dump buttons
+  execute active tab of front window javascript "{BLOCKER_JS}"
+  execute active tab of front window javascript "{DUMP_BTN_JS}"
+  delay 0.3
+{ref_section}
+  -- Insert prompt AFTER references are committed. Earlier we inserted the
+  -- prompt before the ref flow, but Envato's ref-dialog open/close cycle
+  -- resets focus on the contenteditable and wipes our pre-inserted text.
+  -- Inserting last guarantees the prompt is the final input before Generate.
+  execute active tab of front window javascript "(function(){{var el=document.querySelector('[contenteditable=\\"true\\"][role=\\"textbox\\"]');if(!el){{window.__axkanInserted='no_el';return;}}el.focus();el.click();var sel=window.getSelection();sel.removeAllRanges();var range=document.createRange();range.selectNodeContents(el);sel.addRange(range);document.execCommand('delete',false);document.execCommand('insertText',false,'{prompt_js}');el.dispatchEvent(new InputEvent('input',{{bubbles:true,inputType:'insertText'}}));window.__axkanInserted='ok';}})();"
+  -- Wait for hidden mirror to sync
+  repeat 20 times
+    if (execute active tab of front window javascript "(document.querySelector('input[name=\\"prompt\\"]')||{{}}).value?'1':'0'") is "1" then exit repeat
+    delay 0.1
+  end repeat
+  delay 0.3
+  -- Set aspect ratio via combobox
+  execute active tab of front window javascript "
+    (function(){{
+      var map={{'square':'Cuadrado','portrait':'Vertical','landscape':'Horizontal'}};
+      var target=map['{aspect}'.toLowerCase()]||'Vertical';
+      var boxes=Array.from(document.querySelectorAll('[role=combobox]'));
+      var aspectBox=null;
+      for(var i=0;i<boxes.length;i++){{
+        var t=(boxes[i].textContent||'').trim();
+        if(t==='Vertical'||t==='Horizontal'||t==='Cuadrado'){{aspectBox=boxes[i];break;}}
+      }}
+      if(!aspectBox||aspectBox.textContent.trim()===target) return;
+      aspectBox.click();
+      setTimeout(function(){{
+        var btns=Array.from(document.querySelectorAll('button'));
+        for(var j=0;j<btns.length;j++){{
+          if((btns[j].textContent||'').trim()===target){{btns[j].click();return;}}
+        }}
+      }},200);
+    }})();
+  "
+  delay 0.6
+  -- Click Generate. Filter to VISIBLE button only — two exist in the DOM,
+  -- one is a phantom at 0x0. Retry up to 10s while disabled.
+  execute active tab of front window javascript "
+    (function(){{
+      var attempts=0;
+      var tryClick=function(){{
+        var btns=Array.from(document.querySelectorAll('button'));
+        for(var i=0;i<btns.length;i++){{
+          var t=(btns[i].textContent||'').trim();
+          if(t==='Generar'||t==='Generate'){{
+            var r=btns[i].getBoundingClientRect();
+            if(r.width>0 && r.height>0 && !btns[i].disabled){{
+              btns[i].click();
+              window.__axkanGenerated='ok';
+              return;
+            }}
+          }}
+        }}
+        attempts++;
+        if(attempts<40) setTimeout(tryClick,250);
+        else window.__axkanGenerated='timeout';
+      }};
+      tryClick();
+    }})();
+  "
+end tell
+return "done"
+'''
+
+
+# ---------------------------------------------------------------------------
+# Serve tmp-ref files and debug endpoint
+# ---------------------------------------------------------------------------
+def serve_tmp_ref(filename):
+    resp = send_from_directory(str(TMP_REF_DIR), filename)
+    resp.headers["Access-Control-Allow-Origin"] = "*"
+    return resp
+
+
+# ---------------------------------------------------------------------------
+# Envato Queue Watchdog — auto-retry failed video generations
+# Every worker runs a watchdog thread, but only the one holding the "watchdog"
+# lease scans; the rest stand by and take over if that worker dies. On/off is
+# the shared "watchdog_enabled" flag, so start/stop work from any worker.
+# ---------------------------------------------------------------------------
+WATCHDOG_LEASE_TTL = 30  # seconds; the holder renews it every scan (~10s)
+_watchdog_running = False  # True while THIS worker holds the lease and scans
+_watchdog_thread = None
+
+
+def _watchdog_enabled() -> bool:
+    return coord.get("watchdog_enabled", True)
+
+
+def start_watchdog():
+    global _watchdog_thread
+    if _watchdog_thread is None or not _watchdog_thread.is_alive():
+        _watchdog_thread = threading.Thread(target=_envato_watchdog_loop, name="axkan-watchdog", daemon=True)
+        _watchdog_thread.start()
+
+
+def _envato_watchdog_loop():
+    """Background thread: scans all Envato video-gen tabs for 'Queue Full' screen
+    and auto-clicks 'Try Again' + 'Generate' without stealing focus."""
+    global _watchdog_running
+
+    js_check_and_retry = """
+(function(){
+  // Skip blocked tabs (flag is set programmatically via /api/watchdog/block-tab)
+  if (window.__axkanBlocked) return 'BLOCKED';
+  var results = [];
+  // Check if this is a Queue Full page
+  var h1s = document.querySelectorAll('h1, h2, h3');
+  var isQueueFull = false;
+  for (var i = 0; i < h1s.length; i++) {
+    if (h1s[i].textContent.includes('Queue Full') || h1s[i].textContent.includes('Cola llena')) {
+      isQueueFull = true; break;
+    }
+  }
+  if (isQueueFull) {
+    // Click "Try Again" button
+    var btns = document.querySelectorAll('button, a');
+    for (var j = 0; j < btns.length; j++) {
+      var t = btns[j].textContent.trim().toLowerCase();
+      if (t === 'try again' || t === 'intentar de nuevo' || t === 'reintentar') {
+        btns[j].click();
+        return 'RETRY_CLICKED';
+      }
+    }
+    return 'QUEUE_FULL_NO_BUTTON';
+  }
+  // Check if Generate button exists and is enabled (page reloaded after Try Again)
+  var genBtns = document.querySelectorAll('button');
+  for (var k = 0; k < genBtns.length; k++) {
+    var gt = genBtns[k].textContent.trim().toLowerCase();
+    if ((gt === 'generate' || gt === 'generar' || gt.includes('generate')) && !genBtns[k].disabled) {
+      // Check if there's a prompt in the textarea
+      var ta = document.querySelector('textarea');
+      if (ta && ta.value.length > 20) {
+        genBtns[k].click();
+        return 'GENERATE_CLICKED';
+      }
+    }
+  }
+  return 'OK';
+})();
+"""
+
+    while True:
+        if not _watchdog_enabled() or not coord.acquire("watchdog", WATCHDOG_LEASE_TTL):
+            if _watchdog_running:
+                coord.release("watchdog")
+                _watchdog_running = False
+                print("[Watchdog] Stopped")
+            time.sleep(1 if not _watchdog_enabled() else 5)
+            continue
+        if not _watchdog_running:
+            _watchdog_running = True
+            print(f"[Watchdog] Started in worker {os.getpid()} — monitoring Envato tabs for queue errors...")
+
+        try:
+            # Get all video-gen tabs via AppleScript (no focus steal)
+            script = '''
+tell application "Google Chrome"
+  set results to {}
+  repeat with w in windows
+    set tabCount to count of tabs of w
+    repeat with i from 1 to tabCount
+      set u to URL of tab i of w
+      if u contains "video-gen" then
+        try
+          set r to (execute tab i of w javascript "''' + js_check_and_retry.replace('"', '\\"').replace('\n', '\\n') + '''")
+          set end of results to ("tab" & i & ":" & r)
+        end try
+      end if
+    end repeat
+  end repeat
+  return results as text
+end tell
+'''
+            proc = subprocess.run(
+                ["osascript", "-e", script],
+                capture_output=True, text=True, timeout=10,
+            )
+            output = proc.stdout.strip()
+            if "RETRY_CLICKED" in output:
+                print(f"[Watchdog] Queue Full detected — clicked Try Again")
+            if "GENERATE_CLICKED" in output:
+                print(f"[Watchdog] Re-submitted generation after retry")
+        except Exception as e:
+            pass  # Silent fail — don't spam logs
+
+        # Check every 10 seconds
+        for _ in range(10):
+            if not _watchdog_enabled():
+                break
+            time.sleep(1)
+
+
+def watchdog_start():
+    start_watchdog()
+    if _watchdog_enabled() and coord.holder("watchdog"):
+        return jsonify({"success": True, "message": "Already running"})
+    coord.set("watchdog_enabled", True)
+    return jsonify({"success": True, "message": "Watchdog started"})
+
+
+def watchdog_stop():
+    coord.set("watchdog_enabled", False)
+    return jsonify({"success": True, "message": "Watchdog stopping..."})
+
+
+def watchdog_status():
+    owner = coord.holder("watchdog")
+    return jsonify({"running": bool(owner) and _watchdog_enabled(), "worker": owner})
+
+
+def watchdog_block_tab():
+    """Block the current active Envato tab from watchdog automation."""
+    data = request.get_json() or {}
+    tab_index = data.get("tab_index")  # optional specific tab
+    action = data.get("action", "block")  # "block" or "unblock"
+    flag_value = "true" if action == "block" else "false"
+
+    script = f'''
+tell application "Google Chrome"
+  set w to front window
+  {"set targetTab to tab " + str(tab_index) + " of w" if tab_index else "set targetTab to active tab of w"}
+  set u to URL of targetTab
+  if u contains "envato" or u contains "video-gen" or u contains "image-gen" then
+    execute targetTab javascript "window.__axkanBlocked = {flag_value}; '{action}ed'"
+    return "{action}ed: " & u
+  else
+    return "not an Envato tab"
+  end if
+end tell
+'''
+    try:
+        proc = subprocess.run(["osascript", "-e", script], capture_output=True, text=True, timeout=5)
+        result = proc.stdout.strip()
+        print(f"[Watchdog] Tab {action}: {result}")
+        return jsonify({"success": True, "result": result})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
+
+
+def watchdog_block_all():
+    """Block/unblock ALL Envato tabs."""
+    data = request.get_json() or {}
+    action = data.get("action", "block")
+    flag_value = "true" if action == "block" else "false"
+
+    script = f'''
+tell application "Google Chrome"
+  set count to 0
+  repeat with w in windows
+    repeat with i from 1 to (count of tabs of w)
+      set u to URL of tab i of w
+      if u contains "envato" or u contains "video-gen" or u contains "image-gen" then
+        execute tab i of w javascript "window.__axkanBlocked = {flag_value};"
+        set count to count + 1
+      end if
+    end repeat
+  end repeat
+  return count & " tabs {action}ed"
+end tell
+'''
+    try:
+        proc = subprocess.run(["osascript", "-e", script], capture_output=True, text=True, timeout=10)
+        result = proc.stdout.strip()
+        print(f"[Watchdog] All tabs {action}: {result}")
+        return jsonify({"success": True, "result": result})
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)})
+
+
+# ---------------------------------------------------------------------------
+# 2. POST /api/envato/send  (single image prompt → Envato ImageGen)
+# ---------------------------------------------------------------------------
+def envato_send():
+    data = request.get_json() or {}
+    prompt = data.get("prompt", "")
+    if not prompt:
+        return jsonify({"error": "No prompt provided"}), 400
+
+    aspect_ratio = data.get("aspectRatio", "1:1")
+    reference_images = data.get("referenceImages", [])
+
+    # Write ref images to the tmp-ref/ server directory and build public URLs
+    # the in-tab JS will fetch. Unique per-send filenames prevent parallel
+    # sends from clobbering each other.
+    ref_urls = []
+    if reference_images:
+        # Use a unique prefix per send so parallel calls don't overwrite each
+        # other's tmp-ref/ files. _write_ref_images currently wipes the dir;
+        # we instead write our own unique files for this send only.
+        send_id = uuid.uuid4().hex[:8]
+        for i, data_url in enumerate(reference_images[:3]):
+            if not data_url:
+                continue
+            # If the frontend accidentally sends a server path instead of a
+            # data URL, resolve it to the on-disk file so refs aren't silently
+            # dropped.
+            if not data_url.startswith("data:"):
+                if data_url.startswith("/sessions/"):
+                    local_path = session_file(data_url)
+                    if local_path.is_file():
+                        fname = f"ig-{send_id}-{i}{local_path.suffix}"
+                        shutil.copy2(str(local_path), str(TMP_REF_DIR / fname))
+                        ref_urls.append(f"http://localhost:{STUDIO_PORT}/tmp-ref/{fname}")
+                        print(f"[Envato ImageGen] ref {i}: resolved server path → {fname}")
+                    else:
+                        print(f"[Envato ImageGen] ref {i}: server path not found: {local_path}")
+                else:
+                    print(f"[Envato ImageGen] ref {i}: skipped non-data-url: {data_url[:80]}")
+                continue
+            m = re.match(r"^data:image/([^;]+);base64,(.+)$", data_url, re.DOTALL)
+            if not m:
+                continue
+            ext = "jpg" if m.group(1) == "jpeg" else m.group(1)
+            raw = base64.b64decode(m.group(2))
+            if len(raw) > 20 * 1024 * 1024:
+                continue
+            fname = f"ig-{send_id}-{i}.{ext}"
+            (TMP_REF_DIR / fname).write_bytes(raw)
+            ref_urls.append(f"http://localhost:{STUDIO_PORT}/tmp-ref/{fname}")
+
+    sanitized_prompt = sanitize_prompt(prompt)
+    print(f"[Envato ImageGen] send: prompt={len(sanitized_prompt)} chars, aspect={aspect_ratio}, refs={len(ref_urls)}")
+
+    # Run in a daemon thread — each call gets its own (window_id, tab_id) via
+    # _osa_open_tab so parallel sends run cleanly on separate tabs.
+    threading.Thread(
+        target=_run_envato_imagegen_v2,
+        args=(sanitized_prompt, ref_urls, aspect_ratio),
+        daemon=True,
+    ).start()
+
+    return jsonify({"success": True, "message": "Sending to Envato ImageGen..."})
+
+
+# ---------------------------------------------------------------------------
+# Envato VideoGen v2 — step-by-step Python orchestrator.
+#
+# Why this exists: the earlier version embedded the entire multi-step UI sequence in a
+# single `tell application "Google Chrome" ... end tell` block. In that mode,
+# Chrome's `execute javascript` (which dispatches through the remote AppleEvent bridge)
+# doesn't reliably await async functions — the upload JS returned 'no_input' because its
+# querySelector ran against a DOM snapshot taken before React had populated the file input.
+# A standalone bash v6 test that spawns one `osascript -e '...'` per step worked end-to-end,
+# so this helper reproduces that pattern: each step is its own osascript subprocess with
+# Python sleeps between them. Slower per step (~300ms spawn overhead) but observable and
+# correct.
+# ---------------------------------------------------------------------------
+
+_ENVATO_VIDEOGEN_URL = "https://app.envato.com/video-gen"
+_ENVATO_IMAGEGEN_URL = "https://app.envato.com/image-gen"
+
+# Fast-path ref upload: simulate a drop event on the textarea container
+# instead of opening the "Imágenes de referencia" dialog and waiting ~60s for
+# Envato to render a tile thumbnail. The textarea container has ondrop /
+# ondragover handlers wired up by Envato's React app — we can hand them a
+# DataTransfer with our File and they accept it directly. Disabled by default
+# until validated end-to-end; flip to True after verifying the generated
+# output actually used the dropped reference. Falls back to the dialog flow
+# if the drop returns no thumbnail in the prompt bar.
+_FAST_REF_UPLOAD = True
+
+
+def _osa_js(js_source: str, tab_ref: tuple | None = None, timeout: float = 8.0) -> str:
+    """Run a snippet of JS in an Envato video-gen tab via a fresh osascript subprocess.
+
+    Returns the string the JS evaluated to (AppleScript's `execute javascript`
+    stringifies the return value). Empty string on not-found / error so callers
+    can treat every outcome as a plain string comparison.
+
+    If tab_ref is a (window_id, tab_id) tuple, target that specific tab (via Chrome's
+    stable id properties). This lets parallel/sequential bulk jobs each operate on
+    their own tab without clashing. If tab_ref is None, fall back to the first tab
+    matching _ENVATO_VIDEOGEN_URL.
+    """
+    # Escape backslashes first, then double quotes for the AppleScript string literal.
+    js_escaped = js_source.replace("\\", "\\\\").replace('"', '\\"')
+    if tab_ref is not None:
+        window_id, tab_id = tab_ref
+        # NB: AppleScript parses large numeric literals like 1783885217 as real numbers,
+        # so `id of t is 1783885217` never matches an integer id. Coerce both sides with
+        # `as integer` (which handles both the stored real and the literal) to compare
+        # numerically. `=` works fine once types match.
+        applescript = (
+            'tell application "Google Chrome"\n'
+            "  repeat with w in windows\n"
+            f'    if (id of w as integer) = ({window_id} as integer) then\n'
+            "      repeat with t in tabs of w\n"
+            f'        if (id of t as integer) = ({tab_id} as integer) then\n'
+            f'          return (execute t javascript "{js_escaped}")\n'
+            "        end if\n"
+            "      end repeat\n"
+            "    end if\n"
+            "  end repeat\n"
+            '  return "NO_TAB"\n'
+            "end tell\n"
+        )
+    else:
+        applescript = (
+            'tell application "Google Chrome"\n'
+            "  repeat with w in windows\n"
+            "    repeat with t in tabs of w\n"
+            f'      if URL of t is "{_ENVATO_VIDEOGEN_URL}" then\n'
+            f'        return (execute t javascript "{js_escaped}")\n'
+            "      end if\n"
+            "    end repeat\n"
+            "  end repeat\n"
+            '  return "NO_TAB"\n'
+            "end tell\n"
+        )
+    try:
+        proc = subprocess.run(
+            ["osascript", "-e", applescript],
+            capture_output=True,
+            text=True,
+            timeout=timeout,
+        )
+        return (proc.stdout or "").strip()
+    except subprocess.TimeoutExpired:
+        return ""
+    except Exception as e:
+        print(f"[Envato V2] osa_js error: {e}")
+        return ""
+
+
+def _osa_open_tab(url: str = None) -> tuple | None:
+    """Open a fresh Envato tab and return its (window_id, tab_id) reference.
+
+    Chrome's id properties on windows and tabs are stable for the lifetime of that
+    tab — we bind subsequent _osa_js calls to this pair so each bulk job is
+    isolated to its own tab. Parallel sends cannot trip over each other because
+    each has its own tab id.
+    """
+    target_url = url or _ENVATO_VIDEOGEN_URL
+    applescript = (
+        'tell application "Google Chrome"\n'
+        "  activate\n"
+        f'  set newTab to make new tab at end of tabs of front window with properties {{URL:"{target_url}"}}\n'
+        '  return (id of front window as text) & "," & (id of newTab as text)\n'
+        "end tell\n"
+    )
+    try:
+        proc = subprocess.run(
+            ["osascript", "-e", applescript],
+            capture_output=True,
+            text=True,
+            timeout=6,
+        )
+        out = (proc.stdout or "").strip()
+        if "," in out:
+            window_id, tab_id = out.split(",", 1)
+            return (int(window_id), int(tab_id))
+    except Exception as e:
+        print(f"[Envato] open_tab error: {e}")
+    return None
+
+
+def _poll_until(condition_js: str, expected: str, max_polls: int, interval: float = 0.3,
+                on_retry_interval: int = 0, retry_js: str = "",
+                tab_ref: tuple | None = None) -> bool:
+    """Poll condition_js until its result equals `expected` (string compare), up to max_polls.
+
+    If on_retry_interval > 0 and retry_js is set, also runs retry_js every N polls.
+    Returns True on success, False on timeout. Each poll runs in its own osascript.
+    """
+    for i in range(1, max_polls + 1):
+        r = _osa_js(condition_js, tab_ref=tab_ref)
+        if r == expected:
+            return True
+        if on_retry_interval and retry_js and i % on_retry_interval == 0:
+            _osa_js(retry_js, tab_ref=tab_ref)
+        time.sleep(interval)
+    return False
+
+
+def _run_envato_videogen_v2(prompt_text: str, ref_url: str, is_loop: bool, end_ref_url: str = "") -> None:
+    """Orchestrate the new Envato video-gen flow step-by-step.
+
+    Sequence (validated by test harness):
+      1. Open fresh tab, wait for the contenteditable prompt div.
+      2. PHASE 1 — images: click Fotograma inicial, wait file input, upload; then End
+         Frame same way if loop (with retry-click at poll 10 / 20, that UI state
+         needs a nudge when React hasn't fully re-rendered after start-frame thumb).
+      3. PHASE 2 — prompt: execCommand('insertText') into the contenteditable so React
+         syncs the hidden form input.
+      4. PHASE 3 — audio: open the audio combobox, click the 'Con audio' option. The
+         audio listbox coexists with the aspect one, so match by option text.
+      5. PHASE 4 — generar: wait for button enabled, click it.
+    """
+    start_time = time.time()
+
+    def log(msg: str) -> None:
+        print(f"[Envato V2 +{int((time.time()-start_time)*1000)}ms] {msg}")
+
+    # ---- Step 1: open tab + wait page ready ----
+    log("open tab")
+    tab_ref = _osa_open_tab()
+    if tab_ref is None:
+        log("failed to open tab — aborting")
+        return
+    log(f"tab_ref={tab_ref}")
+
+    if not _poll_until(
+        condition_js="document.querySelector('[role=textbox][contenteditable=true]')?'y':'n'",
+        expected="y",
+        max_polls=30,
+        interval=0.2,
+        tab_ref=tab_ref,
+    ):
+        log("page never became ready — aborting")
+        return
+    log("page ready")
+
+    # Inject debug UI overlays
+    _osa_js(BLOCKER_JS, tab_ref=tab_ref)
+    _osa_js(DUMP_BTN_JS, tab_ref=tab_ref)
+
+    # ---- Step 2a: Start Frame (if image provided) ----
+    if ref_url:
+        log("click Fotograma inicial")
+        _osa_js(
+            "(function(){var b=document.querySelectorAll('button');"
+            "for(var i=0;i<b.length;i++)if(b[i].textContent.trim()==='Fotograma inicial'){b[i].click();return 'clicked';}"
+            "return 'nf';})();",
+            tab_ref=tab_ref,
+        )
+
+        # Let the dialog mount fully (not just poll for file input; Envato wires onChange slightly later)
+        time.sleep(2)
+
+        if not _poll_until(
+            condition_js="document.querySelector('input[type=file]')?'y':'n'",
+            expected="y",
+            max_polls=15,
+            interval=0.2,
+            tab_ref=tab_ref,
+        ):
+            log("start-frame file input never appeared — aborting")
+            return
+
+        log("upload start frame")
+        upload_js = (
+            "(async function(){try{"
+            f"var resp=await fetch('{ref_url}');"
+            "var blob=await resp.blob();"
+            "var file=new File([blob],'start.jpg',{type:'image/jpeg'});"
+            "var dt=new DataTransfer();dt.items.add(file);"
+            "var fis=document.querySelectorAll('input[type=file]');"
+            "if(!fis.length){window.__axkanUpload='no_input';return;}"
+            "var fi=fis[fis.length-1];"
+            "var s=Object.getOwnPropertyDescriptor(window.HTMLInputElement.prototype,'files').set;"
+            "s.call(fi,dt.files);"
+            "fi.dispatchEvent(new Event('change',{bubbles:true}));"
+            "window.__axkanUpload='ok';"
+            "}catch(e){window.__axkanUpload='err:'+e.message;}})();"
+            "window.__axkanUpload='pending';"
+        )
+        _osa_js(upload_js, tab_ref=tab_ref)
+
+        # Wait for the flag the async function sets on window
+        if not _poll_until(
+            condition_js="window.__axkanUpload||'pending'",
+            expected="ok",
+            max_polls=15,
+            interval=0.3,
+            tab_ref=tab_ref,
+        ):
+            # Capture status for debugging
+            status = _osa_js("window.__axkanUpload||'pending'", tab_ref=tab_ref)
+            log(f"start-frame upload flag: {status!r} — continuing anyway")
+
+        # Wait for dialog to close and thumb blob to appear
+        _poll_until(
+            condition_js=(
+                "(function(){var d=document.querySelector('[role=dialog]');"
+                "var b=document.querySelectorAll('img[src^=\"blob:\"]');"
+                "var n=0;for(var i=0;i<b.length;i++)if(b[i].naturalWidth>100)n++;"
+                "return (!d && n>=1)?'y':'n';})();"
+            ),
+            expected="y",
+            max_polls=30,
+            interval=0.3,
+            tab_ref=tab_ref,
+        )
+        log("start frame done")
+
+        # ---- Step 2b: End Frame (loop mode) ----
+        if is_loop:
+            # Envato disables the "Fotograma final" button until the start frame
+            # is fully processed.  Wait for it to become enabled before clicking.
+            log("wait for Fotograma final button to be enabled")
+            btn_enabled = _poll_until(
+                condition_js=(
+                    "(function(){var b=document.querySelectorAll('button');"
+                    "for(var i=0;i<b.length;i++)if(b[i].textContent.trim()==='Fotograma final')"
+                    "{return b[i].disabled?'disabled':'enabled';}"
+                    "return 'nf';})();"
+                ),
+                expected="enabled",
+                max_polls=40,
+                interval=0.5,
+                tab_ref=tab_ref,
+            )
+            if not btn_enabled:
+                log("Fotograma final button never enabled — skipping end frame")
+            else:
+                log("click Fotograma final")
+                click_final_js = (
+                    "(function(){var b=document.querySelectorAll('button');"
+                    "for(var i=0;i<b.length;i++)if(b[i].textContent.trim()==='Fotograma final'"
+                    " && !b[i].disabled){b[i].click();return 'clicked';}"
+                    "return 'nf';})();"
+                )
+                _osa_js(click_final_js, tab_ref=tab_ref)
+
+                # Wait for the dialog with title "Fotograma Final" AND a file input.
+                # Retry the click every 10 polls in case React swallowed the first one.
+                end_dialog_ready = _poll_until(
+                    condition_js=(
+                        "(function(){var d=document.querySelector('[role=dialog]');"
+                        "if(!d)return 'no';var fi=d.querySelector('input[type=file]');"
+                        "return (d.textContent||'').indexOf('Fotograma Final')>=0 && fi ? 'y':'n';})();"
+                    ),
+                    expected="y",
+                    max_polls=30,
+                    interval=0.3,
+                    on_retry_interval=10,
+                    retry_js=click_final_js,
+                    tab_ref=tab_ref,
+                )
+
+                if end_dialog_ready:
+                    # Settle before firing upload (same reason as start frame)
+                    time.sleep(1)
+
+                    log("upload end frame")
+                    end_frame_src = end_ref_url if end_ref_url else ref_url
+                    end_upload_js = (
+                        "(async function(){try{"
+                        f"var resp=await fetch('{end_frame_src}');"
+                        "var blob=await resp.blob();"
+                        "var file=new File([blob],'end.jpg',{type:'image/jpeg'});"
+                        "var dt=new DataTransfer();dt.items.add(file);"
+                        "var fis=document.querySelectorAll('input[type=file]');"
+                        "if(!fis.length){window.__axkanUpload='no_input';return;}"
+                        "var fi=fis[fis.length-1];"
+                        "var s=Object.getOwnPropertyDescriptor(window.HTMLInputElement.prototype,'files').set;"
+                        "s.call(fi,dt.files);"
+                        "fi.dispatchEvent(new Event('change',{bubbles:true}));"
+                        "window.__axkanUpload='ok';"
+                        "}catch(e){window.__axkanUpload='err:'+e.message;}})();"
+                        "window.__axkanUpload='pending';"
+                    )
+                    _osa_js(end_upload_js, tab_ref=tab_ref)
+
+                    _poll_until(
+                        condition_js="window.__axkanUpload||'pending'",
+                        expected="ok",
+                        max_polls=15,
+                        interval=0.3,
+                        tab_ref=tab_ref,
+                    )
+                    # Wait for 2 blob thumbs (both frames)
+                    _poll_until(
+                        condition_js=(
+                            "(function(){var b=document.querySelectorAll('img[src^=\"blob:\"]');"
+                            "var n=0;for(var i=0;i<b.length;i++)if(b[i].naturalWidth>100)n++;"
+                            "return n>=2?'y':'n';})();"
+                        ),
+                        expected="y",
+                        max_polls=30,
+                        interval=0.3,
+                        tab_ref=tab_ref,
+                    )
+                    log("end frame done")
+                else:
+                    log("end-frame dialog never opened — skipping end frame")
+
+    # ---- Step 3: Prompt ----
+    log("paste prompt")
+    prompt_b64 = base64.b64encode(prompt_text.encode("utf-8")).decode()
+    _osa_js(
+        "(function(){var p=document.querySelector('[role=textbox][contenteditable=true]');"
+        "if(!p)return 'no';p.focus();"
+        f"var t=new TextDecoder().decode(Uint8Array.from(atob('{prompt_b64}'),function(c){{return c.charCodeAt(0);}}));"
+        "document.execCommand('insertText',false,t);return 'ok';})();",
+        tab_ref=tab_ref,
+    )
+    time.sleep(0.3)
+
+    # ---- Step 4: Audio — ensure 'Con audio' ----
+    log("set audio = Con audio")
+    _osa_js(
+        "(function(){var cbs=document.querySelectorAll('button[role=combobox]');"
+        "for(var i=0;i<cbs.length;i++){var t=cbs[i].textContent.trim();"
+        "if(t==='Sin audio'){cbs[i].click();return 'opened';}"
+        "if(t==='Con audio')return 'already';}return 'nf';})();",
+        tab_ref=tab_ref,
+    )
+    # Wait for audio listbox's 'Con audio' option to exist, then click it
+    _poll_until(
+        condition_js=(
+            "(function(){var lbs=document.querySelectorAll('[role=listbox]');"
+            "for(var i=0;i<lbs.length;i++){var o=lbs[i].querySelectorAll('button');"
+            "for(var j=0;j<o.length;j++)if(o[j].textContent.trim()==='Con audio')return 'y';}"
+            "return 'n';})();"
+        ),
+        expected="y",
+        max_polls=10,
+        interval=0.15,
+        tab_ref=tab_ref,
+    )
+    _osa_js(
+        "(function(){var lbs=document.querySelectorAll('[role=listbox]');"
+        "for(var i=0;i<lbs.length;i++){var o=lbs[i].querySelectorAll('button');"
+        "for(var j=0;j<o.length;j++)if(o[j].textContent.trim()==='Con audio'){o[j].click();return 'ok';}}"
+        "return 'nf';})();",
+        tab_ref=tab_ref,
+    )
+    time.sleep(0.3)
+
+    # ---- Step 5: Generar ----
+    log("wait for Generar to be enabled")
+    if _poll_until(
+        condition_js=(
+            "(function(){var b=document.querySelectorAll('button');"
+            "for(var i=0;i<b.length;i++)if(b[i].textContent.trim()==='Generar')"
+            "return b[i].disabled?'n':'y';return 'nf';})();"
+        ),
+        expected="y",
+        max_polls=20,
+        interval=0.2,
+        tab_ref=tab_ref,
+    ):
+        log("click Generar")
+        _osa_js(
+            "(function(){var b=document.querySelectorAll('button');"
+            "for(var i=0;i<b.length;i++)if(b[i].textContent.trim()==='Generar'){b[i].click();return 'clicked';}"
+            "return 'nf';})();",
+            tab_ref=tab_ref,
+        )
+    else:
+        log("Generar never became enabled — leaving tab for user")
+
+    log("DONE")
+
+
+# ---------------------------------------------------------------------------
+# Envato ImageGen v2 — step-by-step Python orchestrator.
+#
+# Mirrors _run_envato_videogen_v2. Each step is its own osascript subprocess
+# bound to a specific (window_id, tab_id), so parallel sends cannot trip over
+# each other via Chrome's global "active tab of front window".
+#
+# Validated flow (2026-04-22):
+#   1. Open tab, wait for [contenteditable=true][role=textbox] to mount.
+#   2. If reference images: click "Imágenes de referencia" toggle, wait for
+#      [role=dialog] input[type=file], upload via native setter, wait for
+#      tile with envatousercontent URL, click first tile(s) to commit,
+#      click toggle again to close dialog.
+#   3. Insert prompt via execCommand('insertText') — MUST be after refs.
+#      Dialog open/close blurs the contenteditable and wipes pre-inserted text.
+#   4. Set aspect ratio via combobox → option button.
+#   5. Click the VISIBLE "Generar" button (two exist in DOM — filter by rect).
+# ---------------------------------------------------------------------------
+def _open_imagegen_tab() -> tuple | None:
+    """Open a fresh ImageGen tab WITHOUT waiting for it to be ready.
+
+    Returns the (window_id, tab_id) tuple or None on failure.
+    Use this when you want to open many tabs in parallel and wait on
+    them as a batch via _wait_imagegen_tab_ready().
+    """
+    return _osa_open_tab(_ENVATO_IMAGEGEN_URL)
+
+
+def _wait_imagegen_tab_ready(tab_ref: tuple, max_polls: int = 60) -> bool:
+    """Poll an already-open ImageGen tab until its prompt contenteditable mounts."""
+    return _poll_until(
+        condition_js="document.querySelector('[contenteditable=\"true\"][role=\"textbox\"]')?'y':'n'",
+        expected="y",
+        max_polls=max_polls,
+        interval=0.2,
+        tab_ref=tab_ref,
+    )
+
+
+def _attach_refs_via_drop(ref_urls: list, tab_ref: tuple, log) -> bool:
+    """Fast-path reference attachment.
+
+    Simulates a `drop` event on the textarea container with a DataTransfer
+    containing the fetched files. Envato's textarea wrapper has ondrop +
+    ondragover wired up by their React app, so this attaches refs without
+    opening the 'Imágenes de referencia' dialog or waiting for tile thumbnails
+    to render — saves ~60s per tab.
+
+    Returns True if a reference thumbnail appears in the prompt bar within
+    a few seconds; False otherwise (caller should fall back to dialog flow).
+    """
+    if not ref_urls:
+        return True
+    log(f"FAST PATH: drop {len(ref_urls)} ref(s) onto textarea container")
+    urls_json = json.dumps(ref_urls)
+    drop_js = (
+        "window.__axkanFastDrop='pending';"
+        "(async function(){try{"
+        f"var urls={urls_json};"
+        "var files=[];"
+        "for(var i=0;i<urls.length;i++){"
+        "  var r=await fetch(urls[i]);if(!r.ok)continue;"
+        "  var b=await r.blob();"
+        "  var ext=(b.type.split('/')[1]||'jpg').replace('jpeg','jpg');"
+        "  files.push(new File([b],'axkan-ref-'+i+'.'+ext,{type:b.type||'image/jpeg'}));"
+        "}"
+        "if(!files.length){window.__axkanFastDrop='no_blobs';return;}"
+        "var ed=document.querySelector('[contenteditable=\"true\"][role=\"textbox\"]');"
+        "if(!ed){window.__axkanFastDrop='no_editor';return;}"
+        "var target=ed.parentElement&&ed.parentElement.parentElement?"
+        "  ed.parentElement.parentElement:ed.parentElement||ed;"
+        "var dt=new DataTransfer();files.forEach(function(f){dt.items.add(f);});"
+        "var rect=target.getBoundingClientRect();"
+        "var clientX=rect.left+rect.width/2;"
+        "var clientY=rect.top+rect.height/2;"
+        "['dragenter','dragover','drop'].forEach(function(t){"
+        "  target.dispatchEvent(new DragEvent(t,{bubbles:true,cancelable:true,"
+        "    dataTransfer:dt,clientX:clientX,clientY:clientY}));"
+        "});"
+        "window.__axkanFastDrop='dropped';"
+        "}catch(e){window.__axkanFastDrop='err:'+e.message;}})();"
+    )
+    _osa_js(drop_js, tab_ref=tab_ref)
+
+    # Wait for the in-tab JS to finish dispatching events.
+    if not _poll_until(
+        condition_js="window.__axkanFastDrop||''",
+        expected="dropped",
+        max_polls=20,
+        interval=0.15,
+        tab_ref=tab_ref,
+    ):
+        status = _osa_js("window.__axkanFastDrop||''", tab_ref=tab_ref)
+        log(f"FAST PATH: drop dispatch never completed: {status!r}")
+        return False
+
+    # Verify a reference thumbnail appeared in the prompt bar. Probes a few
+    # likely selectors — Envato's React app may render the new ref in any of
+    # several places. We need ANY of them to have at least one thumbnail.
+    log("FAST PATH: verify ref thumbnail appeared in prompt bar")
+    verify_js = (
+        "(function(){"
+        "var sels=["
+        "'[aria-label*=\"referencia\"] img',"
+        "'[aria-label*=\"Referencia\"] img',"
+        "'[data-testid*=\"reference\"] img',"
+        "'[class*=\"reference\"] img',"
+        "'img[src^=\"blob:\"]',"
+        "'img[src*=\"envatousercontent\"]'"
+        "];"
+        "for(var i=0;i<sels.length;i++){"
+        "  var n=document.querySelectorAll(sels[i]);"
+        "  if(n.length>0){"
+        "    for(var j=0;j<n.length;j++){"
+        "      var img=n[j];"
+        "      if(img.naturalWidth>50||img.complete){return 'y';}"
+        "    }"
+        "  }"
+        "}"
+        "return 'n';})();"
+    )
+    if _poll_until(
+        condition_js=verify_js,
+        expected="y",
+        max_polls=40,   # ~6s ceiling — small resized images upload fast
+        interval=0.15,
+        tab_ref=tab_ref,
+    ):
+        log("FAST PATH: ref thumbnail confirmed")
+        return True
+    log("FAST PATH: thumbnail did not appear — will fall back to dialog flow")
+    return False
+
+
+def _run_envato_imagegen_v2(prompt_text: str, ref_urls: list, aspect_ratio: str,
+                            tab_ref: tuple | None = None) -> None:
+    """Orchestrate the validated Envato ImageGen flow step-by-step.
+
+    aspect_ratio: one of "1:1" / "1:2" / "2:1" (maps to square / portrait / landscape).
+    ref_urls: list of HTTP URLs for reference images (served by Flask /tmp-ref/).
+    tab_ref: optional pre-opened tab (window_id, tab_id). If None, opens a new one.
+             When provided, the tab is assumed to already be page-ready (caller used
+             _wait_imagegen_tab_ready). This lets bulk batches open all tabs first,
+             wait for all to load, then fill each one in turn without re-opening.
+    """
+    start_time = time.time()
+
+    def log(msg: str) -> None:
+        print(f"[ImageGen V2 +{int((time.time()-start_time)*1000)}ms] {msg}")
+
+    aspect_map = {"1:1": "Cuadrado", "1:2": "Vertical", "2:1": "Horizontal"}
+    target_aspect_label = aspect_map.get(aspect_ratio, "Vertical")
+
+    # ---- Step 1: open tab + wait page ready (skipped if caller pre-opened) ----
+    if tab_ref is None:
+        log(f"open tab, aspect={target_aspect_label}, refs={len(ref_urls)}")
+        tab_ref = _osa_open_tab(_ENVATO_IMAGEGEN_URL)
+        if tab_ref is None:
+            log("failed to open tab — aborting")
+            return
+        log(f"tab_ref={tab_ref}")
+
+        if not _poll_until(
+            condition_js="document.querySelector('[contenteditable=\"true\"][role=\"textbox\"]')?'y':'n'",
+            expected="y",
+            max_polls=40,
+            interval=0.2,
+            tab_ref=tab_ref,
+        ):
+            log("contenteditable never appeared — aborting")
+            return
+        log("page ready")
+    else:
+        log(f"reusing pre-opened tab_ref={tab_ref}, aspect={target_aspect_label}, refs={len(ref_urls)}")
+
+    _osa_js(BLOCKER_JS, tab_ref=tab_ref)
+    _osa_js(DUMP_BTN_JS, tab_ref=tab_ref)
+
+    # ---- Step 2: Reference images (if any) ----
+    # Try the FAST PATH first when enabled. If it succeeds, skip the dialog
+    # dance entirely. If it fails (no thumbnail confirmed), fall through to
+    # the original dialog flow so behavior is never worse than before.
+    refs_handled_by_fast_path = False
+    if ref_urls and _FAST_REF_UPLOAD:
+        try:
+            refs_handled_by_fast_path = _attach_refs_via_drop(ref_urls, tab_ref, log)
+        except Exception as e:
+            log(f"FAST PATH: exception, falling back to dialog: {e}")
+            refs_handled_by_fast_path = False
+
+    if ref_urls and not refs_handled_by_fast_path:
+        log("click Imágenes de referencia toggle")
+        toggle_js = (
+            "(function(){var b=Array.from(document.querySelectorAll('button'))"
+            ".find(function(x){return x.getAttribute('aria-label')==='Imágenes de referencia';});"
+            "if(!b)return 'nf';b.click();return 'ok';})();"
+        )
+        _osa_js(toggle_js, tab_ref=tab_ref)
+
+        # Dialog mounts its file input
+        if not _poll_until(
+            condition_js="document.querySelector('[role=dialog] input[type=file]')?'y':'n'",
+            expected="y",
+            max_polls=40,
+            interval=0.1,
+            tab_ref=tab_ref,
+        ):
+            log("ref dialog file input never appeared — skipping refs")
+        else:
+            # Count existing tiles BEFORE upload so we can detect new ones
+            log("counting existing tiles before upload")
+            _osa_js(
+                "(function(){var t=document.querySelectorAll('[role=dialog] "
+                "button[aria-label=\"Seleccionar imagen como referencia\"]');"
+                "window.__axkanTilesBefore=t.length;})();",
+                tab_ref=tab_ref,
+            )
+
+            log(f"upload {len(ref_urls)} ref images")
+            urls_json = json.dumps(ref_urls)
+            upload_js = (
+                "window.__axkanRefUp='pending';"
+                "(async function(){try{"
+                f"var urls={urls_json};"
+                "var files=[];"
+                "for(var i=0;i<urls.length;i++){"
+                "  var r=await fetch(urls[i]);if(!r.ok)continue;"
+                "  var b=await r.blob();"
+                "  var ext=(b.type.split('/')[1]||'png').replace('jpeg','jpg');"
+                "  files.push(new File([b],'axkan-ref-'+i+'.'+ext,{type:b.type||'image/png'}));"
+                "}"
+                "if(!files.length){window.__axkanRefUp='no_blobs';return;}"
+                "var dt=new DataTransfer();files.forEach(function(f){dt.items.add(f);});"
+                "var fi=document.querySelector('[role=dialog] input[type=file]');"
+                "if(!fi){window.__axkanRefUp='no_input';return;}"
+                "var s=Object.getOwnPropertyDescriptor(window.HTMLInputElement.prototype,'files').set;"
+                "s.call(fi,dt.files);"
+                "fi.dispatchEvent(new Event('change',{bubbles:true}));"
+                "window.__axkanRefUp='uploaded';"
+                "window.__axkanRefCount=files.length;"
+                "}catch(e){window.__axkanRefUp='err:'+e.message;}})();"
+            )
+            _osa_js(upload_js, tab_ref=tab_ref)
+
+            if not _poll_until(
+                condition_js="window.__axkanRefUp||''",
+                expected="uploaded",
+                max_polls=30,
+                interval=0.3,
+                tab_ref=tab_ref,
+            ):
+                status = _osa_js("window.__axkanRefUp||''", tab_ref=tab_ref)
+                log(f"ref upload status: {status!r} — continuing")
+
+            # Deselect any pre-existing references from prior sessions. Envato
+            # remembers selections across page loads — if we don't clear them,
+            # our prompt ends up using the previous-run's images plus our new
+            # ones (the "turtle showing up alongside our photo" bug).
+            log("deselect any pre-selected library tiles")
+            _osa_js(
+                "(function(){var t=document.querySelectorAll('[role=dialog] "
+                "button[aria-label=\"Seleccionar imagen como referencia\"]');"
+                "var deselected=0;"
+                "for(var i=0;i<t.length;i++){"
+                "  if(t[i].getAttribute('aria-pressed')==='true'||"
+                "     t[i].getAttribute('aria-selected')==='true'||"
+                "     t[i].getAttribute('data-state')==='checked'||"
+                "     t[i].classList.contains('selected')){"
+                "    t[i].click();deselected++;"
+                "  }"
+                "}return deselected;})();",
+                tab_ref=tab_ref,
+            )
+            time.sleep(0.3)
+
+            # Wait for NEW tiles to appear (more than what existed before).
+            # Tightened from 80*0.3=24s ceiling to 200*0.15=30s with 2x faster
+            # detection latency. Smaller resized refs typically finalize in
+            # ~3-8s; the longer ceiling is for queue-loaded times.
+            n = min(len(ref_urls), 3)
+            log(f"wait for {n} NEW tiles (beyond pre-existing count)")
+            new_tiles_arrived = _poll_until(
+                condition_js=(
+                    "(function(){var before=window.__axkanTilesBefore||0;"
+                    "var t=document.querySelectorAll('[role=dialog] "
+                    "button[aria-label=\"Seleccionar imagen como referencia\"]');"
+                    "var newCount=t.length-before;"
+                    f"return newCount>={n}?'y':'n';}})();"
+                ),
+                expected="y",
+                max_polls=200,
+                interval=0.15,
+                tab_ref=tab_ref,
+            )
+
+            if not new_tiles_arrived:
+                # Don't fall back to clicking unknown tiles — that's what caused
+                # the "turtle from a prior generation" bug. Better to skip refs
+                # entirely and let the prompt run text-only.
+                log("NEW tiles never arrived — skipping ref click (avoid stale-tile bug)")
+            else:
+                # Click ONLY the newly added tiles. Envato renders newest-first
+                # in this dialog, so the first n tiles are our uploads. We also
+                # verify each one isn't already selected (extra safety).
+                log("click only NEW tiles to commit as references")
+                click_tiles_js = (
+                    f"(function(){{"
+                    f"var t=document.querySelectorAll('[role=dialog] "
+                    f"button[aria-label=\"Seleccionar imagen como referencia\"]');"
+                    f"var n={n};"
+                    f"var i=0;var tick=function(){{"
+                    f"  if(i>=n){{window.__axkanTiles='done';return;}}"
+                    f"  var btn=t[i];"
+                    f"  var sel=(btn.getAttribute('aria-pressed')==='true'||"
+                    f"           btn.getAttribute('aria-selected')==='true'||"
+                    f"           btn.getAttribute('data-state')==='checked');"
+                    f"  if(!sel) btn.click();"
+                    f"  i++;setTimeout(tick,250);"
+                    f"}};tick();}})();"
+                )
+                _osa_js(click_tiles_js, tab_ref=tab_ref)
+                _poll_until(
+                    condition_js="window.__axkanTiles||''",
+                    expected="done",
+                    max_polls=20,
+                    interval=0.2,
+                    tab_ref=tab_ref,
+                )
+
+            # Close dialog by clicking toggle again
+            log("close ref dialog")
+            _osa_js(toggle_js, tab_ref=tab_ref)
+            time.sleep(0.5)
+
+    # ---- Step 3: Insert prompt (AFTER refs — dialog blur wipes pre-inserted text) ----
+    log("insert prompt")
+    prompt_b64 = base64.b64encode(prompt_text.encode("utf-8")).decode()
+    insert_js = (
+        "(function(){var el=document.querySelector('[contenteditable=\"true\"][role=\"textbox\"]');"
+        "if(!el){window.__axkanInserted='no_el';return;}el.focus();el.click();"
+        "var sel=window.getSelection();sel.removeAllRanges();"
+        "var range=document.createRange();range.selectNodeContents(el);sel.addRange(range);"
+        "document.execCommand('delete',false);"
+        f"var t=new TextDecoder().decode(Uint8Array.from(atob('{prompt_b64}'),function(c){{return c.charCodeAt(0);}}));"
+        "document.execCommand('insertText',false,t);"
+        "el.dispatchEvent(new InputEvent('input',{bubbles:true,inputType:'insertText'}));"
+        "window.__axkanInserted='ok';})();"
+    )
+    _osa_js(insert_js, tab_ref=tab_ref)
+
+    # Wait for hidden mirror to sync
+    _poll_until(
+        condition_js="(document.querySelector('input[name=\"prompt\"]')||{}).value?'y':'n'",
+        expected="y",
+        max_polls=20,
+        interval=0.1,
+        tab_ref=tab_ref,
+    )
+    time.sleep(0.3)
+
+    # ---- Step 4: Set aspect ratio ----
+    log(f"set aspect to {target_aspect_label}")
+    aspect_js = (
+        "(function(){"
+        f"var target='{target_aspect_label}';"
+        "var boxes=Array.from(document.querySelectorAll('[role=combobox]'));"
+        "var aspectBox=null;"
+        "for(var i=0;i<boxes.length;i++){"
+        "  var t=(boxes[i].textContent||'').trim();"
+        "  if(t==='Vertical'||t==='Horizontal'||t==='Cuadrado'){aspectBox=boxes[i];break;}"
+        "}"
+        "if(!aspectBox||aspectBox.textContent.trim()===target)return 'same';"
+        "aspectBox.click();"
+        "setTimeout(function(){"
+        "  var btns=Array.from(document.querySelectorAll('button'));"
+        "  for(var j=0;j<btns.length;j++){"
+        "    if((btns[j].textContent||'').trim()===target){btns[j].click();return;}"
+        "  }"
+        "},200);return 'clicked';})();"
+    )
+    _osa_js(aspect_js, tab_ref=tab_ref)
+    time.sleep(0.6)
+
+    # ---- Step 5: Click VISIBLE Generate button ----
+    log("click Generate (visible only)")
+    generate_js = (
+        "(function(){var btns=Array.from(document.querySelectorAll('button'));"
+        "for(var i=0;i<btns.length;i++){"
+        "  var t=(btns[i].textContent||'').trim();"
+        "  if(t==='Generar'||t==='Generate'){"
+        "    var r=btns[i].getBoundingClientRect();"
+        "    if(r.width>0 && r.height>0 && !btns[i].disabled){btns[i].click();return 'clicked';}"
+        "  }"
+        "}return 'nf';})();"
+    )
+    # Retry up to 10s in case Generate is still disabled (ref upload finalizing)
+    _poll_until(
+        condition_js=generate_js,
+        expected="clicked",
+        max_polls=40,
+        interval=0.25,
+        tab_ref=tab_ref,
+    )
+    log("DONE")
+
+
+# ---------------------------------------------------------------------------
+# 3. POST /api/envato/send-video  (single video prompt → Envato VideoGen)
+# ---------------------------------------------------------------------------
+def envato_send_video():
+    data = request.get_json() or {}
+    raw_prompt = data.get("prompt", "")
+    speech = data.get("speech", "")
+    if not raw_prompt:
+        return jsonify({"error": "No prompt provided"}), 400
+
+    # Embed Spanish dialogue directly in the prompt using Veo 3 format
+    combined = raw_prompt
+    if speech and speech.strip():
+        # If prompt doesn't already contain the Spanish dialogue, append it in Veo 3 format
+        if speech.strip() not in raw_prompt:
+            combined = f"{raw_prompt}\n\nThe character speaks in a clear Mexican Spanish accent: \"{speech.strip()}\" (no subtitles)"
+
+    prompt_b64 = base64.b64encode(_sanitize_video_prompt(combined).encode()).decode()
+
+    # Support both old dataUrl refs and new server-side imagePath
+    reference_images = data.get("referenceImages", [])
+    image_path = data.get("imagePath")  # server-side path like /sessions/abc/uploads/img.png
+    ref_filenames = []
+    if image_path:
+        # Copy from sessions dir to tmp-ref, resized for Envato
+        src = session_file(image_path)
+        if src.exists():
+            fname = "vid-frame-0.jpg"
+            _resize_image_for_envato(str(src), str(TMP_REF_DIR / fname))
+            ref_filenames = [fname]
+    elif reference_images:
+        ref_filenames = _write_ref_images(reference_images)
+
+    # Check if loop mode (same image for both Start Frame + End Frame)
+    is_loop = data.get("loop", False)
+
+    ref_url = ""
+    if ref_filenames:
+        ref_url = f"http://localhost:{STUDIO_PORT}/tmp-ref/{ref_filenames[0]}"
+
+    # Support separate end frame image (different from start frame)
+    end_ref_url = ""
+    end_frame_path = data.get("endFramePath")
+    if end_frame_path:
+        src = session_file(end_frame_path)
+        if src.exists():
+            fname = "vid-end-frame-0.jpg"
+            _resize_image_for_envato(str(src), str(TMP_REF_DIR / fname))
+            end_ref_url = f"http://localhost:{STUDIO_PORT}/tmp-ref/{fname}"
+            # If end frame provided, force loop mode so both frames get uploaded
+            is_loop = True
+
+    sanitized_prompt = _sanitize_video_prompt(combined)
+
+    # Fire the automation in a background thread so the HTTP response returns fast.
+    def _run():
+        try:
+            _run_envato_videogen_v2(
+                prompt_text=sanitized_prompt,
+                ref_url=ref_url,
+                is_loop=is_loop,
+                end_ref_url=end_ref_url,
+            )
+        except Exception as e:
+            print(f"[Envato Video] automation error: {e}")
+
+    threading.Thread(target=_run, daemon=True).start()
+    print(f"[Envato Video] New flow (v2): prompt={len(combined)} chars, refs={len(ref_filenames)}, loop={is_loop}, end_frame={'yes' if end_ref_url else 'no'}")
+    return jsonify({"success": True, "message": "Sending to Envato Video Gen (new app.envato.com flow)..."})
+
+
+# ---------------------------------------------------------------------------
+# 4. POST /api/envato/send-all  (bulk image prompts → Envato ImageGen)
+# ---------------------------------------------------------------------------
+def envato_send_all():
+    """Bulk Envato ImageGen — batched flow.
+
+    For each batch of 10 prompts:
+      1. Open all 10 Chrome tabs at once (parallel page loads).
+      2. Wait for all 10 to finish loading (contenteditable mounts).
+      3. Fill tab 1 — refs + prompt + aspect + Generar. Move to tab 2. Etc.
+      4. After all 10 are submitted, sleep 10s, then start the next batch.
+
+    Builds on _open_imagegen_tab(), _wait_imagegen_tab_ready(), and the
+    extended _run_envato_imagegen_v2(tab_ref=...) which skips its own tab-open
+    step when given a pre-opened tab. Each step uses _osa_js (no pbcopy, no
+    Cmd+V keystroke) so the user's keyboard isn't hijacked during a long run.
+    Press double-ESC (or Cmd+. in v2 UI) to abort — both call /api/abort which
+    killalls osascript.
+    """
+    data = request.get_json() or {}
+    prompts = data.get("prompts", [])
+    if not prompts:
+        return jsonify({"error": "No prompts provided"}), 400
+
+    # Aspect ratios — use the same "1:1" / "1:2" / "2:1" tags the v2 orchestrator expects.
+    aspect_ratios = data.get("aspectRatios", [])
+    aspects = list(aspect_ratios) if aspect_ratios else ["1:1"] * len(prompts)
+    while len(aspects) < len(prompts):
+        aspects.append("1:1")
+
+    # Materialize a list of data URLs / server paths into HTTP URLs the in-tab
+    # JS will fetch. Returns the new list of public /tmp-ref/ URLs (max 3).
+    send_id = uuid.uuid4().hex[:8]
+
+    def _materialize_refs(items: list, prefix: str) -> list[str]:
+        # Refs are resized to <=1200px and saved as JPEG so Envato's
+        # server-side processing finishes faster (small payloads finalize in
+        # ~2-5s vs ~30-60s for full-size originals).
+        out: list[str] = []
+        for i, data_url in enumerate((items or [])[:3]):
+            if not data_url:
+                continue
+            if not data_url.startswith("data:"):
+                if data_url.startswith("/sessions/"):
+                    local_path = session_file(data_url)
+                    if local_path.is_file():
+                        fname = f"{prefix}-{i}.jpg"
+                        try:
+                            _resize_image_for_envato(str(local_path), str(TMP_REF_DIR / fname))
+                        except Exception:
+                            shutil.copy2(str(local_path), str(TMP_REF_DIR / fname))
+                        out.append(f"http://localhost:{STUDIO_PORT}/tmp-ref/{fname}")
+                continue
+            m = re.match(r"^data:image/([^;]+);base64,(.+)$", data_url, re.DOTALL)
+            if not m:
+                continue
+            raw = base64.b64decode(m.group(2))
+            if len(raw) > 20 * 1024 * 1024:
+                continue
+            tmp_in = TMP_REF_DIR / f"{prefix}-{i}-orig.bin"
+            tmp_in.write_bytes(raw)
+            fname = f"{prefix}-{i}.jpg"
+            try:
+                _resize_image_for_envato(str(tmp_in), str(TMP_REF_DIR / fname))
+                tmp_in.unlink(missing_ok=True)
+            except Exception:
+                # Fallback: keep the original bytes with their declared extension
+                ext = "jpg" if m.group(1) == "jpeg" else m.group(1)
+                fname = f"{prefix}-{i}.{ext}"
+                (TMP_REF_DIR / fname).write_bytes(raw)
+                tmp_in.unlink(missing_ok=True)
+            out.append(f"http://localhost:{STUDIO_PORT}/tmp-ref/{fname}")
+        return out
+
+    # Per-prompt refs (preferred): each tab gets its own list of references.
+    # Fall back to a shared `referenceImages` array if per-prompt isn't given.
+    per_prompt_refs_input = data.get("referenceImagesPerPrompt")
+    ref_urls_per_prompt: list[list[str]] = []
+    if isinstance(per_prompt_refs_input, list) and per_prompt_refs_input:
+        for idx, refs_for_one in enumerate(per_prompt_refs_input):
+            ref_urls_per_prompt.append(
+                _materialize_refs(refs_for_one or [], f"ig-bulk-{send_id}-{idx}")
+            )
+        # Pad with empty lists if shorter than prompts
+        while len(ref_urls_per_prompt) < len(prompts):
+            ref_urls_per_prompt.append([])
+    else:
+        shared = _materialize_refs(data.get("referenceImages", []), f"ig-bulk-{send_id}")
+        ref_urls_per_prompt = [shared] * len(prompts)
+
+    sanitized = [sanitize_prompt(p) for p in prompts]
+    total = len(sanitized)
+    batch_size = 10
+    inter_batch_delay = 10  # seconds between batches
+
+    # Clear any stale abort sentinel from a previous run before starting.
+    try:
+        ABORT_FILE.unlink(missing_ok=True)
+    except Exception:
+        pass
+
+    def _aborted() -> bool:
+        return ABORT_FILE.exists()
+
+    def _run_bulk():
+        for batch_start in range(0, total, batch_size):
+            if _aborted():
+                print("[Envato Bulk] ABORTED before next batch")
+                return
+            batch_end = min(batch_start + batch_size, total)
+            batch_n = batch_start // batch_size + 1
+            total_batches = (total + batch_size - 1) // batch_size
+            print(f"[Envato Bulk] === BATCH {batch_n}/{total_batches} ({batch_end - batch_start} tabs) ===")
+
+            # Phase A — open all tabs in this batch back-to-back.
+            tab_refs: list[tuple | None] = []
+            for i in range(batch_start, batch_end):
+                if _aborted():
+                    print("[Envato Bulk] ABORTED during tab open")
+                    return
+                tab_refs.append(_open_imagegen_tab())
+                time.sleep(0.25)  # tiny stagger so Chrome doesn't drop tabs
+
+            # Phase B — wait for every tab in the batch to be page-ready.
+            for idx, tr in enumerate(tab_refs):
+                if _aborted():
+                    print("[Envato Bulk] ABORTED during page-ready wait")
+                    return
+                if tr is None:
+                    print(f"[Envato Bulk] tab {batch_start + idx + 1} failed to open")
+                    continue
+                ready = _wait_imagegen_tab_ready(tr, max_polls=80)
+                if not ready:
+                    print(f"[Envato Bulk] tab {batch_start + idx + 1} never became page-ready")
+
+            # Phase C — fill each tab in turn (serial, so the user can watch
+            # the flow tab-by-tab and DOM state stays stable per tab).
+            for offset, tr in enumerate(tab_refs):
+                if _aborted():
+                    print("[Envato Bulk] ABORTED during fill phase")
+                    return
+                idx = batch_start + offset
+                if tr is None:
+                    continue
+                refs_for_tab = ref_urls_per_prompt[idx] if idx < len(ref_urls_per_prompt) else []
+                print(f"[Envato Bulk] filling tab {idx + 1}/{total} (refs={len(refs_for_tab)})")
+                try:
+                    _run_envato_imagegen_v2(
+                        prompt_text=sanitized[idx],
+                        ref_urls=refs_for_tab,
+                        aspect_ratio=aspects[idx],
+                        tab_ref=tr,
+                    )
+                except Exception as e:
+                    print(f"[Envato Bulk] tab {idx + 1} fill error: {e}")
+
+            # Phase D — pause before next batch (skip after final batch).
+            # Sleep in 0.5s increments so abort is responsive during the wait.
+            if batch_end < total:
+                print(f"[Envato Bulk] batch done — sleeping {inter_batch_delay}s before next batch")
+                slept = 0.0
+                while slept < inter_batch_delay:
+                    if _aborted():
+                        print("[Envato Bulk] ABORTED during inter-batch pause")
+                        return
+                    time.sleep(0.5)
+                    slept += 0.5
+
+        print(f"[Envato Bulk] === ALL {total} PROMPTS DISPATCHED ===")
+
+    threading.Thread(target=_run_bulk, daemon=True).start()
+    total_refs = sum(len(r) for r in ref_urls_per_prompt)
+    print(f"[Envato Bulk] queued: {total} prompts, total refs={total_refs}, batch_size={batch_size}")
+    return jsonify({
+        "success": True,
+        "message": f"Bulk dispatch started: {total} prompts in batches of {batch_size}",
+        "count": total,
+    })
+
+
+# ---------------------------------------------------------------------------
+# 5. POST /api/envato/send-all-video  (bulk video prompts → Envato VideoGen)
+# ---------------------------------------------------------------------------
+def envato_send_all_video():
+    """Bulk video-gen: one Envato tab per prompt, driven through the v2 per-step helper.
+
+    Runs tabs sequentially (not in parallel) because the v2 helper binds to a single
+    app.envato.com/video-gen tab at a time — each run opens a new one, does its work,
+    and moves on. Sequential is safer than parallel tabs anyway (Envato queue limits).
+    """
+    data = request.get_json() or {}
+    prompts = data.get("prompts", [])
+    if not prompts:
+        return jsonify({"error": "No prompts provided"}), 400
+
+    is_loop = data.get("loop", False)
+    speeches = data.get("speeches", [])
+    if not speeches:
+        speeches = [""] * len(prompts)
+
+    reference_images = data.get("referenceImages", [])
+    image_paths = data.get("imagePaths", [])
+
+    # For each prompt, stage the frame image under tmp-ref/vid-ref-{i}.jpg so it can be
+    # served over HTTP to Envato's tab. Build a list of (prompt_text, ref_url) pairs.
+    jobs = []
+    for i, p in enumerate(prompts):
+        sp = speeches[i] if i < len(speeches) else ""
+        combined = p
+        if sp and sp.strip() and sp.strip() not in p:
+            combined = f"{p}\n\nThe character speaks in a clear Mexican Spanish accent: \"{sp.strip()}\" (no subtitles)"
+        prompt_text = _sanitize_video_prompt(combined)
+
+        # Resolve the per-slide frame image
+        ref_url = ""
+        if i < len(image_paths) and image_paths[i]:
+            src = session_file(image_paths[i])
+            if src.exists():
+                dst = TMP_REF_DIR / f"vid-ref-{i}.jpg"
+                _resize_image_for_envato(str(src), str(dst))
+                ref_url = f"http://localhost:{STUDIO_PORT}/tmp-ref/vid-ref-{i}.jpg"
+        elif i < len(reference_images) and reference_images[i]:
+            ref_data = reference_images[i]
+            if ref_data and ref_data.startswith("data:"):
+                m = re.match(r"^data:image/([^;]+);base64,(.+)$", ref_data, re.DOTALL)
+                if m:
+                    ext = "jpg" if m.group(1) == "jpeg" else m.group(1)
+                    dst = TMP_REF_DIR / f"vid-ref-{i}.{ext}"
+                    dst.write_bytes(base64.b64decode(m.group(2)))
+                    ref_url = f"http://localhost:{STUDIO_PORT}/tmp-ref/{dst.name}"
+        jobs.append((prompt_text, ref_url))
+
+    def _run_all():
+        for idx, (pt, ru) in enumerate(jobs, start=1):
+            print(f"[Envato Video Bulk] job {idx}/{len(jobs)}: prompt={len(pt)}ch ref={'yes' if ru else 'no'}")
+            try:
+                _run_envato_videogen_v2(prompt_text=pt, ref_url=ru, is_loop=is_loop)
+            except Exception as e:
+                print(f"[Envato Video Bulk] job {idx} error: {e}")
+            # Small breather between tabs so Envato doesn't rate-limit
+            time.sleep(2)
+
+    threading.Thread(target=_run_all, daemon=True).start()
+    print(f"[Envato Video Bulk] queued {len(jobs)} videos, loop={is_loop}")
+    return jsonify({"success": True, "message": f"Opening {len(jobs)} Envato Video tabs...", "count": len(jobs)})
+
+
+# ---------------------------------------------------------------------------
+# 6. POST /api/envato/bulk-image-to-video
+# ---------------------------------------------------------------------------
+def envato_bulk_image_to_video():
+    data = request.get_json() or {}
+    clips = data.get("clips", [])
+    if not clips:
+        return jsonify({"error": "No clips provided"}), 400
+
+    reference_images = data.get("referenceImages", [])
+    ref_filenames = _write_ref_images(reference_images) if reference_images else []
+
+    clip_count = len(clips)
+    tmp = tempfile.mkdtemp(prefix="envato-img2vid-")
+
+    img_prompt_files = []
+    vid_prompt_files = []
+    for i, c in enumerate(clips):
+        img_pf = os.path.join(tmp, f"img_prompt_{i}.txt")
+        with open(img_pf, "w") as f:
+            f.write(sanitize_prompt(c.get("imagePrompt", "")))
+        img_prompt_files.append(img_pf)
+
+        vid_text = c.get("videoPrompt", c.get("imagePrompt", ""))
+        sp = c.get("speech", "")
+        combined = f"{vid_text}\n\nThe character speaks in a clear Mexican Spanish accent: \"{sp.strip()}\" (no subtitles)" if sp and sp.strip() else vid_text
+        vid_pf = os.path.join(tmp, f"vid_prompt_{i}.txt")
+        with open(vid_pf, "w") as f:
+            f.write(_sanitize_video_prompt(combined))
+        vid_prompt_files.append(vid_pf)
+
+    ref_section = ""
+    if ref_filenames:
+        ref_js_path = str(TMP_REF_DIR / "ref-upload.js")
+        with open(ref_js_path, "w") as f:
+            f.write(_generate_ref_upload_js(ref_filenames))
+        ref_section = f"""
+  execute tab myTab of w javascript "fetch('http://localhost:{STUDIO_PORT}/tmp-ref/ref-upload.js').then(r=>r.text()).then(js=>eval(js)).catch(e=>{{ window.__refUploadDone=true; }});"
+  repeat 30 times
+    set isDone to (execute tab myTab of w javascript "window.__refUploadDone ? 'yes' : 'no'")
+    if isDone is "yes" then exit repeat
+    delay 0.5
+  end repeat
+  delay 0.5"""
+
+    # Phase A: Open all ImageGen tabs
+    script = f'''
+tell application "Google Chrome"
+  if (count of windows) is 0 then
+    make new window
+    delay 1.0
+  end if
+  set w to front window
+'''
+    for _ in range(clip_count):
+        script += '  tell w to make new tab with properties {URL:"https://app.envato.com/image-gen"}\n'
+    script += f"""
+  set tabTotal to count of tabs of w
+  set firstTab to (tabTotal - {clip_count - 1})
+  repeat 60 times
+    set allDone to true
+    repeat with i from firstTab to tabTotal
+      if (loading of tab i of w) then set allDone to false
+    end repeat
+    if allDone then exit repeat
+    delay 0.15
+  end repeat
+  delay 1.5
+end tell
+"""
+
+    # Phase B: Set prompt, refs, aspect, generate on each tab
+    for i in range(clip_count):
+        ipf = img_prompt_files[i]
+        script += f"""
+tell application "Google Chrome"
+  set w to front window
+  set tabTotal to count of tabs of w
+  set myTab to (tabTotal - {clip_count - 1 - i})
+  set active tab index of w to myTab
+  repeat 40 times
+    set inputReady to (execute active tab of w javascript "(document.querySelector('textarea')||document.querySelector('[contenteditable=\\"true\\"],[contenteditable=\\"\\"],div[role=textbox],[role=textbox]')||document.querySelector('input[type=text]'))?'1':'0'")
+    if inputReady is "1" then exit repeat
+    delay 0.15
+  end repeat
+  execute active tab of w javascript "window.__promptFocused=0;(function(){{try{{var el=document.querySelector('textarea');if(!el)el=document.querySelector('[contenteditable=\\"true\\"],[contenteditable=\\"\\"],div[role=textbox],[role=textbox]');if(!el)el=document.querySelector('input[type=text]');if(!el){{window.__promptFocused=1;return;}}window.__promptEl=el;el.scrollIntoView({{block:'center'}});el.focus();el.click();window.__promptFocused=1;}}catch(e){{window.__promptFocused=1;}}}})();"
+  repeat 20 times
+    set isFocused to (execute active tab of w javascript "window.__promptFocused?'yes':'no'")
+    if isFocused is "yes" then exit repeat
+    delay 0.1
+  end repeat
+  delay 0.3
+end tell
+do shell script "cat " & quoted form of "{ipf}" & " | pbcopy"
+tell application "System Events" to keystroke "v" using command down
+delay 0.3
+tell application "Google Chrome"
+  set w to front window
+  execute active tab of w javascript "(function(){{var el=document.querySelector('textarea')||document.querySelector('[contenteditable=\\"true\\"],[contenteditable=\\"\\"],div[role=textbox]')||document.querySelector('input[type=text]');if(el){{el.dispatchEvent(new Event('input',{{bubbles:true}}));el.dispatchEvent(new Event('change',{{bubbles:true}}));}}}})();"
+{ref_section}
+  delay 0.3
+  -- Select Portrait
+  execute active tab of w javascript "(function(){{var map={{'portrait':['portrait','vertical','retrato']}};var targets=map['portrait'];function clickMatch(){{var items=document.querySelectorAll('li,label,button,div[role=option],[role=menuitem],span');for(var i=0;i<items.length;i++){{var t=(items[i].textContent||'').trim().toLowerCase();if(t.length===0||t.length>20)continue;for(var k=0;k<targets.length;k++){{if(t===targets[k]){{items[i].click();return true;}}}}}}return false;}}if(clickMatch())return'ok';return'nf';}})();"
+  delay 0.4
+  execute active tab of w javascript "(function(){{var targets=['portrait','vertical','retrato'];var items=document.querySelectorAll('li,label,button,div[role=option],[role=menuitem],span');for(var i=0;i<items.length;i++){{var t=(items[i].textContent||'').trim().toLowerCase();if(t.length===0||t.length>20)continue;for(var k=0;k<targets.length;k++){{if(t===targets[k]){{items[i].click();return'ok';}}}}}}return'skip';}})();"
+  delay 0.3
+  set genResult to "not-found"
+  repeat 20 times
+    set genResult to (execute active tab of w javascript "(function(){{var btns=document.querySelectorAll('button');for(var i=0;i<btns.length;i++){{var t=(btns[i].textContent||'').trim().toLowerCase();if(t==='generate'||t==='generar'){{if(btns[i].disabled)return'disabled';btns[i].click();return'clicked';}}}}return'not-found';}})();")
+    if genResult is "clicked" then exit repeat
+    delay 0.2
+  end repeat
+end tell
+delay 0.5
+"""
+
+    script += '\nreturn "done"\n'
+    run_applescript(script, timeout=clip_count * 20)
+    print(f"[Envato Img→Vid] Sending: {clip_count} clips, refs={len(ref_filenames)}")
+    return jsonify({"success": True, "message": f"Processing {clip_count} image-to-video clips...", "count": clip_count})
+
+
+# ---------------------------------------------------------------------------
+# 7. POST /api/character/generate  (Character Speaking: image + video)
+# ---------------------------------------------------------------------------
+def character_generate():
+    """Two-phase character speaking flow:
+    Phase 1: Send character image prompt to Envato ImageGen
+    Phase 2: Use Claude CLI to generate rich animation prompt, send to Envato VideoGen
+    """
+    from .prompts import generate_character_video_prompt
+
+    data = request.get_json() or {}
+    character_desc = data.get("character", "")
+    dialogue = data.get("dialogue", "")
+    destination = data.get("destination", "")
+    reference_images = data.get("referenceImages", [])
+
+    if not character_desc:
+        return jsonify({"error": "No character description provided"}), 400
+    if not dialogue:
+        return jsonify({"error": "No dialogue provided"}), 400
+
+    # Write reference images
+    ref_filenames = _write_ref_images(reference_images) if reference_images else []
+
+    # --- Phase 1: Send character image to Envato ImageGen ---
+    image_prompt = (
+        f"{character_desc}. 3D character standing on pure white infinite background, "
+        f"front-facing, full body visible, cute expressive pose, "
+        f"AXKAN brand style Rosa Mexicano #E72A88 and Turquesa #09ADC2. "
+        f"{('Destination: ' + destination + '. ') if destination else ''}"
+        f"9:16 portrait format, clean white background, high quality 3D render, "
+        f"vibrant colors, professional character design suitable for animation."
+    )
+
+    tmp = tempfile.mkdtemp(prefix="envato-char-")
+    img_prompt_file = os.path.join(tmp, "img_prompt.txt")
+    with open(img_prompt_file, "w") as f:
+        f.write(sanitize_prompt(image_prompt))
+
+    ref_js_file = None
+    if ref_filenames:
+        ref_js_file = os.path.join(tmp, "ref-upload.js")
+        with open(ref_js_file, "w") as f:
+            f.write(_generate_ref_upload_js(ref_filenames))
+
+    img_script = _build_imagegen_applescript(img_prompt_file, "Portrait", ref_js_file)
+    run_applescript(img_script, timeout=30)
+    print(f"[Character] Phase 1: Image sent to Envato ImageGen")
+
+    # --- Phase 2: Generate rich video prompt via Claude CLI, then send to VideoGen ---
+    # Uses the v2 Python orchestrator (see _run_envato_videogen_v2). The character flow
+    # has exactly one reference image (the character photo), so we pass it as the Start Frame
+    # with loop=False (character speaking isn't a seamless loop — it has a dialogue arc).
+    def _phase2():
+        # Give a moment for Phase 1 to start
+        time.sleep(2)
+
+        video_prompt = generate_character_video_prompt(character_desc, dialogue, destination)
+        print(f"[Character] Phase 2: Video prompt generated ({len(video_prompt)} chars)")
+
+        # Stage the first reference image as a Start Frame for the character animation
+        ref_url = ""
+        if ref_filenames:
+            src = TMP_REF_DIR / ref_filenames[0]
+            if src.exists():
+                dst = TMP_REF_DIR / "vid-char-frame.jpg"
+                _resize_image_for_envato(str(src), str(dst))
+                ref_url = f"http://localhost:{STUDIO_PORT}/tmp-ref/vid-char-frame.jpg"
+
+        try:
+            _run_envato_videogen_v2(
+                prompt_text=_sanitize_video_prompt(video_prompt),
+                ref_url=ref_url,
+                is_loop=False,
+            )
+            print(f"[Character] Phase 2: Video prompt sent to Envato VideoGen")
+        except Exception as e:
+            print(f"[Character] Phase 2 error: {e}")
+
+    threading.Thread(target=_phase2, daemon=True).start()
+
+    return jsonify({
+        "success": True,
+        "message": "Phase 1: Image sent to Envato. Phase 2: Generating video prompt with Claude...",
+    })
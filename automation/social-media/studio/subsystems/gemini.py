@@ -0,0 +1,244 @@
+"""
+Gemini subsystem — gemini.google.com browser automation and Imagen generation.
+
+Routes: /api/gemini/send, /api/gemini/send-all, /api/gemini/generate-images.
+"""
+
+import os
+import base64
+import textwrap
+
+import tempfile
+
+from flask import request, jsonify
+
+from core import SESSIONS_DIR, ACCENT_CYCLE, get_session, gemini_sdk
+from .envato import run_applescript, sanitize_prompt
+
+
+# ---------------------------------------------------------------------------
+# Gemini Automation (AppleScript → Chrome → gemini.google.com)
+# ---------------------------------------------------------------------------
+def _build_gemini_applescript_single(prompt_file):
+    """Build AppleScript for a single Gemini image generation tab."""
+    return f'''
+tell application "Google Chrome"
+  activate
+  tell front window to make new tab with properties {{URL:"https://gemini.google.com/app"}}
+  repeat 40 times
+    if not (loading of active tab of front window) then exit repeat
+    delay 0.15
+  end repeat
+  repeat 30 times
+    if (execute active tab of front window javascript "document.querySelector('div[contenteditable=true][role=textbox]')?'1':'0'") is "1" then exit repeat
+    delay 0.15
+  end repeat
+  delay 0.3
+  -- Activate Image Mode
+  execute active tab of front window javascript "var chips=document.querySelectorAll('button,a,div[role=button]');for(var c of chips){{if(c.textContent.includes('Create image')){{c.click();break;}}}} 'ok'"
+  delay 0.6
+  execute active tab of front window javascript "var el=document.querySelector('div[contenteditable=true][role=textbox]');if(el){{el.focus();el.click();}} 'ok'"
+end tell
+do shell script "cat " & quoted form of "{prompt_file}" & " | pbcopy"
+tell application "System Events" to keystroke "v" using command down
+delay 0.8
+tell application "System Events"
+  key code 36
+end tell
+return "done"
+'''
+
+
+def gemini_send():
+    data = request.get_json() or {}
+    prompt = data.get("prompt", "")
+    if not prompt:
+        return jsonify({"error": "No prompt provided"}), 400
+
+    tmp = tempfile.mkdtemp(prefix="gemini-")
+    prompt_file = os.path.join(tmp, "prompt.txt")
+    with open(prompt_file, "w") as f:
+        f.write(sanitize_prompt(prompt))
+
+    script = _build_gemini_applescript_single(prompt_file)
+    run_applescript(script, timeout=30)
+
+    print(f"[Gemini] Sending: prompt={len(prompt)} chars")
+    return jsonify({"success": True, "message": "Sending to Gemini..."})
+
+
+def gemini_send_all():
+    data = request.get_json() or {}
+    prompts = data.get("prompts", [])
+    if not prompts:
+        return jsonify({"error": "No prompts provided"}), 400
+
+    tmp = tempfile.mkdtemp(prefix="gemini-bulk-")
+    prompt_files = []
+    for i, p in enumerate(prompts):
+        pf = os.path.join(tmp, f"prompt-{i}.txt")
+        with open(pf, "w") as f:
+            f.write(sanitize_prompt(p))
+        prompt_files.append(pf)
+
+    tab_count = len(prompts)
+    batch_size = 10
+
+    script = '''
+tell application "Google Chrome"
+  activate
+  set w to front window
+end tell
+'''
+    for batch_start in range(0, tab_count, batch_size):
+        batch_end = min(batch_start + batch_size, tab_count)
+        bs = batch_end - batch_start
+
+        script += f'\ntell application "Google Chrome"\n  set w to front window\n'
+        for _ in range(bs):
+            script += '  tell w to make new tab with properties {URL:"https://gemini.google.com/app"}\n'
+        script += f"""
+  set tabTotal to count of tabs of w
+  repeat 50 times
+    set allDone to true
+    repeat with i from (tabTotal - {bs - 1}) to tabTotal
+      if (loading of tab i of w) then set allDone to false
+    end repeat
+    if allDone then exit repeat
+    delay 0.15
+  end repeat
+  delay 0.5
+end tell
+"""
+
+        for i in range(batch_start, batch_end):
+            idx_in_batch = i - batch_start
+            pf = prompt_files[i]
+            script += f"""
+tell application "Google Chrome"
+  set w to front window
+  set tabTotal to count of tabs of w
+  set active tab index of w to (tabTotal - {bs - 1 - idx_in_batch})
+  repeat 20 times
+    if (execute active tab of w javascript "document.querySelector('div[contenteditable=true][role=textbox]')?'1':'0'") is "1" then exit repeat
+    delay 0.1
+  end repeat
+  execute active tab of w javascript "var chips=document.querySelectorAll('button,a,div[role=button]');for(var c of chips){{if(c.textContent.includes('Create image')){{c.click();break;}}}} 'ok'"
+  delay 0.6
+  execute active tab of w javascript "var el=document.querySelector('div[contenteditable=true][role=textbox]');if(el){{el.focus();el.click();}} 'ok'"
+end tell
+do shell script "cat " & quoted form of "{pf}" & " | pbcopy"
+tell application "System Events" to keystroke "v" using command down
+delay 0.8
+tell application "System Events"
+  key code 36
+end tell
+delay 0.3
+"""
+
+    script += '\nreturn "done"\n'
+    run_applescript(script, timeout=tab_count * 15)
+
+    print(f"[Gemini Bulk] Sending: {tab_count} prompts")
+    return jsonify({"success": True, "message": f"Opening {tab_count} Gemini tabs...", "count": tab_count})
+
+
+# ---------------------------------------------------------------------------
+# 9. POST /api/gemini/generate-images
+# ---------------------------------------------------------------------------
+def gemini_generate_images():
+    data = request.json or {}
+    session_id = data.get("session_id")
+    prompts = data.get("prompts", [])
+    reference_image = data.get("reference_image")
+    aspect_ratio = data.get("aspect_ratio", "4:5 vertical (1080x1350)")
+
+    sid, sess = get_session(session_id)
+
+    images = []
+    errors = []
+
+    # Try Gemini image generation
+    genai = gemini_sdk()
+    if genai:
+        try:
+            imagen_model = genai.ImageGenerationModel("imagen-3.0-generate-002")
+            for p in prompts:
+                try:
+                    result = imagen_model.generate_images(
+                        prompt=p["prompt_text"],
+                        number_of_images=1,
+                    )
+                    if result.images:
+                        img_data = result.images[0]._image_bytes
+                        filename = f"slide_{p['slide_number']}.png"
+                        img_path = SESSIONS_DIR / sid / filename
+                        img_path.write_bytes(img_data)
+                        images.append({
+                            "slide_number": p["slide_number"],
+                            "filename": filename,
+                            "url": f"/sessions/{sid}/{filename}",
+                        })
+                    else:
+                        errors.append({"slide_number": p["slide_number"], "error": "No image returned"})
+                except Exception as e:
+                    errors.append({"slide_number": p["slide_number"], "error": str(e)})
+        except Exception as e:
+            print(f"[Imagen error] {e} — using SVG placeholders")
+            images, errors = _generate_placeholder_images(sid, prompts)
+    else:
+        images, errors = _generate_placeholder_images(sid, prompts)
+
+    return jsonify({
+        "success": True,
+        "session_id": sid,
+        "images": images,
+        "errors": errors,
+    })
+
+
+def _generate_placeholder_images(sid: str, prompts: list) -> tuple[list, list]:
+    """Generate colored SVG placeholder images with slide info."""
+    images = []
+    errors = []
+    for p in prompts:
+        slide_num = p.get("slide_number", 1)
+        slide_name = p.get("slide_name", f"Slide {slide_num}")
+        color = ACCENT_CYCLE[(slide_num - 1) % len(ACCENT_CYCLE)]
+
+        svg = textwrap.dedent(f"""\
+            <svg xmlns="http://www.w3.org/2000/svg" width="1080" height="1350" viewBox="0 0 1080 1350">
+              <defs>
+                <linearGradient id="bg" x1="0%" y1="0%" x2="100%" y2="100%">
+                  <stop offset="0%" style="stop-color:{color};stop-opacity:1"/>
+                  <stop offset="100%" style="stop-color:#1a1a2e;stop-opacity:1"/>
+                </linearGradient>
+              </defs>
+              <rect width="1080" height="1350" fill="url(#bg)"/>
+              <text x="540" y="600" text-anchor="middle" font-family="Arial,Helvetica,sans-serif"
+                    font-size="120" font-weight="bold" fill="white" opacity="0.9">Slide {slide_num}</text>
+              <text x="540" y="720" text-anchor="middle" font-family="Arial,Helvetica,sans-serif"
+                    font-size="48" fill="white" opacity="0.7">{_svg_escape(slide_name)}</text>
+              <text x="540" y="820" text-anchor="middle" font-family="Arial,Helvetica,sans-serif"
+                    font-size="36" fill="white" opacity="0.4">AXKAN Studio — Placeholder</text>
+            </svg>""")
+
+        svg_b64 = base64.b64encode(svg.encode("utf-8")).decode("utf-8")
+        data_url = f"data:image/svg+xml;base64,{svg_b64}"
+
+        # Also save to disk
+        filename = f"slide_{slide_num}.svg"
+        img_path = SESSIONS_DIR / sid
+        img_path.mkdir(parents=True, exist_ok=True)
+        (img_path / filename).write_text(svg, encoding="utf-8")
+
+        images.append({
+            "slide_number": slide_num,
+            "filename": filename,
+            "url": data_url,
+        })
+    return images, errors
+
+
+def _svg_escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
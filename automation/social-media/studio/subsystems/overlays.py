@@ -0,0 +1,402 @@
+"""
+Overlays subsystem — text overlay specs, AI variations and captions.
+
+Routes: /api/overlays/*, /api/caption/generate.
+
+Overlay specs and captions come from ONE structured Gemini call per
+(destination, content type, prompts, tones, template version), cached in the
+shared state DB. Whichever of /api/overlays/specs or /api/caption/generate runs
+first pays for the call, the other (and every re-open of the session) is a
+cache hit. The template functions stay as instant fallbacks; a reply that
+needed them is only cached briefly, so the next request asks Gemini again.
+"""
+
+import hashlib
+import json
+import random
+import textwrap
+import threading
+import time
+
+from flask import request, jsonify
+
+from core import ACCENT_CYCLE, coord, get_session, save_session, gemini_model
+
+# Bump whenever _copy_prompt() or the response shape changes — old cache
+# entries then simply stop matching.
+COPY_TEMPLATE_VERSION = "1"
+CAPTION_TONES = ("casual", "professional", "fun", "inspirational")
+_COPY_LEASE_TTL = 60     # seconds one worker may hold the "generating" lease
+_COPY_WAIT = 45          # seconds a second request waits for that result
+_COPY_TTL = 30 * 86400   # cached copy is dropped after 30 days
+_COPY_RETRY_TTL = 300    # ...or after 5 minutes if it had template fallbacks
+# The lease is per worker process (owner = host:pid), so threads of one worker
+# also serialise on a local lock: striped by key, so the table stays bounded.
+_COPY_LOCKS = [threading.Lock() for _ in range(16)]
+
+
+def _copy_key(destination, content_type, prompts, tones) -> str:
+    slides = [
+        [p.get("slide_number"), p.get("slide_name", ""), p.get("prompt_text", "")]
+        for p in prompts
+    ]
+    blob = json.dumps([COPY_TEMPLATE_VERSION, destination, content_type, slides, list(tones)],
+                      ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(blob.encode("utf-8")).hexdigest()[:24]
+
+
+def _parse_json_reply(text):
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1]
+        if text.endswith("```"):
+            text = text[:-3]
+        text = text.strip()
+    return json.loads(text)
+
+
+def _copy_prompt(destination, content_type, prompts, tones):
+    slides_desc = "\n".join(
+        f"- Slide {p['slide_number']}: {p.get('slide_name', '')} — {p.get('prompt_text', '')[:120]}"
+        for p in prompts
+    ) or "(none yet — leave overlay_specs empty)"
+    return textwrap.dedent(f"""\
+        You are a social media copywriter creating viral Instagram content.
+        Content type: {content_type}
+        Destination: {destination}
+        Slides:
+        {slides_desc}
+
+        Write (1) overlay text specs for EVERY slide, in slide order, and
+        (2) one Instagram caption for EACH tone: {", ".join(tones)}.
+        Respond ONLY with valid JSON:
+        {{
+          "overlay_specs": [{{
+            "slide_name": "name",
+            "role": "hero|detail|lifestyle|variant|cta",
+            "headline": "short bold headline (3-5 words, Spanish)",
+            "subheadline": "supporting text (5-10 words, Spanish)",
+            "cta": "call to action (2-4 words, Spanish)",
+            "bg_color": "#hexcolor",
+            "tags": ["#tag1", "#tag2"]
+          }}],
+          "captions": {{
+            "<tone>": {{"caption": "3-5 lines, engaging, authentic, scroll-stopping, emojis, Spanish",
+                        "hashtags": ["15-20 relevant tags, some in English"]}}
+          }}
+        }}
+    """)
+
+
+def _copy_gemini(destination, content_type, prompts, tones):
+    """One structured call → ({"overlay_specs": [...], "captions": {tone: {...}}},
+    complete). Missing or malformed parts are filled from the templates, and
+    complete is then False."""
+    resp = gemini_model().generate_content(
+        _copy_prompt(destination, content_type, prompts, tones),
+        generation_config={"response_mime_type": "application/json"},
+    )
+    result = _parse_json_reply(resp.text)
+
+    complete = True
+    specs = result.get("overlay_specs")
+    if not prompts:
+        specs = []  # captions only; overlays_specs uses the templates for slide-less sessions
+    elif not isinstance(specs, list) or len(specs) != len(prompts) \
+            or not all(isinstance(x, dict) and x.get("headline") for x in specs):
+        print(f"[Copy Gemini] overlay_specs unusable ({type(specs).__name__}), using template")
+        specs, complete = _overlay_specs_template(destination, prompts), False
+
+    captions = {}
+    raw = result.get("captions") if isinstance(result.get("captions"), dict) else {}
+    for tone in tones:
+        c = raw.get(tone)
+        if isinstance(c, dict) and isinstance(c.get("caption"), str) and c["caption"].strip():
+            captions[tone] = {"caption": c["caption"], "hashtags": list(c.get("hashtags") or [])}
+        else:
+            caption, hashtags = _caption_template(destination, tone)
+            captions[tone] = {"caption": caption, "hashtags": hashtags}
+            complete = False
+    return {"overlay_specs": specs, "captions": captions}, complete
+
+
+def _cached_copy(key):
+    copy = coord.get(key)
+    return copy if copy and copy.get("expires", 0) > time.time() else None
+
+
+def _session_copy(destination, content_type, prompts, tone=None):
+    """Overlay specs + captions for this slide set, from cache or ONE Gemini call.
+    With no slides yet the call only writes the captions.
+
+    Returns (copy, source) with source "cache" or "gemini", or (None, None)
+    when Gemini is unavailable/failed — callers then use the templates.
+    Concurrent requests for the same key (the publish step fires specs and
+    caption together, possibly on different workers) share one call via a
+    lease on the key; threads of one worker, which share the lease owner,
+    queue on a local lock first.
+    """
+    tones = CAPTION_TONES if tone in (None, *CAPTION_TONES) else (*CAPTION_TONES, tone)
+    key = f"copy:{_copy_key(destination, content_type, prompts, tones)}"
+    cached = _cached_copy(key)
+    if cached:
+        return cached, "cache"
+    if not gemini_model():
+        return None, None
+
+    deadline = time.time() + _COPY_WAIT
+    local = _COPY_LOCKS[int(key[-8:], 16) % len(_COPY_LOCKS)]
+    if not local.acquire(timeout=_COPY_WAIT):
+        return None, None
+    try:
+        while not coord.acquire(key, _COPY_LEASE_TTL):
+            if time.time() > deadline:
+                return None, None
+            time.sleep(0.25)
+            cached = _cached_copy(key)
+            if cached:
+                return cached, "cache"
+        try:
+            cached = _cached_copy(key)  # filled while we waited for the lease?
+            if cached:
+                return cached, "cache"
+            t0 = time.time()
+            copy, complete = _copy_gemini(destination, content_type, prompts, tones)
+            copy["expires"] = time.time() + (_COPY_TTL if complete else _COPY_RETRY_TTL)
+            coord.set(key, copy)
+            coord.prune("copy:", _COPY_TTL)
+            print(f"[Copy Gemini] {len(prompts)} slides + {len(tones)} captions in one call ({time.time() - t0:.1f}s)")
+            return copy, "gemini"
+        except Exception as e:
+            print(f"[Copy Gemini error] {e}")
+            return None, None
+        finally:
+            coord.release(key)
+    finally:
+        local.release()
+
+
+def _copy_destination(sess, data):
+    """Destination both copy endpoints key the shared call on: the session's,
+    else the request's — so specs and caption for one session hit one entry."""
+    return sess.get("destination") or data.get("destination") or "México"
+
+
+# ---------------------------------------------------------------------------
+# 12. POST /api/overlays/specs
+# ---------------------------------------------------------------------------
+def overlays_specs():
+    data = request.json or {}
+    session_id = data.get("session_id")
+    sid, sess = get_session(session_id)
+    destination = _copy_destination(sess, data)
+    content_type = sess.get("content_type", "carousel")
+    prompts = sess.get("prompts", [])
+
+    copy, source = _session_copy(destination, content_type, prompts) if prompts else (None, None)
+    if copy:
+        specs = copy["overlay_specs"]
+    else:
+        # Template fallback
+        specs, source = _overlay_specs_template(destination, prompts), "template"
+    if specs != sess.get("overlay_specs"):
+        sess["overlay_specs"] = specs
+        save_session(sid, sess, "overlay_specs")
+    return jsonify({"success": True, "specs": specs, "source": source})
+
+
+def _overlay_specs_template(destination, prompts):
+    dest = destination.upper()
+    headlines = [
+        f"¡Vive {dest}!",
+        f"Arte de {dest}",
+        f"Llévate {dest}",
+        f"Colores de {dest}",
+        f"Recuerdo de {dest}",
+        f"Hecho en {dest}",
+        f"Explora {dest}",
+        f"¡{dest} te espera!",
+    ]
+    subheadlines = [
+        "Momentos que inspiran",
+        "Cultura y color en cada detalle",
+        "Esto tienes que vivirlo",
+        "Descubre lo mejor del destino",
+        "Arte que viaja contigo",
+        "Tradición y estilo moderno",
+        "Un pedacito de México para ti",
+        "Desliza para ver más",
+    ]
+    ctas = [
+        "¡Compra ahora!",
+        "Descubre más →",
+        "Añade a tu colección",
+        "Link en bio 🔗",
+        "¡Nuevo diseño!",
+        "Visita la tienda",
+        "Envío a todo México",
+        "¡No te lo pierdas!",
+    ]
+    roles = ["hero", "detail", "lifestyle", "variant", "process", "landmark", "collection", "cta"]
+    tags_pool = [
+        f"#{destination.replace(' ', '')}", "#Mexico", "#Travel",
+        "#MexicoMagico", "#Explore", "#Wanderlust", "#ContentCreator",
+        "#Instagram", "#ViralContent", "#Trending",
+    ]
+
+    specs = []
+    n = len(prompts) if prompts else 6
+    for i in range(n):
+        slide_name = prompts[i].get("slide_name", f"Slide {i+1}") if i < len(prompts) else f"Slide {i+1}"
+        specs.append({
+            "slide_name": slide_name,
+            "role": roles[i % len(roles)],
+            "headline": headlines[i % len(headlines)],
+            "subheadline": subheadlines[i % len(subheadlines)],
+            "cta": ctas[i % len(ctas)],
+            "bg_color": ACCENT_CYCLE[i % len(ACCENT_CYCLE)],
+            "tags": random.sample(tags_pool, min(4, len(tags_pool))),
+        })
+    return specs
+
+
+# ---------------------------------------------------------------------------
+# 13. POST /api/overlays/ai-variation
+# ---------------------------------------------------------------------------
+def overlays_ai_variation():
+    data = request.json or {}
+    session_id = data.get("session_id")
+    slide_index = int(data.get("slide_index", 0))
+    sid, sess = get_session(session_id)
+    destination = sess.get("destination", "México")
+
+    # Try Gemini
+    if gemini_model():
+        try:
+            prompt = (
+                f"Generate ONE creative Instagram overlay text variation for a slide about "
+                f"{destination}. Professional social media content. "
+                f"Respond ONLY with JSON: {{\"headline\": \"...\", \"subheadline\": \"...\", \"cta\": \"...\"}}"
+                f" All text in Spanish. Headline: 3-5 words, bold. Subheadline: 5-10 words. CTA: 2-4 words."
+            )
+            resp = gemini_model().generate_content(prompt)
+            text = resp.text.strip()
+            if text.startswith("```"):
+                text = text.split("\n", 1)[1]
+                if text.endswith("```"):
+                    text = text[:-3]
+                text = text.strip()
+            texts = json.loads(text)
+            return jsonify({"success": True, "texts": texts})
+        except Exception as e:
+            print(f"[AI variation error] {e}")
+
+    # Template fallback with randomized variety
+    dest = destination.upper()
+    variations = [
+        {"headline": f"Descubre {dest}", "subheadline": "Momentos que inspiran", "cta": "Desliza →"},
+        {"headline": f"Magia de {dest}", "subheadline": "Cultura en cada detalle", "cta": "Link en bio"},
+        {"headline": f"¡Puro {dest}!", "subheadline": "Esto tienes que vivirlo", "cta": "Guarda este post"},
+        {"headline": f"Explora {dest}", "subheadline": "Lo mejor del destino en tu feed", "cta": "Comparte"},
+        {"headline": f"Vibes de {dest}", "subheadline": "Color, tradición y estilo", "cta": "Descubre más"},
+        {"headline": f"Tesoro de {dest}", "subheadline": "México como nunca lo viste", "cta": "Síguenos →"},
+    ]
+    pick = variations[(slide_index + random.randint(0, 3)) % len(variations)]
+    return jsonify({"success": True, "texts": pick})
+
+
+# ---------------------------------------------------------------------------
+# 14. POST /api/overlays/preview
+# ---------------------------------------------------------------------------
+def overlays_preview():
+    return jsonify({"success": True, "message": "Preview generated"})
+
+
+# ---------------------------------------------------------------------------
+# 15. POST /api/overlays/apply-all
+# ---------------------------------------------------------------------------
+def overlays_apply_all():
+    data = request.json or {}
+    session_id = data.get("session_id")
+    sid, sess = get_session(session_id)
+
+    # Return existing clean files if any
+    files = sess.get("clean_files", sess.get("uploaded_files", []))
+    return jsonify({"success": True, "files": files})
+
+
+# ---------------------------------------------------------------------------
+# 16. POST /api/caption/generate
+# ---------------------------------------------------------------------------
+def caption_generate():
+    data = request.json or {}
+    session_id = data.get("session_id")
+    tone = data.get("tone", "casual")
+
+    sid, sess = get_session(session_id)
+    destination = _copy_destination(sess, data)
+    content_type = sess.get("content_type", "carousel")
+
+    copy, source = _session_copy(destination, content_type, sess.get("prompts", []), tone)
+    if copy and tone in copy["captions"]:
+        return jsonify({"success": True, **copy["captions"][tone], "source": source})
+
+    # Template fallback
+    caption, hashtags = _caption_template(destination, tone)
+    return jsonify({"success": True, "caption": caption, "hashtags": hashtags, "source": "template"})
+
+
+def _caption_template(destination, tone):
+    dest = destination
+    dest_tag = destination.replace(" ", "")
+
+    tone_intros = {
+        "casual": f"✨ ¡{dest} en todo su esplendor! ✨",
+        "professional": f"Descubre lo mejor de {dest}.",
+        "fun": f"🎉🇲🇽 ¡{dest} como nunca lo habías visto! 🔥",
+        "inspirational": f"Cada destino tiene una historia. Esta es la de {dest}. 🌎",
+    }
+    tone_bodies = {
+        "casual": (
+            f"{dest} tiene esa energía que se siente desde la primera foto. "
+            f"Colores vibrantes, cultura increíble y momentos que no te puedes perder. "
+            f"Desliza para ver más 👀"
+        ),
+        "professional": (
+            f"{dest} combina tradición y modernidad como pocos lugares. "
+            f"Cada rincón es una experiencia visual que merece ser compartida. "
+            f"Contenido original, calidad premium."
+        ),
+        "fun": (
+            f"¡{dest} tiene MÁS color que tu feed completo! 🌈 "
+            f"Desliza, guarda y comparte porque esto se tiene que ver. "
+            f"¡Tag a alguien que necesita ver esto! 🙌"
+        ),
+        "inspirational": (
+            f"Los colores de {dest}, su cultura, su energía — todo capturado "
+            f"en momentos que te transportan. Hay lugares que cambian tu perspectiva. "
+            f"Este es uno de ellos. ✈️"
+        ),
+    }
+    tone_ctas = {
+        "casual": "¡Guarda este post para tu próximo viaje! 📌",
+        "professional": "Síguenos para más contenido de calidad.",
+        "fun": "¡Comparte con alguien que necesita ver esto! 🏃‍♂️💨",
+        "inspirational": "Descubre más → link en bio 🔗",
+    }
+
+    intro = tone_intros.get(tone, tone_intros["casual"])
+    body = tone_bodies.get(tone, tone_bodies["casual"])
+    cta = tone_ctas.get(tone, tone_ctas["casual"])
+    caption = f"{intro}\n\n{body}\n\n{cta}"
+
+    hashtags = [
+        f"#{dest_tag}", "#Mexico", "#Travel",
+        "#MexicoMagico", "#Explore", "#ContentCreator",
+        "#Instagram", "#ViralContent", "#Trending",
+        "#Wanderlust", f"#Visit{dest_tag}", "#TravelMexico",
+        "#InstaTravel", "#Photography", "#CreativeContent",
+        "#VisualStory", "#ExploreMexico", "#TravelGram",
+        "#Discover", "#ContentStudio",
+    ]
+    return caption, hashtags
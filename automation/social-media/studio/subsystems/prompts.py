@@ -0,0 +1,1338 @@
+"""
+Prompts subsystem — Claude CLI prompt generation.
+
+Routes: /api/chat, /api/prompts/generate, /api/video-prompts/generate.
+Loaded on first request to one of them (see subsystems/__init__.py).
+"""
+
+import os
+import json
+import shutil
+import base64
+import textwrap
+import subprocess
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import re
+import tempfile
+
+from flask import request, jsonify
+
+from core import (
+    SESSIONS_DIR, communicate, set_progress, bump_progress, get_session, save_session,
+    gemini_model, wait_for_ingest, router,
+)
+
+
+# (Legacy product specs removed — system now generates social media content, not product designs)
+
+# Slide role templates per content type
+CAROUSEL_ROLES = [
+    ("Portada / Hook", "SCROLL-STOPPER cover — the most striking, bold, high-contrast image of the sequence. Must create instant curiosity and demand the swipe. This slide alone determines if people engage."),
+    ("Detalle Close-up", "Extreme close-up revealing textures, details, or patterns. Rewards the swipe with intimate visual detail you couldn't see on the cover."),
+    ("Contexto / Lifestyle", "Lifestyle context shot — the subject in its real-world environment. Feels authentic, aspirational, lived-in. Shows the human side."),
+    ("Perspectiva Diferente", "A completely different angle, mood, or visual treatment of the same subject — visual surprise that justifies continuing to swipe."),
+    ("Behind the Scenes", "Behind-the-scenes, process, or making-of angle — adds depth, story, and authenticity. Shows what most people don't get to see."),
+    ("Icónico / Cultural", "The iconic or cultural angle — connects emotionally to place, tradition, or identity. Triggers nostalgia, pride, or wanderlust."),
+    ("Panorámica / Colección", "Wide shot, collection view, or overhead flat lay — shows the full picture, variety, or scale. Provides visual breathing room."),
+    ("Cierre / CTA", "Final slide with maximum visual energy — bold, satisfying, conclusive. Must feel like the perfect ending that triggers saves and shares."),
+]
+
+REEL_ROLES = [
+    ("Hook / Apertura", "ATTENTION GRAB in under 1 second — dramatic zoom, reveal, or unexpected angle. Must make viewers stop scrolling instantly. High energy, high contrast."),
+    ("Reveal", "The main reveal — cinematic drama, dramatic lighting, the 'wow' moment that delivers on the hook's promise."),
+    ("Detalle", "Intimate close-up — texture, color depth, fine details. ASMR-level visual satisfaction."),
+    ("Lifestyle", "Real-world context — someone experiencing, using, or interacting with the subject. Authentic, aspirational, relatable."),
+    ("Variante", "Different angle, mood, or variation — quick visual shift that keeps attention and shows range."),
+    ("Cierre / CTA", "High-energy closing — bold visual conclusion, satisfying ending. Triggers replay, save, and share."),
+]
+
+# ── Carousel Loop (content_type='living') — each clip is its own self-contained 3-8s loop.
+# Unlike REEL_ROLES (which form a linear story), every loop clip must stand alone and
+# return to its starting frame. Roles describe the VISUAL hook of the loop, not a narrative position.
+LOOP_ROLES = [
+    ("Portada / Hook", "SCROLL-STOPPER cover loop. Start frame = end frame. Middle: explosive reveal (particles, confetti, 3D rotation, elements flying out and snapping back)."),
+    ("Detalle Close-up", "Intimate loop around the product detail. Start frame = end frame. Middle: zoom through micro-texture, focus racking, light rays caressing the surface, then smooth return."),
+    ("Contexto Lifestyle", "Lifestyle-context loop. Start frame = end frame. Middle: gentle parallax, atmospheric particles, a hand entering and exiting frame holding the product."),
+    ("Perspectiva", "Alternate-angle loop. Start frame = end frame. Middle: 3D orbit reveal, dramatic tilt-shift, or a mirror/reflection trick that resolves back to the original composition."),
+    ("Detalle Cultural", "Culturally-rich loop. Start frame = end frame. Middle: pattern/texture traveling across the surface, Mayan grecas animating, color shifts triggered by light."),
+    ("Colección", "Wide collection loop. Start frame = end frame. Middle: objects dance out of formation, rearrange, then snap back into the original layout. Satisfying symmetry."),
+]
+
+# ── Personaje Hablando (content_type='character') — ONE character portrait prompt.
+# User generates 3 Envato variations of this single prompt, picks their favorite,
+# then Phase 2 writes the motion + speech prompts. So Phase 1 here is PORTRAIT-focused,
+# not multi-slide narrative. Only the first role is typically used.
+CHARACTER_ROLES = [
+    ("Retrato de Personaje",
+     "Studio-quality 9:16 vertical portrait of ONE person ready to speak to camera. "
+     "Looking directly at lens, relaxed neutral expression (resting mouth, soft eyes — "
+     "NOT smiling, NOT mouth-open). Framed from chest up with generous headroom for "
+     "on-screen text. Environment and lighting must feel premium editorial — soft key "
+     "light, subtle rim, shallow depth of field, realistic skin texture with pores and "
+     "micro-imperfections. The character's identity (clothing, ethnicity, setting) "
+     "should align with the product's cultural context (Mexican/AXKAN brand). This "
+     "image WILL be used as the first frame of a talking-head video, so the pose and "
+     "expression must be animation-ready — not locked into a fixed emotion."),
+]
+
+DESTINATIONS_LANDMARKS = {
+    "cancun": ["playa turquesa", "zona hotelera", "ruinas de Tulum", "El Meco", "Isla Mujeres"],
+    "cdmx": ["Palacio de Bellas Artes", "Ángel de la Independencia", "Zócalo", "Chapultepec", "Coyoacán"],
+    "oaxaca": ["Monte Albán", "Hierve el Agua", "alebrijes", "mercado Benito Juárez", "iglesia de Santo Domingo"],
+    "guadalajara": ["Catedral", "Hospicio Cabañas", "mariachis", "Tlaquepaque", "Lago de Chapala"],
+    "playa del carmen": ["Quinta Avenida", "cenotes", "arrecife", "Xcaret", "Cozumel"],
+    "los cabos": ["El Arco", "playa del Amor", "desierto y mar", "ballenas", "atardecer dorado"],
+    "merida": ["catedral", "Paseo de Montejo", "haciendas", "Uxmal", "Chichén Itzá"],
+    "puerto vallarta": ["Malecón", "Los Arcos", "Sierra Madre", "bahía de Banderas", "zona romántica"],
+    "san miguel de allende": ["Parroquia", "calles empedradas", "globos de Cantoya", "arte callejero", "atardecer colonial"],
+}
+
+
+def _get_landmarks(destination: str) -> list[str]:
+    key = destination.lower().strip()
+    for k, v in DESTINATIONS_LANDMARKS.items():
+        if k in key or key in k:
+            return v
+    return [
+        f"iconic landmark of {destination}",
+        f"colorful street scene in {destination}",
+        f"traditional market in {destination}",
+        f"sunset view of {destination}",
+        f"local flora and fauna of {destination}",
+    ]
+
+
+# ---------------------------------------------------------------------------
+# 0. POST /api/chat — AI Chat Assistant
+# ---------------------------------------------------------------------------
+def chat():
+    data = request.get_json() or {}
+    message = data.get("message", "")
+    images = data.get("images", [])
+    history = data.get("history", [])
+
+    if not message:
+        return jsonify({"error": "No message"}), 400
+
+    # Build system prompt
+    system_prompt = (
+        "You are the AXKAN Content Studio AI assistant — a creative director that helps plan social media content.\n"
+        "AXKAN: premium Mexican souvenir brand. Colors: Rosa Mexicano #E72A88, Turquesa #09ADC2, Naranja #F39223, Verde #8AB73B.\n"
+        "Products: flat laser-cut MDF souvenirs (magnets, keychains, key holders) with vivid printed illustrations.\n\n"
+        "YOUR JOB:\n"
+        "1. Understand what the user wants to create\n"
+        "2. ENHANCE their idea — add creative details, suggest compositions, lighting, angles, moods\n"
+        "3. Ask 1-2 smart clarifying questions that will improve the final result\n"
+        "4. If the project involves a model/person or specific visual style, ASK for reference images\n"
+        "   Say something like: '¿Tienes fotos de referencia de la modelo o del estilo que buscas? Adjúntalas con el 📎'\n"
+        "5. When you have enough info, output a ready config with an ENHANCED theme description\n\n"
+        "ENHANCE INSTRUCTIONS — THIS IS YOUR MOST IMPORTANT JOB:\n"
+        "- The user gives you a RAW idea. Your job is to TRANSFORM it into a PROFESSIONAL creative brief.\n"
+        "- The 'theme' field in the config is NOT a copy of what the user said — it's YOUR enhanced version.\n"
+        "- REWRITE their idea as a detailed creative director's brief with:\n"
+        "  * Specific camera movements (dolly, arc, push-in, tracking)\n"
+        "  * Lighting setup (golden hour, rim light, direction, color temperature)\n"
+        "  * Character details (clothing description enriched, pose, expression, body language)\n"
+        "  * Atmosphere and mood (emotional tone, energy level, pacing)\n"
+        "  * For videos: clip-by-clip structure with what happens in each clip\n"
+        "  * For videos with dialogue: write the ACTUAL Spanish dialogue for each clip\n"
+        "  * Background/environment details the user didn't specify\n"
+        "- The theme should read like a professional production brief, NOT like the user's casual message\n"
+        "- Example: User says 'la modelo en un café hablando de souvenirs'\n"
+        "  Theme becomes: 'Clip 1: Extreme close-up, golden hour café, modelo con blusa Rosa Mexicano speaks\n"
+        "  to camera with knowing expression. Warm amber lighting from window right. She says: ¿Sabes qué es\n"
+        "  lo peor de vender souvenirs? Clip 2: Medium shot revealing café interior...'\n"
+        "- Include AXKAN brand elements naturally (Rosa Mexicano accents, cultural pride, premium feel)\n\n"
+        "WHEN TO ASK FOR REFERENCE IMAGES:\n"
+        "- If user mentions a model/person → ask for reference photos of them\n"
+        "- If user describes a specific visual style → ask for examples\n"
+        "- If user wants product shots → ask for photos of the actual products\n"
+        "- Say it naturally: '¿Me puedes compartir fotos de referencia? Así el resultado será mucho más preciso'\n\n"
+        "RESPOND WITH ONLY VALID JSON (no markdown fences, no backticks):\n"
+        '{"message": "response in Spanish casual Mexican tone", "suggestions": ["detailed useful suggestion 1","suggestion 2","suggestion 3"], "ready": false, "config": null}\n\n'
+        "When ready (after enhancing the instructions):\n"
+        '{"message": "¡Perfecto! Tu proyecto va a quedar increíble...", "suggestions": [], "ready": true, '
+        '"config": {"content_type": "carousel|reel|post|character|living", "destination": "place", '
+        '"slides": 6, "theme": "YOUR REWRITTEN PROFESSIONAL CREATIVE BRIEF — not a copy of user words. Include clip-by-clip structure for videos, specific camera/lighting/mood details, actual Spanish dialogue lines, clothing/styling specifics, environment details. This must read like a production document.", "is_video": false}}\n\n'
+        "Rules:\n"
+        "- ALWAYS respond in Spanish (casual Mexican tone, friendly)\n"
+        "- Max 2-3 questions before being ready\n"
+        "- Every suggestion must be USEFUL and SPECIFIC to improve the final result\n"
+        "- Concise messages — short paragraphs, not essays\n"
+        "- Proactively suggest creative ideas the user didn't think of\n"
+        "- When the user says 'continuar' or 'generar con lo que tengo': summarize what you understood,\n"
+        "  confirm key details (type, slides/clips count, destination, style), and if anything essential\n"
+        "  is missing, ask ONLY that in a quick natural way before outputting ready:true\n"
+        "- For videos: always confirm how many clips they want (each clip ~8 seconds)\n"
+        "- The 'slides' field in config works for both image slides AND video clips\n"
+        "- If user uploads images, analyze them and incorporate findings into the plan\n"
+        "- SPELLING RULES in all dialogue/speech: AXKAN → AXKÁN, souvenirs → suvenirs, imanes → imánes\n"
+        "- NEVER use the words 'punta' or 'sexo' anywhere\n"
+        "- Write dialogue phonetically clear for AI voice generation"
+    )
+
+    # Build conversation text from history + current message
+    conversation_parts = []
+    for entry in history:
+        role = entry.get("role", "user")
+        text = entry.get("content", entry.get("text", ""))
+        if role == "user":
+            conversation_parts.append(f"User: {text}")
+        else:
+            conversation_parts.append(f"Assistant: {text}")
+
+    # Handle images — save to temp dir if provided
+    tmp_dir = None
+    saved_image_paths = []
+    if images:
+        tmp_dir = tempfile.mkdtemp(prefix="axkan-chat-")
+        for idx, img_data in enumerate(images[:3]):
+            if img_data and img_data.startswith("data:"):
+                m = re.match(r"^data:image/([^;]+);base64,(.+)$", img_data, re.DOTALL)
+                if m:
+                    ext = "jpg" if m.group(1) == "jpeg" else m.group(1)
+                    img_path = os.path.join(tmp_dir, f"chat_image_{idx+1}.{ext}")
+                    with open(img_path, "wb") as f:
+                        f.write(base64.b64decode(m.group(2)))
+                    saved_image_paths.append(img_path)
+
+    # Build user message
+    user_msg = ""
+    if saved_image_paths:
+        user_msg += "I've uploaded images. Read them:\n" + "\n".join(f"  {p}" for p in saved_image_paths) + "\n\n"
+    user_msg += f"User: {message}"
+    if conversation_parts:
+        user_msg = "\n".join(conversation_parts) + f"\nUser: {message}"
+        if saved_image_paths:
+            user_msg = "I've uploaded images. Read them:\n" + "\n".join(f"  {p}" for p in saved_image_paths) + "\n\n" + user_msg
+
+    # Write system prompt to temp file
+    sys_dir = tempfile.mkdtemp(prefix="axkan-chat-sys-")
+    sys_file = os.path.join(sys_dir, "system.txt")
+    with open(sys_file, "w") as f:
+        f.write(system_prompt)
+
+    # Build claude CLI command — model/turns picked by the router (Haiku by default)
+    with router.route("chat", reads=bool(saved_image_paths)) as route:
+        cmd = ["claude", "-p", "--system-prompt-file", sys_file, *route.args("Read")]
+        try:
+            proc = subprocess.Popen(
+                cmd,
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, cwd=tmp_dir or sys_dir,
+            )
+            stdout, stderr = communicate(proc, input=user_msg, timeout=60)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            route.fail("timeout")
+            return jsonify({"error": "AI timeout"}), 504
+        except Exception as e:
+            route.fail(str(e))
+            return jsonify({"error": str(e)}), 500
+
+        if not stdout or not stdout.strip():
+            route.fail("empty output")
+            return jsonify({"error": "Empty AI response", "stderr": stderr[:500] if stderr else ""}), 500
+
+    # Parse JSON from output (strip markdown fences if present)
+    raw = stdout.strip()
+    # Remove markdown code fences
+    raw = re.sub(r"^```(?:json)?\s*", "", raw)
+    raw = re.sub(r"\s*```$", "", raw)
+    # Find JSON object
+    brace_start = raw.find("{")
+    brace_end = raw.rfind("}")
+    if brace_start != -1 and brace_end != -1:
+        json_str = raw[brace_start:brace_end + 1]
+        try:
+            result = json.loads(json_str)
+            return jsonify(result)
+        except json.JSONDecodeError:
+            pass
+
+    # Fallback: return raw as message
+    return jsonify({"message": raw, "suggestions": [], "ready": False, "config": None})
+
+
+# ---------------------------------------------------------------------------
+# 1. POST /api/prompts/generate
+# ---------------------------------------------------------------------------
+def prompts_generate():
+    data = request.json or {}
+    destination = data.get("destination", "México")
+    slides = int(data.get("slides", 6))
+    content_type = data.get("content_type", "carousel")
+    theme = data.get("theme", "")
+    # Support both single reference_image and array reference_images
+    reference_images = data.get("reference_images", [])
+    if not reference_images:
+        single = data.get("reference_image")
+        if single:
+            reference_images = [single]
+
+    # "reel" = generic video, "living" = carousel-loop, "character" = personaje-hablando.
+    # All three are VIDEO flows — they need speech fields and reel-style prompts.
+    # Leaving "character" out of this set made personaje-hablando Phase 1 prompts
+    # come out as static-carousel copy (no speech, no cinematic clip-by-clip).
+    is_reel = content_type in ("reel", "living", "character")
+    is_video = is_reel
+    # Allow the client to force is_video via payload (handles edge cases where
+    # the backend's content_type → flow mapping might drift).
+    if data.get("is_video") is True:
+        is_video = True
+        is_reel = True
+
+    print(f"\n[PROMPTS] === Generate request: dest={destination}, slides={slides}, type={content_type}, theme={theme[:50] if theme else ''}, ref_images={len(reference_images)} ===")
+
+    # Use the client's session_id so prompts land in the same session as
+    # the uploaded files (Bug: prompts_generate previously ignored it).
+    sid, sess = get_session(data.get("session_id"))
+    sess["destination"] = destination
+    sess["content_type"] = content_type
+    save_session(sid, sess, "destination", "content_type")
+
+    landmarks = _get_landmarks(destination)
+
+    # Use Claude CLI (analyzes reference image, generates quality prompts)
+    try:
+        prompts = _generate_prompts_claude(
+            destination, slides, content_type,
+            theme, reference_images, is_reel, landmarks,
+        )
+        if prompts and len(prompts) > 0:
+            sess["prompts"] = prompts
+            save_session(sid, sess, "prompts")
+            return jsonify({
+                "success": True,
+                "session_id": sid,
+                "prompts": prompts,
+                "destination": destination,
+                "total_slides": len(prompts),
+                "is_reel": is_reel,
+            })
+    except Exception as e:
+        import traceback
+        print(f"[Claude CLI error] {e} — falling back to templates")
+        traceback.print_exc()
+
+    # Template fallback (only if Claude CLI fails)
+    print("[PROMPTS] WARNING: Using TEMPLATE fallback — Claude CLI failed or returned empty")
+    prompts = _generate_prompts_template(
+        destination, slides, content_type,
+        theme, is_reel, landmarks,
+    )
+    sess["prompts"] = prompts
+    save_session(sid, sess, "prompts")
+    return jsonify({
+        "success": True,
+        "session_id": sid,
+        "prompts": prompts,
+        "destination": destination,
+        "total_slides": len(prompts),
+        "is_reel": is_reel,
+    })
+
+
+def _generate_prompts_claude(
+    destination, slides, content_type,
+    theme, reference_images, is_reel, landmarks,
+):
+    """Use Claude CLI to generate prompts — one per slide, ALL IN PARALLEL."""
+    from concurrent.futures import ThreadPoolExecutor, as_completed
+
+    # Pick the role list appropriate to the sub-type:
+    #   'character' → CHARACTER_ROLES  (personaje-hablando: portrait prompts)
+    #   'living'    → LOOP_ROLES       (carousel-loop: self-contained loop clips)
+    #   'reel' / other video → REEL_ROLES  (linear story — hook → reveal → CTA)
+    #   image flows → CAROUSEL_ROLES   (Instagram 8-slide sequence)
+    if content_type == "character":
+        role_list = CHARACTER_ROLES
+    elif content_type == "living":
+        role_list = LOOP_ROLES
+    elif is_reel:
+        role_list = REEL_ROLES
+    else:
+        role_list = CAROUSEL_ROLES
+
+    # Build reference image analysis block
+    ref_analysis_block = ""
+    if reference_images:
+        ref_count = len(reference_images)
+        ref_analysis_block = f"""
+REFERENCE IMAGE{"S" if ref_count > 1 else ""} ({ref_count} provided):
+Use the Read tool to read {"each" if ref_count > 1 else "the"} reference image file{"s" if ref_count > 1 else ""} in the working directory.
+
+After reading, extract:
+A) ART STYLE: line style, shading, proportions, color approach, rendering technique, overall aesthetic
+B) COMPOSITION: layout, background, supporting elements, decorative details
+C) CHARACTER/SUBJECT: identity, clothing, expressions, accessories
+
+Then generate a prompt that REPLICATES the exact visual style from the reference.
+Be hyper-specific about the style. Do NOT change the art style or use generic descriptions.
+"""
+
+    # Content-type-specific best practices
+    content_type_block = ""
+    if content_type == "carousel":
+        content_type_block = """
+INSTAGRAM CAROUSEL BEST PRACTICES:
+- This is ONE slide in a swipeable carousel sequence
+- SLIDE 1 must stop the scroll in 0.5s — bold, high-contrast, curiosity gap
+- Visual consistency: same palette, style, and visual language across all slides
+- High contrast, vivid saturated colors — 2x better feed performance
+- Clean, uncluttered — one hero element per slide
+- Each slide must reveal something NEW to justify the swipe
+- Saveable designs (carousels get 22% more saves than single posts)
+- Last slide: strong visual energy for CTA
+- Format: 4:5 vertical (1080x1350px)
+"""
+    elif content_type == "living":
+        content_type_block = """
+INSTAGRAM VIDEO CAROUSEL (ANIMATED) BEST PRACTICES:
+- This image becomes a 3-5 second video clip in a swipeable video carousel
+- Video carousels get 2-3x more reach than static (Instagram prioritizes video)
+- Design for MOTION: include depth layers (foreground, subject, background) for parallax
+- Slow, intentional camera movement: push-ins, gentle pans, parallax shifts
+- One dominant motion direction per slide — no chaotic movement
+- First frame must work as static thumbnail (most see it paused)
+- Must work on mute — text overlays carry the message
+- Uniform color grading across all clips
+- Seamless transitions: match exit frame to next slide's entry frame
+
+NO TEXT IN VIDEO FRAMES:
+- DO NOT include any text, words, headlines, or typography in any video frame
+- Only pure visual animation — motion, transitions, camera movement
+- Animated stickers or graphic elements OK, but NO readable text
+- Text overlays added in post-production
+
+QUALITY: Professional television / high studio level — Pixar, Apple commercial quality.
+Every frame flawless, cinematic color grading, premium feel.
+- Format: 9:16 vertical (1080x1920px) — 3-5 sec per clip
+"""
+    elif content_type == "post":
+        content_type_block = """
+INSTAGRAM SINGLE POST BEST PRACTICES:
+- ONE shot to stop the scroll and earn the save
+- Single strong focal point — one subject, one message, one visual anchor
+- High contrast between subject and background is the #1 scroll-stop factor
+- Warm tones (amber, terracotta, coral) outperform cool tones
+- Monochromatic or two-tone palettes read faster than multi-color
+- Dark backgrounds with bright subjects ("light in tunnel" effect)
+- Human faces with direct eye contact increase dwell time 2-3x
+- Foreground/background depth separation (blur, contrast, scale)
+- Full-bleed, no visible margins
+- Subtle grain/texture for premium feel — saturated but not neon
+- Save triggers: actionable value, bold stats, reference-worthy design
+- Format: 4:5 vertical (1080x1350px)
+"""
+    elif content_type == "pitch":
+        content_type_block = """
+B2B PITCH DECK BEST PRACTICES:
+- This is a professional PDF pitch page. Build trust and drive conversion.
+- 60-70% whitespace — cluttered = amateur
+- 2 fonts max + 3 brand colors + 1 accent
+- One key stat per page, displayed large (48pt+)
+- Real photography over stock; mockups in context build credibility
+- Icons over bullet points
+- Lead with THEIR ROI, not your features
+- Page roles: Cover > Problem > Solution > Social Proof > Pricing > CTA
+- Under 500 total words across all pages
+- End with exactly ONE clear CTA
+- Format: A4 landscape (16:9)
+"""
+    elif content_type == "character":
+        content_type_block = """
+CHARACTER / MODEL FOR VIDEO — BEST PRACTICES:
+
+IF THE CHARACTER IS A REAL PERSON / MODEL:
+- HYPERREALISTIC is mandatory — the person must look indistinguishable from a real smartphone photo
+- Skin must show REAL TEXTURE: visible pores on nose and cheeks, natural redness/flush on cheekbones,
+  slight uneven tone, T-zone shine, peach fuzz visible in side lighting. NEVER airbrushed, smoothed,
+  porcelain, or filtered. Skin should look like it would feel textured to the touch.
+- Under-eye area must be bright and healthy — NO dark circles, NO hollowing, NO tired look
+- Hair must show real texture: individual strands visible, flyaways, baby hairs, natural shine but
+  never salon-perfect or blown-out
+- Hands: natural with visible knuckle wrinkles, proper anatomy (exactly 5 fingers per hand, 3 joints each)
+- Eyes must track naturally — both eyes same direction, natural pupil size, dual-tone iris detail
+- Expression must be NATURAL: mid-laugh, warm smile reaching the eyes, or subtle pleased expression.
+  Never a dead neutral stare. Include micro-actions: tucking hair, adjusting angle, glancing away then back.
+- ANTI-AI AESTHETIC: Image should look like a smartphone capture, NOT a professional photoshoot.
+  Include slight imperfections: motion blur on hair, slightly off-center framing, mixed color temperature,
+  visible grain/noise, natural shadow under chin. NO softbox catch lights, NO magazine color grading.
+- Camera: smartphone front-facing (iPhone selfie cam), 24mm wide-angle, slight barrel distortion,
+  auto-exposure, medium depth of field. Looks like a frame from a casual video, NOT a photoshoot.
+
+IF THE CHARACTER IS ANIMATED / ILLUSTRATED / 3D:
+- Full body visible, front-facing or 3/4 angle, expressive pose
+- Clean white or simple gradient background — the character is the hero
+- Bold, vivid, saturated colors — must pop on a phone screen
+- Clean precise edges — no blur, no artifacts
+- Expressive face with clear eyes and mouth — designed for lip sync and emotion
+- Professional character design quality — Pixar/Disney concept sheet level
+
+CLOTHING — MANDATORY FOR BOTH:
+- NEVER a plain all-white outfit — that looks cheap and generic
+- Outfit MUST match the scene, context, destination, or theme:
+  * Tropical/beach: colorful casual, sundress, linen, sandals
+  * Urban/city: stylish fitted streetwear, modern Mexican fashion
+  * Traditional/cultural: embroidered blouse, huipil, rebozo, regional dress
+  * Market/street: high-waist jeans + fitted graphic tee, tote bag
+  * Professional: fitted blazer, tailored trousers
+  * Night out: form-fitting top, midi skirt, heeled sandals
+- Clothing must have color, pattern, personality — it tells a story
+- Clothing must show the character's silhouette, never shapeless or oversized
+
+CRITICAL — NO TEXT IN THE IMAGE:
+- DO NOT include any text, words, headlines, or typography in the image prompt
+- No speech bubbles, no captions, no destination names, no brand names
+- The image must be PURE VISUAL — only the character and scene, zero text
+- Text will be added later as video overlays, NOT baked into the generated image
+
+ANATOMICAL INTEGRITY:
+- Exactly two hands, ten fingers, proper joint articulation
+- Both eyes tracking same direction, consistent iris size
+- No floating objects — everything in contact with hand or surface
+- Hair obeys gravity, clothing consistent, body proportions fixed
+- If ANY anatomical error appears, the generation has FAILED
+
+FORMAT: 9:16 vertical (1080x1920px)
+"""
+    elif is_reel:
+        content_type_block = """
+INSTAGRAM REEL/VIDEO BEST PRACTICES:
+- This image becomes a video clip. Design for MOTION and CINEMA.
+- Hook in under 1 second — dramatic angle, extreme close-up, or unexpected reveal
+- Cinematic lighting: dramatic shadows, rim light, golden hour, studio
+- Depth of field: sharp subject, soft background (bokeh)
+- Rich color grading: warm for lifestyle, cool for modern, vivid for energy
+- Depth layers (foreground, subject, background) for parallax animation
+- Dynamic angles: overhead flat lay, 45-degree hero, extreme macro, sweeping wide
+- Pattern interrupt: unexpected visual that breaks the scroll
+- Visual satisfaction: oddly satisfying details, symmetry, smooth transitions
+- Emotional trigger: nostalgia, pride, wanderlust, aspiration
+
+CRITICAL — NO TEXT IN VIDEO FRAMES:
+- DO NOT include any text, words, headlines, captions, or typography in any video frame
+- No titles, no subtitles, no brand names, no destination names baked into the image
+- Only pure visual animation — motion, transitions, camera movement, visual effects
+- Animated stickers or graphic elements are OK, but NO readable text
+- Text overlays will be added in post-production, NOT generated in the video
+
+QUALITY STANDARD — PROFESSIONAL TELEVISION / HIGH STUDIO LEVEL:
+- Every frame must look like it was produced by a top-tier animation or production studio
+- Pixar, Apple commercial, Netflix intro level quality
+- Flawless motion, smooth transitions, zero artifacts
+- Cinematic color grading, professional lighting setups
+- Premium feel in every single frame — no cheap or amateur look
+- Format: 9:16 vertical (1080x1920px)
+"""
+
+    # Save reference images to a shared temp dir
+    tmp_dir = tempfile.mkdtemp(prefix="claude-prompts-")
+    saved_ref_paths = []
+    if reference_images:
+        for idx, ref_img in enumerate(reference_images[:3]):
+            if ref_img and ref_img.startswith("data:"):
+                m = re.match(r"^data:image/([^;]+);base64,(.+)$", ref_img, re.DOTALL)
+                if m:
+                    ext = "jpg" if m.group(1) == "jpeg" else m.group(1)
+                    img_path = os.path.join(tmp_dir, f"reference_{idx+1}.{ext}")
+                    with open(img_path, "wb") as f:
+                        f.write(base64.b64decode(m.group(2)))
+                    saved_ref_paths.append(img_path)
+
+    has_refs = len(saved_ref_paths) > 0
+
+    # --- Phase 0: Pre-analyze reference images (one call, shared across all slides) ---
+    ref_analysis_text = ""
+    set_progress(total=slides, done=0, phase="idle")
+
+    if has_refs:
+        set_progress(phase="analyzing")
+        print(f"[Claude Prompts] Phase 0: Analyzing {len(saved_ref_paths)} reference images...")
+        analysis_system = (
+            "You are a visual analysis expert. Read the reference image(s) and output a CONCISE but SPECIFIC analysis. "
+            "Cover: art style, color palette, subject description, composition, background, mood. "
+            "Be specific enough to reproduce the style. Under 500 words. Output ONLY the analysis, no JSON."
+        )
+        analysis_user = "Read and analyze:\n" + "\n".join(f"  {p}" for p in saved_ref_paths)
+        analysis_dir = os.path.join(tmp_dir, "analysis")
+        os.makedirs(analysis_dir, exist_ok=True)
+        sys_file_a = os.path.join(analysis_dir, "system.txt")
+        with open(sys_file_a, "w") as f:
+            f.write(analysis_system)
+        try:
+            with router.route("analysis", reads=True) as route:
+                proc = subprocess.Popen(
+                    ["claude", "-p", "--system-prompt-file", sys_file_a, *route.args("Read")],
+                    stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                    text=True, cwd=tmp_dir,
+                )
+                stdout, stderr = communicate(proc, input=analysis_user, timeout=45)
+                if stdout and len(stdout.strip()) > 50:
+                    ref_analysis_text = stdout.strip()
+                    print(f"[Claude Prompts] Phase 0: Done ({len(ref_analysis_text)} chars)")
+                else:
+                    route.fail("output too short")
+                    print(f"[Claude Prompts] Phase 0: Too short, fallback to per-slide reads")
+        except Exception as e:
+            print(f"[Claude Prompts] Phase 0: Failed ({e}), fallback to per-slide reads")
+
+    # If pre-analysis succeeded, slides don't need to read images (fast single-turn)
+    has_pre_analysis = len(ref_analysis_text) > 100
+
+    # --- Generate ONE slide per thread ---
+    def generate_single_slide(slide_num):
+        """Generate a single slide prompt via Claude CLI."""
+        idx = (slide_num - 1) % len(role_list)
+        role_name, role_desc = role_list[idx]
+
+        # All other slides context (so Claude knows the full sequence)
+        other_roles = "\n".join(
+            f"    Slide {i+1}: {name} — {desc}"
+            for i, (name, desc) in enumerate(role_list[:slides])
+            if i != (slide_num - 1)
+        )
+
+        system = textwrap.dedent(f"""\
+            You are a world-class prompt engineer and creative director for AXKAN brand social media content.
+            You create PROFESSIONAL, VIRAL-QUALITY image prompts for Instagram.
+
+            AXKAN BRAND IDENTITY — ALL content must reflect this visual identity:
+            - Brand: AXKAN — premium Mexican cultural brand.
+            - Color palette: Rosa Mexicano #E72A88 (primary), Turquesa Caribe #09ADC2, Naranja Calido #F39223, Verde Selva #8AB73B, Rojo #E52421
+            - Color rule: 60% white/neutral, 30% Rosa Mexicano, 10% accent colors
+            - Typography feel: Bold, chunky, impactful headlines. Clean condensed body text.
+            - Visual style: Premium, culturally authentic, vibrant but NOT neon. Saturated rich tones.
+            - Embraces: Pre-Hispanic symbolism, regional authenticity, sophisticated palettes
+            - Rejects: Stereotypes (sombreros/mustaches), neon gaudy colors, cheap tourist aesthetics
+            - Pattern elements: Tropical flowers, spiral motifs (caracol), tropical leaves, Mayan grecas
+            - Mood: Adventurous, fresh, passionate, colorful, vibrant — like a piña on a hot day.
+
+            AXKAN PRODUCT REALITY — CRITICAL, read carefully:
+            - AXKAN products are FLAT laser-cut MDF souvenirs with PRINTED illustrations
+            - They are FLAT pieces of wood (2-3mm thin) with vivid colorful prints on the surface
+            - They are NOT 3D, NOT clay, NOT ceramic, NOT handmade, NOT hand-painted
+            - They look like colorful illustrated stickers or fridge magnets — organic custom silhouette shapes
+            - NO visible wood border or MDF edge in the design — the illustration goes edge to edge
+            - The design IS the shape — like a die-cut sticker where the illustration defines the contour
+            - Think: bold colorful illustrated flat magnets with destination names in chunky colorful letters
+            - When showing products: vivid flat illustrated pieces, NOT 3D relief, NOT wood-framed
+
+            MANDATORY TEXT LANGUAGE:
+            - ALL text that appears ON images, slides, or videos MUST be in SPANISH 100%
+            - Headlines, subheadlines, CTAs, destination names — everything in SPANISH
+            - Never put English text on any visual. Spanish only.
+
+            PEOPLE & REALISM — CRITICAL WHEN ANY PERSON APPEARS:
+            - HYPERREALISTIC skin is MANDATORY — NEVER porcelain, smooth, airbrushed, or flawless
+            - Skin MUST show: visible pores on nose and cheeks, natural redness/flush on cheekbones,
+              slight uneven tone, T-zone shine, peach fuzz visible in side lighting, natural imperfections
+            - Include in the prompt: "real human skin texture with visible pores, natural redness on
+              cheekbones, slight T-zone shine, imperfect and lived-in, never airbrushed or smoothed"
+            - Under-eye area: bright and healthy, NO dark circles
+            - Hair: individual strands visible, flyaways, baby hairs, natural texture — never salon-perfect
+            - Hands: natural knuckle wrinkles, visible texture — never smooth porcelain
+            - The person should look like a real smartphone photo, NOT a retouched magazine cover
+            - No AI-looking uncanny faces, no cartoon people, no illustrated people
+
+            You are creating SOCIAL MEDIA CONTENT — images posted on Instagram as {content_type}s.
+            The content MUST look and feel like AXKAN brand — premium, culturally rich, Rosa Mexicano accented.
+
+            Topic/Subject: {destination}
+            {'Theme/mood: ' + theme if theme else ''}
+            Content type: {content_type} ({'video clips' if is_reel else 'static images'})
+            Local context: {', '.join(landmarks)}
+{content_type_block}
+{ref_analysis_block}
+            YOUR TASK: Generate exactly ONE prompt for SLIDE {slide_num} of {slides}.
+
+            YOUR SLIDE ROLE: {role_name} — {role_desc}
+
+            The full carousel sequence (for context, so your slide fits the story):
+{other_roles}
+
+            {"The prompt must be an EXTREMELY DETAILED natural language description (300-500 words). Include: exact skin texture details (pores, redness, imperfections), precise clothing description (fabric, color, fit, pattern), exact camera setup (lens mm, aperture, distance), lighting (direction, color temperature, shadows), environment details (surfaces, objects, atmosphere), character pose and expression (micro-details: which way eyes look, mouth position, hand placement), anti-AI imperfections (grain, motion blur, off-center framing). The more specific and detailed, the more accurate the result." if content_type == "character" else "The prompt must be a HIGHLY DETAILED natural language description (150-300 words). Include: specific camera lens and aperture (e.g. 35mm f/2.8), exact lighting setup (direction, color temperature, shadow quality), material textures (fabric weave, surface finish, skin detail), environment specifics (surfaces, objects, depth layers), color grading (warm/cool, saturation level, contrast). More detail = more realistic output."}
+            Professional photography/editorial quality — specify camera angle, lighting, color mood, composition.
+            Any text visible in the image MUST be in SPANISH.
+
+            PHOTOREALISM KEYWORDS — ALWAYS end every prompt_text with these exact words:
+            "ultra-high resolution, 4K, sharp focus, high frequency detail, photorealistic, RAW photo,
+            high dynamic range, crisp fine detail on hair strands and fabric texture, no AI smoothing,
+            no plastic skin, natural film grain"
+            {'''DIALOGUE / SPEECH RULES FOR VIDEO (CRITICAL):
+            Generate a "speech" field with 1-2 sentences in Mexican Spanish.
+            This speech will be embedded into the video prompt using Veo 3 dialogue format.
+
+            VEO 3 SPANISH DIALOGUE FORMAT — the prompt_text MUST include dialogue like this:
+            "The character says in a clear Mexican Spanish accent: '¿Texto en español aquí?'"
+
+            RULES:
+            - Write the SCENE DESCRIPTION in English
+            - Write the DIALOGUE in Spanish, inside quotation marks
+            - ALWAYS specify "in a Mexican Spanish accent" or "speaking Mexican Spanish"
+            - Keep dialogue SHORT (under 15 words) — long sentences sound unnatural
+            - The speech field contains the raw Spanish text
+            - The prompt_text must embed the dialogue using: says in Mexican Spanish: "texto"
+            - Add "(no subtitles)" at the end of the prompt to prevent text overlays
+
+            PRONUNCIATION & SPELLING RULES FOR DIALOGUE:
+            - AXKAN must ALWAYS be written as "AXKÁN" (with accent on A)
+            - souvenirs must be written as "suvenirs" (phonetic spelling for correct pronunciation)
+            - imanes must be written as "imánes" (accent on a)
+            - Words with accents must emphasize the accented syllable clearly
+            - NEVER include the words "punta" or "sexo" in any dialogue
+            - Write dialogue phonetically clear — every syllable must be pronounceable
+            - Avoid complex compound words that AI might slur together
+            - Prefer short punchy phrases over long flowing sentences
+            ''' if is_reel else ''}
+
+            Respond with ONLY valid JSON, no markdown fences, no explanation:
+            {{
+                "slide_number": {slide_num},
+                "slide_name": "{role_name}",
+                "prompt_text": "scene description in English... The character says in a clear Mexican Spanish accent: 'dialogo en español' (no subtitles)...",
+                {"\"speech\": \"dialogo en español puro...\"," if is_reel else ""}
+                "estimated_time": "~30s"
+            }}
+        """)
+
+        user_msg = (
+            f"Generate 1 professional {content_type} image prompt for SLIDE {slide_num}: {role_name}. "
+            f"Topic: {destination}."
+        )
+        if theme:
+            user_msg += f" Theme: {theme}."
+
+        if has_pre_analysis:
+            # Use pre-analyzed text (fast — no image reads needed)
+            user_msg += (
+                f"\n\nREFERENCE IMAGE ANALYSIS (pre-analyzed):\n{ref_analysis_text}\n\n"
+                f"Generate a prompt that MATCHES this visual style precisely."
+            )
+        elif has_refs:
+            # Fallback: read images directly (slower)
+            paths_str = "\n".join(f"  - {p}" for p in saved_ref_paths)
+            user_msg += (
+                f"\n\nRead ALL reference images at:\n{paths_str}\n"
+                f"Analyze the style deeply and generate a prompt that MATCHES this visual style."
+            )
+
+        # Write to per-slide temp files
+        slide_dir = os.path.join(tmp_dir, f"slide_{slide_num}")
+        os.makedirs(slide_dir, exist_ok=True)
+        sys_file = os.path.join(slide_dir, "system.txt")
+        with open(sys_file, "w") as f:
+            f.write(system)
+
+        # If pre-analysis done, single turn (no tools needed). Otherwise multi-turn with Read.
+        with router.route("slide", reads=has_refs and not has_pre_analysis) as route:
+            cmd = ["claude", "-p", "--system-prompt-file", sys_file, *route.args("Read,Glob")]
+            print(f"  [Slide {slide_num}] Starting generation...")
+            proc = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE, text=True, cwd=tmp_dir,
+            )
+            try:
+                stdout, stderr = communicate(proc, input=user_msg, timeout=90)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                raise ValueError(f"Slide {slide_num} timed out")
+
+            output = stdout.strip()
+            if not output or len(output) < 20:
+                raise ValueError(f"Slide {slide_num} empty output")
+
+            # Extract JSON object from output
+            text = output
+            if "```json" in text:
+                text = text.split("```json", 1)[1]
+                if "```" in text:
+                    text = text.split("```", 1)[0]
+                text = text.strip()
+            elif "```" in text:
+                parts = text.split("```")
+                if len(parts) >= 3:
+                    text = parts[1].strip()
+
+            # Find JSON object { ... }
+            brace_start = text.find("{")
+            if brace_start >= 0:
+                brace_end = text.rfind("}")
+                if brace_end > brace_start:
+                    text = text[brace_start:brace_end + 1]
+
+            result = json.loads(text)
+        result["slide_number"] = slide_num
+        result.setdefault("slide_name", role_name)
+        result.setdefault("estimated_time", "~30s")
+        if is_reel:
+            result.setdefault("speech", "")
+        else:
+            result["speech"] = ""
+
+        print(f"  [Slide {slide_num}] Done ✓")
+        return result
+
+    # Fire ALL slides in parallel
+    set_progress(phase="generating", done=0)
+    print(f"[Claude Prompts] Generating {slides} prompts in PARALLEL for {destination}...")
+    prompts = [None] * slides
+    with ThreadPoolExecutor(max_workers=slides) as executor:
+        futures = {
+            executor.submit(generate_single_slide, i + 1): i
+            for i in range(slides)
+        }
+        for future in as_completed(futures):
+            idx = futures[future]
+            bump_progress()
+            try:
+                prompts[idx] = future.result()
+            except Exception as e:
+                print(f"  [Slide {idx+1}] FAILED: {e}")
+                # Use role info for a minimal fallback
+                role_name, role_desc = role_list[idx % len(role_list)]
+                prompts[idx] = {
+                    "slide_number": idx + 1,
+                    "slide_name": role_name,
+                    "prompt_text": f"Professional {content_type} image of {destination}. {role_desc}. {theme or ''}. Professional photography, vivid colors, 4:5 vertical.",
+                    "speech": "",
+                    "estimated_time": "~30s",
+                }
+
+    # Cleanup
+    try:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+    except Exception:
+        pass
+
+    set_progress(phase="complete")
+    print(f"[Claude Prompts] All {slides} slides complete ✓")
+    return prompts
+
+
+def _generate_prompts_gemini(
+    destination, slides, content_type,
+    theme, reference_image, is_reel, landmarks,
+):
+    if content_type == "character":
+        role_list = CHARACTER_ROLES
+    elif content_type == "living":
+        role_list = LOOP_ROLES
+    elif is_reel:
+        role_list = REEL_ROLES
+    else:
+        role_list = CAROUSEL_ROLES
+    system_prompt = textwrap.dedent(f"""\
+        You are a world-class creative director specializing in social media content.
+        You create professional, viral-quality images for Instagram.
+
+        Topic/Subject: {destination}
+        Local context/elements: {', '.join(landmarks)}
+        Content type: {content_type} ({'video clips' if is_reel else 'static images'})
+        {'Theme/mood: ' + theme if theme else ''}
+
+        Generate exactly {slides} detailed image-generation prompts for professional social media content.
+        Each prompt must be 3-5 sentences describing the exact visual for an AI image generator.
+        Include lighting, composition, color mood, camera angle, and atmosphere.
+        DO NOT create product designs, souvenirs, or merchandise. Create real social media photography/graphics.
+        {'Also generate a "speech" field (1-2 sentences in Mexican Spanish). In the prompt_text, embed dialogue as: The character says in a clear Mexican Spanish accent: "texto" (no subtitles)' if is_reel else ''}
+
+        Respond ONLY with valid JSON — an array of objects:
+        [{{
+            "slide_number": 1,
+            "slide_name": "name",
+            "prompt_text": "detailed prompt...",
+            {"\"speech\": \"narration text...\"," if is_reel else ""}
+            "estimated_time": "~30s"
+        }}]
+    """)
+
+    resp = gemini_model().generate_content(system_prompt)
+    text = resp.text.strip()
+    # Strip markdown code fences if present
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1]
+        if text.endswith("```"):
+            text = text[:-3]
+        text = text.strip()
+    prompts = json.loads(text)
+
+    # Normalize
+    for i, p in enumerate(prompts):
+        p.setdefault("slide_number", i + 1)
+        p.setdefault("slide_name", f"Slide {i+1}")
+        p.setdefault("estimated_time", "~30s")
+        if is_reel:
+            p.setdefault("speech", "")
+        else:
+            p["speech"] = ""
+    return prompts[:slides]
+
+
+def _generate_prompts_template(
+    destination, slides, content_type,
+    theme, is_reel, landmarks,
+):
+    if content_type == "character":
+        role_list = CHARACTER_ROLES
+    elif content_type == "living":
+        role_list = LOOP_ROLES
+    elif is_reel:
+        role_list = REEL_ROLES
+    else:
+        role_list = CAROUSEL_ROLES
+    prompts = []
+
+    color_moods = [
+        "warm golden hour tones with deep shadows",
+        "cool blue and teal tones with crisp contrast",
+        "vibrant saturated colors with high energy",
+        "earthy warm tones with rich terracotta accents",
+        "moody dramatic lighting with pops of vivid color",
+        "bright and airy with soft pastel accents",
+        "rich jewel tones — emerald, ruby, sapphire",
+        "sunset palette — coral, amber, magenta, gold",
+    ]
+    composition_angles = [
+        "centered hero composition with shallow depth of field",
+        "dramatic low-angle perspective with sky in background",
+        "overhead flat-lay arrangement on textured surface",
+        "three-quarter angle with natural bokeh background",
+        "extreme close-up macro detail shot with soft focus edges",
+        "wide establishing shot with environmental storytelling",
+        "dynamic diagonal composition with leading lines",
+        "symmetrical frontal view with dramatic lighting",
+    ]
+    settings = [
+        "rustic wooden table with warm ambient light",
+        "colorful Mexican street with painted walls",
+        "lush tropical garden with dappled sunlight",
+        "modern minimalist surface with dramatic shadows",
+        "bustling market with vibrant textiles and produce",
+        "beach at golden hour with warm sand",
+        "colonial architecture with cobblestone details",
+        "cozy interior with natural window light",
+    ]
+    visual_elements = [
+        "marigolds, candles, and warm textures",
+        "tropical flowers, palm fronds, and natural light",
+        "ocean waves, sand patterns, and sea glass",
+        "cacti, succulents, and desert light",
+        "architectural details, wrought iron, and stone textures",
+        "street food, fresh produce, and clay pottery",
+        "monarch butterflies, agave plants, and wildflowers",
+        "textiles, embroidery patterns, and handcrafted objects",
+    ]
+
+    speeches_casual = [
+        f"¡Mira lo increíble que es {destination}! Esto tienes que vivirlo.",
+        f"¿Ya conoces {destination}? Es un lugar que te roba el corazón.",
+        f"Los colores de {destination} son otro nivel. ¡Mira estos detalles!",
+        f"Cada rincón de {destination} cuenta una historia diferente.",
+        f"{destination} tiene una energía única. ¿Ya lo sentiste?",
+        f"De {destination} para el mundo — pura magia mexicana.",
+        f"Tu próximo viaje tiene que ser a {destination}. Así se ve.",
+        f"¡Esto es {destination}! Desliza para ver más.",
+    ]
+
+    for i in range(slides):
+        idx = i % len(role_list)
+        role_name, role_desc = role_list[idx]
+        landmark = landmarks[i % len(landmarks)]
+        color_mood = color_moods[i % len(color_moods)]
+        angle = composition_angles[i % len(composition_angles)]
+        setting = settings[i % len(settings)]
+        elements = visual_elements[i % len(visual_elements)]
+
+        theme_line = f" Theme: {theme}." if theme else ""
+
+        prompt_text = (
+            f"Professional Instagram {content_type} image of {destination}. "
+            f"This slide is the {role_name}: {role_desc}. "
+            f"Composition: {angle}, set in {setting}. "
+            f"Visual elements include {landmark}, {elements}. "
+            f"Color mood: {color_mood}. "
+            f"Professional photography quality — crisp, well-lit, editorial feel. "
+            f"4:5 vertical format optimized for Instagram feed.{theme_line}"
+        )
+
+        speech = ""
+        if is_reel:
+            speech = speeches_casual[i % len(speeches_casual)]
+
+        prompts.append({
+            "slide_number": i + 1,
+            "slide_name": role_name,
+            "prompt_text": prompt_text,
+            "speech": speech,
+            "estimated_time": "~30s" if is_reel else "~45s",
+        })
+
+    return prompts
+
+
+def _enhance_prompt_for_video(raw_prompt, speech=""):
+    """Use local claude CLI to enhance a raw user prompt into a cinematic video prompt."""
+    system = (
+        "You are a video prompt engineer for Envato Video Gen. "
+        "Take the user's rough idea and rewrite it as a single, detailed, cinematic video generation prompt. "
+        "Include: camera movement, lighting, mood, composition, timing, and visual style. "
+        "Keep it under 300 words. Output ONLY the enhanced prompt, nothing else. "
+        "Style: warm, bold, premium feel. Professional social media quality."
+    )
+    user_msg = raw_prompt
+    if speech:
+        user_msg += f'\n\nThe character speaks in a clear Mexican Spanish accent: "{speech}" (no subtitles)'
+
+    try:
+        with router.route("enhance") as route:
+            proc = subprocess.Popen(
+                ["claude", "-p", user_msg, "--system-prompt", system, *route.args()],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            stdout, _ = communicate(proc, timeout=60)
+            enhanced = stdout.strip()
+            if enhanced and len(enhanced) > 50:
+                return enhanced
+            route.fail("output too short")
+    except Exception as e:
+        print(f"[WARN] claude CLI failed: {e}")
+
+    return raw_prompt
+
+
+def generate_character_video_prompt(character_description, dialogue, destination=""):
+    """Use Claude CLI to generate a rich, cinematic character animation prompt."""
+    system = (
+        "You are a world-class animation prompt engineer for Envato Video Gen AI. "
+        "You create EXTREMELY DETAILED character animation prompts with professional-grade "
+        "animation directives. Your prompts are cinematic, precise, and produce stunning results.\n\n"
+        "RULES:\n"
+        "- Output ONLY the video prompt, nothing else. No explanations, no labels.\n"
+        "- Write in a single flowing paragraph (no bullets, no numbered lists).\n"
+        "- Include ALL of the following in every prompt:\n"
+        "  1. STARTING POSE: Describe the character's exact starting position based on the reference image\n"
+        "  2. ANIMATION PHYSICS: squash & stretch, anticipation, follow-through, overlapping action\n"
+        "  3. SECONDARY MOTION: constant micro-movements (breathing, blinking, subtle sway)\n"
+        "  4. CHARACTER-SPECIFIC PHYSICS: appendage physics (tails, ears, hair, gills, wings) with "
+        "     pendulum/spring dynamics\n"
+        "  5. TIMED ACTIONS: specific movements synchronized to the dialogue beats\n"
+        "  6. FACIAL EXPRESSIONS: eye movements, blinks, mouth sync, emotion transitions\n"
+        "  7. DIALOGUE INTEGRATION: embed the FULL dialogue in Spanish within the prompt using "
+        "     Embed dialogue using Veo 3 format: The character says in a clear Mexican Spanish accent: \"texto en español\"\n"
+        "     ALL dialogue MUST be in Mexican Spanish. Specify accent: 'Mexican Spanish accent'.\n"
+        "     Keep dialogue under 15 words per clip. Add '(no subtitles)' at end of prompt.\n"
+        "  8. ENDING POSE: final expression and position\n"
+        "  9. TECHNICAL: 24fps, 8-10 seconds, pure white infinite background, soft contact shadow\n"
+        "- The prompt should be 150-250 words.\n"
+        "- ALWAYS write the dialogue in Spanish exactly as provided.\n"
+    )
+
+    user_msg = (
+        f"CHARACTER: {character_description}\n"
+        f"DIALOGUE (Spanish): {dialogue}\n"
+    )
+    if destination:
+        user_msg += f"DESTINATION: {destination}\n"
+    user_msg += (
+        "\nGenerate a single, rich, cinematic animation prompt for this character speaking "
+        "this dialogue. Include animation physics, gesture timing, and the full dialogue embedded."
+    )
+
+    try:
+        with router.route("character") as route:
+            proc = subprocess.Popen(
+                ["claude", "-p", user_msg, "--system-prompt", system, *route.args()],
+                stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+            )
+            stdout, _ = communicate(proc, timeout=90)
+            enhanced = stdout.strip()
+            if enhanced and len(enhanced) > 80:
+                print(f"[Character Prompt] Claude generated {len(enhanced)} chars")
+                return enhanced
+            route.fail("output too short")
+    except Exception as e:
+        print(f"[WARN] Claude CLI failed for character prompt: {e}")
+
+    # Fallback: build a reasonable prompt manually
+    dest_phrase = f" en {destination}" if destination else ""
+    return (
+        f"Partiendo de la imagen de referencia donde el personaje ({character_description}) "
+        f"esta de pie sobre fondo blanco puro infinito, animar al personaje con calidad "
+        f"cinematografica profesional a 24fps durante 8-10 segundos aplicando fisica de animacion "
+        f"de alta gama con squash & stretch, anticipacion, follow-through y overlapping action. "
+        f"El personaje hace gestos expresivos con sus manos mientras habla, mueve la cabeza "
+        f"con energia, parpadea naturalmente. EL PERSONAJE SIEMPRE HABLA EN ESPANOL. "
+        f'The character says in a clear Mexican Spanish accent: "{dialogue}" (no subtitles). '
+        f"termina con una sonrisa amplia y pose orgullosa. "
+        f"Sombra de contacto suave en el suelo blanco puro."
+    )
+
+
+# ---------------------------------------------------------------------------
+# 8. POST /api/video-prompts/generate
+# Claude CLI analyzes uploaded first-frame images and generates video prompts
+# ---------------------------------------------------------------------------
+def video_prompts_generate():
+    data = request.get_json() or {}
+    session_id = data.get("session_id")
+    destination = data.get("destination", "")
+    content_type = data.get("content_type", "living")
+    theme = data.get("theme", "")
+    video_clip_count = int(data.get("video_clip_count", 0))
+    original_prompts = data.get("original_prompts", [])
+
+    # Get uploaded images from session
+    sid, sess = get_session(session_id)
+    wait_for_ingest(sid)
+    upload_dir = SESSIONS_DIR / sid / "uploads"
+    clean_dir = SESSIONS_DIR / sid / "clean"
+
+    # Find images (prefer clean, fallback to uploads)
+    img_dir = clean_dir if clean_dir.exists() else upload_dir
+    image_files = []
+    if img_dir.exists():
+        for f in sorted(img_dir.iterdir()):
+            if f.is_file() and f.suffix.lower() in (".png", ".jpg", ".jpeg", ".webp"):
+                image_files.append(str(f))
+
+    if not image_files:
+        return jsonify({"error": "No images found in session"}), 400
+
+    # Build context from original prompts
+    slides_context = ""
+    if original_prompts:
+        slides_context = "\n".join(
+            f"  Slide {i+1} ({p.get('slide_name', '')}): {p.get('prompt_text', '')[:100]}..."
+            + (f"\n    Speech: {p['speech']}" if p.get('speech') else "")
+            for i, p in enumerate(original_prompts)
+        )
+
+    system = textwrap.dedent(f"""\
+        You are a world-class video animation prompt engineer for Envato Video Gen AI.
+        You create EXTREMELY DETAILED cinematic video animation prompts.
+
+        CONTEXT:
+        - Style: professional social media content, premium quality.
+        - Destination: {destination}
+        - Content type: {content_type}
+        {'- Theme: ' + theme if theme else ''}
+        - You have {len(image_files)} first-frame images to analyze.
+        - The user wants {video_clip_count or len(image_files)} video clips total.
+
+        ORIGINAL SLIDE PROMPTS (for context/story):
+{slides_context}
+
+        TASK: Read the image file(s), then generate EXACTLY {video_clip_count or len(image_files)} video animation prompts.
+        Output EXACTLY {video_clip_count or len(image_files)} JSON objects.
+
+        {"LOOP VIDEO STRUCTURE — THIS IS CRITICAL:" if content_type == "living" else "STORY STRUCTURE — THIS IS CRITICAL:"}
+        {"Each image is an INDEPENDENT video. Each image gets its OWN unique loop animation." if content_type == "living" else ""}
+        {"The SAME IMAGE is used as BOTH the Start Frame AND End Frame for each video." if content_type == "living" else ""}
+        {"The animation MUST start from the exact image composition and RETURN to the exact same composition by the end." if content_type == "living" else ""}
+        {"In the MIDDLE, create MIND-BLOWING, extremely attention-grabbing animations:" if content_type == "living" else ""}
+        {"- Objects flying out, rotating, exploding, morphing, floating in 3D space" if content_type == "living" else ""}
+        {"- Dramatic camera movements (orbit, zoom, dolly, crane shots)" if content_type == "living" else ""}
+        {"- Particles, confetti, light rays, energy bursts, sparkles" if content_type == "living" else ""}
+        {"- Elements separating, dancing, interacting with each other in wild ways" if content_type == "living" else ""}
+        {"- Then SMOOTHLY reverse everything back to the original position" if content_type == "living" else ""}
+        {"- The last frame MUST match the first frame EXACTLY for a perfect seamless loop" if content_type == "living" else ""}
+        {"EVERY animation must be DIFFERENT and UNIQUE — no two videos should have the same type of movement." if content_type == "living" else ""}
+        {'''ALL clips together MUST tell ONE COHERENT STORY — a narrative arc with:
+        - Clip 1: HOOK — grab attention, introduce the character/scene, create curiosity
+        - Middle clips: DEVELOP the story — reveal, explore, build tension or interest
+        - Last clip: PAYOFF — deliver the emotional resolution, satisfying conclusion
+        Whether it's 1 clip or 6, the content must feel like a complete narrative.
+        Each clip extends the previous one — they are SEQUENTIAL SCENES of the same story.''' if content_type != "living" else ""}
+        The first uploaded image is the visual starting point (first frame of clip 1).
+
+        {'''FOR EACH VIDEO PROMPT INCLUDE (CHARACTER / TALKING HEAD):
+        1. CHARACTER START: Exact pose and expression from the image — resting mouth, soft gaze, natural posture
+        2. LIP SYNC: The character speaks the SPEECH below in clear Mexican Spanish. Mouth shapes realistic,
+           not exaggerated cartoon. Micro pauses between phrases. Breathing between sentences.
+        3. FACIAL MICRO-EXPRESSION: Natural eye blinks every 2-4s, subtle brow movement, warm eye contact with lens
+        4. HEAD / BODY: Gentle micro head tilts tied to speech rhythm, natural shoulder settle, NO over-acting
+        5. EYE CONTACT: Direct to lens throughout — this is a talking-head to camera
+        6. BREATHING: Visible chest rise/fall tied to speech pace
+        7. CAMERA: Locked, static shot (slight natural sway allowed). NO zooms, NO pans — the speech carries the clip.
+        8. AUDIO: Speech is REQUIRED. Embed using Veo 3 format:
+           The character says in a clear Mexican Spanish accent: "texto en español" (no subtitles)
+        9. DURATION: 3-8s per clip, enough for ~1 sentence.
+        ''' if content_type == "character" else '''FOR EACH VIDEO PROMPT INCLUDE:
+        1. STARTING POSE: Describe exact starting position from the image
+        2. ANIMATION PHYSICS: squash & stretch, anticipation, follow-through
+        3. SECONDARY MOTION: breathing, blinking, subtle sway, micro-movements
+        4. CAMERA MOVEMENT: pan, zoom, dolly, tracking shots
+        5. TIMED ACTIONS: specific movements and transitions
+        6. MOOD & LIGHTING: atmosphere changes, color shifts
+        7. If speech exists, embed it in the video_prompt using Veo 3 format:
+           The character says in a clear Mexican Spanish accent: "texto en español" (no subtitles)
+        8. TECHNICAL: 24fps, 5-8 seconds, smooth transitions
+        '''}
+
+        Each video prompt: 100-200 words, vivid natural language.
+        slide_name in SPANISH. speech {'ALWAYS non-empty' if content_type == 'character' else 'populated only if the flow uses dialogue'} in Mexican Spanish.
+        ALL dialogue MUST be in Mexican Spanish — specify "Mexican Spanish accent" explicitly.
+
+        CRITICAL: Output EXACTLY {video_clip_count or len(image_files)} objects in the JSON array. No more, no less.
+
+        OUTPUT FORMAT — ONLY valid JSON, no markdown fences:
+        [{{
+            "slide_name": "nombre en espanol",
+            "video_prompt": "cinematic prompt in English... The character says in a clear Mexican Spanish accent: 'dialogo en español' (no subtitles)",
+            "speech": "dialogo en español puro",
+            "estimated_time": "~5s"
+        }}]
+    """)
+
+    # --- Phase 0: Pre-analyze ALL images in one call (shared across parallel generations) ---
+    tmp_dir = tempfile.mkdtemp(prefix="claude-vidprompts-")
+    image_analyses = {}  # idx → text analysis
+
+    print(f"[Video Prompts] Phase 0: Analyzing {len(image_files)} images in one call...")
+    analysis_system = (
+        "You are a visual analysis expert. Read ALL the images and output a SEPARATE analysis for each one. "
+        "For each image, describe: subject, style, color palette, composition, objects, text visible, background, mood. "
+        "Be specific enough to reproduce each image's content. Format:\n"
+        "IMAGE 1:\n[analysis]\n\nIMAGE 2:\n[analysis]\n\netc."
+    )
+    analysis_user = "Read and analyze each image separately:\n" + "\n".join(f"  {i+1}. {p}" for i, p in enumerate(image_files))
+    analysis_dir = os.path.join(tmp_dir, "analysis")
+    os.makedirs(analysis_dir, exist_ok=True)
+    sys_file_a = os.path.join(analysis_dir, "system.txt")
+    with open(sys_file_a, "w") as f:
+        f.write(analysis_system)
+    try:
+        with router.route("analysis", reads=True) as route:
+            proc = subprocess.Popen(
+                ["claude", "-p", "--system-prompt-file", sys_file_a, *route.args("Read")],
+                stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                text=True, cwd=tmp_dir,
+            )
+            stdout, _ = communicate(proc, input=analysis_user, timeout=60)
+            if not stdout or len(stdout.strip()) <= 50:
+                route.fail("output too short")
+        if stdout and len(stdout.strip()) > 50:
+            full_analysis = stdout.strip()
+            # Split by IMAGE N: markers
+            for i in range(len(image_files)):
+                marker = f"IMAGE {i+1}:"
+                next_marker = f"IMAGE {i+2}:"
+                if marker in full_analysis:
+                    start = full_analysis.index(marker) + len(marker)
+                    end = full_analysis.index(next_marker) if next_marker in full_analysis else len(full_analysis)
+                    image_analyses[i] = full_analysis[start:end].strip()
+            # If markers didn't work, use the whole thing for all
+            if not image_analyses:
+                for i in range(len(image_files)):
+                    image_analyses[i] = full_analysis
+            print(f"[Video Prompts] Phase 0: Done — {len(image_analyses)} analyses")
+        else:
+            print(f"[Video Prompts] Phase 0: Too short, falling back to per-image reads")
+    except Exception as e:
+        print(f"[Video Prompts] Phase 0: Failed ({e}), falling back to per-image reads")
+
+    has_pre_analysis = len(image_analyses) > 0
+
+    def generate_single_video_prompt(img_idx):
+        """Generate one video prompt for one image via Claude CLI."""
+        img_path = image_files[img_idx]
+        slide_dir = os.path.join(tmp_dir, f"vid_{img_idx}")
+        os.makedirs(slide_dir, exist_ok=True)
+        sys_file = os.path.join(slide_dir, "system.txt")
+        with open(sys_file, "w") as f:
+            f.write(system)
+
+        if has_pre_analysis and img_idx in image_analyses:
+            # Fast single-turn — no image read needed
+            user_msg = (
+                f"Generate ONE video animation prompt based on this image analysis:\n\n"
+                f"IMAGE ANALYSIS:\n{image_analyses[img_idx]}\n\n"
+                f"Create a cinematic video prompt that animates this image. Topic: {destination}."
+            )
+        else:
+            # Fallback — read image directly
+            user_msg = (
+                f"Read this image and generate ONE video animation prompt:\n"
+                f"  {img_path}\n\n"
+                f"Analyze the image deeply — extract the subject, style, composition, colors. "
+                f"Then create a video prompt that animates this specific image with cinematic quality. "
+                f"Topic: {destination}."
+            )
+
+        fast = has_pre_analysis and img_idx in image_analyses
+        with router.route("video_prompt", reads=not fast) as route:
+            cmd = ["claude", "-p", "--system-prompt-file", sys_file, *route.args("Read")]
+            print(f"  [Video {img_idx+1}] Starting generation {'(fast)' if has_pre_analysis else '(with read)'}...")
+            proc = subprocess.Popen(
+                cmd, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE, text=True, cwd=tmp_dir,
+            )
+            try:
+                stdout, stderr = communicate(proc, input=user_msg, timeout=90)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                raise ValueError(f"Video {img_idx+1} timed out")
+
+            output = stdout.strip()
+            if not output or len(output) < 20:
+                raise ValueError(f"Video {img_idx+1} empty output")
+
+            # Extract JSON object
+            text = output
+            if "```json" in text:
+                text = text.split("```json", 1)[1].split("```", 1)[0].strip()
+            elif "```" in text:
+                parts = text.split("```")
+                if len(parts) >= 3:
+                    text = parts[1].strip()
+
+            # Try to parse as array first, then as object
+            if text.strip().startswith("["):
+                arr = json.loads(text)
+                result = arr[0] if arr else {}
+            else:
+                brace_start = text.find("{")
+                brace_end = text.rfind("}")
+                if brace_start >= 0 and brace_end > brace_start:
+                    text = text[brace_start:brace_end + 1]
+                result = json.loads(text)
+
+        result.setdefault("slide_name", f"Video {img_idx+1}")
+        result.setdefault("video_prompt", "")
+        result.setdefault("speech", "")
+        result.setdefault("estimated_time", "~5s")
+        print(f"  [Video {img_idx+1}] Done ✓")
+        return result
+
+    num_videos = video_clip_count or len(image_files)
+    print(f"[Video Prompts] Generating {num_videos} prompts in PARALLEL...")
+    video_prompts = [None] * num_videos
+
+    with ThreadPoolExecutor(max_workers=num_videos) as executor:
+        futures = {
+            executor.submit(generate_single_video_prompt, i): i
+            for i in range(num_videos)
+        }
+        for future in as_completed(futures):
+            idx = futures[future]
+            try:
+                video_prompts[idx] = future.result()
+            except Exception as e:
+                print(f"  [Video {idx+1}] FAILED: {e}")
+                video_prompts[idx] = {
+                    "slide_name": f"Video {idx+1} (error)",
+                    "video_prompt": f"Error generating prompt: {e}",
+                    "speech": "",
+                    "estimated_time": "~5s",
+                }
+
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    video_prompts = [vp for vp in video_prompts if vp is not None]
+    print(f"[Video Prompts] Got {len(video_prompts)} video prompts")
+    return jsonify({
+        "success": True,
+        "video_prompts": video_prompts,
+    })
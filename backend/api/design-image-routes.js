@@ -0,0 +1,245 @@
+/**
+ * Design Image Routes
+ * Content-addressed storage for the design images of orders sent by the
+ * orders generator (tools/orders-generator/backend_integration.py).
+ *
+ *   POST /api/design-images/check    { sha256: [...] } -> which images are missing
+ *   POST /api/design-images          multipart, one part per image, field name = its sha256
+ *   PUT  /api/design-images/:sha256  one chunk of a large image (Content-Range)
+ *
+ * Uploads are streamed to disk and hashed on the way, never held in memory;
+ * an image whose content doesn't match its sha256 is discarded. Stored
+ * images are served from /design-images/<sha256>.<ext>.
+ */
+
+import express from 'express';
+import multer from 'multer';
+import crypto from 'crypto';
+import fs from 'fs';
+import path from 'path';
+import { Transform } from 'stream';
+import { pipeline } from 'stream/promises';
+import { fileURLToPath } from 'url';
+import { log, logError } from '../shared/logger.js';
+
+const __filename = fileURLToPath(import.meta.url);
+const __dirname = path.dirname(__filename);
+
+const router = express.Router();
+
+const designImagesPath = path.join(__dirname, '../design-images');
+const partialPath = path.join(designImagesPath, 'partial');
+fs.mkdirSync(partialPath, { recursive: true });
+
+const SHA256 = /^[0-9a-f]{64}$/;
+const EXTENSIONS = new Set(['.jpg', '.jpeg', '.png', '.webp', '.gif', '.bmp', '.tif', '.tiff']);
+const MAX_PART_SIZE = 50 * 1024 * 1024;     // one multipart part; bigger images come in chunks
+const MAX_IMAGE_SIZE = 500 * 1024 * 1024;   // chunked upload total
+
+// sha256 -> stored file name, loaded once from disk
+const storedImages = new Map();
+for (const name of fs.readdirSync(designImagesPath)) {
+  const sha256 = name.split('.')[0];
+  if (SHA256.test(sha256)) storedImages.set(sha256, name);
+}
+
+function describe(sha256) {
+  const file = storedImages.get(sha256);
+  return {
+    sha256,
+    url: `/design-images/${file}`,
+    size: fs.statSync(path.join(designImagesPath, file)).size
+  };
+}
+
+// Move a verified upload into place (or drop it if another upload won)
+async function keepImage(tmpPath, sha256, filename) {
+  if (storedImages.has(sha256)) {
+    await fs.promises.rm(tmpPath, { force: true });
+  } else {
+    const ext = path.extname(filename || '').toLowerCase();
+    const file = `${sha256}${EXTENSIONS.has(ext) ? ext : '.img'}`;
+    await fs.promises.rename(tmpPath, path.join(designImagesPath, file));
+    storedImages.set(sha256, file);
+  }
+  return describe(sha256);
+}
+
+async function hashFile(filePath) {
+  const hash = crypto.createHash('sha256');
+  await pipeline(fs.createReadStream(filePath), hash);
+  return hash.digest('hex');
+}
+
+// Multer storage engine: each part goes straight to a temp file and
+// through sha256 on the way, so no image is buffered in memory
+const hashingStorage = {
+  _handleFile(req, file, cb) {
+    const tmpPath = path.join(partialPath, `${crypto.randomUUID()}.upload`);
+    const hash = crypto.createHash('sha256');
+    let size = 0;
+    const hasher = new Transform({
+      transform(chunk, encoding, done) {
+        hash.update(chunk);
+        size += chunk.length;
+        done(null, chunk);
+      }
+    });
+    pipeline(file.stream, hasher, fs.createWriteStream(tmpPath))
+      .then(() => cb(null, { path: tmpPath, size, sha256: hash.digest('hex') }))
+      .catch(error => fs.rm(tmpPath, { force: true }, () => cb(error)));
+  },
+  _removeFile(req, file, cb) {
+    fs.rm(file.path, { force: true }, cb);
+  }
+};
+
+const upload = multer({
+  storage: hashingStorage,
+  limits: {
+    fileSize: MAX_PART_SIZE,
+  },
+  fileFilter: (req, file, cb) => {
+    // Field name is the client's sha256 of the file
+    cb(null, SHA256.test(file.fieldname));
+  }
+});
+
+// ========================================
+// WHICH IMAGES ARE MISSING
+// ========================================
+router.post('/check', (req, res) => {
+  const hashes = req.body?.sha256;
+  if (!Array.isArray(hashes) || !hashes.every(h => SHA256.test(h))) {
+    return res.status(400).json({
+      success: false,
+      error: 'sha256 must be a list of hex SHA-256 hashes'
+    });
+  }
+
+  const known = {};
+  const missing = [];
+  const partial = {};   // chunked uploads that can be resumed: bytes already received
+  for (const sha256 of hashes) {
+    if (storedImages.has(sha256)) {
+      known[sha256] = describe(sha256);
+      continue;
+    }
+    missing.push(sha256);
+    const partPath = path.join(partialPath, `${sha256}.part`);
+    if (fs.existsSync(partPath)) partial[sha256] = fs.statSync(partPath).size;
+  }
+
+  res.json({ success: true, data: { known, missing, partial } });
+});
+
+// ========================================
+// MULTIPART UPLOAD
+// ========================================
+router.post('/', upload.any(), async (req, res) => {
+  try {
+    const stored = [];
+    const rejected = [];
+    for (const file of req.files || []) {
+      if (file.sha256 !== file.fieldname) {
+        await fs.promises.rm(file.path, { force: true });
+        rejected.push({ sha256: file.fieldname, error: 'Content does not match sha256' });
+        continue;
+      }
+      stored.push(await keepImage(file.path, file.sha256, file.originalname));
+    }
+
+    log('info', 'design-images.multipart-upload-stored');
+    res.json({ success: true, data: { stored, rejected } });
+  } catch (error) {
+    logError('design-images.error-storing-upload', error);
+    res.status(500).json({
+      success: false,
+      error: (error.message || 'Error desconocido')
+    });
+  }
+});
+
+// ========================================
+// CHUNKED UPLOAD (large images)
+// ========================================
+// Body: raw bytes start-end of the file, with Content-Range: bytes start-end/total.
+// Chunks must arrive in order; a chunk at the wrong offset gets 409 with the
+// bytes received so far, so an interrupted upload resumes where it stopped.
+router.put('/:sha256', async (req, res) => {
+  const { sha256 } = req.params;
+  try {
+    if (!SHA256.test(sha256)) {
+      return res.status(400).json({ success: false, error: 'Invalid sha256' });
+    }
+    if (storedImages.has(sha256)) {
+      req.resume();
+      return res.json({ success: true, data: { complete: true, ...describe(sha256) } });
+    }
+
+    const range = /^bytes (\d+)-(\d+)\/(\d+)$/.exec(req.get('Content-Range') || '');
+    if (!range) {
+      return res.status(400).json({ success: false, error: 'Content-Range: bytes start-end/total required' });
+    }
+    const [start, end, total] = range.slice(1).map(Number);
+    if (end < start || end >= total || total > MAX_IMAGE_SIZE) {
+      return res.status(400).json({ success: false, error: 'Invalid Content-Range' });
+    }
+
+    const partPath = path.join(partialPath, `${sha256}.part`);
+    const received = fs.existsSync(partPath) ? fs.statSync(partPath).size : 0;
+    if (start !== received) {
+      req.resume();
+      return res.status(409).json({ success: false, error: 'Unexpected offset', data: { received } });
+    }
+
+    await pipeline(req, fs.createWriteStream(partPath, { flags: 'a' }));
+    const size = fs.statSync(partPath).size;
+    if (size < total) {
+      return res.json({ success: true, data: { complete: false, received: size } });
+    }
+
+    if (size !== total || await hashFile(partPath) !== sha256) {
+      await fs.promises.rm(partPath, { force: true });
+      return res.status(422).json({ success: false, error: 'Content does not match sha256' });
+    }
+    const image = await keepImage(partPath, sha256, req.query.filename);
+    log('info', 'design-images.chunked-upload-stored');
+    res.json({ success: true, data: { complete: true, received: size, ...image } });
+  } catch (error) {
+    logError('design-images.error-storing-chunk', error);
+    res.status(500).json({
+      success: false,
+      error: (error.message || 'Error desconocido')
+    });
+  }
+});
+
+// ========================================
+// ERROR HANDLER FOR MULTER
+// ========================================
+router.use((error, req, res, next) => {
+  if (error instanceof multer.MulterError) {
+    if (error.code === 'LIMIT_FILE_SIZE') {
+      return res.status(413).json({
+        success: false,
+        error: 'Imagen demasiado grande para multipart (máximo 50MB); súbela por partes'
+      });
+    }
+    return res.status(400).json({
+      success: false,
+      error: (error.message || 'Error desconocido')
+    });
+  }
+
+  if (error) {
+    return res.status(400).json({
+      success: false,
+      error: (error.message || 'Error desconocido')
+    });
+  }
+
+  next();
+});
+
+export default router;
@@ -9,6 +9,7 @@
 import { Router } from 'express';
 import path from 'path';
 import fs from 'fs';
+import crypto from 'crypto';
 import { fileURLToPath } from 'url';
 import { query } from '../shared/database.js';
 import * as notionSync from '../agents/notion-agent/sync.js';
@@ -32,17 +33,62 @@ const reminderRouter = Router();
 // NOTION AGENT ENDPOINTS
 // ========================================
 
+// Orders created with an Idempotency-Key header (orders generator client).
+// A retry with the same key gets the first order back instead of creating
+// a duplicate; in-memory for now, like the assistant's conversations.
+// A key reused with a different body is refused (422) rather than replayed.
+const idempotentOrders = new Map();
+
+// Forget keys after 24 hours
+setInterval(() => {
+  const oneDayAgo = Date.now() - (24 * 60 * 60 * 1000);
+  for (const [key, value] of idempotentOrders.entries()) {
+    if (value.createdAt < oneDayAgo) {
+      idempotentOrders.delete(key);
+    }
+  }
+}, 60 * 60 * 1000); // Check every hour
+
 // Create order in Notion and local database
 router.post('/', async (req, res) => {
+  const idempotencyKey = req.get('Idempotency-Key');
   try {
-    const result = await notionSync.createOrderBothSystems(req.body);
+    const bodyHash = idempotencyKey &&
+      crypto.createHash('sha256').update(JSON.stringify(req.body ?? null)).digest('hex');
+    let entry = idempotencyKey && idempotentOrders.get(idempotencyKey);
+    if (entry && entry.bodyHash !== bodyHash) {
+      return res.status(422).json({
+        success: false,
+        error: 'Idempotency-Key already used for a different order'
+      });
+    }
+    const replayed = Boolean(entry);
+    if (!entry) {
+      // Stored before awaiting, so a retry arriving mid-creation waits for it
+      entry = { createdAt: Date.now(), bodyHash, result: notionSync.createOrderBothSystems(req.body) };
+      if (idempotencyKey) idempotentOrders.set(idempotencyKey, entry);
+    }
 
-    // Push notification (fire-and-forget)
-    pushService.notifyNewOrder(
-      result.orderNumber || req.body.orderNumber,
-      req.body.clientName,
-      req.body.totalPrice
-    );
+    let result;
+    try {
+      result = await entry.result;
+    } catch (error) {
+      if (idempotencyKey && idempotentOrders.get(idempotencyKey) === entry) {
+        idempotentOrders.delete(idempotencyKey); // failed: let a retry create it
+      }
+      throw error;
+    }
+
+    if (replayed) {
+      res.set('Idempotent-Replayed', 'true');
+    } else {
+      // Push notification (fire-and-forget)
+      pushService.notifyNewOrder(
+        result.orderNumber || req.body.orderNumber,
+        req.body.clientName,
+        req.body.totalPrice
+      );
+    }
 
     res.status(201).json({
       success: true,
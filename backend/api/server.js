@@ -51,6 +51,7 @@ import analyticsRoutes from './analytics-routes.js';
 import salespersonRoutes from './salesperson-routes.js';
 import productionRoutes from './production-routes.js';
 import designPortalRoutes from './design-portal-routes.js';
+import designImageRoutes from './design-image-routes.js';
 import { generateCatalogPDF, getCatalogUrl } from '../services/catalog-generator.js';
 import pushService from '../services/push-notification.js';
 import { log, logError } from '../shared/logger.js';
@@ -322,6 +323,14 @@ if (!fs.existsSync(salesDigestsPath)) {
 app.use('/sales-digests', express.static(salesDigestsPath));
 log('info', 'server.serving-sales-digests-from-public-whatsapp-needs-d');
 
+// Order design images (uploaded by the orders generator, content-addressed)
+const designImagesPath = path.join(__dirname, '../design-images');
+if (!fs.existsSync(designImagesPath)) {
+  fs.mkdirSync(designImagesPath, { recursive: true });
+}
+app.use('/design-images', authMiddleware, express.static(designImagesPath));
+log('info', 'server.serving-design-images-from-auth-protected');
+
 // ========================================
 // HEALTH CHECK
 // ========================================
@@ -465,6 +474,7 @@ app.use('/api/mercadolibre', authMiddleware, mercadolibreRoutes);
 // ========================================
 app.use('/api/orders', authMiddleware, orderRoutes);
 app.use('/api/reminders', authMiddleware, reminderRoutes);
+app.use('/api/design-images', authMiddleware, designImageRoutes);
 
 // ========================================
 // EMPLOYEE DASHBOARD ROUTES
@@ -23,17 +23,11 @@ import os
 import sys
 import subprocess
 import json
-from datetime import datetime
 from pathlib import Path
 import tkinter as tk
 from tkinter import messagebox, filedialog, simpledialog
 from PIL import Image as PILImage, ImageGrab, ImageTk, ImageDraw, ImageFont
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.pdfbase import pdfform
 import yaml
 
 
@@ -50,217 +44,9 @@ AXKAN_COLORS = {
 }
 
 
-class OrderImageAnalyzer:
-    """Analyzes order images and extracts design cells"""
-
-    def __init__(self, image):
-        self.image = image
-        self.width, self.height = image.size
-
-    def detect_grid_layout(self):
-        """
-        Detect the grid layout by analyzing whitespace gaps between content regions.
-        Returns (rows, cols) tuple.
-        """
-        # Convert to grayscale for analysis
-        gray = self.image.convert('L')
-
-        # Detect grid by finding whitespace gaps (bright regions) between content (dark regions)
-        cols, rows = self._detect_by_regularity(gray)
-
-        # Validate detected grid
-        if cols >= 1 and rows >= 1 and cols <= 6 and rows <= 6:
-            return (rows, cols)
-
-        # Fallback to aspect ratio method if detection fails
-        return self._fallback_aspect_ratio_detection()
-
-    def _detect_by_regularity(self, gray_image):
-        """
-        Detect grid by finding whitespace gaps between content regions.
-        Looks for consistent vertical and horizontal white/light strips.
-        """
-        height = gray_image.height
-        width = gray_image.width
-
-        # For columns: compute average brightness of each vertical strip
-        col_brightness = []
-        sample_step = max(1, height // 50)
-        for x in range(width):
-            total = sum(gray_image.getpixel((x, y)) for y in range(0, height, sample_step))
-            avg = total / (height // sample_step)
-            col_brightness.append(avg)
-
-        # For rows: compute average brightness of each horizontal strip
-        row_brightness = []
-        sample_step_x = max(1, width // 50)
-        for y in range(height):
-            total = sum(gray_image.getpixel((x, y)) for x in range(0, width, sample_step_x))
-            avg = total / (width // sample_step_x)
-            row_brightness.append(avg)
-
-        # Find whitespace gaps - regions that are significantly brighter (whiter)
-        cols = self._count_regions_by_brightness(col_brightness, width)
-        rows = self._count_regions_by_brightness(row_brightness, height)
-
-        return cols, rows
-
-    def _count_regions_by_brightness(self, brightness, total_size):
-        """Count content regions by finding whitespace gaps"""
-        if not brightness or total_size < 10:
-            return 1
-
-        # Light smoothing to reduce noise, but preserve structure
-        window = max(3, total_size // 200)
-        smoothed = self._smooth_profile(brightness, window)
-
-        # Find max brightness (white = ~255)
-        max_brightness = max(smoothed)
-        min_brightness = min(smoothed)
-        brightness_range = max_brightness - min_brightness
-
-        if brightness_range < 20:
-            # Very uniform image, can't detect gaps
-            return 1
-
-        # Whitespace threshold: must be very close to max brightness (pure white)
-        # Use 90% of the way from min to max
-        whitespace_threshold = min_brightness + brightness_range * 0.90
-
-        # Content threshold: anything not pure white counts as content
-        # Use 85% of the way from min to max (very lenient to catch light-colored content like yellow)
-        content_threshold = min_brightness + brightness_range * 0.85
-
-        # Minimum gap size to count as a divider (at least 0.5% of total size)
-        min_gap_size = max(2, total_size // 200)
-
-        # Minimum content size (at least 5% of total size)
-        min_content_size = total_size // 20
-
-        # Find gaps (consecutive whitespace regions)
-        gaps = []
-        in_gap = False
-        gap_start = 0
-
-        for i, b in enumerate(smoothed):
-            if b >= whitespace_threshold:
-                if not in_gap:
-                    gap_start = i
-                    in_gap = True
-            else:
-                if in_gap and i - gap_start >= min_gap_size:
-                    gaps.append((gap_start, i))
-                in_gap = False
-
-        # Also check for gap at the end
-        if in_gap and len(smoothed) - gap_start >= min_gap_size:
-            gaps.append((gap_start, len(smoothed)))
-
-        # Filter gaps that are at the edges (not between content)
-        # Keep only interior gaps that separate content regions
-        interior_gaps = []
-
-        for gap_start_pos, gap_end_pos in gaps:
-            # Skip gaps at the very beginning or end
-            if gap_start_pos < min_gap_size:
-                continue
-            if gap_end_pos > total_size - min_gap_size:
-                continue
-
-            # Check if there's content before and after
-            has_content_before = any(
-                smoothed[i] < content_threshold
-                for i in range(max(0, gap_start_pos - min_content_size), gap_start_pos)
-            )
-            has_content_after = any(
-                smoothed[i] < content_threshold
-                for i in range(gap_end_pos, min(len(smoothed), gap_end_pos + min_content_size))
-            )
-
-            if has_content_before and has_content_after:
-                interior_gaps.append((gap_start_pos, gap_end_pos))
-
-        # Number of content regions = number of interior gaps + 1
-        num_regions = len(interior_gaps) + 1
-
-        # Sanity check
-        return max(1, min(8, num_regions))
-
-    def _smooth_profile(self, profile, window=5):
-        """Apply simple moving average smoothing"""
-        if window < 1:
-            window = 1
-        smoothed = []
-        half_w = window // 2
-        for i in range(len(profile)):
-            start = max(0, i - half_w)
-            end = min(len(profile), i + half_w + 1)
-            avg = sum(profile[start:end]) / (end - start)
-            smoothed.append(avg)
-        return smoothed
-
-    def _fallback_aspect_ratio_detection(self):
-        """Fallback detection based on aspect ratio"""
-        aspect = self.width / self.height
-
-        if aspect > 1.8:
-            return (1, 3)
-        elif aspect > 1.3:
-            return (2, 3)
-        elif aspect > 0.9:
-            if self.width > 1000:
-                return (3, 3)
-            else:
-                return (2, 2)
-        else:
-            return (3, 2)
-
-    def crop_designs(self, rows, cols, padding_top_pct=0.12, padding_bottom_pct=0.08):
-        """
-        Crop individual designs from the grid.
-
-        Args:
-            rows: Number of rows in grid
-            cols: Number of columns in grid
-            padding_top_pct: Percentage of cell height to skip from top (for "Tipo:" label)
-            padding_bottom_pct: Percentage of cell height to skip from bottom (for "Requeridos:")
-
-        Returns:
-            List of cropped PIL Images
-        """
-        cell_width = self.width // cols
-        cell_height = self.height // rows
-
-        designs = []
-
-        for row in range(rows):
-            for col in range(cols):
-                # Calculate cell boundaries
-                x1 = col * cell_width
-                y1 = row * cell_height
-                x2 = x1 + cell_width
-                y2 = y1 + cell_height
-
-                # Add padding to skip text areas
-                padding_top = int(cell_height * padding_top_pct)
-                padding_bottom = int(cell_height * padding_bottom_pct)
-                margin = 10
-
-                # Crop the design area (excluding labels)
-                crop_x1 = x1 + margin
-                crop_y1 = y1 + padding_top
-                crop_x2 = x2 - margin
-                crop_y2 = y2 - padding_bottom
-
-                design_img = self.image.crop((crop_x1, crop_y1, crop_x2, crop_y2))
-                designs.append({
-                    'image': design_img,
-                    'row': row,
-                    'col': col,
-                    'index': row * cols + col
-                })
-
-        return designs
+# Grid detection by whitespace gaps; shared engine in order_grid.py
+from order_grid import WhitespaceGapAnalyzer as OrderImageAnalyzer  # noqa: E402
+from order_pdf import OrderSheet, AXKAN_STYLE  # noqa: E402
 
 
 class IntegratedOrderGUI:
@@ -428,6 +214,7 @@ class IntegratedOrderGUI:
         # Auto-detect grid
         analyzer = OrderImageAnalyzer(img)
         self.grid_rows, self.grid_cols = analyzer.detect_grid_layout()
+        confidence = analyzer.layout.confidence
 
         # Show preview
         preview = img.copy()
@@ -443,7 +230,8 @@ class IntegratedOrderGUI:
         # Show detection info
         messagebox.showinfo("Image Loaded",
             f"Image loaded: {img.width}x{img.height}\n\n"
-            f"Detected layout: {self.grid_rows} rows × {self.grid_cols} columns\n"
+            f"Detected layout: {self.grid_rows} rows × {self.grid_cols} columns "
+            f"({confidence:.0%} confidence)\n"
             f"Total designs: {self.grid_rows * self.grid_cols}\n\n"
             f"Click 'Next' to adjust if needed.")
 
@@ -784,7 +572,7 @@ class IntegratedOrderGUI:
 
 
 class AxkanPDFGenerator:
-    """PDF generator with AXKAN branding"""
+    """PDF generator with AXKAN branding (drawn by order_pdf.OrderSheet)"""
 
     def __init__(self):
         self.load_config()
@@ -795,9 +583,6 @@ class AxkanPDFGenerator:
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = yaml.safe_load(f)
 
-        self.page_width, self.page_height = A4
-        self.margin = self.config['layout']['margin'] * mm
-
     def generate_pdf(self, order_name, instructions, designs):
         """Generate PDF with designs"""
         output_dir = Path(self.config['output_path']).expanduser()
@@ -806,211 +591,7 @@ class AxkanPDFGenerator:
         safe_name = "".join(c if c.isalnum() or c in ' -_' else '-' for c in order_name)
         output_path = output_dir / f"{safe_name}.pdf"
 
-        c = canvas.Canvas(str(output_path), pagesize=(self.page_width, self.page_height))
-
-        self._draw_header(c, order_name, instructions, len(designs))
-        self._draw_designs(c, designs)
-
-        c.save()
-        return str(output_path)
-
-    def _draw_header(self, c, order_name, instructions, num_designs):
-        """Draw header with AXKAN branding"""
-        pink = colors.HexColor(AXKAN_COLORS['pink'])
-        green = colors.HexColor(AXKAN_COLORS['green'])
-        orange = colors.HexColor(AXKAN_COLORS['orange'])
-        cyan = colors.HexColor(AXKAN_COLORS['cyan'])
-        red = colors.HexColor(AXKAN_COLORS['red'])
-        dark = colors.HexColor(AXKAN_COLORS['dark'])
-        light = colors.HexColor(AXKAN_COLORS['light'])
-
-        # AXKAN logo
-        axkan = [('A', pink), ('X', green), ('K', orange), ('A', cyan), ('N', red)]
-        x = self.margin
-        c.setFont("Helvetica-Bold", 36)
-        for letter, color in axkan:
-            c.setFillColor(color)
-            c.drawString(x, self.page_height - 50, letter)
-            x += 28
-
-        # Title
-        c.setFillColor(dark)
-        c.setFont("Helvetica-Bold", 18)
-        c.drawCentredString(self.page_width / 2, self.page_height - 50, "ORDEN DE COMPRA")
-
-        # Order info
-        y = self.page_height - 90
-        c.setFillColor(colors.white)
-        c.setStrokeColor(pink)
-        c.setLineWidth(2)
-        c.roundRect(self.margin, y - 25, self.page_width - 2*self.margin, 25, 5, fill=True, stroke=True)
-
-        c.setFillColor(dark)
-        c.setFont("Helvetica-Bold", 10)
-        info = f"Order: {order_name} | Designs: {num_designs} | Date: {datetime.now().strftime('%Y-%m-%d')}"
-        c.drawString(self.margin + 10, y - 17, info)
-
-        # Instructions
-        if instructions:
-            y -= 35
-            c.setFont("Helvetica-Bold", 10)
-            c.drawString(self.margin, y, "Instructions:")
-            c.setFillColor(light)
-            c.setStrokeColor(cyan)
-            c.roundRect(self.margin + 80, y - 20, self.page_width - 2*self.margin - 80, 25, 3, fill=True, stroke=True)
-            c.setFillColor(colors.black)
-            c.setFont("Helvetica", 10)
-            c.drawString(self.margin + 85, y - 10, instructions)
-
-        # CAJAS TOTALES
-        y -= 50
-        c.setFillColor(dark)
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(self.margin, y + 5, "CAJAS TOTALES:")
-
-        c.setFillColor(light)
-        c.setStrokeColor(orange)
-        c.setLineWidth(3)
-        c.roundRect(self.margin + 130, y - 15, 150, 35, 5, fill=True, stroke=True)
-
-        form = c.acroForm
-        form.textfield(name="cajas_totales", x=self.margin + 130, y=y - 15,
-                      width=150, height=35, borderWidth=0,
-                      fontSize=16, fontName='Helvetica-Bold')
-
-        # Rainbow separator
-        y -= 30
-        segment_width = (self.page_width - 2*self.margin) / 5
-        for i, color in enumerate([pink, green, orange, cyan, red]):
-            c.setStrokeColor(color)
-            c.setLineWidth(3)
-            c.line(self.margin + i*segment_width, y,
-                   self.margin + (i+1)*segment_width, y)
-
-    def _draw_designs(self, c, designs):
-        """Draw design grid with pagination (max 9 per page)"""
-        num = len(designs)
-        cols = 3
-        max_per_page = 9
-
-        available_width = self.page_width - 2*self.margin
-        available_height = self.page_height - self.margin - 230
-
-        spacing = 10
-
-        accent_colors = [
-            colors.HexColor(AXKAN_COLORS['pink']),
-            colors.HexColor(AXKAN_COLORS['green']),
-            colors.HexColor(AXKAN_COLORS['orange']),
-            colors.HexColor(AXKAN_COLORS['cyan']),
-            colors.HexColor(AXKAN_COLORS['red'])
-        ]
-
-        items_drawn = 0
-
-        for i, design in enumerate(designs):
-            # New page when needed
-            if items_drawn > 0 and items_drawn % max_per_page == 0:
-                c.showPage()
-
-            # Calculate layout for current page
-            if items_drawn % max_per_page == 0:
-                remaining = num - items_drawn
-                items_on_page = min(remaining, max_per_page)
-                rows_on_page = (items_on_page + cols - 1) // cols
-
-                cell_width = (available_width - (cols-1)*spacing) / cols
-                cell_height = (available_height - (rows_on_page-1)*spacing) / rows_on_page
-                cell_height = max(cell_height, 180)
-
-                start_x = self.margin
-                if items_drawn == 0:
-                    start_y = self.page_height - 230
-                else:
-                    start_y = self.page_height - self.margin
-
-                current_x = start_x
-                current_y = start_y
-                items_in_row = 0
-
-            page_idx = items_drawn % max_per_page
-            row = page_idx // cols
-            col = page_idx % cols
-
-            x = start_x + col * (cell_width + spacing)
-            y = start_y - row * (cell_height + spacing)
-
-            accent = accent_colors[i % 5]
-
-            # Cell border
-            c.setStrokeColor(accent)
-            c.setLineWidth(2)
-            c.rect(x, y - cell_height, cell_width, cell_height)
-
-            # Type header
-            c.setFillColor(accent)
-            c.rect(x, y - 18, cell_width, 18, fill=True, stroke=False)
-            c.setFillColor(colors.white)
-            c.setFont("Helvetica-Bold", 9)
-            c.drawString(x + 5, y - 13, f"Tipo: {design.get('type', '')}")
-
-            # Image - use boundary-based positioning
-            img_path = design.get('image_path')
-            if img_path and os.path.exists(img_path):
-                try:
-                    img = PILImage.open(img_path)
-                    iw, ih = img.size
-
-                    top_of_image_zone = y - 20
-                    bottom_of_image_zone = y - cell_height + 50
-
-                    max_w = cell_width - 10
-                    max_h = top_of_image_zone - bottom_of_image_zone
-
-                    scale = min(max_w/iw, max_h/ih)
-                    dw, dh = iw*scale, ih*scale
-
-                    ix = x + (cell_width - dw) / 2
-                    iy = bottom_of_image_zone + (max_h - dh) / 2
-
-                    c.drawImage(img_path, ix, iy, width=dw, height=dh,
-                               preserveAspectRatio=True, mask='auto')
-                except:
-                    pass
-
-            # Quantity
-            dark = colors.HexColor(AXKAN_COLORS['dark'])
-            light = colors.HexColor(AXKAN_COLORS['light'])
-
-            qty_y = y - cell_height + 40
-            c.setFillColor(dark)
-            c.setFont("Helvetica-Bold", 9)
-            c.drawString(x + 5, qty_y, "Requeridos:")
-
-            c.setFillColor(light)
-            c.setStrokeColor(accent)
-            c.setLineWidth(1)
-            c.rect(x + 60, qty_y - 12, cell_width - 70, 15, fill=True, stroke=True)
-
-            c.setFillColor(colors.black)
-            c.setFont("Helvetica", 10)
-            c.drawString(x + 65, qty_y - 8, str(design.get('quantity', '')))
-
-            # Contados field
-            cnt_y = qty_y - 20
-            c.setFillColor(dark)
-            c.setFont("Helvetica-Bold", 9)
-            c.drawString(x + 5, cnt_y, "Contados:")
-
-            c.setFillColor(light)
-            c.rect(x + 60, cnt_y - 12, cell_width - 70, 15, fill=True, stroke=True)
-
-            form = c.acroForm
-            form.textfield(name=f"contados_{i}", x=x + 60, y=cnt_y - 12,
-                          width=cell_width - 70, height=15, borderWidth=0,
-                          fontSize=10, fontName='Helvetica')
-
-            items_drawn += 1
+        return OrderSheet(AXKAN_STYLE, self.config).render(output_path, order_name, instructions, designs)
 
 
 def main():
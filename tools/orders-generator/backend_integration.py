@@ -5,71 +5,177 @@ Backend Integration for AXKAN Order Generator
 Sends orders to the VT Souvenir System backend API.
 
 This module provides functions to:
-1. Create orders in the backend database
+1. Create orders in the backend database (one at a time or in bulk)
 2. Sync orders with Notion via the backend
 3. Upload images and get URLs for tracking
 
+Requests share one pooled requests.Session (keep-alive, up to `workers`
+connections). Failed calls are retried with exponential backoff and full
+jitter, but only when repeating them is safe: GETs, status updates, and
+order creation, which sends an Idempotency-Key header that the backend
+uses to return the first result instead of creating a second order.
+
+Design images are sent as files, not base64: each is hashed here, the
+backend says which hashes it doesn't have yet, and only those are streamed
+from disk (multipart requests, or chunked uploads for large files) while
+the order itself is being created.
+
 Usage:
     from backend_integration import BackendIntegration
 
     backend = BackendIntegration()
     result = backend.create_order(order_data)
+    results, errors = backend.create_orders([order1, order2, ...])
+    order = backend.create_order_with_designs(order_data, ["design1.png", ...])
 """
 
 import os
 import json
 import base64
+import hashlib
+import mimetypes
+import random
+import threading
+import time
+import uuid
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
+from urllib.parse import quote
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
 load_dotenv()
 
+RETRY_STATUSES = (429, 502, 503, 504)
+READ_SIZE = 1 << 20                         # hashing and multipart streaming
+CHUNKED_UPLOAD_SIZE = 32 * 1024 * 1024      # larger images go in chunks (backend takes 50 MB per part)
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+MULTIPART_BATCH_SIZE = 64 * 1024 * 1024     # small images sent together per request
+
+
+class MultipartStream:
+    """multipart/form-data body read from the files while it is sent.
+    len() gives requests the Content-Length, so no file is held in memory;
+    it can be iterated again for a retry."""
+
+    def __init__(self, files):
+        """files: [(field name, path)]"""
+        boundary = uuid.uuid4().hex
+        self.content_type = f'multipart/form-data; boundary={boundary}'
+        self.parts = []
+        for field, path in files:
+            filename = Path(path).name.replace('"', '')
+            content_type = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+            head = (f'--{boundary}\r\n'
+                    f'Content-Disposition: form-data; name="{field}"; filename="{filename}"\r\n'
+                    f'Content-Type: {content_type}\r\n\r\n').encode('utf-8')
+            self.parts.append((head, path, os.path.getsize(path)))
+        self.tail = f'--{boundary}--\r\n'.encode('ascii')
+
+    def __len__(self):
+        return sum(len(head) + size + 2 for head, _, size in self.parts) + len(self.tail)
+
+    def __iter__(self):
+        for head, path, _ in self.parts:
+            yield head
+            with open(path, 'rb') as f:
+                while chunk := f.read(READ_SIZE):
+                    yield chunk
+            yield b'\r\n'
+        yield self.tail
+
 
 class BackendIntegration:
     """Integration with VT Souvenir System Backend"""
 
-    def __init__(self, base_url=None):
+    def __init__(self, base_url=None, workers=8, retries=3, backoff=0.5, max_backoff=8):
         """
         Initialize backend integration.
 
         Args:
             base_url: Backend API URL. Defaults to environment variable or localhost.
+            workers: Pooled connections, and orders sent at once by create_orders
+            retries: Extra attempts for calls that are safe to repeat
+            backoff: First retry waits up to this many seconds, doubling each time
+            max_backoff: Longest wait between attempts
         """
         self.base_url = base_url or os.getenv('BACKEND_URL', 'http://localhost:3000')
         self.timeout = 30
+        self.workers = workers
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=workers)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._lock = threading.Lock()
+        self._hashes = {}       # (path, mtime, size) -> sha256
+        self.stats = {'requests': 0, 'retries': 0, 'uploaded': 0, 'skipped': 0, 'upload_bytes': 0}
+
+    def _wait(self, attempt, response=None):
+        """Sleep before retry number `attempt`: Retry-After if the server sent
+        one, otherwise exponential backoff with full jitter."""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            delay = min(float(retry_after), self.max_backoff)
+        else:
+            delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+        time.sleep(delay)
 
-    def _make_request(self, method, endpoint, data=None, json_data=None):
-        """Make HTTP request to backend"""
-        url = f"{self.base_url}{endpoint}"
-
-        try:
-            if method == 'GET':
-                response = requests.get(url, params=data, timeout=self.timeout)
-            elif method == 'POST':
-                response = requests.post(url, json=json_data, timeout=self.timeout)
-            elif method == 'PATCH':
-                response = requests.patch(url, json=json_data, timeout=self.timeout)
-            else:
-                raise ValueError(f"Unsupported HTTP method: {method}")
-
-            response.raise_for_status()
-            return response.json()
+    def _make_request(self, method, endpoint, data=None, json_data=None, headers=None, idempotent=None,
+                      body=None):
+        """
+        Make HTTP request to backend.
 
-        except requests.exceptions.RequestException as e:
-            print(f"Backend request failed: {e}")
-            raise
+        idempotent: whether the call may be repeated after a failure
+        (default: GET only). Retries cover connection errors, timeouts and
+        429/502/503/504 answers.
+        body: raw request body (bytes or a re-iterable stream) instead of json_data
+        """
+        url = f"{self.base_url}{endpoint}"
+        if method not in ('GET', 'POST', 'PATCH', 'PUT'):
+            raise ValueError(f"Unsupported HTTP method: {method}")
+        if idempotent is None:
+            idempotent = method == 'GET'
+        attempts = 1 + (self.retries if idempotent else 0)
+
+        for attempt in range(attempts):
+            last = attempt == attempts - 1
+            with self._lock:
+                self.stats['requests'] += 1
+                self.stats['retries'] += attempt > 0
+            try:
+                response = self.session.request(method, url, params=data if method == 'GET' else None,
+                                                json=json_data, data=body, headers=headers,
+                                                timeout=self.timeout)
+                if response.status_code in RETRY_STATUSES and not last:
+                    self._wait(attempt, response)
+                    continue
+                response.raise_for_status()
+                return response.json()
+
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if last:
+                    print(f"Backend request failed: {e}")
+                    raise
+                self._wait(attempt)
+            except requests.exceptions.RequestException as e:
+                print(f"Backend request failed: {e}")
+                raise
 
     def health_check(self):
         """Check if backend is running"""
         try:
-            result = self._make_request('GET', '/health')
+            result = self._make_request('GET', '/health', idempotent=False)   # a quick answer, no retries
             return result.get('status') == 'ok'
         except Exception:
             return False
 
-    def create_order(self, order_data):
+    def create_order(self, order_data, idempotency_key=None):
         """
         Create a new order in the backend system.
 
@@ -91,6 +197,9 @@ class BackendIntegration:
                 - notes: str (optional)
                 - eventType: str (optional)
                 - eventDate: str (optional) YYYY-MM-DD format
+            idempotency_key: Sent as Idempotency-Key so retries don't create
+                the order twice. A new one is made if not given; pass the same
+                key when retrying an order yourself.
 
         Returns:
             dict with success status, orderId, orderNumber, notionPageId
@@ -108,7 +217,9 @@ class BackendIntegration:
                 for item in order_data['items']
             )
 
-        result = self._make_request('POST', '/api/orders', json_data=order_data)
+        result = self._make_request('POST', '/api/orders', json_data=order_data,
+                                    headers={'Idempotency-Key': idempotency_key or str(uuid.uuid4())},
+                                    idempotent=True)
 
         if result.get('success'):
             print(f"Order created: {result.get('data', {}).get('orderNumber')}")
@@ -116,6 +227,215 @@ class BackendIntegration:
         else:
             raise Exception(result.get('error', 'Unknown error'))
 
+    def create_orders(self, orders, idempotency_keys=None):
+        """
+        Create many orders, `workers` requests in flight at once over the
+        pooled connections.
+
+        Args:
+            orders: list of order_data dicts (see create_order)
+            idempotency_keys: optional list of keys, one per order (ValueError
+                if the lengths differ)
+
+        Returns:
+            (results, errors): results[i] is the created order for orders[i]
+            or None; errors maps the index of each failed order to its message
+        """
+        keys = list(idempotency_keys or [str(uuid.uuid4()) for _ in orders])
+        if len(keys) != len(orders):
+            raise ValueError(f"{len(keys)} idempotency keys for {len(orders)} orders")
+        results, errors = [None] * len(orders), {}
+        if not orders:
+            return results, errors
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(orders)),
+                                thread_name_prefix='backend-order') as pool:
+            futures = [pool.submit(self.create_order, order, key) for order, key in zip(orders, keys)]
+            for i, future in enumerate(futures):
+                try:
+                    results[i] = future.result()
+                except Exception as e:
+                    errors[i] = str(e)
+        return results, errors
+
+    def create_order_with_designs(self, order_data, image_paths, idempotency_key=None):
+        """
+        Create an order and upload its design images at the same time, then
+        attach the images to the order.
+
+        Returns:
+            The created order (see create_order) plus 'designImages', the
+            uploaded images ({sha256, url, size, filename}), and
+            'designImageErrors', {path: message} for images that failed
+        """
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix='backend-order') as pool:
+            order_future = pool.submit(self.create_order, order_data, idempotency_key)
+            try:
+                images, errors = self.upload_design_images(image_paths)
+            except Exception as e:
+                # The order may exist already: hand it back rather than invite a second one
+                images, errors = {}, {str(p): str(e) for p in dict.fromkeys(image_paths) if p}
+            order = order_future.result()
+
+        order = dict(order or {})
+        order['designImages'] = []
+        for path, image in images.items():
+            image = dict(image, filename=Path(path).name)
+            try:
+                self.attach_design_image(order.get('orderId'), image)
+                order['designImages'].append(image)
+            except Exception as e:
+                errors[path] = str(e)
+        order['designImageErrors'] = errors
+        return order
+
+    def attach_design_image(self, order_id, image):
+        """Add an uploaded design image to the order's attachments"""
+        result = self._make_request('POST', f'/api/orders/{order_id}/attachment',
+                                    json_data={'url': image['url'], 'filename': image['filename'],
+                                               'type': 'design'})
+
+        if result.get('success'):
+            return result.get('attachments')
+        else:
+            raise Exception(result.get('error', 'Unknown error'))
+
+    # ------------------------------------------------------------------
+    # Design image uploads
+    # ------------------------------------------------------------------
+    def file_sha256(self, path):
+        """sha256 of a file, read in pieces; remembered while the file is unchanged"""
+        stat = os.stat(path)
+        key = (str(path), stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            if key in self._hashes:
+                return self._hashes[key]
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            while chunk := f.read(READ_SIZE):
+                digest.update(chunk)
+        with self._lock:
+            self._hashes[key] = digest.hexdigest()
+        return self._hashes[key]
+
+    def upload_design_images(self, image_paths):
+        """
+        Upload the design image files the backend doesn't have yet.
+
+        Every file is hashed here and the backend is asked which hashes it is
+        missing, so an image already sent with another order costs nothing
+        more. Missing images are streamed from disk, `workers` requests at a
+        time: small ones together in multipart requests, ones over
+        CHUNKED_UPLOAD_SIZE in UPLOAD_CHUNK_SIZE pieces (resuming where the
+        backend stopped if an earlier upload was interrupted).
+
+        Returns:
+            (images, errors): images maps each path to {sha256, url, size};
+            errors maps each path that failed to its message
+        """
+        paths = list(dict.fromkeys(str(p) for p in image_paths if p))
+        images, errors = {}, {}
+        if not paths:
+            return images, errors
+
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(paths)),
+                                thread_name_prefix='backend-upload') as pool:
+            hashes = {}
+            for path, future in [(p, pool.submit(self.file_sha256, p)) for p in paths]:
+                try:
+                    hashes[path] = future.result()
+                except OSError as e:
+                    errors[path] = str(e)
+            if not hashes:
+                return images, errors
+
+            result = self._make_request('POST', '/api/design-images/check',
+                                        json_data={'sha256': sorted(set(hashes.values()))}, idempotent=True)
+            if not result.get('success'):
+                raise Exception(result.get('error', 'Unknown error'))
+            known = dict(result['data']['known'])
+            partial = result['data'].get('partial', {})
+
+            missing = {}
+            for path, sha256 in hashes.items():
+                if sha256 not in known:
+                    missing.setdefault(sha256, path)
+            with self._lock:
+                self.stats['skipped'] += len(set(hashes.values())) - len(missing)
+
+            small = [(sha256, path) for sha256, path in missing.items()
+                     if os.path.getsize(path) <= CHUNKED_UPLOAD_SIZE]
+            batches, batch, batch_size = [], [], 0
+            for sha256, path in small:
+                size = os.path.getsize(path)
+                if batch and batch_size + size > MULTIPART_BATCH_SIZE:
+                    batches.append(batch)
+                    batch, batch_size = [], 0
+                batch.append((sha256, path))
+                batch_size += size
+            if batch:
+                batches.append(batch)
+
+            futures = [(pool.submit(self._upload_multipart, batch), batch) for batch in batches]
+            futures += [(pool.submit(self._upload_chunked, sha256, path, partial.get(sha256, 0)), [(sha256, path)])
+                        for sha256, path in missing.items() if os.path.getsize(path) > CHUNKED_UPLOAD_SIZE]
+            failed = {}
+            for future, batch in futures:
+                try:
+                    stored, rejected = future.result()
+                except Exception as e:
+                    stored, rejected = {}, {sha256: str(e) for sha256, _ in batch}
+                known.update(stored)
+                failed.update(rejected)
+
+        for path, sha256 in hashes.items():
+            if sha256 in known:
+                images[path] = known[sha256]
+            else:
+                errors[path] = failed.get(sha256, 'Not stored by the backend')
+        return images, errors
+
+    def _upload_multipart(self, batch):
+        """One multipart request with the files of batch [(sha256, path)].
+        Returns ({sha256: image}, {sha256: error})."""
+        body = MultipartStream(batch)
+        result = self._make_request('POST', '/api/design-images', body=body,
+                                    headers={'Content-Type': body.content_type}, idempotent=True)
+        if not result.get('success'):
+            raise Exception(result.get('error', 'Unknown error'))
+        stored = {image['sha256']: image for image in result['data']['stored']}
+        with self._lock:
+            self.stats['uploaded'] += len(stored)
+            self.stats['upload_bytes'] += len(body)
+        return stored, {item['sha256']: item['error'] for item in result['data'].get('rejected', [])}
+
+    def _upload_chunked(self, sha256, path, offset=0):
+        """Send a large file in UPLOAD_CHUNK_SIZE pieces from offset.
+        Returns ({sha256: image}, {})."""
+        size = os.path.getsize(path)
+        endpoint = f'/api/design-images/{sha256}?filename={quote(Path(path).name)}'
+        with open(path, 'rb') as f:
+            while True:
+                f.seek(offset)
+                chunk = f.read(UPLOAD_CHUNK_SIZE)
+                headers = {'Content-Type': 'application/octet-stream',
+                           'Content-Range': f'bytes {offset}-{offset + len(chunk) - 1}/{size}'}
+                try:
+                    result = self._make_request('PUT', endpoint, body=chunk, headers=headers, idempotent=True)
+                except requests.exceptions.HTTPError as e:
+                    if e.response is None or e.response.status_code != 409:
+                        raise
+                    offset = e.response.json()['data']['received']   # the backend has more (or less): go on from there
+                    continue
+                with self._lock:
+                    self.stats['upload_bytes'] += len(chunk)
+                data = result['data']
+                if data.get('complete'):
+                    with self._lock:
+                        self.stats['uploaded'] += 1
+                    image = {key: data[key] for key in ('sha256', 'url', 'size')}
+                    return {sha256: image}, {}
+                offset = data['received']
+
     def get_orders(self, filters=None):
         """
         Get orders from backend with optional filters.
@@ -150,7 +470,7 @@ class BackendIntegration:
     def update_order_status(self, order_id, status):
         """Update order status"""
         result = self._make_request('PATCH', f'/api/orders/{order_id}/status',
-                                   json_data={'status': status})
+                                   json_data={'status': status}, idempotent=True)
 
         if result.get('success'):
             return result.get('data')
@@ -252,10 +572,6 @@ def send_order_to_backend(order_name, instructions, designs, client_info=None):
     """
     backend = BackendIntegration()
 
-    # Check backend health
-    if not backend.health_check():
-        raise ConnectionError("Backend is not available. Make sure it's running.")
-
     # Convert to backend format
     order_data = convert_generator_to_backend_format(order_name, instructions, designs)
 
@@ -274,8 +590,14 @@ def send_order_to_backend(order_name, instructions, designs, client_info=None):
         if 'state' in client_info:
             order_data['clientState'] = client_info['state']
 
-    # Create order
-    result = backend.create_order(order_data)
+    # Create order and upload its design images (no separate health check:
+    # an unreachable backend fails the request itself, after the retries)
+    try:
+        result = backend.create_order_with_designs(order_data, [d.get('image_path') for d in designs])
+    except requests.exceptions.ConnectionError as e:
+        raise ConnectionError("Backend is not available. Make sure it's running.") from e
+    for path, error in result['designImageErrors'].items():
+        print(f"Warning: Design image not uploaded ({Path(path).name}): {error}")
 
     return result
 
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Batch Auto-Crop - headless order PDFs from a folder of screenshots
+==================================================================
+The same pipeline as axkan_order_system.py (detect grid -> crop designs ->
+AxkanPDFGenerator), without the Tk dialogs, run on many order images at
+once across a process pool.
+
+Order details come from sidecars instead of the Step 3 form:
+
+  photo.png + photo.json    one file per image
+      {"order_name": "Hotel Xcaret", "instructions": "Entregar viernes",
+       "type": "Imanes", "quantity": 50,             <- default for every design
+       "designs": [{"type": "Llaveros", "quantity": 100}, ...],   <- in grid order
+       "rows": 3, "cols": 3}                         <- optional, skips detection
+
+  --sidecar orders.json     {"photo.png": {...same keys...}, ...}
+  --sidecar orders.csv      image,order_name,instructions,design,type,quantity[,rows,cols]
+                            one line per design (design = 1-based index), or
+                            one line per image with design left empty
+
+Images without a sidecar use the file name as the order name and
+--type/--quantity for every design. Orders detected with low confidence are
+flagged in the summary; --min-confidence holds them back for the GUI.
+
+Usage:
+    python batch_autocrop.py screenshots/
+    python batch_autocrop.py "pedidos/*.jpg" --sidecar pedidos.csv --jobs 4
+    python batch_autocrop.py screenshots/ --output ~/Desktop/ORDERS --report timings.csv
+"""
+
+import argparse
+import contextlib
+import csv
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from PIL import Image as PILImage
+
+from axkan_order_system import AxkanPDFGenerator, OrderImageAnalyzer
+from order_grid import CONFIDENCE_THRESHOLD, STRATEGY_NAMES
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp', '.bmp', '.tif', '.tiff')
+
+
+# ==========================================
+# INPUTS AND SIDECARS
+# ==========================================
+
+def find_images(inputs):
+    """Image paths from folders, glob patterns and plain files (sorted, no duplicates)."""
+    found = []
+    for item in inputs:
+        path = Path(item).expanduser()
+        if path.is_dir():
+            candidates = sorted(path.iterdir())
+        elif path.is_file():
+            candidates = [path]
+        else:
+            candidates = sorted(Path(p) for p in glob.glob(str(path)))
+        found.extend(p for p in candidates if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS)
+    images, seen = [], set()
+    for p in found:
+        if p.resolve() not in seen:
+            seen.add(p.resolve())
+            images.append(p)
+    return images
+
+
+def _int(value, default=None):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def load_sidecar(path):
+    """{image file name: order spec} from a JSON or CSV sidecar."""
+    path = Path(path).expanduser()
+    if path.suffix.lower() == '.json':
+        data = json.loads(path.read_text(encoding='utf-8'))
+        if isinstance(data, list):
+            data = {entry['image']: entry for entry in data}
+        return {Path(name).name: spec for name, spec in data.items()}
+
+    orders = {}
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for line in csv.DictReader(f):
+            name = Path(line.get('image', '')).name
+            if not name:
+                continue
+            spec = orders.setdefault(name, {'designs': []})
+            for key in ('order_name', 'instructions'):
+                if line.get(key):
+                    spec[key] = line[key]
+            for key in ('rows', 'cols'):
+                if _int(line.get(key)):
+                    spec[key] = _int(line[key])
+            design = {'type': line.get('type', ''), 'quantity': _int(line.get('quantity'), 0)}
+            index = _int(line.get('design'))
+            if index is None:
+                spec['type'], spec['quantity'] = design['type'], design['quantity']
+                continue
+            designs = spec['designs']
+            while len(designs) < index:
+                designs.append(None)
+            designs[index - 1] = design
+    return orders
+
+
+def order_spec(image_path, sidecar, default_type, default_quantity):
+    """Order details for one image: own .json sidecar, then --sidecar, then defaults."""
+    spec = {'order_name': image_path.stem, 'instructions': '',
+            'type': default_type, 'quantity': default_quantity, 'designs': []}
+    own = image_path.with_suffix('.json')
+    if own.is_file():
+        spec.update(json.loads(own.read_text(encoding='utf-8')))
+    elif image_path.name in sidecar:
+        spec.update(sidecar[image_path.name])
+    return spec
+
+
+def safe_name(name):
+    """Order name as a folder name."""
+    return "".join(c if c.isalnum() or c in ' -_' else '-' for c in name)
+
+
+def unique_order_names(jobs):
+    """Suffix repeated order names so one order's PDF or crop folder doesn't
+    overwrite another's. Names are compared as folder names: "Hotel/Playa"
+    and "Hotel-Playa" are the same folder."""
+    used = set()
+    for job in jobs:
+        name = job['spec']['order_name']
+        unique, n = name, 1
+        while safe_name(unique).lower() in used:
+            n += 1
+            unique = f"{name} ({n})"
+        used.add(safe_name(unique).lower())
+        job['spec']['order_name'] = unique
+
+
+# ==========================================
+# WORKER
+# ==========================================
+
+def save_design(img, path):
+    """Save a crop as JPEG the way IntegratedOrderGUI.generate_pdf does."""
+    if img.mode == 'RGBA':
+        bg = PILImage.new('RGB', img.size, (255, 255, 255))
+        bg.paste(img, mask=img.split()[3])
+        img = bg
+    elif img.mode != 'RGB':
+        img = img.convert('RGB')
+    img.save(str(path), "JPEG", quality=90)
+
+
+def process_order(job):
+    """Detect, crop and render one order. Runs in a pool worker; returns a result dict."""
+    spec = job['spec']
+    result = {'file': job['image'], 'order_name': spec['order_name'], 'pdf': None, 'error': None,
+              'grid': None, 'confidence': None, 'strategy': None, 'designs': 0, 'warnings': [], 'held': False,
+              'load_ms': 0.0, 'detect_ms': 0.0, 'crop_ms': 0.0, 'pdf_ms': 0.0, 'total_ms': 0.0}
+    start = time.perf_counter()
+    try:
+        t0 = time.perf_counter()
+        image = PILImage.open(job['image'])
+        image.load()
+        t1 = time.perf_counter()
+
+        analyzer = OrderImageAnalyzer(image)
+        with contextlib.redirect_stdout(io.StringIO()):   # analyzers print their decisions
+            if spec.get('rows') and spec.get('cols'):
+                layout = analyzer.cell_bounds(int(spec['rows']), int(spec['cols']))
+            else:
+                layout = analyzer.analyze()
+        t2 = time.perf_counter()
+        result.update(grid=f"{layout.rows}x{layout.cols}", confidence=round(layout.confidence, 2),
+                      strategy=layout.strategy, load_ms=(t1 - t0) * 1000, detect_ms=(t2 - t1) * 1000)
+
+        if layout.strategy != 'manual' and layout.confidence < job['min_confidence']:
+            result['held'] = True
+            result['error'] = f"confidence {layout.confidence:.2f} below {job['min_confidence']:.2f}, review in the GUI"
+            return result
+
+        work_dir = Path(job['work_dir'])
+        work_dir.mkdir(parents=True, exist_ok=True)
+        designs = []
+        listed = spec.get('designs') or []
+        for design in analyzer.crop_designs(layout.rows, layout.cols):
+            i = design['index']
+            img_path = work_dir / f"design_{i}.jpg"
+            save_design(design['image'], img_path)
+            entry = listed[i] if i < len(listed) and listed[i] else {}
+            designs.append({
+                'type': entry.get('type', spec.get('type', '')),
+                'quantity': _int(entry.get('quantity', spec.get('quantity')), 0),
+                'image_path': str(img_path),
+            })
+        t3 = time.perf_counter()
+        if listed and len(listed) != len(designs):
+            result['warnings'].append(f"sidecar lists {len(listed)} designs, grid has {len(designs)}")
+
+        generator = AxkanPDFGenerator()
+        if job['output']:
+            generator.config['output_path'] = job['output']
+        result['pdf'] = generator.generate_pdf(spec['order_name'], spec.get('instructions', ''), designs)
+        t4 = time.perf_counter()
+
+        result.update(designs=len(designs), crop_ms=(t3 - t2) * 1000, pdf_ms=(t4 - t3) * 1000)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        result['total_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+# ==========================================
+# SUMMARY
+# ==========================================
+
+def status(result):
+    if result['error']:
+        return 'HELD' if result['held'] else 'FAILED'
+    if result['strategy'] != 'manual' and result['confidence'] < CONFIDENCE_THRESHOLD:
+        return 'CHECK'
+    return 'ok'
+
+
+def print_summary(results, wall_s, jobs):
+    header = f"{'file':32} {'grid':>5} {'conf':>5} {'method':18} {'load':>7} {'detect':>7} " \
+             f"{'crop':>7} {'pdf':>7} {'total':>8}  status"
+    print()
+    print(header)
+    print('-' * len(header))
+    for r in results:
+        method = STRATEGY_NAMES.get(r['strategy'], r['strategy'] or '-')
+        conf = f"{r['confidence']:.2f}" if r['confidence'] is not None else '-'
+        print(f"{Path(r['file']).name[:32]:32} {r['grid'] or '-':>5} {conf:>5} {method[:18]:18} "
+              f"{r['load_ms']:5.0f}ms {r['detect_ms']:5.0f}ms {r['crop_ms']:5.0f}ms {r['pdf_ms']:5.0f}ms "
+              f"{r['total_ms']:6.0f}ms  {status(r)}")
+        for warning in r['warnings']:
+            print(f"    ⚠️  {warning}")
+        if r['error']:
+            print(f"    ❌ {r['error']}")
+
+    done = [r for r in results if not r['error']]
+    flagged = [r for r in done if status(r) == 'CHECK']
+    busy_s = sum(r['total_ms'] for r in results) / 1000
+    print()
+    print(f"✅ {len(done)}/{len(results)} PDFs, {sum(r['designs'] for r in done)} designs "
+          f"in {wall_s:.1f}s ({jobs} workers, {busy_s:.1f}s of work, "
+          f"{len(results) / max(wall_s, 1e-9):.1f} orders/s)")
+    if flagged:
+        print(f"⚠️  {len(flagged)} with confidence below {CONFIDENCE_THRESHOLD:.2f} - check the crops:")
+        for r in flagged:
+            print(f"    {r['pdf']}")
+    if len(done) < len(results):
+        print(f"❌ {len(results) - len(done)} failed or held back")
+
+
+def write_report(results, path):
+    fields = ['file', 'order_name', 'grid', 'confidence', 'strategy', 'designs', 'load_ms',
+              'detect_ms', 'crop_ms', 'pdf_ms', 'total_ms', 'pdf', 'error']
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+        writer.writeheader()
+        for r in results:
+            writer.writerow({k: round(v, 1) if k.endswith('_ms') else v for k, v in r.items()})
+    print(f"✅ Report written to {path}")
+
+
+# ==========================================
+# MAIN
+# ==========================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Auto-crop order screenshots and generate PDFs without the GUI')
+    parser.add_argument('inputs', nargs='+', help='Folders, image files or glob patterns')
+    parser.add_argument('--sidecar', help='JSON or CSV with order names, types and quantities per image')
+    parser.add_argument('--type', default='', help='Type for designs without one in a sidecar')
+    parser.add_argument('--quantity', type=int, default=0, help='Quantity for designs without one (default 0)')
+    parser.add_argument('--output', help='PDF folder (default: output_path in config.yaml)')
+    parser.add_argument('--work-dir', default='temp_images', help='Where cropped designs are saved (default temp_images)')
+    parser.add_argument('--jobs', type=int, default=os.cpu_count() or 1, help='Worker processes (default: all cores)')
+    parser.add_argument('--min-confidence', type=float, default=0.0,
+                        help='Skip orders whose grid confidence is lower (default 0: generate all)')
+    parser.add_argument('--report', help='Also write per-file timings to this CSV file')
+    args = parser.parse_args()
+
+    images = find_images(args.inputs)
+    if not images:
+        print("❌ No order images found")
+        return 1
+    sidecar = load_sidecar(args.sidecar) if args.sidecar else {}
+
+    jobs = []
+    for path in images:
+        spec = order_spec(path, sidecar, args.type, args.quantity)
+        jobs.append({'image': str(path), 'spec': spec, 'min_confidence': args.min_confidence,
+                     'output': str(Path(args.output).expanduser()) if args.output else None})
+    unique_order_names(jobs)
+    for job in jobs:   # one crop folder per order: workers must not share design_0.jpg
+        job['work_dir'] = str(Path(args.work_dir) / safe_name(job['spec']['order_name']))
+
+    workers = max(1, min(args.jobs, len(jobs)))
+    print(f"Processing {len(jobs)} order images with {workers} workers")
+    start = time.perf_counter()
+    results = []
+    if workers == 1:
+        for job in jobs:
+            results.append(process_order(job))
+            print(f"  {Path(job['image']).name}: {status(results[-1])}")
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(process_order, job) for job in jobs]
+            for future in as_completed(futures):
+                results.append(future.result())
+                print(f"  {Path(results[-1]['file']).name}: {status(results[-1])}")
+    wall_s = time.perf_counter() - start
+
+    order = {job['image']: n for n, job in enumerate(jobs)}
+    results.sort(key=lambda r: order[r['file']])
+    print_summary(results, wall_s, workers)
+    if args.report:
+        write_report(results, args.report)
+    return 0 if all(not r['error'] for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,302 @@
+#!/usr/bin/env python3
+"""
+Batch Render - many order JSONs in one warm process
+===================================================
+generate_axkan.py --auto renders one order per Python process, so every
+order pays for starting the interpreter, importing reportlab, PIL, yaml and
+tkinter and reading config.yaml before the first line is drawn. This script
+renders a whole batch with the same generator instead (and the same
+order_pdf form recordings and prepared images), optionally spread across a
+process pool with one warm generator per worker.
+
+Inputs are the JSON that generate_from_json takes:
+
+  order.json          {"order_name": ..., "instructions": ..., "designs": [...]}
+  orders.json         [{...}, {...}]  or  {"orders": [{...}, ...]}
+  folder/             every *.json in it
+
+Relative image paths are looked up next to the JSON file when they don't
+exist from the current folder; designs can also give an image_url
+(downloaded through image_fetch's cache).
+
+--combine also writes every order into one PDF for printing (each order
+starts on a new page, see OrderSheet.render_combined). The manifest lists
+every PDF with its timings and errors:
+
+  {"orders": [{"source", "order_name", "pdf", "designs", "render_ms", "error"}],
+   "combined": {"pdf", "orders", "render_ms"}, "workers", "setup_ms", "wall_ms", ...}
+
+Usage:
+    python batch_render.py pedidos/
+    python batch_render.py test_order.json test_order_29.json --combine impresion.pdf
+    python batch_render.py pedidos/ --jobs 4 --output ~/Desktop/ORDERS --manifest manifest.json
+    python batch_render.py pedidos/ --manifest -       # manifest on stdout, summary on stderr
+"""
+
+import argparse
+import contextlib
+import glob
+import io
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+from pathlib import Path
+
+from generate_axkan import AxkanPDFGenerator, generate_from_json, order_from_json
+
+
+# ==========================================
+# INPUTS
+# ==========================================
+
+def find_json_files(inputs):
+    """JSON paths from folders, glob patterns and plain files (sorted, no duplicates)."""
+    found = []
+    for item in inputs:
+        path = Path(item).expanduser()
+        if path.is_dir():
+            found.extend(sorted(path.glob('*.json')))
+        elif path.is_file():
+            found.append(path)
+        else:
+            found.extend(sorted(Path(p) for p in glob.glob(str(path))))
+    seen, files = set(), []
+    for path in found:
+        key = path.resolve()
+        if key not in seen:
+            seen.add(key)
+            files.append(path)
+    return files
+
+
+def resolve_images(order, base_dir):
+    """Make relative image paths that only exist next to the JSON absolute."""
+    designs = order.get('designs')
+    for design in designs if isinstance(designs, list) else []:
+        if not isinstance(design, dict):
+            continue    # generate_from_json reports it
+        image_path = design.get('image_path')
+        if image_path and not Path(image_path).is_absolute() and not Path(image_path).exists():
+            candidate = base_dir / image_path
+            if candidate.exists():
+                design['image_path'] = str(candidate)
+    return order
+
+
+def _order_job(source, order, base_dir):
+    if not isinstance(order, dict):
+        return {'source': source, 'data': None,
+                'error': f"Expected an order object, got {type(order).__name__}"}
+    return {'source': source, 'data': resolve_images(order, base_dir)}
+
+
+def load_orders(inputs):
+    """One job per order: {'source': 'file.json' or 'file.json#n', 'data': order dict}.
+    Files that can't be read, and entries that aren't orders, come back as
+    jobs with an 'error'."""
+    jobs = []
+    for path in find_json_files(inputs):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            jobs.append({'source': str(path), 'data': None, 'error': f"{type(e).__name__}: {e}"})
+            continue
+        if isinstance(data, dict) and isinstance(data.get('orders'), list):
+            data = data['orders']
+        if isinstance(data, list):
+            for n, order in enumerate(data):
+                jobs.append(_order_job(f"{path}#{n}", order, path.parent))
+        else:
+            jobs.append(_order_job(str(path), data, path.parent))
+    return jobs
+
+
+def unique_order_names(jobs):
+    """Suffix repeated order names so one order's PDF doesn't overwrite another's."""
+    counts = {}
+    for job in jobs:
+        if not job['data']:
+            continue
+        name = job['data'].get('order_name', 'Untitled Order')
+        counts[name] = counts.get(name, 0) + 1
+        if counts[name] > 1:
+            job['data']['order_name'] = f"{name} ({counts[name]})"
+
+
+# ==========================================
+# WORKER
+# ==========================================
+
+_generator = None
+
+
+def init_generator(output=None):
+    """Load config.yaml once for this process. Returns the setup time in ms."""
+    global _generator
+    start = time.perf_counter()
+    _generator = AxkanPDFGenerator()
+    if output:
+        _generator.config['output_path'] = output
+    return (time.perf_counter() - start) * 1000
+
+
+def render_order(job):
+    """Render one order with this process's generator; returns a result dict."""
+    data = job['data'] if isinstance(job['data'], dict) else {}
+    designs = data.get('designs')
+    result = {'source': job['source'], 'order_name': data.get('order_name'), 'pdf': None,
+              'designs': len(designs) if isinstance(designs, list) else 0, 'render_ms': 0.0,
+              'error': job.get('error'), 'pid': os.getpid()}
+    if not result['error'] and not isinstance(job['data'], dict):
+        result['error'] = f"Expected an order object, got {type(job['data']).__name__}"
+    if result['error']:
+        return result
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):   # per-PDF image summaries
+            result['pdf'] = generate_from_json(data, _generator)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        result['render_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def render_combined(jobs, results, path):
+    """All orders that rendered into one print PDF, in input order."""
+    orders = []
+    for job, result in zip(jobs, results):
+        if result['error']:
+            continue
+        order_name, instructions, num_designs, slot_data = order_from_json(job['data'], _generator.fetcher)
+        orders.append((order_name, instructions, _generator.slot_items(num_designs, slot_data)))
+    start = time.perf_counter()
+    path = Path(path).expanduser()
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with contextlib.redirect_stdout(io.StringIO()):
+        _generator.sheet.render_combined(path, orders)
+    return {'pdf': str(path), 'orders': len(orders), 'render_ms': round((time.perf_counter() - start) * 1000, 1)}
+
+
+def run_batch(jobs, output=None, workers=1, combine=None, progress=None):
+    """Render every job and return the manifest dict. With workers > 1 the orders
+    are spread over a process pool; the combined PDF is drawn here afterwards."""
+    started = datetime.now()
+    start = time.perf_counter()
+    setup_ms = init_generator(output)
+    workers = max(1, min(workers, len(jobs)))
+
+    results = []
+    if workers == 1:
+        for job in jobs:
+            results.append(render_order(job))
+            if progress:
+                progress(results[-1])
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=init_generator,
+                                 initargs=(output,)) as pool:
+            futures = [pool.submit(render_order, job) for job in jobs]
+            for future in as_completed(futures):
+                results.append(future.result())
+                if progress:
+                    progress(results[-1])
+        index = {job['source']: n for n, job in enumerate(jobs)}
+        results.sort(key=lambda r: index[r['source']])
+
+    combined = None
+    if combine:
+        try:
+            combined = render_combined(jobs, results, combine)
+        except Exception as e:
+            combined = {'pdf': None, 'orders': 0, 'render_ms': 0.0, 'error': f"{type(e).__name__}: {e}"}
+
+    return {
+        'started': started.isoformat(timespec='seconds'),
+        'workers': workers,
+        'setup_ms': round(setup_ms, 1),
+        'wall_ms': round((time.perf_counter() - start) * 1000, 1),
+        'ok': sum(1 for r in results if not r['error']),
+        'failed': sum(1 for r in results if r['error']),
+        'orders': [dict(r, render_ms=round(r['render_ms'], 1)) for r in results],
+        'combined': combined,
+    }
+
+
+# ==========================================
+# SUMMARY
+# ==========================================
+
+def print_summary(manifest, out=sys.stdout):
+    results = manifest['orders']
+    header = f"{'order':40} {'designs':>7} {'render':>9}  status"
+    print(file=out)
+    print(header, file=out)
+    print('-' * len(header), file=out)
+    for r in results:
+        name = r['order_name'] or Path(r['source']).name
+        print(f"{name[:40]:40} {r['designs']:7d} {r['render_ms']:7.0f}ms  {'FAILED' if r['error'] else 'ok'}",
+              file=out)
+        if r['error']:
+            print(f"    ❌ {r['error']}", file=out)
+
+    wall_s = manifest['wall_ms'] / 1000
+    busy_s = sum(r['render_ms'] for r in results) / 1000
+    print(file=out)
+    print(f"✅ {manifest['ok']}/{len(results)} PDFs, {sum(r['designs'] for r in results if not r['error'])} "
+          f"designs in {wall_s:.1f}s ({manifest['workers']} workers, {busy_s:.1f}s rendering, "
+          f"{manifest['setup_ms']:.0f}ms setup, {len(results) / max(wall_s, 1e-9):.1f} orders/s)", file=out)
+    combined = manifest['combined']
+    if combined:
+        if combined.get('error'):
+            print(f"❌ Combined PDF failed: {combined['error']}", file=out)
+        else:
+            print(f"✅ {combined['orders']} orders combined in {combined['render_ms']:.0f}ms: {combined['pdf']}",
+                  file=out)
+    if manifest['failed']:
+        print(f"❌ {manifest['failed']} failed", file=out)
+
+
+# ==========================================
+# MAIN
+# ==========================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Render many order JSONs to PDFs in one process')
+    parser.add_argument('inputs', nargs='+', help='Order JSON files, folders or glob patterns')
+    parser.add_argument('--output', help='PDF folder (default: output_path in config.yaml)')
+    parser.add_argument('--jobs', type=int, default=1,
+                        help='Worker processes (default 1: render in this process)')
+    parser.add_argument('--combine', metavar='PDF', help='Also write all orders into this one PDF for printing')
+    parser.add_argument('--manifest', metavar='JSON', help="Write the manifest to this file ('-' for stdout)")
+    args = parser.parse_args()
+
+    out = sys.stderr if args.manifest == '-' else sys.stdout
+    jobs = load_orders(args.inputs)
+    if not jobs:
+        print("❌ No order JSON found", file=out)
+        return 1
+    unique_order_names(jobs)
+
+    output = str(Path(args.output).expanduser()) if args.output else None
+    print(f"Rendering {len(jobs)} orders with {max(1, min(args.jobs, len(jobs)))} workers", file=out)
+    manifest = run_batch(jobs, output, args.jobs, args.combine,
+                         progress=lambda r: print(f"  {r['order_name'] or r['source']}: "
+                                                  f"{'FAILED' if r['error'] else 'ok'}", file=out))
+    print_summary(manifest, out)
+
+    if args.manifest == '-':
+        json.dump(manifest, sys.stdout, indent=2, ensure_ascii=False)
+        print()
+    elif args.manifest:
+        with open(args.manifest, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, ensure_ascii=False)
+        print(f"✅ Manifest written to {args.manifest}", file=out)
+    return 0 if not manifest['failed'] else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
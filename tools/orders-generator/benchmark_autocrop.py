@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Auto-crop Benchmark
+===================
+Runs grid analyzers over synthetic order sheets (synthetic_orders.py) and
+reports, per analyzer:
+  - accuracy      sheets whose (rows, cols) is exactly right
+  - cell IoU      detected cell box vs. true cell box (correct sheets only)
+  - crop IoU      crop_designs() rectangle vs. the drawn design
+  - cut designs   designs not fully inside their crop
+  - latency       detect_grid_layout() and crop_designs() per image
+
+Analyzers are given as module:Class. The module may be a path to a .py file,
+so an older implementation can be compared against the current one:
+    git show HEAD~3:tools/orders-generator/order_grid.py > /tmp/order_grid_old.py
+    python benchmark_autocrop.py --analyzer /tmp/order_grid_old.py:OrderImageAnalyzer
+
+Usage:
+    python benchmark_autocrop.py                      # 200 in-memory sheets, seed 1
+    python benchmark_autocrop.py --count 50 --seed 7
+    python benchmark_autocrop.py --corpus corpus/     # sheets from synthetic_orders.py
+    python benchmark_autocrop.py --csv results.csv --misses
+"""
+
+import argparse
+import contextlib
+import csv
+import importlib
+import importlib.util
+import io
+import sys
+import time
+from pathlib import Path
+
+from synthetic_orders import generate_corpus, load_corpus
+
+DEFAULT_ANALYZERS = ['order_grid:OrderImageAnalyzer', 'order_grid:WhitespaceGapAnalyzer']
+
+
+def load_analyzer(spec):
+    module_name, _, class_name = spec.rpartition(':')
+    if module_name.endswith('.py'):
+        path = Path(module_name)
+        module_spec = importlib.util.spec_from_file_location(f"bench_{path.stem}", path)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(module_name)
+    return getattr(module, class_name)
+
+
+def iou(a, b):
+    ix = max(0.0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0.0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+def contains(outer, inner, slack=2):
+    return (outer[0] - slack <= inner[0] and outer[1] - slack <= inner[1]
+            and outer[2] + slack >= inner[2] and outer[3] + slack >= inner[3])
+
+
+def equal_division(width, height, rows, cols, padding_top_pct=0.12, padding_bottom_pct=0.08):
+    """Cell and crop boxes of the original equal-division crop_designs(), for
+    analyzers whose designs carry no 'box'."""
+    cw, ch = width // cols, height // rows
+    boxes = {}
+    for row in range(rows):
+        for col in range(cols):
+            x1, y1 = col * cw, row * ch
+            crop = (x1 + 10, y1 + int(ch * padding_top_pct), x1 + cw - 10, y1 + ch - int(ch * padding_bottom_pct))
+            boxes[(row, col)] = ((x1, y1, x1 + cw, y1 + ch), crop)
+    return boxes
+
+
+def crop_boxes(analyzer, designs, rows, cols):
+    """{(row, col): (cell box, crop box)} from crop_designs() output."""
+    if designs and 'box' in designs[0] and 'crop' in designs[0]:
+        return {(d['row'], d['col']): (d['box'], d['crop']) for d in designs}
+    return equal_division(analyzer.width, analyzer.height, rows, cols)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    s = sorted(values)
+    return s[min(len(s) - 1, int(q * len(s)))]
+
+
+def new_stats():
+    return {'sheets': 0, 'correct': 0, 'cell_iou': [], 'crop_iou': [], 'designs': 0, 'cut': 0,
+            'detect_ms': [], 'crop_ms': [], 'misses': []}
+
+
+def measure(analyzer_cls, n, sheet, stats):
+    """Run one analyzer on one sheet and add the result to its stats."""
+    truth = (sheet['rows'], sheet['cols'])
+    with contextlib.redirect_stdout(io.StringIO()):   # analyzers print their decisions
+        t0 = time.perf_counter()
+        analyzer = analyzer_cls(sheet['image'])
+        detected = tuple(analyzer.detect_grid_layout())
+        t1 = time.perf_counter()
+        designs = analyzer.crop_designs(*detected)
+        t2 = time.perf_counter()
+
+    stats['sheets'] += 1
+    stats['detect_ms'].append((t1 - t0) * 1000)
+    stats['crop_ms'].append((t2 - t1) * 1000)
+    if detected != truth:
+        stats['misses'].append((n, truth, detected, sheet['params']))
+        return
+    stats['correct'] += 1
+    boxes = crop_boxes(analyzer, designs, *detected)
+    for cell in sheet['cells']:
+        box, crop = boxes[(cell['row'], cell['col'])]
+        stats['cell_iou'].append(iou(box, cell['box']))
+        stats['crop_iou'].append(iou(crop, cell['design_box']))
+        stats['designs'] += 1
+        stats['cut'] += not contains(crop, cell['design_box'])
+
+
+def summary(name, s):
+    mean = lambda v: sum(v) / len(v) if v else 0.0
+    return {
+        'analyzer': name,
+        'sheets': s['sheets'],
+        'accuracy_pct': round(100 * s['correct'] / max(1, s['sheets']), 1),
+        'cell_iou': round(mean(s['cell_iou']), 3),
+        'crop_iou': round(mean(s['crop_iou']), 3),
+        'cut_pct': round(100 * s['cut'] / max(1, s['designs']), 1),
+        'detect_p50_ms': round(percentile(s['detect_ms'], 0.5), 1),
+        'detect_p95_ms': round(percentile(s['detect_ms'], 0.95), 1),
+        'detect_max_ms': round(max(s['detect_ms'], default=0), 1),
+        'crop_p50_ms': round(percentile(s['crop_ms'], 0.5), 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark auto-crop grid analyzers on synthetic sheets')
+    parser.add_argument('--corpus', help='Folder written by synthetic_orders.py (default: generate in memory)')
+    parser.add_argument('--count', type=int, default=200, help='In-memory sheets (default 200)')
+    parser.add_argument('--seed', type=int, default=1, help='In-memory corpus seed (default 1)')
+    parser.add_argument('--analyzer', action='append', help='module:Class or file.py:Class (repeatable)')
+    parser.add_argument('--csv', help='Also write the summary table to this CSV file')
+    parser.add_argument('--misses', action='store_true', help='List every wrong detection')
+    args = parser.parse_args()
+
+    if args.corpus:
+        sheets = load_corpus(args.corpus)
+        source = args.corpus
+    else:
+        sheets = generate_corpus(args.count, args.seed)
+        source = f"{args.count} generated sheets, seed {args.seed}"
+    print(f"Corpus: {source}\n")
+
+    # One pass over the corpus (sheets can be 40 MP; only one is held at a time)
+    specs = args.analyzer or DEFAULT_ANALYZERS
+    analyzers = [(spec, load_analyzer(spec), new_stats()) for spec in specs]
+    for n, sheet in enumerate(sheets, start=1):
+        for spec, analyzer_cls, stats in analyzers:
+            measure(analyzer_cls, n, sheet, stats)
+
+    rows = []
+    for spec, _, stats in analyzers:
+        rows.append(summary(spec, stats))
+        if args.misses:
+            for n, truth, detected, params in stats['misses']:
+                print(f"  MISS {spec} #{n}: {truth[0]}x{truth[1]} detected as {detected[0]}x{detected[1]}  {params}")
+    if args.misses:
+        print()
+
+    header = f"{'analyzer':42} {'acc%':>6} {'cellIoU':>8} {'cropIoU':>8} {'cut%':>6} " \
+             f"{'det p50':>8} {'det p95':>8} {'det max':>8} {'crop p50':>9}"
+    print(header)
+    print('-' * len(header))
+    for r in rows:
+        print(f"{r['analyzer'][:42]:42} {r['accuracy_pct']:6.1f} {r['cell_iou']:8.3f} {r['crop_iou']:8.3f} "
+              f"{r['cut_pct']:6.1f} {r['detect_p50_ms']:6.1f}ms {r['detect_p95_ms']:6.1f}ms "
+              f"{r['detect_max_ms']:6.1f}ms {r['crop_p50_ms']:7.1f}ms")
+
+    if args.csv:
+        with open(args.csv, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"\n✅ Summary written to {args.csv}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,451 @@
+#!/usr/bin/env python3
+"""
+Backend Client Benchmark
+========================
+Sends the same orders to a local stand-in for the backend's /api/orders
+and reports orders per second, HTTP requests, TCP connections and
+duplicated orders for each way of sending them:
+
+  per-call     requests.post per order after a /health check (the client
+               before the pooled Session: new connection each call, no retries)
+  session      BackendIntegration.create_order, one order at a time
+  bulk         BackendIntegration.create_orders, --workers orders in flight
+
+The stand-in answers after --latency ms. With --fail-rate it creates the
+order and then answers 503 (a lost response) for that fraction of POSTs:
+per-call loses those orders, the pooled client retries them with the same
+Idempotency-Key and the stand-in replays the first result, so the
+"duplicates" column must stay 0.
+
+--images also sends orders with design images (picked from a pool of
+--images random files, so designs repeat across orders like catalog
+designs do) both ways, reporting bytes sent and the client's peak memory:
+
+  base64-json  images inlined as base64 in the order JSON
+  streamed     BackendIntegration.create_order_with_designs: hashes checked
+               first, missing files streamed (multipart, or chunked over
+               CHUNKED_UPLOAD_SIZE; --large-mb adds one such file)
+
+Usage:
+    python benchmark_backend.py                          # 200 orders, 20ms latency
+    python benchmark_backend.py --orders 500 --workers 16
+    python benchmark_backend.py --fail-rate 0.1
+    python benchmark_backend.py --clients bulk --images 30 --image-kb 2000 --large-mb 40
+"""
+
+import argparse
+import base64
+import contextlib
+import hashlib
+import io
+import itertools
+import json
+import multiprocessing
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+from backend_integration import BackendIntegration, convert_generator_to_backend_format
+
+PRODUCT_TYPES = ['Imanes', 'Llaveros', 'Destapadores', 'Portallaves']
+
+
+# ==========================================
+# STAND-IN BACKEND
+# ==========================================
+
+class StandInBackend(ThreadingHTTPServer):
+    """/health and POST /api/orders with Idempotency-Key replay, counting
+    requests, connections and orders"""
+
+    daemon_threads = True
+
+    def __init__(self, latency_ms=20, fail_rate=0.0, seed=1):
+        super().__init__(('127.0.0.1', 0), StandInHandler)
+        self.latency = latency_ms / 1000
+        self.fail_rate = fail_rate
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.order_numbers = itertools.count(1)
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.orders = {}        # idempotency key (or a fresh id) -> (body sha256, created order)
+            self.images = {}        # sha256 -> size
+            self.partial = {}       # sha256 -> bytearray of a chunked upload
+            self.counts = {'requests': 0, 'connections': 0, 'created': 0, 'replayed': 0, 'failed': 0,
+                           'bytes_in': 0, 'images': 0, 'attached': 0}
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive, like the real backend
+    disable_nagle_algorithm = True  # as node does; else keep-alive answers stall on delayed ACKs
+
+    def setup(self):
+        super().setup()
+        self.server.count('connections')
+
+    def _json(self, status, body):
+        data = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self.server.count('requests')
+        self._json(200 if self.path == '/health' else 404, {'status': 'ok'})
+
+    def _body(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        with self.server.lock:
+            self.server.counts['bytes_in'] += length
+        return self.rfile.read(length)
+
+    def _image(self, sha256):
+        return {'sha256': sha256, 'url': f"/design-images/{sha256}.png", 'size': self.server.images[sha256]}
+
+    def _store(self, sha256, data):
+        """Keep an upload if its content matches sha256 (the real backend hashes while streaming)."""
+        if hashlib.sha256(data).hexdigest() != sha256:
+            return False
+        with self.server.lock:
+            if sha256 not in self.server.images:
+                self.server.images[sha256] = len(data)
+                self.server.counts['images'] += 1
+        return True
+
+    def do_POST(self):
+        server = self.server
+        server.count('requests')
+        body = self._body()
+        if self.path == '/api/design-images/check':
+            hashes = json.loads(body)['sha256']
+            with server.lock:
+                known = {h: self._image(h) for h in hashes if h in server.images}
+                partial = {h: len(server.partial[h]) for h in hashes if h in server.partial}
+            self._json(200, {'success': True, 'data': {
+                'known': known, 'missing': [h for h in hashes if h not in known], 'partial': partial}})
+            return
+        if self.path == '/api/design-images':
+            boundary = self.headers['Content-Type'].split('boundary=')[1].encode('ascii')
+            stored, rejected = [], []
+            for part in body.split(b'--' + boundary)[1:-1]:
+                head, _, data = part.partition(b'\r\n\r\n')
+                sha256 = re.search(rb'name="([0-9a-f]{64})"', head).group(1).decode('ascii')
+                if self._store(sha256, data[:-2]):
+                    stored.append(self._image(sha256))
+                else:
+                    rejected.append({'sha256': sha256, 'error': 'Content does not match sha256'})
+            self._json(200, {'success': True, 'data': {'stored': stored, 'rejected': rejected}})
+            return
+        if re.fullmatch(r'/api/orders/\d+/attachment', self.path):
+            server.count('attached')
+            self._json(200, {'success': True, 'attachments': []})
+            return
+        if self.path != '/api/orders':
+            self._json(404, {'success': False, 'error': 'Not found'})
+            return
+        time.sleep(server.latency)
+
+        key = self.headers.get('Idempotency-Key')
+        body_hash = hashlib.sha256(body).hexdigest()
+        with server.lock:
+            stored_hash, order = server.orders.get(key, (None, None)) if key else (None, None)
+            reused = order is not None and stored_hash != body_hash     # real route answers 422
+            if order is None:
+                number = next(server.order_numbers)
+                order = {'orderId': number, 'orderNumber': f"ORD-{number:05d}",
+                         'clientName': json.loads(body).get('clientName')}
+                server.orders[key or f"no-key-{number}"] = (body_hash, order)
+                server.counts['created'] += 1
+            elif not reused:
+                server.counts['replayed'] += 1
+            lost = server.random.random() < server.fail_rate
+
+        if reused:
+            self._json(422, {'success': False, 'error': 'Idempotency-Key already used for a different order'})
+        elif lost:    # created, but the answer never reaches the client
+            server.count('failed')
+            self._json(503, {'success': False, 'error': 'Service Unavailable'})
+        else:
+            self._json(201, {'success': True, 'data': order})
+
+    def do_PUT(self):
+        """Chunked upload: Content-Range bytes start-end/total, in order."""
+        server = self.server
+        server.count('requests')
+        body = self._body()
+        sha256 = self.path.split('?')[0].rsplit('/', 1)[1]
+        start, _, total = map(int, re.fullmatch(r'bytes (\d+)-(\d+)/(\d+)',
+                                                self.headers['Content-Range']).groups())
+        with server.lock:
+            received = server.partial.setdefault(sha256, bytearray())
+            if start != len(received):
+                self._json(409, {'success': False, 'error': 'Unexpected offset',
+                                 'data': {'received': len(received)}})
+                return
+            received += body
+            if len(received) < total:
+                self._json(200, {'success': True, 'data': {'complete': False, 'received': len(received)}})
+                return
+            data = bytes(server.partial.pop(sha256))
+        if not self._store(sha256, data):
+            self._json(422, {'success': False, 'error': 'Content does not match sha256'})
+            return
+        self._json(200, {'success': True, 'data': {'complete': True, 'received': total, **self._image(sha256)}})
+
+    def log_message(self, format, *args):
+        pass
+
+
+def run_stand_in(conn, latency_ms, fail_rate):
+    """Child process: serve, and answer 'reset' / 'stats' / 'stop' on conn."""
+    server = StandInBackend(latency_ms, fail_rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    conn.send(server.url)
+    while (command := conn.recv()) != 'stop':
+        if command == 'reset':
+            server.reset()
+            conn.send(None)
+        else:
+            with server.lock:
+                conn.send(dict(server.counts))
+    server.shutdown()
+    server.server_close()
+
+
+class StandInProcess:
+    """The stand-in in its own process, so its CPU time and memory aren't the client's"""
+
+    def __init__(self, latency_ms=20, fail_rate=0.0):
+        self._conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=run_stand_in, args=(child, latency_ms, fail_rate),
+                                               daemon=True)
+        self.process.start()
+        self.url = self._conn.recv()
+
+    def _ask(self, command):
+        self._conn.send(command)
+        return self._conn.recv()
+
+    def reset(self):
+        self._ask('reset')
+
+    @property
+    def counts(self):
+        return self._ask('stats')
+
+    def stop(self):
+        self._conn.send('stop')
+        self.process.join(5)
+
+
+# ==========================================
+# CLIENTS
+# ==========================================
+
+def make_orders(count):
+    orders = []
+    for n in range(count):
+        designs = [{'type': PRODUCT_TYPES[(n + i) % len(PRODUCT_TYPES)], 'quantity': 25 * (i + 1)}
+                   for i in range(1 + n % 6)]
+        order = convert_generator_to_backend_format(f"Bench {n:04d}", "Entregar el viernes", designs)
+        order['clientPhone'] = '5551234567'
+        orders.append(order)
+    return orders
+
+
+def per_call(url, orders, workers):
+    """The client before the pooled Session: health check, then a bare requests.post."""
+    errors = {}
+    for i, order in enumerate(orders):
+        try:
+            requests.get(f"{url}/health", timeout=30).raise_for_status()
+            response = requests.post(f"{url}/api/orders", json=order, timeout=30)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            errors[i] = str(e)
+    return errors
+
+
+def session(url, orders, workers):
+    backend = BackendIntegration(url, workers=workers, backoff=0.05)
+    errors = {}
+    for i, order in enumerate(orders):
+        try:
+            backend.create_order(order)
+        except Exception as e:
+            errors[i] = str(e)
+    return errors
+
+
+def bulk(url, orders, workers):
+    backend = BackendIntegration(url, workers=workers, backoff=0.05)
+    _, errors = backend.create_orders(orders)
+    return errors
+
+
+CLIENTS = {'per-call': per_call, 'session': session, 'bulk': bulk}
+
+
+def measure(server, clients, orders, workers):
+    rows = []
+    for name in clients:
+        server.reset()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):    # "Order created: ..." per order
+            errors = CLIENTS[name](server.url, [dict(o) for o in orders], workers)
+        elapsed = time.perf_counter() - start
+        counts = server.counts
+        rows.append({'client': name, 'seconds': elapsed, 'ok': len(orders) - len(errors),
+                     'errors': len(errors), 'duplicates': max(0, counts['created'] - len(orders)), **counts})
+    return rows
+
+
+# ==========================================
+# DESIGN IMAGES
+# ==========================================
+
+def make_images(folder, count, size_kb, large_mb):
+    """Random bytes with a .png name: the stand-in only hashes them."""
+    rng = random.Random(2)
+    paths = []
+    for n in range(count):
+        path = Path(folder) / f"design_{n:03d}.png"
+        path.write_bytes(rng.randbytes(size_kb * 1024))
+        paths.append(path)
+    if large_mb:
+        path = Path(folder) / "design_large.png"
+        with open(path, 'wb') as f:
+            for _ in range(large_mb):
+                f.write(rng.randbytes(1024 * 1024))
+        paths.insert(0, path)
+    return paths
+
+
+def base64_json(url, orders, designs, workers):
+    """The obvious alternative: every image inlined in the order JSON."""
+    session = requests.Session()
+    for order, paths in zip(orders, designs):
+        order = dict(order, designImages=[{'filename': p.name, 'data': base64.b64encode(p.read_bytes()).decode('ascii')}
+                                          for p in paths])
+        session.post(f"{url}/api/orders", json=order, timeout=300).raise_for_status()
+    return {}
+
+
+def streamed(url, orders, designs, workers):
+    backend = BackendIntegration(url, workers=workers, backoff=0.05)
+    errors = {}
+    for i, (order, paths) in enumerate(zip(orders, designs)):
+        result = backend.create_order_with_designs(order, paths)
+        if result['designImageErrors']:
+            errors[i] = result['designImageErrors']
+    return errors
+
+
+UPLOADS = {'base64-json': base64_json, 'streamed': streamed}
+
+
+def measure_uploads(server, orders, images, per_order, workers):
+    rng = random.Random(3)
+    designs = [[images[0]] + rng.sample(images[1:], per_order - 1) if n == 0 and len(images) > per_order
+               else rng.sample(images, per_order) for n in range(len(orders))]
+    rows = []
+    for name, send in UPLOADS.items():
+        server.reset()
+        tracemalloc.start()
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            errors = send(server.url, [dict(o) for o in orders], designs, workers)
+        elapsed = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        rows.append({'client': name, 'seconds': elapsed, 'errors': len(errors),
+                     'peak_mb': peak / (1024 * 1024), **server.counts})
+    return rows, sum(p.stat().st_size for d in designs for p in d)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the backend client against a local stand-in')
+    parser.add_argument('--orders', type=int, default=200, help='Orders per client (default 200)')
+    parser.add_argument('--workers', type=int, default=8, help='Pooled connections / bulk concurrency (default 8)')
+    parser.add_argument('--latency', type=float, default=20, help='Stand-in latency per order in ms (default 20)')
+    parser.add_argument('--fail-rate', type=float, default=0.0,
+                        help='Fraction of POSTs whose answer is lost after creating the order (default 0)')
+    parser.add_argument('--clients', default=','.join(CLIENTS), help=f"Comma list (default {','.join(CLIENTS)})")
+    parser.add_argument('--images', type=int, default=0,
+                        help='Also compare image uploads, with a pool of this many design files (default 0: off)')
+    parser.add_argument('--image-kb', type=int, default=1500, help='Size of each design file in KB (default 1500)')
+    parser.add_argument('--designs', type=int, default=6, help='Design images per order (default 6)')
+    parser.add_argument('--upload-orders', type=int, default=10, help='Orders in the upload comparison (default 10)')
+    parser.add_argument('--large-mb', type=int, default=0,
+                        help='Add one file of this many MB to the first order (chunked upload)')
+    args = parser.parse_args()
+
+    clients = [c.strip() for c in args.clients.split(',') if c.strip()]
+    unknown = [c for c in clients if c not in CLIENTS]
+    if unknown:
+        print(f"❌ Unknown client: {', '.join(unknown)}")
+        return 1
+
+    server = StandInProcess(args.latency, args.fail_rate)
+    print(f"Stand-in backend on {server.url}: {args.latency:g}ms latency, "
+          f"{args.fail_rate:.0%} lost answers; {args.orders} orders, {args.workers} workers")
+    upload_rows = None
+    try:
+        rows = measure(server, clients, make_orders(args.orders), args.workers)
+        if args.images:
+            with tempfile.TemporaryDirectory(prefix='axkan_bench_images_') as folder:
+                images = make_images(folder, args.images, args.image_kb, args.large_mb)
+                upload_rows, image_bytes = measure_uploads(server, make_orders(args.upload_orders), images,
+                                                           min(args.designs, len(images)), args.workers)
+    finally:
+        server.stop()
+
+    header = (f"{'client':10} {'orders/s':>9} {'seconds':>8} {'requests':>9} {'conns':>6} "
+              f"{'ok':>5} {'errors':>7} {'replayed':>9} {'duplicates':>11}")
+    print()
+    print(header)
+    print('-' * len(header))
+    for r in rows:
+        print(f"{r['client']:10} {args.orders / r['seconds']:9.1f} {r['seconds']:8.2f} {r['requests']:9d} "
+              f"{r['connections']:6d} {r['ok']:5d} {r['errors']:7d} {r['replayed']:9d} {r['duplicates']:11d}")
+
+    if upload_rows:
+        mb = 1024 * 1024
+        print()
+        print(f"{args.upload_orders} orders with {args.designs} designs each "
+              f"({image_bytes / mb:.0f} MB of images referenced, pool of {len(images)} files)")
+        header = (f"{'client':12} {'seconds':>8} {'requests':>9} {'MB sent':>8} {'images stored':>14} "
+                  f"{'attached':>9} {'peak MB':>8} {'errors':>7}")
+        print(header)
+        print('-' * len(header))
+        for r in upload_rows:
+            print(f"{r['client']:12} {r['seconds']:8.2f} {r['requests']:9d} {r['bytes_in'] / mb:8.1f} "
+                  f"{r['images']:14d} {r['attached']:9d} {r['peak_mb']:8.1f} {r['errors']:7d}")
+        if any(r['errors'] for r in upload_rows):
+            return 1
+    return 0 if all(r['duplicates'] == 0 for r in rows if r['client'] != 'per-call') else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Order PDF Render Benchmark
+==========================
+Renders the same orders through each renderer and reports orders per
+second, latency per order and PDF size:
+
+  engine              order_pdf.OrderSheet, forms recorded once per process
+  engine-per-pdf      order_pdf.OrderSheet, forms drawn again in every PDF
+
+Older generators can be added with --renderer module:Class or file.py:Class.
+They are called like axkan_order_system.AxkanPDFGenerator:
+generate_pdf(order_name, instructions, designs), writing to config['output_path'].
+To compare against the generators from before order_pdf.py (saved next to
+config.yaml, which they load from their own folder):
+    git show HEAD~1:tools/orders-generator/axkan_order_system.py > axkan_old.py
+    python benchmark_render.py --renderer axkan_old.py:AxkanPDFGenerator
+
+Usage:
+    python benchmark_render.py                       # 200 orders of 9 designs, no images
+    python benchmark_render.py --orders 500 --designs 12
+    python benchmark_render.py --images test_images  # designs cycle through these images
+"""
+
+import argparse
+import contextlib
+import importlib
+import importlib.util
+import io
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from order_pdf import OrderSheet, FormTemplates, AXKAN_STYLE
+
+PRODUCT_TYPES = ["Imanes chicos", "Llaveros", "Destapadores", "Portallaves"]
+
+
+def load_renderer(spec):
+    module_name, _, class_name = spec.rpartition(':')
+    if module_name.endswith('.py'):
+        path = Path(module_name)
+        module_spec = importlib.util.spec_from_file_location(f"bench_{path.stem}", path)
+        module = importlib.util.module_from_spec(module_spec)
+        module_spec.loader.exec_module(module)
+    else:
+        module = importlib.import_module(module_name)
+    return getattr(module, class_name)
+
+
+def make_orders(count, num_designs, images):
+    orders = []
+    for n in range(count):
+        designs = [{'type': PRODUCT_TYPES[(n + i) % len(PRODUCT_TYPES)],
+                    'quantity': 25 * (i + 1),
+                    'image_path': str(images[(n + i) % len(images)]) if images else None}
+                   for i in range(num_designs)]
+        orders.append((f"Bench {n:04d}", "Entregar el viernes" if n % 2 else "", designs))
+    return orders
+
+
+def engine(templates):
+    """Renderer function for OrderSheet with the given template cache."""
+    sheet = OrderSheet(AXKAN_STYLE, templates=templates)
+    return lambda out_dir, name, instructions, designs: \
+        sheet.render(Path(out_dir) / f"{name}.pdf", name, instructions, designs)
+
+
+def legacy(spec):
+    generator = load_renderer(spec)()
+
+    def render(out_dir, name, instructions, designs):
+        generator.config['output_path'] = str(out_dir)
+        return generator.generate_pdf(name, instructions, designs)
+    return render
+
+
+def measure(renderers, orders, warmup):
+    """Render every order with each renderer in turn, so a busy machine slows
+    them all alike. Returns one summary row per renderer."""
+    out_dir = Path(tempfile.mkdtemp(prefix='bench_render_'))
+    times = {label: [] for label, _ in renderers}
+    sizes = {label: [] for label, _ in renderers}
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):   # per-PDF image summaries
+            for n, (name, instructions, designs) in enumerate(orders[:warmup] + orders):
+                for label, render in renderers:
+                    t = time.perf_counter()
+                    path = render(out_dir, name, instructions, designs)
+                    elapsed = time.perf_counter() - t
+                    if n >= warmup:
+                        times[label].append(elapsed)
+                        sizes[label].append(Path(path).stat().st_size)
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+
+    rows = []
+    for label, _ in renderers:
+        t = sorted(times[label])
+        rows.append({
+            'renderer': label,
+            'orders_per_sec': len(t) / sum(t),
+            'p50_ms': t[len(t) // 2] * 1000,
+            'p95_ms': t[min(len(t) - 1, int(len(t) * 0.95))] * 1000,
+            'kb_per_pdf': sum(sizes[label]) / len(sizes[label]) / 1024,
+        })
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark order-sheet PDF rendering')
+    parser.add_argument('--orders', type=int, default=200, help='Orders per renderer (default 200)')
+    parser.add_argument('--designs', type=int, default=9, help='Designs per order (default 9)')
+    parser.add_argument('--images', help='Folder of design images (default: no images)')
+    parser.add_argument('--warmup', type=int, default=5, help='Untimed orders first (default 5)')
+    parser.add_argument('--renderer', action='append', default=[],
+                        help='Extra module:Class or file.py:Class to compare (repeatable)')
+    args = parser.parse_args()
+
+    images = sorted(p for p in Path(args.images).iterdir()
+                    if p.suffix.lower() in ('.png', '.jpg', '.jpeg')) if args.images else []
+    orders = make_orders(args.orders, args.designs, images)
+    print(f"{args.orders} orders x {args.designs} designs, "
+          f"{f'{len(images)} images' if images else 'no images'}\n")
+
+    renderers = [(spec, legacy(spec)) for spec in args.renderer]
+    renderers += [('engine', engine(FormTemplates())),
+                  ('engine-per-pdf', engine(FormTemplates(record=False)))]
+    rows = measure(renderers, orders, args.warmup)
+
+    header = f"{'renderer':42} {'orders/s':>9} {'p50':>9} {'p95':>9} {'KB/pdf':>8}"
+    print(header)
+    print('-' * len(header))
+    for r in rows:
+        print(f"{r['renderer'][:42]:42} {r['orders_per_sec']:9.1f} {r['p50_ms']:7.2f}ms "
+              f"{r['p95_ms']:7.2f}ms {r['kb_per_pdf']:8.1f}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Blob Store - content-addressed design images for pending-order backups
+=====================================================================
+Every backup of an order used to copy its design images into a new
+images/ folder, so re-saving an order after a failure (or several orders
+sharing designs) stored the same megabytes again. BlobStore keeps each
+distinct image once, named by its SHA-256:
+
+    blobs/3f/3fa9...c1.jpg      the bytes (extension kept: reportlab embeds
+                                .jpg files without re-encoding)
+    blobs/refs.json             {blob name: number of orders using it}
+    blobs/refs.lock             held while refs.json is read, changed and written
+
+Orders reference blobs in order_data.json ('image_blob') and get a hardlink
+to each one in their images/ folder when the filesystem supports it, so
+the folder still opens in Finder without taking any extra space. When an
+order is deleted its references are released and blobs nobody uses are
+removed.
+
+The app, a second copy of it and batch tools can share one store, so counts
+are never kept between calls: every put/release re-reads refs.json under an
+exclusive lock on refs.lock and writes it back (temp file + replace) before
+letting go.
+
+Usage:
+    store = BlobStore(BACKUP_PATH / "blobs")
+    blob = store.put("temp_images/design_0.jpg")        # +1 reference
+    image_path = store.link(blob, order_folder / "images" / "design_0.jpg")
+    ...
+    store.release(blob)                                 # -1, deleted at 0
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+
+if sys.platform == 'win32':
+    import msvcrt
+else:
+    import fcntl
+
+CHUNK_SIZE = 1 << 20
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class BlobStore:
+    """Deduplicated, reference-counted image files"""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.refs_file = self.root / "refs.json"
+        self.lock_file = self.root / "refs.lock"
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def _locked_refs(self):
+        """Current refs.json contents, locked against other threads and processes.
+        Changes made to the dict are written back on exit."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with self._lock, open(self.lock_file, 'a+b') as lock:
+            if sys.platform == 'win32':
+                lock.seek(0)
+                msvcrt.locking(lock.fileno(), msvcrt.LK_LOCK, 1)
+            else:
+                fcntl.flock(lock.fileno(), fcntl.LOCK_EX)
+            try:
+                refs = self._load_refs()
+                yield refs
+                self._save_refs(refs)
+            finally:
+                if sys.platform == 'win32':
+                    lock.seek(0)
+                    msvcrt.locking(lock.fileno(), msvcrt.LK_UNLCK, 1)
+                else:
+                    fcntl.flock(lock.fileno(), fcntl.LOCK_UN)
+
+    def _load_refs(self):
+        try:
+            with open(self.refs_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_refs(self, refs):
+        tmp = self.refs_file.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(refs, f, indent=1, sort_keys=True)
+        os.replace(tmp, self.refs_file)
+
+    def path(self, blob):
+        return self.root / blob[:2] / blob
+
+    def put(self, src):
+        """Store src (if not stored yet) and add a reference. Returns the blob name."""
+        src = Path(src)
+        blob = sha256_file(src) + src.suffix.lower()
+        dest = self.path(blob)
+        with self._locked_refs() as refs:
+            if not dest.exists():
+                dest.parent.mkdir(parents=True, exist_ok=True)
+                tmp = dest.with_name(dest.name + '.tmp')
+                shutil.copyfile(src, tmp)
+                os.replace(tmp, dest)
+            refs[blob] = refs.get(blob, 0) + 1
+        return blob
+
+    def link(self, blob, dest):
+        """Hardlink the blob to dest. Returns dest, or the blob's own path where
+        hardlinks are not supported (different volume, FAT, SMB...)."""
+        dest = Path(dest)
+        try:
+            dest.parent.mkdir(parents=True, exist_ok=True)
+            if dest.exists():
+                dest.unlink()
+            os.link(self.path(blob), dest)
+            return dest
+        except OSError:
+            return self.path(blob)
+
+    def release(self, blob):
+        """Drop one reference; the blob is deleted when none are left."""
+        with self._locked_refs() as refs:
+            count = refs.get(blob, 0) - 1
+            if count > 0:
+                refs[blob] = count
+            else:
+                refs.pop(blob, None)
+                try:
+                    self.path(blob).unlink()
+                except OSError:
+                    pass
+
+    def refcount(self, blob):
+        return self._load_refs().get(blob, 0)
+
+    def rebuild_refs(self, order_files):
+        """Recount references from order_data.json files and delete unreferenced
+        blobs (after refs.json was lost, or orders were deleted by hand)."""
+        refs = {}
+        for order_file in order_files:
+            try:
+                with open(order_file, 'r', encoding='utf-8') as f:
+                    designs = json.load(f).get('designs', [])
+            except (OSError, ValueError):
+                continue
+            for design in designs:
+                blob = design.get('image_blob')
+                if blob:
+                    refs[blob] = refs.get(blob, 0) + 1
+        with self._locked_refs() as current:
+            current.clear()
+            current.update(refs)
+            removed = 0
+            for path in self.root.glob('??/*'):
+                if path.name not in refs:
+                    path.unlink()
+                    removed += 1
+        return removed
+
+    def size(self):
+        """(blobs, bytes) currently stored."""
+        files = [p for p in self.root.glob('??/*') if p.is_file()]
+        return len(files), sum(p.stat().st_size for p in files)
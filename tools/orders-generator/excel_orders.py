@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Excel Orders - streaming, cached reader for order workbooks
+===========================================================
+generate_reference.py and generate_quick.py read orders from the Excel
+template (create_sample_excel.py):
+
+    A1 Order Number | B1 value          (optional header rows)
+    A2 Client Name  | B2 value
+    row 4           Product Name | Type | Quantity | Image Path
+    row 5...        one item per row
+
+Client spreadsheets can be large and full of pasted pictures, and a normal
+openpyxl.load_workbook() parses every sheet, style and image into memory.
+read_order() instead:
+
+  - opens the workbook read-only and streams the active sheet's rows,
+    only columns A-D
+  - indexes embedded pictures by the row they are anchored to (drawing XML
+    only) and extracts the bytes just for items whose Image Path is empty
+    or doesn't exist on this computer
+  - caches the parsed order per workbook, keyed by path, mtime and size:
+    generating again from an unchanged file doesn't open it at all
+
+Usage:
+    order = read_order("pedido.xlsx")
+    order['items']      # [{'name', 'type', 'quantity', 'image_path'}]
+"""
+
+import hashlib
+import json
+import os
+import posixpath
+import shutil
+import tempfile
+import xml.etree.ElementTree as ET
+import zipfile
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+CACHE_DIR = Path(tempfile.gettempdir()) / 'axkan_excel_orders'
+CACHE_VERSION = 1
+HEADER_ROW = 4
+COLUMNS = 4     # Product Name, Type, Quantity, Image Path
+
+NS = {
+    'xdr': 'http://schemas.openxmlformats.org/drawingml/2006/spreadsheetDrawing',
+    'a': 'http://schemas.openxmlformats.org/drawingml/2006/main',
+    'rel': 'http://schemas.openxmlformats.org/package/2006/relationships',
+}
+R_EMBED = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}embed'
+
+
+def _rels(archive, part):
+    """{relationship id: (type, absolute target)} of a package part."""
+    rels_path = posixpath.join(posixpath.dirname(part), '_rels', posixpath.basename(part) + '.rels')
+    try:
+        root = ET.fromstring(archive.read(rels_path))
+    except KeyError:
+        return {}
+    base = posixpath.dirname(part)
+    targets = {}
+    for rel in root.findall('rel:Relationship', NS):
+        if rel.get('TargetMode') == 'External':
+            continue
+        target = rel.get('Target', '')
+        # Excel writes targets relative to the part, openpyxl absolute ("/xl/...")
+        target = target.lstrip('/') if target.startswith('/') else posixpath.join(base, target)
+        targets[rel.get('Id')] = (rel.get('Type', ''), posixpath.normpath(target))
+    return targets
+
+
+def embedded_images(archive, sheet_part):
+    """{row (1-based): media member} for pictures anchored on the sheet.
+    Only the drawing XML is read; the first picture of a row wins."""
+    images = {}
+    for rel_type, drawing in _rels(archive, sheet_part).values():
+        if not rel_type.endswith('/drawing'):
+            continue
+        media = _rels(archive, drawing)
+        root = ET.fromstring(archive.read(drawing))
+        for anchor in list(root.findall('xdr:twoCellAnchor', NS)) + list(root.findall('xdr:oneCellAnchor', NS)):
+            row = anchor.find('xdr:from/xdr:row', NS)
+            blip = anchor.find('.//a:blip', NS)
+            if row is None or blip is None or blip.get(R_EMBED) not in media:
+                continue
+            images.setdefault(int(row.text) + 1, media[blip.get(R_EMBED)][1])
+    return images
+
+
+def _cache_files(excel_path):
+    name = hashlib.sha1(str(excel_path).encode('utf-8')).hexdigest()[:16]
+    return CACHE_DIR / f"{name}.json", CACHE_DIR / name
+
+
+def _parse(excel_path, order_info, image_dir):
+    order_data = {
+        'order_number': '',
+        'client_name': '',
+        'items': []
+    }
+
+    wb = load_workbook(excel_path, read_only=True, data_only=True)
+    try:
+        sheet = wb.active
+        if order_info:
+            for label, value in sheet.iter_rows(min_row=1, max_row=2, max_col=2, values_only=True):
+                if label == 'Order Number':
+                    order_data['order_number'] = str(value or '')
+                elif label == 'Client Name':
+                    order_data['client_name'] = str(value or '')
+
+        rows = []
+        for row_num, row in enumerate(sheet.iter_rows(min_row=HEADER_ROW + 1, max_col=COLUMNS, values_only=True),
+                                      start=HEADER_ROW + 1):
+            product_name, product_type, quantity, image_path = (tuple(row) + (None,) * COLUMNS)[:COLUMNS]
+            if not product_name:  # Skip empty rows
+                continue
+            rows.append(row_num)
+            order_data['items'].append({
+                'name': str(product_name),
+                'type': str(product_type),
+                'quantity': int(quantity) if quantity else 0,
+                'image_path': str(image_path) if image_path else None
+            })
+        sheet_part = getattr(sheet, '_worksheet_path', None)
+    finally:
+        wb.close()
+
+    missing = [(row_num, item) for row_num, item in zip(rows, order_data['items'])
+               if not item['image_path'] or not os.path.exists(item['image_path'])]
+    if missing and sheet_part:
+        with zipfile.ZipFile(excel_path) as archive:
+            images = embedded_images(archive, sheet_part)
+            for row_num, item in missing:
+                member = images.get(row_num)
+                if not member:
+                    continue
+                image_dir.mkdir(parents=True, exist_ok=True)
+                out = image_dir / f"row_{row_num}{posixpath.splitext(member)[1].lower()}"
+                out.write_bytes(archive.read(member))
+                item['image_path'] = str(out)
+    return order_data
+
+
+def read_order(excel_path, order_info=True):
+    """Order data from an order workbook (see module docstring). order_info=False
+    skips the Order Number / Client Name rows (the quick template has none)."""
+    excel_path = Path(excel_path).resolve()
+    stat = excel_path.stat()
+    key = [CACHE_VERSION, str(excel_path), stat.st_mtime_ns, stat.st_size, order_info]
+    cache_file, image_dir = _cache_files(excel_path)
+
+    try:
+        with open(cache_file, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('key') == key and all(
+                not item['image_path'] or not item['image_path'].startswith(str(image_dir))
+                or os.path.exists(item['image_path']) for item in cached['order']['items']):
+            return cached['order']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+
+    shutil.rmtree(image_dir, ignore_errors=True)    # pictures of an older version of the file
+    order_data = _parse(excel_path, order_info, image_dir)
+    try:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = cache_file.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump({'key': key, 'order': order_data}, f, ensure_ascii=False)
+        os.replace(tmp, cache_file)
+    except OSError as e:
+        print(f"Warning: Could not cache {excel_path.name}: {e}")
+    return order_data
@@ -22,18 +22,17 @@ import json
 import argparse
 import tkinter as tk
 from tkinter import simpledialog, messagebox, filedialog
-from datetime import datetime
 from pathlib import Path
 import io
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.pdfgen import canvas
 from reportlab.lib import colors
-from reportlab.pdfbase import pdfform
 from PIL import Image as PILImage, ImageGrab
 import yaml
 
+from order_pdf import OrderSheet, AXKAN_STYLE
+from image_fetch import ImageFetcher
+from slot_images import SlotImageLoader, prepare_slot_image
+
 
 # AXKAN Brand Colors
 AXKAN_COLORS = {
@@ -75,6 +74,10 @@ class ImageEditorGUI:
         self.root.geometry("950x750")
         self.root.configure(bg=AXKAN_COLORS['light'])
 
+        # Pasted images are resized and saved on worker threads
+        self.slot_images = SlotImageLoader(self.root, prepare_slot_image, self._slot_image_ready,
+                                           failed=self._slot_image_failed, preview_size=(130, 100))
+
         self.setup_ui()
 
     def setup_ui(self):
@@ -323,34 +326,13 @@ class ImageEditorGUI:
                 messagebox.showerror("Error", f"Could not load image:\n{e}")
 
     def add_image_to_slot(self, slot_num, img):
-        """Add an image to a slot"""
-        # Compress large images
-        if img.width > 2000 or img.height > 2000:
-            img.thumbnail((2000, 2000), PILImage.Resampling.LANCZOS)
-
-        # Convert to RGB if necessary
-        if img.mode == 'RGBA':
-            background = PILImage.new('RGB', img.size, (255, 255, 255))
-            background.paste(img, mask=img.split()[3])
-            img = background
-        elif img.mode not in ('RGB', 'L'):
-            img = img.convert('RGB')
-
-        # Save temp file
-        temp_dir = Path("temp_images")
-        temp_dir.mkdir(exist_ok=True)
-
-        temp_path = temp_dir / f"slot_{slot_num}.jpg"
-        img.save(str(temp_path), "JPEG", quality=85, optimize=True)
-
-        self.image_paths[slot_num] = str(temp_path)
+        """Add an image to a slot (prepared in the background, see slot_images.py)"""
+        self.slot_labels[slot_num].config(image="", text="Loading...")
+        self.slot_labels[slot_num].image = None
+        self.slot_images.submit(slot_num, img)
 
-        # Update preview
-        img_copy = img.copy()
-        img_copy.thumbnail((130, 100))
-
-        from PIL import ImageTk
-        photo = ImageTk.PhotoImage(img_copy)
+    def _slot_image_ready(self, slot_num, path, photo):
+        self.image_paths[slot_num] = path
 
         self.slot_labels[slot_num].config(image=photo, text="")
         self.slot_labels[slot_num].image = photo
@@ -358,8 +340,16 @@ class ImageEditorGUI:
         # Visual feedback
         self.slot_frames[slot_num].config(bg="#ccffcc")
 
+    def _slot_image_failed(self, slot_num, error):
+        self.image_paths.pop(slot_num, None)
+        self.slot_labels[slot_num].config(image="", text="[No image]\nClick & Cmd+V")
+        self.slot_labels[slot_num].image = None
+        messagebox.showerror("Error", f"Could not load image:\n{error}")
+
     def generate_pdf(self):
         """Collect data and generate PDF"""
+        self.slot_images.flush()    # images still being prepared
+
         # Collect type and quantity data from entries
         for slot_num in range(self.num_designs):
             type_val = self.type_entries[slot_num].get().strip()
@@ -572,7 +562,12 @@ class UnifiedOrderDialog:
 
 
 class AxkanPDFGenerator:
-    """PDF generator with Axkan branding"""
+    """PDF generator with Axkan branding (drawn by order_pdf.OrderSheet)"""
+
+    # Logo image over the letters; Tipo and Requeridos stay editable for the sheet filled in by hand
+    STYLE = dict(AXKAN_STYLE, logo_image=(str(Path(__file__).parent / 'axkan_logo.png'), 150, 50),
+                 type_fill=colors.HexColor(AXKAN_COLORS['light']), type_color=colors.black,
+                 editable_type=True, editable_quantity=True, placeholder=True, always_instructions=True)
 
     def __init__(self):
         self.load_config()
@@ -583,11 +578,8 @@ class AxkanPDFGenerator:
         with open(config_path, 'r', encoding='utf-8') as f:
             self.config = yaml.safe_load(f)
 
-        if self.config['layout']['page_size'] == 'A4':
-            self.page_width, self.page_height = A4
-
-        self.margin = self.config['layout']['margin'] * mm
-        self.columns = self.config['layout']['columns']
+        self.sheet = OrderSheet(self.STYLE, self.config)
+        self.fetcher = ImageFetcher.from_config(self.config)
 
     def ask_order_details(self):
         """Show dialog for order details"""
@@ -629,7 +621,10 @@ class AxkanPDFGenerator:
         output_filename = f"{safe_order_name}.pdf"
         output_path = output_dir / output_filename
 
-        # Create items list
+        return self.sheet.render(output_path, order_name, instructions, self.slot_items(num_designs, slot_data))
+
+    def slot_items(self, num_designs, slot_data=None):
+        """Design list for OrderSheet from the editor's slot data"""
         items = []
         for i in range(num_designs):
             item = {
@@ -648,326 +643,7 @@ class AxkanPDFGenerator:
                     item['quantity'] = slot_data['quantities'][i]
 
             items.append(item)
-
-        # Create PDF
-        c = canvas.Canvas(str(output_path), pagesize=(self.page_width, self.page_height))
-
-        self._draw_header(c, order_name, instructions, num_designs)
-        self._draw_items_grid(c, items)
-
-        c.save()
-
-        return str(output_path)
-
-    def _draw_header(self, c, order_name, instructions, num_designs):
-        """Draw PDF header with Axkan branding"""
-        # Colors
-        pink = colors.HexColor(AXKAN_COLORS['pink'])
-        green = colors.HexColor(AXKAN_COLORS['green'])
-        orange = colors.HexColor(AXKAN_COLORS['orange'])
-        cyan = colors.HexColor(AXKAN_COLORS['cyan'])
-        red = colors.HexColor(AXKAN_COLORS['red'])
-        dark = colors.HexColor(AXKAN_COLORS['dark'])
-        light = colors.HexColor(AXKAN_COLORS['light'])
-
-        # Draw AXKAN text logo
-        axkan_letters = [('A', pink), ('X', green), ('K', orange), ('A', cyan), ('N', red)]
-        x = self.margin
-        c.setFont("Helvetica-Bold", 36)
-        for letter, color in axkan_letters:
-            c.setFillColor(color)
-            c.drawString(x, self.page_height - 50, letter)
-            x += 30
-
-        # Try to draw axkan logo image if available
-        logo_path = Path(__file__).parent / 'axkan_logo.png'
-        if logo_path.exists():
-            try:
-                c.drawImage(str(logo_path), self.margin,
-                           self.page_height - 65,
-                           width=150, height=50,
-                           preserveAspectRatio=True, mask='auto')
-            except:
-                pass
-
-        # Title
-        c.setFillColor(dark)
-        c.setFont("Helvetica-Bold", 18)
-        c.drawCentredString(self.page_width / 2, self.page_height - 50, "ORDEN DE COMPRA")
-
-        # Order info box
-        y_pos = self.page_height - 95
-        c.setFillColor(colors.white)
-        c.setStrokeColor(pink)
-        c.setLineWidth(2)
-        c.roundRect(self.margin, y_pos - 25, self.page_width - 2 * self.margin, 25, 5, fill=True, stroke=True)
-
-        c.setFillColor(dark)
-        c.setFont("Helvetica-Bold", 10)
-        order_info = f"Order: {order_name} | Designs: {num_designs} | Date: {datetime.now().strftime('%Y-%m-%d')}"
-        c.drawString(self.margin + 10, y_pos - 17, order_info)
-
-        # Instructions
-        y_pos -= 35
-        c.setFillColor(dark)
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(self.margin, y_pos, "Instructions:")
-
-        c.setFillColor(light)
-        c.setStrokeColor(cyan)
-        c.setLineWidth(2)
-        box_x = self.margin + 80
-        box_width = self.page_width - 2 * self.margin - 80
-        c.roundRect(box_x, y_pos - 25, box_width, 30, 3, fill=True, stroke=True)
-
-        c.setFillColor(colors.black)
-        c.setFont("Helvetica", 10)
-        if instructions:
-            c.drawString(box_x + 5, y_pos - 10, instructions)
-
-        # CAJAS TOTALES
-        y_pos -= 50
-        c.setFillColor(dark)
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(self.margin, y_pos + 5, "CAJAS TOTALES:")
-
-        c.setFillColor(light)
-        c.setStrokeColor(orange)
-        c.setLineWidth(3)
-        cajas_x = self.margin + 130
-        c.roundRect(cajas_x, y_pos - 15, 150, 35, 5, fill=True, stroke=True)
-
-        form = c.acroForm
-        form.textfield(
-            name="cajas_totales",
-            x=cajas_x,
-            y=y_pos - 15,
-            width=150,
-            height=35,
-            borderWidth=0,
-            textColor=colors.black,
-            fontSize=16,
-            fontName='Helvetica-Bold'
-        )
-
-        # Separator line with gradient effect (3 colored segments)
-        y_pos -= 30
-        segment_width = (self.page_width - 2 * self.margin) / 5
-        segment_colors = [pink, green, orange, cyan, red]
-        c.setLineWidth(3)
-        for i, seg_color in enumerate(segment_colors):
-            c.setStrokeColor(seg_color)
-            c.line(self.margin + i * segment_width, y_pos - 5,
-                   self.margin + (i + 1) * segment_width, y_pos - 5)
-
-    def _draw_items_grid(self, c, items):
-        """Draw grid of items with dynamic sizing"""
-        num_items = len(items)
-        columns = 3
-        max_per_page = 9
-
-        available_width = self.page_width - 2 * self.margin
-        available_height = self.page_height - self.margin - 230
-
-        items_on_page = min(num_items, max_per_page)
-        rows_on_page = (items_on_page + columns - 1) // columns
-
-        spacing = 10
-        cell_width = (available_width - (columns - 1) * spacing) / columns
-        cell_height = (available_height - (rows_on_page - 1) * spacing) / rows_on_page
-
-        cell_width = max(cell_width, 150)
-        cell_height = max(cell_height, 180)
-
-        padding = self.config['cell']['padding']
-
-        total_grid_width = cell_width * columns + spacing * (columns - 1)
-        total_grid_height = cell_height * rows_on_page + spacing * (rows_on_page - 1)
-
-        start_x = (self.page_width - total_grid_width) / 2
-        start_y = self.page_height - 230 - (available_height - total_grid_height) / 2
-
-        current_x = start_x
-        current_y = start_y
-        items_in_row = 0
-        items_drawn = 0
-
-        for idx, item in enumerate(items):
-            if items_drawn > 0 and items_drawn % max_per_page == 0:
-                c.showPage()
-
-                remaining_items = num_items - items_drawn
-                items_on_page = min(remaining_items, max_per_page)
-                rows_on_page = (items_on_page + columns - 1) // columns
-
-                cell_height = (available_height - (rows_on_page - 1) * spacing) / rows_on_page
-                cell_height = max(cell_height, 180)
-
-                total_grid_height = cell_height * rows_on_page + spacing * (rows_on_page - 1)
-                start_y = self.page_height - self.margin - (available_height - total_grid_height) / 2
-
-                current_x = start_x
-                current_y = start_y
-                items_in_row = 0
-
-            # Draw cell border with colored accent
-            color_idx = idx % 5
-            accent_colors = [
-                colors.HexColor(AXKAN_COLORS['pink']),
-                colors.HexColor(AXKAN_COLORS['green']),
-                colors.HexColor(AXKAN_COLORS['orange']),
-                colors.HexColor(AXKAN_COLORS['cyan']),
-                colors.HexColor(AXKAN_COLORS['red'])
-            ]
-
-            c.setStrokeColor(accent_colors[color_idx])
-            c.setLineWidth(2)
-            c.rect(current_x, current_y - cell_height, cell_width, cell_height)
-
-            self._draw_item_cell(c, item, current_x, current_y, cell_width, cell_height, padding, accent_colors[color_idx])
-
-            items_in_row += 1
-            items_drawn += 1
-
-            if items_in_row >= columns:
-                current_y -= (cell_height + spacing)
-                current_x = start_x
-                items_in_row = 0
-            else:
-                current_x += (cell_width + spacing)
-
-    def _draw_item_cell(self, c, item, x, y, width, height, padding, accent_color):
-        """Draw a single item cell with Axkan styling"""
-        dark = colors.HexColor(AXKAN_COLORS['dark'])
-        light = colors.HexColor(AXKAN_COLORS['light'])
-
-        # Type label bar
-        c.setFillColor(accent_color)
-        c.rect(x, y - padding - 18, width, 18, fill=True, stroke=False)
-
-        c.setFillColor(colors.white)
-        c.setFont("Helvetica-Bold", 8)
-        c.drawString(x + padding, y - padding - 12, "Tipo:")
-
-        # Type value - editable field
-        type_x = x + padding + 30
-        type_width = width - 2*padding - 30
-        c.setFillColor(light)
-        c.rect(type_x, y - padding - 16, type_width, 14, fill=True, stroke=False)
-
-        form = c.acroForm
-        form.textfield(
-            name=f"type_{id(item)}",
-            x=type_x,
-            y=y - padding - 16,
-            width=type_width,
-            height=14,
-            borderWidth=0,
-            textColor=colors.black,
-            fontSize=9,
-            fontName='Helvetica',
-            value=item.get('type', '')
-        )
-
-        # Image
-        if item.get('image_path') and os.path.exists(item['image_path']):
-            self._draw_image(c, item['image_path'], x, y, width, height, padding)
-        else:
-            image_y_center = y - padding - 30 - (height - 110) / 2
-            c.setFillColor(colors.lightgrey)
-            c.setFont("Helvetica", 10)
-            c.drawCentredString(x + width/2, image_y_center, "[Image placeholder]")
-
-            c.setStrokeColor(colors.grey)
-            c.setLineWidth(0.5)
-            image_box_height = height - 110
-            c.rect(x + 10, y - padding - 30 - image_box_height, width - 20, image_box_height)
-
-        # Quantity
-        c.setFillColor(dark)
-        c.setFont("Helvetica-Bold", 9)
-        qty_y = y - height + padding + 45
-        c.drawString(x + padding, qty_y - 2, "Requeridos:")
-
-        c.setFillColor(light)
-        c.setStrokeColor(accent_color)
-        c.setLineWidth(1)
-        qty_x = x + padding + 55
-        qty_width = width - 2*padding - 55
-        c.rect(qty_x, qty_y - 15, qty_width, 15, fill=True, stroke=True)
-
-        form.textfield(
-            name=f"quantity_{id(item)}",
-            x=qty_x,
-            y=qty_y - 15,
-            width=qty_width,
-            height=15,
-            borderWidth=0,
-            textColor=colors.black,
-            fontSize=10,
-            fontName='Helvetica',
-            value=str(item.get('quantity', ''))
-        )
-
-        # Contados field
-        if self.config['form_fields']['enable_editable']:
-            field_y = qty_y - 25
-
-            c.setFillColor(dark)
-            c.setFont("Helvetica-Bold", 8)
-            c.drawString(x + padding, field_y - 2, "Contados:")
-
-            c.setFillColor(light)
-            c.setStrokeColor(accent_color)
-            c.setLineWidth(1)
-            counted_x = x + padding + 55
-            counted_width = width - 2*padding - 55
-            c.rect(counted_x, field_y - 15, counted_width, 15, fill=True, stroke=True)
-
-            form.textfield(
-                name=f"counted_{id(item)}",
-                x=counted_x,
-                y=field_y - 15,
-                width=counted_width,
-                height=15,
-                borderWidth=0,
-                textColor=colors.black,
-                fontSize=10,
-                fontName='Helvetica'
-            )
-
-    def _draw_image(self, c, image_path, x, y, cell_width, cell_height, padding):
-        """Draw image centered in cell between TIPO bar and Requeridos field"""
-        try:
-            img = PILImage.open(image_path)
-            img_width, img_height = img.size
-
-            # Image zone boundaries (absolute y coordinates)
-            top_of_image_zone = y - padding - 20  # below TIPO bar
-            bottom_of_image_zone = y - cell_height + padding + 50  # above Requeridos+Contados
-
-            available_width = cell_width - 10
-            available_height = top_of_image_zone - bottom_of_image_zone
-
-            scale_width = available_width / img_width
-            scale_height = available_height / img_height
-            scale = min(scale_width, scale_height)
-
-            display_width = img_width * scale
-            display_height = img_height * scale
-
-            # Center image in the available zone
-            image_x = x + (cell_width - display_width) / 2
-            image_y = bottom_of_image_zone + (available_height - display_height) / 2
-
-            c.drawImage(image_path, image_x, image_y,
-                       width=display_width, height=display_height,
-                       preserveAspectRatio=True, mask='auto')
-        except Exception as e:
-            print(f"Warning: Could not load image {image_path}: {e}")
-            c.setFont("Helvetica", 10)
-            c.setFillColor(colors.lightgrey)
-            c.drawCentredString(x + cell_width/2, y - cell_height/2, "[Image not found]")
+        return items
 
 
 def open_file(filepath):
@@ -985,10 +661,10 @@ def open_file(filepath):
         return False
 
 
-def generate_from_json(json_data):
-    """Generate PDF from JSON data (used by Claude Code)"""
-    generator = AxkanPDFGenerator()
-
+def order_from_json(json_data, fetcher=None):
+    """(order_name, instructions, num_designs, slot_data) from order JSON.
+    Designs with an image_url instead of a local image_path are downloaded
+    (all at once, through the fetcher's cache)."""
     order_name = json_data.get('order_name', 'Untitled Order')
     instructions = json_data.get('instructions', '')
     designs = json_data.get('designs', [])
@@ -1010,6 +686,26 @@ def generate_from_json(json_data):
         if 'image_path' in design:
             slot_data['image_paths'][i] = design['image_path']
 
+    urls = {i: design['image_url'] for i, design in enumerate(designs)
+            if design.get('image_url') and not (design.get('image_path') and os.path.exists(design['image_path']))}
+    if urls:
+        fetcher = fetcher or ImageFetcher()
+        paths, errors = fetcher.fetch_all(urls.values())
+        for i, url in urls.items():
+            if url in paths:
+                slot_data['image_paths'][i] = paths[url]
+            else:
+                print(f"Warning: Could not fetch image {url}: {errors[url]}")
+        print(fetcher.summary())
+
+    return order_name, instructions, num_designs, slot_data
+
+
+def generate_from_json(json_data, generator=None):
+    """Generate PDF from JSON data (used by Claude Code).
+    Pass a generator to reuse its config and sheet across orders (batch_render.py)."""
+    generator = generator or AxkanPDFGenerator()
+    order_name, instructions, num_designs, slot_data = order_from_json(json_data, generator.fetcher)
     output_path = generator.generate_pdf(order_name, instructions, num_designs, slot_data)
 
     return output_path
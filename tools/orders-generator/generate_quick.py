@@ -9,18 +9,49 @@ import subprocess
 import sys
 import tkinter as tk
 from tkinter import simpledialog, messagebox, filedialog
-from datetime import datetime
 from pathlib import Path
 import io
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.pdfbase import pdfform
 from PIL import Image as PILImage, ImageGrab
 import yaml
 
+from excel_orders import read_order
+from order_pdf import OrderSheet, VT_STYLE
+from slot_images import SlotImageLoader, flatten
+
+
+def prepare_quick_image(img, temp_path):
+    """Shrink, flatten and save a design as JPEG with memory optimization and
+    compression (runs on a SlotImageLoader worker thread)"""
+    # Compress large images more aggressively
+    # For very large images (>4000px), resize to 1500px max
+    # For large images (>2000px), resize to 2000px max
+    if img.width > 4000 or img.height > 4000:
+        max_size = 1500
+        print(f"  Compressing very large image ({img.width}x{img.height} -> max {max_size}px)")
+        img.thumbnail((max_size, max_size), PILImage.Resampling.LANCZOS)
+    elif img.width > 2000 or img.height > 2000:
+        max_size = 2000
+        print(f"  Optimizing large image ({img.width}x{img.height} -> max {max_size}px)")
+        img.thumbnail((max_size, max_size), PILImage.Resampling.LANCZOS)
+
+    # Convert to RGB if necessary (removes alpha channel to reduce size)
+    img = flatten(img)
+
+    # Use JPEG for better compression (smaller file sizes)
+    # Quality 85 provides good balance between size and quality
+    img.save(str(temp_path), "JPEG", quality=85, optimize=True)
+
+    # Check file size and compress more if needed (>2MB)
+    file_size = temp_path.stat().st_size
+    if file_size > 2 * 1024 * 1024:  # > 2MB
+        print(f"  Further compressing ({file_size / 1024 / 1024:.1f}MB -> reducing quality)")
+        img.save(str(temp_path), "JPEG", quality=70, optimize=True)
+        file_size = temp_path.stat().st_size
+
+    print(f"  Design image: {img.width}x{img.height}, {file_size / 1024:.0f}KB")
+    return img
+
 
 class ImageEditorGUI:
     """GUI for adding images to order slots with copy-paste support"""
@@ -36,6 +67,10 @@ class ImageEditorGUI:
         self.root.title(f"Add Images - {order_name}")
         self.root.geometry("900x700")
 
+        # Pasted images are compressed and saved on worker threads
+        self.slot_images = SlotImageLoader(self.root, prepare_quick_image, self._slot_image_ready,
+                                           failed=self._slot_image_failed, preview_size=(150, 150))
+
         self.setup_ui()
 
     def setup_ui(self):
@@ -228,58 +263,14 @@ class ImageEditorGUI:
                 messagebox.showerror("Error", f"Could not load image:\n{e}")
 
     def add_image_to_slot(self, slot_num, img):
-        """Add an image to a slot with memory optimization and compression"""
-        original_size = img.width * img.height * 4  # Approximate original size in bytes
-
-        # Compress large images more aggressively
-        # For very large images (>4000px), resize to 1500px max
-        # For large images (>2000px), resize to 2000px max
-        if img.width > 4000 or img.height > 4000:
-            max_size = 1500
-            print(f"  Compressing very large image for Design {slot_num + 1} ({img.width}x{img.height} -> max {max_size}px)")
-            img.thumbnail((max_size, max_size), PILImage.Resampling.LANCZOS)
-        elif img.width > 2000 or img.height > 2000:
-            max_size = 2000
-            print(f"  Optimizing large image for Design {slot_num + 1} ({img.width}x{img.height} -> max {max_size}px)")
-            img.thumbnail((max_size, max_size), PILImage.Resampling.LANCZOS)
-
-        # Convert to RGB if necessary (removes alpha channel to reduce size)
-        if img.mode == 'RGBA':
-            # Create white background
-            background = PILImage.new('RGB', img.size, (255, 255, 255))
-            background.paste(img, mask=img.split()[3])  # Use alpha channel as mask
-            img = background
-        elif img.mode not in ('RGB', 'L'):
-            img = img.convert('RGB')
-
-        # Save temp file with compression
-        temp_dir = Path("temp_images")
-        temp_dir.mkdir(exist_ok=True)
-
-        # Use JPEG for better compression (smaller file sizes)
-        # Quality 85 provides good balance between size and quality
-        temp_path = temp_dir / f"slot_{slot_num}.jpg"
-        img.save(str(temp_path), "JPEG", quality=85, optimize=True)
-
-        # Check file size and compress more if needed (>2MB)
-        file_size = temp_path.stat().st_size
-        if file_size > 2 * 1024 * 1024:  # > 2MB
-            print(f"  Further compressing Design {slot_num + 1} ({file_size / 1024 / 1024:.1f}MB -> reducing quality)")
-            img.save(str(temp_path), "JPEG", quality=70, optimize=True)
-            file_size = temp_path.stat().st_size
-
-        print(f"  Design {slot_num + 1}: {img.width}x{img.height}, {file_size / 1024:.0f}KB")
+        """Add an image to a slot; it is compressed in the background (slot_images.py)"""
+        self.slot_labels[slot_num].config(image="", text="Loading...")
+        self.slot_labels[slot_num].image = None
+        self.slot_images.submit(slot_num, img)
 
+    def _slot_image_ready(self, slot_num, path, photo):
         # Store path only (not the image object to save memory)
-        self.image_paths[slot_num] = str(temp_path)
-
-        # Update preview with thumbnail
-        img_copy = img.copy()
-        img_copy.thumbnail((150, 150))
-
-        # Convert to PhotoImage
-        from PIL import ImageTk
-        photo = ImageTk.PhotoImage(img_copy)
+        self.image_paths[slot_num] = path
 
         self.slot_labels[slot_num].config(image=photo, text="")
         self.slot_labels[slot_num].image = photo  # Keep reference
@@ -287,12 +278,16 @@ class ImageEditorGUI:
         # Change background to show it has image
         self.slot_frames[slot_num].config(bg="#ccffcc")
 
-        # Clear the full-size image from memory
-        del img
-        del img_copy
+    def _slot_image_failed(self, slot_num, error):
+        self.image_paths.pop(slot_num, None)
+        self.slot_labels[slot_num].config(image="", text="[No image]\nClick here & Cmd+V to paste")
+        self.slot_labels[slot_num].image = None
+        self.slot_frames[slot_num].config(bg="white")
+        messagebox.showerror("Error", f"Could not load image:\n{error}")
 
     def remove_image(self, slot_num):
         """Remove image from a slot"""
+        self.slot_images.cancel(slot_num)
         if slot_num in self.image_paths:
             # Delete temp file
             try:
@@ -310,6 +305,7 @@ class ImageEditorGUI:
 
     def generate_pdf(self):
         """Generate PDF with images"""
+        self.slot_images.flush()    # images still being compressed
         self.result = "generate"
         self.root.quit()
         self.root.destroy()
@@ -515,7 +511,7 @@ class UnifiedOrderDialog:
 
 
 class QuickPDFGenerator:
-    """Quick PDF generator with dialog prompt"""
+    """Quick PDF generator with dialog prompt (VT sheet drawn by order_pdf.OrderSheet)"""
 
     def __init__(self):
         self.load_config()
@@ -525,12 +521,7 @@ class QuickPDFGenerator:
         with open('config.yaml', 'r', encoding='utf-8') as f:
             self.config = yaml.safe_load(f)
 
-        # Set up page dimensions
-        if self.config['layout']['page_size'] == 'A4':
-            self.page_width, self.page_height = A4
-
-        self.margin = self.config['layout']['margin'] * mm
-        self.columns = self.config['layout']['columns']
+        self.sheet = OrderSheet(VT_STYLE, self.config)
 
     def ask_order_details(self):
         """Show unified dialog for all order details"""
@@ -637,33 +628,7 @@ class QuickPDFGenerator:
         if not os.path.exists(excel_path):
             raise FileNotFoundError(f"Template file not found: {excel_path}")
 
-        wb = load_workbook(excel_path)
-        sheet = wb.active
-
-        order_data = {
-            'order_number': '',
-            'client_name': '',
-            'items': []
-        }
-
-        # Read items starting from row 5
-        for row in range(5, sheet.max_row + 1):
-            product_name = sheet.cell(row, 1).value
-            product_type = sheet.cell(row, 2).value
-            quantity = sheet.cell(row, 3).value
-            image_path = sheet.cell(row, 4).value
-
-            if not product_name:
-                continue
-
-            order_data['items'].append({
-                'name': str(product_name),
-                'type': str(product_type),
-                'quantity': int(quantity) if quantity else 0,
-                'image_path': str(image_path) if image_path else None
-            })
-
-        return order_data
+        return read_order(excel_path, order_info=False)
 
     def generate_pdf(self, order_name, instructions, num_designs, image_paths=None):
         """Generate PDF with the given order name, instructions, and number of designs"""
@@ -713,338 +678,11 @@ class QuickPDFGenerator:
             items.append({
                 'name': f"Design {i+1}",
                 'type': "",
-                'quantity': 0,
+                'quantity': '',
                 'image_path': img_path
             })
 
-        # Create PDF
-        c = canvas.Canvas(str(output_path), pagesize=(self.page_width, self.page_height))
-
-        # Draw header with instructions
-        self._draw_header(c, order_name, instructions, num_designs)
-
-        # Draw grid with items
-        self._draw_items_grid(c, items)
-
-        # Save PDF
-        c.save()
-
-        return str(output_path)
-
-    def _draw_header(self, c, order_name, instructions, num_designs):
-        """Draw PDF header with instructions and logos"""
-        # Navy blue and blue colors
-        navy_blue = colors.HexColor('#1B4F72')  # Dark navy blue
-        bright_blue = colors.HexColor('#2E86C1')  # Bright blue
-
-        # Add VT logo (only vt1.png - the VT letters)
-        logo_height = 60
-        try:
-            # Try to load vt1.png (VT symbol)
-            if os.path.exists('vt1.png'):
-                c.drawImage('vt1.png', self.margin,
-                           self.page_height - 75,
-                           width=70, height=logo_height,
-                           preserveAspectRatio=True, mask='auto')
-        except:
-            pass
-
-        # Title
-        c.setFillColor(navy_blue)
-        c.setFont("Helvetica-Bold", 20)
-        c.drawCentredString(self.page_width / 2, self.page_height - 50, "ORDEN DE COMPRA")
-
-        # Order info box (white background)
-        y_pos = self.page_height - 100
-        c.setFillColor(colors.white)
-        c.setStrokeColor(navy_blue)
-        c.setLineWidth(2)
-        info_box_height = 25
-        c.roundRect(self.margin, y_pos - info_box_height,
-                   self.page_width - 2 * self.margin, info_box_height,
-                   5, fill=True, stroke=True)
-
-        # Order info text
-        c.setFillColor(navy_blue)
-        c.setFont("Helvetica-Bold", self.config['fonts']['body_size'])
-        order_info = f"Order: {order_name} | Designs: {num_designs} | Date: {datetime.now().strftime('%Y-%m-%d')}"
-        c.drawString(self.margin + 10, y_pos - 17, order_info)
-
-        # Instructions field
-        y_pos -= 35
-        c.setFillColor(navy_blue)
-        c.setFont("Helvetica-Bold", self.config['fonts']['body_size'])
-        c.drawString(self.margin, y_pos, "Instructions:")
-
-        # Draw instructions box with blue border
-        c.setFont("Helvetica", self.config['fonts']['body_size'])
-        box_x = self.margin + 80
-        box_width = self.page_width - 2 * self.margin - 80
-        box_height = 30
-
-        # Colored border
-        c.setStrokeColor(bright_blue)
-        c.setFillColor(colors.HexColor('#EBF5FB'))  # Light blue background
-        c.setLineWidth(2)
-        c.roundRect(box_x, y_pos - box_height + 5, box_width, box_height, 3, fill=True, stroke=True)
-
-        # Draw instructions text
-        c.setFillColor(colors.black)
-        if instructions:
-            c.drawString(box_x + 5, y_pos - 10, instructions)
-
-        y_pos -= box_height
-
-        # CAJAS TOTALES field - very visible
-        y_pos -= 40
-        c.setFillColor(navy_blue)
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(self.margin, y_pos + 5, "CAJAS TOTALES:")
-
-        # Draw large box for total boxes with bright blue border
-        cajas_box_x = self.margin + 120
-        cajas_box_width = 150
-        cajas_box_height = 35
-
-        c.setStrokeColor(bright_blue)
-        c.setFillColor(colors.HexColor('#EBF5FB'))
-        c.setLineWidth(3)
-        c.roundRect(cajas_box_x, y_pos - 15, cajas_box_width, cajas_box_height, 5, fill=True, stroke=True)
-
-        # Add editable field for total boxes
-        form = c.acroForm
-        form.textfield(
-            name="cajas_totales",
-            x=cajas_box_x,
-            y=y_pos - 15,
-            width=cajas_box_width,
-            height=cajas_box_height,
-            borderWidth=0,
-            textColor=colors.black,
-            fontSize=16,
-            fontName='Helvetica-Bold'
-        )
-
-        y_pos -= 25
-
-        # Draw separator line with blue color
-        c.setStrokeColor(bright_blue)
-        c.setLineWidth(3)
-        c.line(self.margin, y_pos - 5, self.page_width - self.margin, y_pos - 5)
-
-    def _draw_items_grid(self, c, items):
-        """Draw grid of items with dynamic sizing"""
-        num_items = len(items)
-        columns = 3  # Always 3 columns
-        max_per_page = 9  # Maximum 3 rows x 3 columns
-
-        # Calculate available space
-        available_width = self.page_width - 2 * self.margin
-        available_height = self.page_height - self.margin - 230  # Account for header with CAJAS TOTALES
-
-        # Calculate number of items on first page
-        items_on_page = min(num_items, max_per_page)
-        rows_on_page = (items_on_page + columns - 1) // columns  # Ceiling division
-
-        # Dynamic cell sizing with spacing
-        spacing = 10  # Spacing between cells
-        cell_width = (available_width - (columns - 1) * spacing) / columns
-        cell_height = (available_height - (rows_on_page - 1) * spacing) / rows_on_page
-
-        # Ensure minimum size
-        cell_width = max(cell_width, 150)
-        cell_height = max(cell_height, 180)
-
-        padding = self.config['cell']['padding']
-
-        # Center the grid
-        total_grid_width = cell_width * columns + spacing * (columns - 1)
-        total_grid_height = cell_height * rows_on_page + spacing * (rows_on_page - 1)
-
-        start_x = (self.page_width - total_grid_width) / 2
-        start_y = self.page_height - 230 - (available_height - total_grid_height) / 2
-
-        current_x = start_x
-        current_y = start_y
-        items_in_row = 0
-        items_drawn = 0
-
-        for item in items:
-            # Check if we need a new page
-            if items_drawn > 0 and items_drawn % max_per_page == 0:
-                c.showPage()
-
-                # Recalculate for remaining items
-                remaining_items = num_items - items_drawn
-                items_on_page = min(remaining_items, max_per_page)
-                rows_on_page = (items_on_page + columns - 1) // columns
-
-                cell_height = (available_height - (rows_on_page - 1) * spacing) / rows_on_page
-                cell_height = max(cell_height, 180)
-
-                total_grid_height = cell_height * rows_on_page + spacing * (rows_on_page - 1)
-                start_y = self.page_height - self.margin - (available_height - total_grid_height) / 2
-
-                current_x = start_x
-                current_y = start_y
-                items_in_row = 0
-
-            # Draw cell border
-            c.setStrokeColor(colors.black)
-            c.setLineWidth(1)
-            c.rect(current_x, current_y - cell_height, cell_width, cell_height)
-
-            # Draw item content
-            self._draw_item_cell(c, item, current_x, current_y, cell_width, cell_height, padding)
-
-            # Move to next position
-            items_in_row += 1
-            items_drawn += 1
-
-            if items_in_row >= columns:
-                current_y -= (cell_height + spacing)
-                current_x = start_x
-                items_in_row = 0
-            else:
-                current_x += (cell_width + spacing)
-
-    def _draw_item_cell(self, c, item, x, y, width, height, padding):
-        """Draw a single item cell"""
-        navy_blue = colors.HexColor('#1B4F72')
-        bright_blue = colors.HexColor('#2E86C1')
-        light_blue = colors.HexColor('#EBF5FB')
-
-        # Type label with blue background bar - make it editable
-        c.setFillColor(bright_blue)
-        c.rect(x, y - padding - 18, width, 18, fill=True, stroke=False)
-
-        c.setFillColor(colors.white)
-        c.setFont("Helvetica-Bold", 8)
-        c.drawString(x + padding, y - padding - 12, "Tipo:")
-
-        # Editable Type field
-        type_field_x = x + padding + 30
-        type_field_width = width - 2*padding - 30
-        c.setFillColor(light_blue)
-        c.rect(type_field_x, y - padding - 16, type_field_width, 14, fill=True, stroke=False)
-
-        form = c.acroForm
-        form.textfield(
-            name=f"type_{id(item)}",
-            x=type_field_x,
-            y=y - padding - 16,
-            width=type_field_width,
-            height=14,
-            borderWidth=0,
-            textColor=colors.black,
-            fontSize=9,
-            fontName='Helvetica'
-        )
-
-        # Image area - draw image if exists, otherwise show placeholder
-        if item.get('image_path') and os.path.exists(item['image_path']):
-            self._draw_image(c, item['image_path'], x, y, width, height, padding)
-        else:
-            # Show placeholder
-            image_y_center = y - padding - 30 - (height - 110) / 2
-            c.setFillColor(colors.lightgrey)
-            c.setFont("Helvetica", 10)
-            c.drawCentredString(x + width/2, image_y_center, "[Image placeholder]")
-
-            # Draw a light grey box for image area
-            c.setStrokeColor(colors.grey)
-            c.setLineWidth(0.5)
-            image_box_height = height - 110
-            c.rect(x + 10, y - padding - 30 - image_box_height, width - 20, image_box_height, stroke=True, fill=False)
-
-        # Quantity ordered with blue accent - make it editable
-        c.setFillColor(navy_blue)
-        c.setFont("Helvetica-Bold", 9)
-        qty_y = y - height + padding + 45
-        c.drawString(x + padding, qty_y - 2, "Requeridos:")
-
-        # Editable quantity field
-        c.setFillColor(light_blue)
-        c.setStrokeColor(bright_blue)
-        c.setLineWidth(1)
-        qty_field_x = x + padding + 55
-        qty_field_width = width - 2*padding - 55
-        c.rect(qty_field_x, qty_y - 15, qty_field_width, 15, fill=True, stroke=True)
-
-        form = c.acroForm
-        form.textfield(
-            name=f"quantity_{id(item)}",
-            x=qty_field_x,
-            y=qty_y - 15,
-            width=qty_field_width,
-            height=15,
-            borderWidth=0,
-            textColor=colors.black,
-            fontSize=10,
-            fontName='Helvetica'
-        )
-
-        # Editable fields with blue labels
-        if self.config['form_fields']['enable_editable']:
-            field_y = qty_y - 25
-
-            # Counted
-            c.setFillColor(navy_blue)
-            c.setFont("Helvetica-Bold", 8)
-            c.drawString(x + padding, field_y - 2, "Contados:")
-
-            # Draw light blue background for field
-            c.setFillColor(light_blue)
-            c.setStrokeColor(bright_blue)
-            c.setLineWidth(1)
-            counted_field_x = x + padding + 55
-            counted_field_width = width - 2*padding - 55
-            c.rect(counted_field_x, field_y - 15, counted_field_width, 15, fill=True, stroke=True)
-
-            # Add text field
-            form = c.acroForm
-            form.textfield(
-                name=f"counted_{id(item)}",
-                x=counted_field_x,
-                y=field_y - 15,
-                width=counted_field_width,
-                height=15,
-                borderWidth=0,
-                textColor=colors.black,
-                fontSize=10,
-                fontName='Helvetica'
-            )
-
-    def _draw_image(self, c, image_path, x, y, cell_width, cell_height, padding):
-        """Draw image centered and auto-sized in cell"""
-        try:
-            img = PILImage.open(image_path)
-            img_width, img_height = img.size
-
-            # Calculate available space for image (excluding header and footer areas)
-            available_width = cell_width - 6  # 3px padding on each side
-            available_height = cell_height - 65  # Space for tipo, requeridos, contados fields
-
-            # Calculate scale to fit image within available space while maintaining aspect ratio
-            scale_width = available_width / img_width
-            scale_height = available_height / img_height
-            scale = min(scale_width, scale_height)
-
-            display_width = img_width * scale
-            display_height = img_height * scale
-
-            # Center the image horizontally and vertically in the available space
-            image_x = x + (cell_width - display_width) / 2
-            image_y = y - padding - 30 - available_height/2 - display_height/2
-
-            c.drawImage(image_path, image_x, image_y,
-                       width=display_width, height=display_height,
-                       preserveAspectRatio=True, mask='auto')
-        except Exception as e:
-            print(f"Warning: Could not load image {image_path}: {e}")
-            c.setFont("Helvetica", 10)
-            c.setFillColor(colors.lightgrey)
-            c.drawCentredString(x + cell_width/2, y - cell_height/2, "[Image not found]")
+        return self.sheet.render(output_path, order_name, instructions, items)
 
 
 def open_file(filepath):
@@ -17,9 +17,12 @@ from reportlab.lib.utils import ImageReader
 from reportlab.pdfbase import pdfform
 from reportlab.platypus import Table, TableStyle
 from PIL import Image as PILImage
-from openpyxl import load_workbook
 import yaml
 
+from excel_orders import read_order
+from pdf_images import DesignImages
+from order_pdf import TEMPLATES
+
 
 class ReferenceSheetGenerator:
     """Generates PDF reference sheets from order data"""
@@ -46,41 +49,9 @@ class ReferenceSheetGenerator:
         """
         Read order data from Excel file
         Expected columns: Product Name, Type, Quantity, Image Path
+        (streamed read-only and cached per file, see excel_orders.py)
         """
-        wb = load_workbook(excel_path)
-        sheet = wb.active
-
-        order_data = {
-            'order_number': '',
-            'client_name': '',
-            'items': []
-        }
-
-        # Read header row to get order info
-        if sheet.cell(1, 1).value == 'Order Number':
-            order_data['order_number'] = str(sheet.cell(1, 2).value or '')
-        if sheet.cell(2, 1).value == 'Client Name':
-            order_data['client_name'] = str(sheet.cell(2, 2).value or '')
-
-        # Read items starting from row 5 (skip header)
-        header_row = 4
-        for row in range(header_row + 1, sheet.max_row + 1):
-            product_name = sheet.cell(row, 1).value
-            product_type = sheet.cell(row, 2).value
-            quantity = sheet.cell(row, 3).value
-            image_path = sheet.cell(row, 4).value
-
-            if not product_name:  # Skip empty rows
-                continue
-
-            order_data['items'].append({
-                'name': str(product_name),
-                'type': str(product_type),
-                'quantity': int(quantity) if quantity else 0,
-                'image_path': str(image_path) if image_path else None
-            })
-
-        return order_data
+        return read_order(excel_path)
 
     def generate_pdf(self, order_data, output_filename=None):
         """Generate PDF reference sheet from order data"""
@@ -97,6 +68,7 @@ class ReferenceSheetGenerator:
 
         # Create PDF
         c = canvas.Canvas(str(output_path), pagesize=(self.page_width, self.page_height))
+        self.images = DesignImages.from_config(self.config)
 
         # Draw header
         self._draw_header(c, order_data)
@@ -106,14 +78,16 @@ class ReferenceSheetGenerator:
 
         # Save PDF
         c.save()
+        print(self.images.summary())
 
         print(f"[SUCCESS] PDF generated successfully: {output_path}")
         return str(output_path)
 
     def _draw_header(self, c, order_data):
         """Draw PDF header with order information"""
-        c.setFont("Helvetica-Bold", self.config['fonts']['title_size'])
-        c.drawString(self.margin, self.page_height - self.margin, "REFERENCE SHEET")
+        TEMPLATES.place(c, ('reference-header', self.page_width, self.page_height, self.margin,
+                            self.config['fonts']['title_size']),
+                        self._header_art, (0, 0, self.page_width, self.page_height))
 
         # Order info
         c.setFont("Helvetica", self.config['fonts']['body_size'])
@@ -126,7 +100,13 @@ class ReferenceSheetGenerator:
 
         c.drawString(self.margin, y_pos, order_info)
 
+    def _header_art(self, c):
+        """Title and rule, the same on every sheet (a cached form XObject)"""
+        c.setFont("Helvetica-Bold", self.config['fonts']['title_size'])
+        c.drawString(self.margin, self.page_height - self.margin, "REFERENCE SHEET")
+
         # Draw line
+        y_pos = self.page_height - self.margin - 25
         c.setLineWidth(2)
         c.line(self.margin, y_pos - 10, self.page_width - self.margin, y_pos - 10)
 
@@ -140,9 +120,6 @@ class ReferenceSheetGenerator:
         start_y = self.page_height - self.margin - 60
         start_x = self.margin
 
-        # Calculate grid layout
-        rows_per_page = int((self.page_height - 2 * self.margin - 80) / cell_height)
-
         current_x = start_x
         current_y = start_y
         items_in_row = 0
@@ -155,12 +132,11 @@ class ReferenceSheetGenerator:
                 current_x = start_x
                 items_in_row = 0
 
-            # Draw cell border
-            c.setStrokeColor(colors.black)
-            c.setLineWidth(1)
-            c.rect(current_x, current_y - cell_height, cell_width, cell_height)
-
-            # Draw item content
+            # Cell border and labels (a cached form XObject), then the item
+            TEMPLATES.place(c, ('reference-cell', cell_width, cell_height, padding,
+                                self.config['fonts']['label_size'], self.config['form_fields']['enable_editable']),
+                            lambda c: self._cell_art(c, cell_width, cell_height, padding),
+                            (-1, -1, cell_width + 1, cell_height + 1), current_x, current_y - cell_height)
             self._draw_item_cell(c, item, current_x, current_y, cell_width, cell_height, padding)
 
             # Move to next position
@@ -174,6 +150,19 @@ class ReferenceSheetGenerator:
                 # Move to next column
                 current_x += cell_width
 
+    def _cell_art(self, c, width, height, padding):
+        """Everything in a cell that doesn't depend on the item, origin at its bottom-left"""
+        c.setStrokeColor(colors.black)
+        c.setLineWidth(1)
+        c.rect(0, 0, width, height)
+
+        if self.config['form_fields']['enable_editable']:
+            c.setFont("Helvetica", self.config['fonts']['label_size'])
+            field_y = padding + 60 - 25
+            for label in ("Contados:", "Cajas:", "Notas:"):
+                c.drawString(padding, field_y - 2, label)
+                field_y -= 20
+
     def _draw_item_cell(self, c, item, x, y, width, height, padding):
         """Draw a single item cell"""
         # Type label at top
@@ -194,31 +183,14 @@ class ReferenceSheetGenerator:
         qty_y = y - height + padding + 60
         c.drawString(x + padding, qty_y, f"Requeridos: {item['quantity']}")
 
-        # Editable fields
+        # Editable fields (labels are in the cell template)
         if self.config['form_fields']['enable_editable']:
-            field_height = self.config['form_fields']['field_height']
             field_y = qty_y - 25
-
-            # Counted field
-            c.setFont("Helvetica", self.config['fonts']['label_size'])
-            c.drawString(x + padding, field_y - 2, "Contados:")
-            pdfform.textFieldRelative(c, f"counted_{id(item)}",
-                                     x + padding + 55, field_y - 15,
-                                     width - 2*padding - 55, 15)
-
-            # Boxes field
-            field_y -= 20
-            c.drawString(x + padding, field_y - 2, "Cajas:")
-            pdfform.textFieldRelative(c, f"boxes_{id(item)}",
-                                     x + padding + 55, field_y - 15,
-                                     width - 2*padding - 55, 15)
-
-            # Notes field
-            field_y -= 20
-            c.drawString(x + padding, field_y - 2, "Notas:")
-            pdfform.textFieldRelative(c, f"notes_{id(item)}",
-                                     x + padding + 55, field_y - 15,
-                                     width - 2*padding - 55, 15)
+            for name in ("counted", "boxes", "notes"):
+                pdfform.textFieldRelative(c, f"{name}_{id(item)}",
+                                         x + padding + 55, field_y - 15,
+                                         width - 2*padding - 55, 15)
+                field_y -= 20
 
     def _draw_image(self, c, image_path, x, y, cell_width, cell_height, padding):
         """Draw image centered in cell"""
@@ -240,7 +212,7 @@ class ReferenceSheetGenerator:
             image_y = y - padding - 30 - display_height  # Below type label
 
             # Draw image
-            c.drawImage(image_path, image_x, image_y,
+            c.drawImage(self.images.prepare(image_path, display_width, display_height), image_x, image_y,
                        width=display_width, height=display_height,
                        preserveAspectRatio=True, mask='auto')
         except Exception as e:
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Image Fetch - design images from URLs, cached on disk
+=====================================================
+Orders can give designs[].image_url instead of a local image_path, so the
+design portal doesn't have to download and stage files first. ImageFetcher
+downloads all URLs of an order at once (threads sharing one pooled
+requests.Session) into a cache folder:
+
+    <cache>/<sha256 of url>.png     the image
+    <cache>/<sha256 of url>.json    url, ETag, Last-Modified, when it was fetched
+
+  - an image fetched less than revalidate_hours ago is used without any
+    request: repeat orders with catalog designs download nothing
+  - older ones are revalidated with If-None-Match / If-Modified-Since; a 304
+    costs a round trip but no download
+  - if the server can't be reached, the cached copy is used anyway
+  - responses over max_image_mb, or that aren't images, are refused
+  - when the cache grows past max_cache_mb the least recently used images
+    are deleted
+
+Usage:
+    fetcher = ImageFetcher.from_config(config)
+    paths, errors = fetcher.fetch_all(["https://.../design1.png", ...])
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from PIL import Image as PILImage
+
+CACHE_DIR = Path(tempfile.gettempdir()) / 'axkan_image_cache'
+CHUNK_SIZE = 1 << 16
+CONTENT_TYPES = {'image/jpeg': '.jpg', 'image/png': '.png', 'image/webp': '.webp',
+                 'image/gif': '.gif', 'image/bmp': '.bmp', 'image/tiff': '.tif'}
+IMAGE_SUFFIXES = set(CONTENT_TYPES.values()) | {'.jpeg', '.tiff'}
+
+
+def _discard(path):
+    if path:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+class ImageFetchError(Exception):
+    """The image could not be downloaded and there is no cached copy"""
+
+
+class ImageFetcher:
+    """Concurrent, cached downloads of design image URLs"""
+
+    def __init__(self, cache_dir=CACHE_DIR, max_cache_mb=500, max_image_mb=25, workers=8,
+                 timeout=30, revalidate_hours=24):
+        self.cache_dir = Path(cache_dir).expanduser()
+        self.max_cache_bytes = int(max_cache_mb * 1024 * 1024)
+        self.max_image_bytes = int(max_image_mb * 1024 * 1024)
+        self.workers = workers
+        self.timeout = timeout
+        self.revalidate_s = revalidate_hours * 3600
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers,
+                              max_retries=Retry(total=2, backoff_factor=0.5,
+                                                status_forcelist=(502, 503, 504)))
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._lock = threading.Lock()
+        self.stats = {'cached': 0, 'revalidated': 0, 'downloaded': 0, 'stale': 0, 'failed': 0,
+                      'bytes': 0}
+
+    @classmethod
+    def from_config(cls, config):
+        """Settings from the 'image_fetch' section of config.yaml."""
+        section = dict((config or {}).get('image_fetch') or {})
+        return cls(**section)
+
+    def _count(self, key, amount=1):
+        with self._lock:
+            self.stats[key] += amount
+
+    # ------------------------------------------------------------------
+    # One URL
+    # ------------------------------------------------------------------
+    def _meta_path(self, url):
+        return self.cache_dir / f"{hashlib.sha256(url.encode('utf-8')).hexdigest()}.json"
+
+    def _read_meta(self, meta_path):
+        try:
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return meta if (self.cache_dir / meta.get('file', '')).is_file() else None
+
+    def _write_meta(self, meta_path, meta):
+        fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(tmp, meta_path)
+
+    def fetch(self, url):
+        """Local path of the image at url, downloading it if needed."""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        meta_path = self._meta_path(url)
+        meta = self._read_meta(meta_path)
+        cached = self.cache_dir / meta['file'] if meta else None
+
+        if cached and time.time() - meta.get('fetched', 0) < self.revalidate_s:
+            os.utime(cached)    # mtime = last use, for eviction
+            self._count('cached')
+            return str(cached)
+
+        headers = {}
+        if meta and meta.get('etag'):
+            headers['If-None-Match'] = meta['etag']
+        if meta and meta.get('last_modified'):
+            headers['If-Modified-Since'] = meta['last_modified']
+
+        tmp = None
+        try:
+            with self.session.get(url, headers=headers, timeout=self.timeout, stream=True) as response:
+                if response.status_code == 304 and cached:
+                    meta['fetched'] = time.time()
+                    self._write_meta(meta_path, meta)
+                    os.utime(cached)
+                    self._count('revalidated')
+                    return str(cached)
+                response.raise_for_status()
+                if int(response.headers.get('Content-Length') or 0) > self.max_image_bytes:
+                    raise ImageFetchError(f"larger than {self.max_image_bytes / (1024 * 1024):g} MB")
+
+                content_type = response.headers.get('Content-Type', '').split(';')[0].strip().lower()
+                suffix = CONTENT_TYPES.get(content_type) or Path(urlparse(url).path).suffix.lower()
+                if suffix not in IMAGE_SUFFIXES:
+                    suffix = '.img'
+                fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix='.part')
+                size = 0
+                with os.fdopen(fd, 'wb') as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        size += len(chunk)
+                        if size > self.max_image_bytes:
+                            raise ImageFetchError(f"larger than {self.max_image_bytes / (1024 * 1024):g} MB")
+                        f.write(chunk)
+                etag = response.headers.get('ETag')
+                last_modified = response.headers.get('Last-Modified')
+        except requests.RequestException as e:
+            _discard(tmp)
+            if cached:      # offline or server down: an old copy beats an empty cell
+                print(f"Warning: Using cached {url}: {e}")
+                os.utime(cached)
+                self._count('stale')
+                return str(cached)
+            raise ImageFetchError(str(e)) from e
+        except ImageFetchError:
+            _discard(tmp)
+            raise
+
+        try:
+            with PILImage.open(tmp) as img:
+                img.verify()
+        except Exception:
+            _discard(tmp)
+            raise ImageFetchError(f"not an image ({content_type or 'unknown type'})")
+
+        dest = meta_path.with_suffix(suffix)
+        os.replace(tmp, dest)
+        if cached and cached != dest:
+            cached.unlink(missing_ok=True)
+        self._write_meta(meta_path, {'url': url, 'file': dest.name, 'etag': etag,
+                                     'last_modified': last_modified, 'fetched': time.time(), 'size': size})
+        self._count('downloaded')
+        self._count('bytes', size)
+        return str(dest)
+
+    # ------------------------------------------------------------------
+    # Many URLs
+    # ------------------------------------------------------------------
+    def fetch_all(self, urls):
+        """Fetch every URL at once. Returns ({url: path}, {url: error message});
+        it returns when the slowest download is done."""
+        urls = list(dict.fromkeys(urls))
+        paths, errors = {}, {}
+        if not urls:
+            return paths, errors
+        with ThreadPoolExecutor(max_workers=min(self.workers, len(urls)),
+                                thread_name_prefix='image-fetch') as pool:
+            futures = {url: pool.submit(self.fetch, url) for url in urls}
+            for url, future in futures.items():
+                try:
+                    paths[url] = future.result()
+                except Exception as e:
+                    self._count('failed')
+                    errors[url] = str(e)
+        self.evict(keep=set(paths.values()))
+        return paths, errors
+
+    def evict(self, keep=()):
+        """Delete least recently used images until the cache fits max_cache_mb."""
+        try:
+            files = [p for p in self.cache_dir.iterdir() if p.suffix not in ('.json', '.part') and p.is_file()]
+        except OSError:
+            return 0
+        entries = []
+        for p in files:
+            try:
+                stat = p.stat()
+            except OSError:     # evicted meanwhile by another generator sharing the cache
+                continue
+            entries.append((stat.st_mtime, stat.st_size, p))
+        entries.sort(key=lambda e: e[0])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in entries:
+            if total <= self.max_cache_bytes:
+                break
+            if str(path) in keep:
+                continue
+            try:
+                path.unlink(missing_ok=True)
+                path.with_suffix('.json').unlink(missing_ok=True)
+            except OSError:
+                continue
+            total -= size
+            removed += 1
+        return removed
+
+    def summary(self):
+        s = self.stats
+        return (f"🌐 Image URLs: {s['cached']} cached, {s['revalidated']} revalidated, "
+                f"{s['downloaded']} downloaded ({s['bytes'] / (1024 * 1024):.1f} MB), "
+                f"{s['stale']} stale, {s['failed']} failed")
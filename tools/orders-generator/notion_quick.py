@@ -17,17 +17,14 @@ import os
 import sys
 import subprocess
 import json
+import threading
+import time
 from datetime import datetime
 from pathlib import Path
 import tkinter as tk
 from tkinter import messagebox, filedialog, ttk
 import shutil
 
-from reportlab.lib.pagesizes import A4
-from reportlab.lib.units import mm
-from reportlab.pdfgen import canvas
-from reportlab.lib import colors
-from reportlab.pdfbase import pdfform
 from PIL import Image as PILImage, ImageGrab, ImageTk
 
 
@@ -41,6 +38,15 @@ OUTPUT_PATH = "/Volumes/TRABAJOS/2026/ORDERS/IVAN"
 # ============================================================================
 BACKUP_PATH = Path.home() / "Documents" / "AXKAN_Orders_Backup"
 PENDING_ORDERS_PATH = BACKUP_PATH / "pending_orders"
+LOCAL_PDF_PATH = BACKUP_PATH / "pdfs"             # PDFs are rendered here first
+LOCAL_PDF_KEEP_DAYS = 7                          # then deleted once published and this old
+PUBLISH_QUEUE_FILE = BACKUP_PATH / "publish_queue.json"
+PUBLISH_EXIT_WAIT = 20                           # seconds to let copies finish on quit
+PENDING_JOURNAL_FILE = BACKUP_PATH / "pending_journal.jsonl"
+PENDING_CATALOG_FILE = BACKUP_PATH / "pending_orders.db"
+BLOB_STORE_PATH = BACKUP_PATH / "blobs"                # design images of pending orders
+CONNECTION_STATUS_FILE = BACKUP_PATH / "connection_status.json"   # last probe result, shown at startup
+CONNECTION_PROBE_TIMEOUT = 8                     # seconds before a silent share counts as offline
 
 
 # ============================================================================
@@ -49,6 +55,8 @@ PENDING_ORDERS_PATH = BACKUP_PATH / "pending_orders"
 class ConnectionChecker:
     """Check network connection and manage order recovery"""
 
+    _probe = None   # the ConnectionProbe in flight: a stalled mount ties up one thread, not one per click
+
     @staticmethod
     def is_output_path_available():
         """Check if the output path is accessible"""
@@ -67,6 +75,33 @@ class ConnectionChecker:
             print(f"[Connection] Output path not available: {e}")
             return False
 
+    @staticmethod
+    def last_known_status():
+        """Result of the last probe (True / False), or None if there never was one"""
+        try:
+            with open(CONNECTION_STATUS_FILE, 'r', encoding='utf-8') as f:
+                return bool(json.load(f)['online'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def save_status(online):
+        try:
+            BACKUP_PATH.mkdir(parents=True, exist_ok=True)
+            CONNECTION_STATUS_FILE.write_text(json.dumps({
+                'online': online, 'checked': datetime.now().isoformat(timespec='seconds')}))
+        except OSError as e:
+            print(f"[Connection] Could not save status: {e}")
+
+    @staticmethod
+    def probe_in_background():
+        """Start is_output_path_available() on a daemon thread, or join the probe
+        still running. Returns the ConnectionProbe to poll."""
+        probe = ConnectionChecker._probe
+        if probe is None or probe.finished():
+            probe = ConnectionChecker._probe = ConnectionProbe()
+        return probe
+
     @staticmethod
     def get_backup_path():
         """Get or create backup directory"""
@@ -87,19 +122,21 @@ class ConnectionChecker:
         order_folder = PENDING_ORDERS_PATH / f"{safe_name}_{timestamp}"
         order_folder.mkdir(parents=True, exist_ok=True)
 
-        # Save images to backup folder
+        # Images go to the shared blob store (each distinct image stored once);
+        # images/ gets hardlinks to them where the disk supports it
         images_folder = order_folder / "images"
         images_folder.mkdir(exist_ok=True)
+        blobs = get_blobs()
 
         saved_designs = []
         for i, design in enumerate(designs):
             saved_design = dict(design)
             img_path = design.get('image_path')
             if img_path and os.path.exists(img_path):
-                # Copy image to backup folder
-                new_img_path = images_folder / f"design_{i}.jpg"
-                shutil.copy2(img_path, new_img_path)
-                saved_design['image_path'] = str(new_img_path)
+                blob = blobs.put(img_path)
+                link = blobs.link(blob, images_folder / f"design_{i}{Path(blob).suffix}")
+                saved_design['image_path'] = str(link)
+                saved_design['image_blob'] = blob
             saved_designs.append(saved_design)
 
         # Save order data as JSON
@@ -115,6 +152,10 @@ class ConnectionChecker:
         with open(order_file, 'w', encoding='utf-8') as f:
             json.dump(order_data, f, indent=2, ensure_ascii=False)
 
+        # Indexed for the main menu; the background sync retries it as soon as the share is reachable
+        get_catalog().add(order_folder, order_data)
+        get_sync().add(order_folder, order_data)
+
         print(f"[Backup] Order saved to: {order_folder}")
         return str(order_folder)
 
@@ -128,37 +169,30 @@ class ConnectionChecker:
         return None
 
     @staticmethod
-    def get_pending_orders():
-        """Get list of pending orders that failed to save"""
+    def get_pending_orders(limit=None, offset=0):
+        """Get pending orders that failed to save, newest first (a page of them
+        with limit/offset). Served from the SQLite catalog, not by parsing folders."""
         if not PENDING_ORDERS_PATH.exists():
             return []
+        return get_catalog().list(limit, offset)
 
-        pending = []
-        for folder in PENDING_ORDERS_PATH.iterdir():
-            if folder.is_dir():
-                order_file = folder / "order_data.json"
-                if order_file.exists():
-                    try:
-                        with open(order_file, 'r', encoding='utf-8') as f:
-                            data = json.load(f)
-                            pending.append({
-                                'folder': str(folder),
-                                'name': data.get('order_name', 'Unknown'),
-                                'timestamp': data.get('timestamp', ''),
-                                'designs_count': len(data.get('designs', []))
-                            })
-                    except:
-                        pass
-
-        # Sort by timestamp, newest first
-        pending.sort(key=lambda x: x['timestamp'], reverse=True)
-        return pending
+    @staticmethod
+    def count_pending_orders():
+        if not PENDING_ORDERS_PATH.exists():
+            return 0
+        return get_catalog().count()
 
     @staticmethod
     def delete_pending_order(order_folder):
         """Delete a pending order after successful save"""
         try:
+            data = ConnectionChecker.load_pending_order(order_folder) or {}
             shutil.rmtree(order_folder)
+            for design in data.get('designs', []):
+                if design.get('image_blob'):
+                    get_blobs().release(design['image_blob'])
+            get_catalog().remove(order_folder)
+            get_sync().forget(order_folder)
             print(f"[Backup] Deleted pending order: {order_folder}")
             return True
         except Exception as e:
@@ -166,6 +200,113 @@ class ConnectionChecker:
             return False
 
 
+class ConnectionProbe:
+    """One is_output_path_available() call on a daemon thread. On a stale SMB
+    mount it can block for tens of seconds, so the UI polls result() instead."""
+
+    def __init__(self, timeout=CONNECTION_PROBE_TIMEOUT):
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+        self._result = None
+        self._timed_out = False
+        self._thread = threading.Thread(target=self._run, name="connection-probe", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        online = ConnectionChecker.is_output_path_available()
+        self._result = online
+        ConnectionChecker.save_status(online)
+
+    def finished(self):
+        return not self._thread.is_alive()
+
+    def result(self):
+        """True / False once known, None while still running. Past the timeout
+        the share counts as offline."""
+        if self._result is not None:
+            return self._result
+        if time.monotonic() < self.deadline:
+            return None
+        if not self._timed_out:
+            self._timed_out = True
+            print(f"[Connection] Output path not responding after {self.timeout}s")
+            ConnectionChecker.save_status(False)
+        return False
+
+
+# ============================================================================
+# BACKGROUND SYNC - Copies local PDFs to OUTPUT_PATH and retries pending orders
+# ============================================================================
+from share_publisher import SharePublisher  # noqa: E402
+from pending_sync import PendingOrderSync  # noqa: E402
+from order_catalog import PendingOrderCatalog  # noqa: E402
+from blob_store import BlobStore  # noqa: E402
+
+_publisher = None
+_sync = None
+_catalog = None
+_blobs = None
+# Pending-sync workers and the Tk thread both reach these getters; without the
+# lock two BlobStores could be built, each overwriting the other's refs.json
+_singletons_lock = threading.RLock()
+
+
+def get_blobs():
+    """The pending-order image store; reference counts are recounted from the
+    orders if refs.json is missing."""
+    global _blobs
+    if _blobs is None:
+        with _singletons_lock:
+            if _blobs is None:
+                blobs = BlobStore(BLOB_STORE_PATH)
+                if not blobs.refs_file.exists():
+                    blobs.rebuild_refs(PENDING_ORDERS_PATH.glob("*/order_data.json"))
+                _blobs = blobs
+    return _blobs
+
+
+def get_catalog():
+    """The pending-order index; rebuilt from the folders if missing or stale."""
+    global _catalog
+    if _catalog is None:
+        with _singletons_lock:
+            if _catalog is None:
+                _catalog = PendingOrderCatalog(PENDING_CATALOG_FILE, PENDING_ORDERS_PATH)
+    return _catalog
+
+
+def get_publisher():
+    """The app's SharePublisher, started on first use. Copies left over from
+    the last run are resumed; published local PDFs are pruned after a week."""
+    global _publisher
+    if _publisher is None:
+        with _singletons_lock:
+            if _publisher is None:
+                _publisher = SharePublisher(PUBLISH_QUEUE_FILE, prune_dir=LOCAL_PDF_PATH,
+                                            keep_days=LOCAL_PDF_KEEP_DAYS).start()
+    return _publisher
+
+
+def _regenerate_pending(order_data):
+    AxkanPDFGenerator().generate_pdf(order_data['order_name'], order_data['instructions'],
+                                     order_data['designs'])
+
+
+def get_sync():
+    """The app's PendingOrderSync, started on first use."""
+    global _sync
+    if _sync is None:
+        with _singletons_lock:
+            if _sync is None:
+                _sync = PendingOrderSync(PENDING_ORDERS_PATH, PENDING_JOURNAL_FILE,
+                                         regenerate=_regenerate_pending,
+                                         probe=ConnectionChecker.is_output_path_available,
+                                         publisher=get_publisher(), catalog=get_catalog(),
+                                         delete=ConnectionChecker.delete_pending_order)
+                _sync.start()   # after assigning: its workers call get_sync() through delete_pending_order
+    return _sync
+
+
 # ============================================================================
 # AXKAN BRAND COLORS - Modern UI Palette
 # ============================================================================
@@ -210,346 +351,11 @@ UI_SHADOW_COLOR = '#00000015'
 
 
 # ============================================================================
-# ORDER IMAGE ANALYZER - For auto-crop mode (Improved grid detection)
+# ORDER IMAGE ANALYZER - For auto-crop mode (shared engine in order_grid.py)
 # ============================================================================
-class OrderImageAnalyzer:
-    """Analyzes order images and extracts design cells"""
-
-    def __init__(self, image):
-        self.image = image
-        self.width, self.height = image.size
-
-    def _detect_by_text_labels(self, gray_image):
-        """
-        Detect grid by finding repeating text label patterns (like "Tipo:").
-        Order documents typically have labels at consistent positions in each cell.
-        """
-        height = gray_image.height
-        width = gray_image.width
-
-        row_signatures = []
-        sample_step_x = max(1, width // 100)
-
-        for y in range(height):
-            samples = [gray_image.getpixel((x, y)) for x in range(0, width, sample_step_x)]
-            avg_brightness = sum(samples) / len(samples) if samples else 128
-            variance = sum((s - avg_brightness) ** 2 for s in samples) / len(samples) if samples else 0
-            row_signatures.append((avg_brightness, variance))
-
-        brightness_changes = []
-        for i in range(1, len(row_signatures)):
-            change = abs(row_signatures[i][0] - row_signatures[i-1][0])
-            brightness_changes.append(change)
-
-        threshold = max(brightness_changes) * 0.3 if brightness_changes else 10
-
-        change_positions = []
-        for i, change in enumerate(brightness_changes):
-            if change > threshold:
-                change_positions.append(i)
-
-        if len(change_positions) < 2:
-            return (1, 1)
-
-        clusters = []
-        current_cluster = [change_positions[0]]
-        for pos in change_positions[1:]:
-            if pos - current_cluster[-1] < height // 20:
-                current_cluster.append(pos)
-            else:
-                clusters.append(sum(current_cluster) // len(current_cluster))
-                current_cluster = [pos]
-        clusters.append(sum(current_cluster) // len(current_cluster))
-
-        if len(clusters) >= 2:
-            spacings = [clusters[i+1] - clusters[i] for i in range(len(clusters)-1)]
-            avg_spacing = sum(spacings) / len(spacings)
-
-            if avg_spacing > 0:
-                estimated_rows = int(round(height / avg_spacing))
-                if estimated_rows >= 2 and estimated_rows <= 8:
-                    cols = self._detect_columns_by_symmetry(gray_image)
-                    if cols >= 2:
-                        return (estimated_rows, cols)
-
-        return (1, 1)
-
-    def _detect_columns_by_symmetry(self, gray_image):
-        """Detect columns by finding vertical symmetry in brightness"""
-        width = gray_image.width
-        height = gray_image.height
-
-        col_brightness = []
-        sample_step = max(1, height // 50)
-        for x in range(width):
-            total = sum(gray_image.getpixel((x, y)) for y in range(0, height, sample_step))
-            col_brightness.append(total / (height // sample_step))
-
-        smoothed = self._smooth_profile(col_brightness, window=width // 100)
-
-        best_cols = 1
-        best_score = float('inf')
-
-        for num_cols in range(2, 7):
-            col_width = width // num_cols
-            if col_width < 50:
-                continue
-
-            patterns = []
-            for c in range(num_cols):
-                start = c * col_width
-                end = start + col_width
-                pattern = smoothed[start:end]
-                patterns.append(pattern)
-
-            if patterns:
-                min_len = min(len(p) for p in patterns)
-                total_variance = 0
-                for i in range(min_len):
-                    values = [p[i] for p in patterns]
-                    mean = sum(values) / len(values)
-                    var = sum((v - mean) ** 2 for v in values) / len(values)
-                    total_variance += var
-
-                avg_variance = total_variance / min_len
-                if avg_variance < best_score:
-                    best_score = avg_variance
-                    best_cols = num_cols
-
-        return best_cols
-
-    def _detect_by_brightness_stripes(self, gray_image):
-        """Detect grid by analyzing periodic brightness patterns."""
-        height = gray_image.height
-        width = gray_image.width
-
-        row_profile = []
-        sample_step_x = max(1, width // 50)
-        for y in range(height):
-            total = sum(gray_image.getpixel((x, y)) for x in range(0, width, sample_step_x))
-            row_profile.append(total / (width // sample_step_x))
-
-        col_profile = []
-        sample_step_y = max(1, height // 50)
-        for x in range(width):
-            total = sum(gray_image.getpixel((x, y)) for y in range(0, height, sample_step_y))
-            col_profile.append(total / (height // sample_step_y))
-
-        rows = self._find_periodicity(row_profile, height)
-        cols = self._find_periodicity(col_profile, width)
-
-        return (rows, cols)
-
-    def _find_periodicity(self, profile, total_size):
-        """Find the number of repeating units in a brightness profile using autocorrelation"""
-        if len(profile) < 20:
-            return 1
-
-        mean = sum(profile) / len(profile)
-        normalized = [p - mean for p in profile]
-
-        best_cells = 1
-        best_correlation = 0
-
-        for num_cells in range(2, 8):
-            period = len(profile) // num_cells
-            if period < 20:
-                continue
-
-            correlation = 0
-            count = 0
-            for i in range(len(profile) - period):
-                correlation += normalized[i] * normalized[i + period]
-                count += 1
-
-            if count > 0:
-                correlation /= count
-
-            if correlation > best_correlation:
-                best_correlation = correlation
-                best_cells = num_cells
-
-        if best_correlation > 0:
-            return best_cells
-        return 1
-
-    def detect_grid_layout(self):
-        """Detect the grid layout using multiple methods. Returns (rows, cols) tuple."""
-        gray = self.image.convert('L')
-
-        rows1, cols1 = self._detect_by_text_labels(gray)
-        if rows1 >= 2 and cols1 >= 2:
-            print(f"[Grid] Text label method: {rows1}x{cols1}")
-            return (rows1, cols1)
-
-        rows2, cols2 = self._detect_by_brightness_stripes(gray)
-        if rows2 >= 2 and cols2 >= 2:
-            print(f"[Grid] Brightness stripe method: {rows2}x{cols2}")
-            return (rows2, cols2)
-
-        cols3, rows3 = self._detect_grid_lines(gray)
-        if cols3 >= 2 and rows3 >= 2 and cols3 <= 6 and rows3 <= 8:
-            print(f"[Grid] Edge method: {rows3}x{cols3}")
-            return (rows3, cols3)
-
-        result = self._fallback_aspect_ratio_detection()
-        print(f"[Grid] Aspect ratio fallback: {result}")
-        return result
-
-    def _detect_grid_lines(self, gray_image):
-        """Detect grid by finding vertical and horizontal lines using edge detection."""
-        width = gray_image.width
-        height = gray_image.height
-
-        v_edges = []
-        for x in range(1, width - 1):
-            edge_strength = 0
-            sample_step = max(1, height // 40)
-            for y in range(0, height, sample_step):
-                left = gray_image.getpixel((x - 1, y))
-                right = gray_image.getpixel((x + 1, y))
-                edge_strength += abs(right - left)
-            v_edges.append(edge_strength)
-
-        h_edges = []
-        for y in range(1, height - 1):
-            edge_strength = 0
-            sample_step = max(1, width // 40)
-            for x in range(0, width, sample_step):
-                top = gray_image.getpixel((x, y - 1))
-                bottom = gray_image.getpixel((x, y + 1))
-                edge_strength += abs(bottom - top)
-            h_edges.append(edge_strength)
-
-        cols = self._find_grid_lines_from_edges(v_edges, width)
-        rows = self._find_grid_lines_from_edges(h_edges, height)
-
-        return cols, rows
-
-    def _find_grid_lines_from_edges(self, edges, total_size):
-        """Find evenly-spaced grid lines from edge strength profile"""
-        if not edges or total_size < 10:
-            return 1
-
-        smoothed = self._smooth_profile(edges, window=max(5, total_size // 50))
-
-        max_edge = max(smoothed)
-        if max_edge < 100:
-            return 1
-
-        edge_threshold = max_edge * 0.4
-        margin = total_size // 15
-
-        above_threshold = []
-        in_peak = False
-        peak_start = 0
-        peak_max = 0
-        peak_max_pos = 0
-
-        for i, val in enumerate(smoothed):
-            if val >= edge_threshold:
-                if not in_peak:
-                    in_peak = True
-                    peak_start = i
-                    peak_max = val
-                    peak_max_pos = i
-                elif val > peak_max:
-                    peak_max = val
-                    peak_max_pos = i
-            else:
-                if in_peak:
-                    above_threshold.append(peak_max_pos)
-                    in_peak = False
-
-        if in_peak:
-            above_threshold.append(peak_max_pos)
-
-        interior_peaks = [p for p in above_threshold if margin < p < total_size - margin]
-
-        if len(interior_peaks) == 0:
-            return 1
-
-        best_cells = 1
-        best_score = float('inf')
-
-        for num_cells in range(2, 8):
-            expected_spacing = total_size / num_cells
-            expected_lines = []
-            for i in range(1, num_cells):
-                expected_lines.append(int(i * expected_spacing))
-
-            if len(expected_lines) == 0:
-                continue
-
-            total_error = 0
-            matched = 0
-            for exp_pos in expected_lines:
-                min_dist = float('inf')
-                for peak in interior_peaks:
-                    dist = abs(peak - exp_pos)
-                    if dist < min_dist:
-                        min_dist = dist
-                if min_dist < expected_spacing * 0.15:
-                    matched += 1
-                    total_error += min_dist
-                else:
-                    total_error += expected_spacing
-
-            if matched > 0:
-                score = total_error / matched
-                score = score / (matched / len(expected_lines))
-
-                if score < best_score and matched >= len(expected_lines) * 0.6:
-                    best_score = score
-                    best_cells = num_cells
-
-        return best_cells
-
-    def _smooth_profile(self, profile, window=5):
-        """Apply simple moving average smoothing"""
-        if window < 1:
-            window = 1
-        smoothed = []
-        half_w = window // 2
-        for i in range(len(profile)):
-            start = max(0, i - half_w)
-            end = min(len(profile), i + half_w + 1)
-            avg = sum(profile[start:end]) / (end - start)
-            smoothed.append(avg)
-        return smoothed
-
-    def _fallback_aspect_ratio_detection(self):
-        """Fallback detection based on aspect ratio"""
-        aspect = self.width / self.height
-
-        if aspect > 1.8:
-            return (1, 3)
-        elif aspect > 1.3:
-            return (2, 3)
-        elif aspect > 0.9:
-            if self.width > 1000:
-                return (3, 3)
-            else:
-                return (2, 2)
-        else:
-            return (3, 2)
-
-    def crop_designs(self, rows, cols, padding_top_pct=0.12, padding_bottom_pct=0.08):
-        cell_width = self.width // cols
-        cell_height = self.height // rows
-        designs = []
-        for row in range(rows):
-            for col in range(cols):
-                x1, y1 = col * cell_width, row * cell_height
-                padding_top = int(cell_height * padding_top_pct)
-                padding_bottom = int(cell_height * padding_bottom_pct)
-                margin = 10
-                design_img = self.image.crop((
-                    x1 + margin, y1 + padding_top,
-                    x1 + cell_width - margin, y1 + cell_height - padding_bottom
-                ))
-                designs.append({'image': design_img, 'index': row * cols + col})
-        return designs
+from order_grid import OrderImageAnalyzer  # noqa: E402
+from order_pdf import OrderSheet, AXKAN_STYLE  # noqa: E402
+from slot_images import SlotImageLoader, prepare_slot_image  # noqa: E402
 
 
 # ============================================================================
@@ -576,6 +382,9 @@ class ImageEditorGUI:
         if sys.platform == 'darwin':
             os.system('''/usr/bin/osascript -e 'tell app "Finder" to set frontmost of process "Python" to true' ''')
 
+        # Pasted images are resized and saved on worker threads
+        self.slot_images = SlotImageLoader(self.root, prepare_slot_image, self._slot_image_ready,
+                                           failed=self._slot_image_failed, preview_size=(130, 100))
         self.setup_ui()
 
     def setup_ui(self):
@@ -689,29 +498,24 @@ class ImageEditorGUI:
                 messagebox.showerror("Error", f"Could not load: {e}")
 
     def add_image_to_slot(self, slot_num, img):
-        if img.width > 2000 or img.height > 2000:
-            img.thumbnail((2000, 2000), PILImage.Resampling.LANCZOS)
-        if img.mode == 'RGBA':
-            bg = PILImage.new('RGB', img.size, (255, 255, 255))
-            bg.paste(img, mask=img.split()[3])
-            img = bg
-        elif img.mode != 'RGB':
-            img = img.convert('RGB')
-
-        temp_dir = Path("temp_images")
-        temp_dir.mkdir(exist_ok=True)
-        temp_path = temp_dir / f"slot_{slot_num}.jpg"
-        img.save(str(temp_path), "JPEG", quality=85, optimize=True)
-        self.image_paths[slot_num] = str(temp_path)
-
-        thumb = img.copy()
-        thumb.thumbnail((130, 100))
-        photo = ImageTk.PhotoImage(thumb)
+        self.slot_labels[slot_num].config(image="", text="Loading...")
+        self.slot_labels[slot_num].image = None
+        self.slot_images.submit(slot_num, img)
+
+    def _slot_image_ready(self, slot_num, path, photo):
+        self.image_paths[slot_num] = path
         self.slot_labels[slot_num].config(image=photo, text="")
         self.slot_labels[slot_num].image = photo
         self.slot_frames[slot_num].config(bg="#ccffcc")
 
+    def _slot_image_failed(self, slot_num, error):
+        self.image_paths.pop(slot_num, None)
+        self.slot_labels[slot_num].config(image="", text="[No image]\nClick + Cmd+V")
+        self.slot_labels[slot_num].image = None
+        messagebox.showerror("Error", f"Could not load: {error}")
+
     def generate(self):
+        self.slot_images.flush()
         self.result = "generate"
         self.root.quit()
         self.root.destroy()
@@ -1023,140 +827,24 @@ class ProgressWindow:
 # AXKAN PDF GENERATOR
 # ============================================================================
 class AxkanPDFGenerator:
+    # Editable Tipo; up to 12 designs (4 rows) per page, cells capped at 200 pt
+    STYLE = dict(AXKAN_STYLE, editable_type=True, per_page=12, max_cell_height=200)
+
     def __init__(self):
-        self.page_width, self.page_height = A4
-        self.margin = 20 * mm  # 20mm margin
+        self.sheet = OrderSheet(self.STYLE)
 
     def generate_pdf(self, order_name, instructions, designs):
-        output_dir = Path(OUTPUT_PATH).expanduser()
+        """Render to LOCAL_PDF_PATH and queue the copy to OUTPUT_PATH.
+        Returns the local path, which is ready to open right away."""
+        output_dir = LOCAL_PDF_PATH
         output_dir.mkdir(parents=True, exist_ok=True)
         safe_name = "".join(c if c.isalnum() or c in ' -_' else '-' for c in order_name)
         output_path = output_dir / f"{safe_name}.pdf"
 
-        c = canvas.Canvas(str(output_path), pagesize=(self.page_width, self.page_height))
-        self._draw_header(c, order_name, instructions, len(designs))
-        self._draw_designs(c, designs)
-        c.save()
+        self.sheet.render(output_path, order_name, instructions, designs)
+        get_publisher().publish(output_path, OUTPUT_PATH)
         return str(output_path)
 
-    def _draw_header(self, c, order_name, instructions, num):
-        pink, green, orange, cyan, red = [colors.HexColor(AXKAN_COLORS[k]) for k in ['pink','green','orange','cyan','red']]
-        dark, light = colors.HexColor(AXKAN_COLORS['dark']), colors.HexColor(AXKAN_COLORS['light'])
-
-        x = self.margin
-        c.setFont("Helvetica-Bold", 36)
-        for letter, color in [('A',pink),('X',green),('K',orange),('A',cyan),('N',red)]:
-            c.setFillColor(color)
-            c.drawString(x, self.page_height - 50, letter)
-            x += 28
-
-        c.setFillColor(dark)
-        c.setFont("Helvetica-Bold", 18)
-        c.drawCentredString(self.page_width/2, self.page_height - 50, "ORDEN DE COMPRA")
-
-        y = self.page_height - 90
-        c.setFillColor(colors.white)
-        c.setStrokeColor(pink)
-        c.setLineWidth(2)
-        c.roundRect(self.margin, y-25, self.page_width-2*self.margin, 25, 5, fill=True, stroke=True)
-        c.setFillColor(dark)
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(self.margin+10, y-17, f"Order: {order_name} | Designs: {num} | {datetime.now().strftime('%Y-%m-%d')}")
-
-        if instructions:
-            y -= 35
-            c.drawString(self.margin, y, "Instructions:")
-            c.setFillColor(light)
-            c.setStrokeColor(cyan)
-            c.roundRect(self.margin+80, y-20, self.page_width-2*self.margin-80, 25, 3, fill=True, stroke=True)
-            c.setFillColor(colors.black)
-            c.setFont("Helvetica", 10)
-            c.drawString(self.margin+85, y-10, instructions)
-
-        y -= 50
-        c.setFillColor(dark)
-        c.setFont("Helvetica-Bold", 14)
-        c.drawString(self.margin, y+5, "CAJAS TOTALES:")
-        c.setFillColor(light)
-        c.setStrokeColor(orange)
-        c.setLineWidth(3)
-        c.roundRect(self.margin+130, y-15, 150, 35, 5, fill=True, stroke=True)
-        c.acroForm.textfield(name="cajas_totales", x=self.margin+130, y=y-15, width=150, height=35,
-                            borderWidth=0, fontSize=16, fontName='Helvetica-Bold')
-
-        y -= 30
-        sw = (self.page_width - 2*self.margin) / 5
-        for i, col in enumerate([pink,green,orange,cyan,red]):
-            c.setStrokeColor(col)
-            c.setLineWidth(3)
-            c.line(self.margin+i*sw, y, self.margin+(i+1)*sw, y)
-
-    def _draw_designs(self, c, designs):
-        cols, num = 3, len(designs)
-        rows = (num + cols - 1) // cols
-        aw = self.page_width - 2*self.margin
-        ah = self.page_height - self.margin - 230
-        sp = 10
-        cw = (aw - (cols-1)*sp) / cols
-        ch = min((ah - (rows-1)*sp) / rows, 200)
-
-        accent = [colors.HexColor(AXKAN_COLORS[k]) for k in ['pink','green','orange','cyan','red']]
-        dark, light = colors.HexColor(AXKAN_COLORS['dark']), colors.HexColor(AXKAN_COLORS['light'])
-
-        for i, d in enumerate(designs):
-            row, col = i // cols, i % cols
-            x = self.margin + col * (cw + sp)
-            y = self.page_height - 230 - row * (ch + sp)
-            ac = accent[i % 5]
-
-            c.setStrokeColor(ac)
-            c.setLineWidth(2)
-            c.rect(x, y-ch, cw, ch)
-
-            c.setFillColor(ac)
-            c.rect(x, y-18, cw, 18, fill=True, stroke=False)
-            c.setFillColor(colors.white)
-            c.setFont("Helvetica-Bold", 9)
-            c.drawString(x+5, y-13, "Tipo:")
-            c.acroForm.textfield(name=f"tipo_{i}", x=x+35, y=y-16, width=cw-45, height=14,
-                                value=d.get('type',''), borderWidth=0, fontSize=9,
-                                fontName='Helvetica-Bold', textColor=colors.white,
-                                fillColor=ac, borderColor=ac)
-
-            img_path = d.get('image_path')
-            if img_path and os.path.exists(img_path):
-                try:
-                    img = PILImage.open(img_path)
-                    iw, ih = img.size
-                    mw, mh = cw-10, ch-80
-                    scale = min(mw/iw, mh/ih)
-                    dw, dh = iw*scale, ih*scale
-                    c.drawImage(img_path, x+(cw-dw)/2, y-25-dh-(mh-dh)/2, width=dw, height=dh,
-                               preserveAspectRatio=True, mask='auto')
-                except:
-                    pass
-
-            qy = y - ch + 40
-            c.setFillColor(dark)
-            c.setFont("Helvetica-Bold", 9)
-            c.drawString(x+5, qy, "Requeridos:")
-            c.setFillColor(light)
-            c.setStrokeColor(ac)
-            c.setLineWidth(1)
-            c.rect(x+60, qy-12, cw-70, 15, fill=True, stroke=True)
-            c.setFillColor(colors.black)
-            c.setFont("Helvetica", 10)
-            c.drawString(x+65, qy-8, str(d.get('quantity','')))
-
-            cy = qy - 20
-            c.setFillColor(dark)
-            c.setFont("Helvetica-Bold", 9)
-            c.drawString(x+5, cy, "Contados:")
-            c.setFillColor(light)
-            c.rect(x+60, cy-12, cw-70, 15, fill=True, stroke=True)
-            c.acroForm.textfield(name=f"contados_{i}", x=x+60, y=cy-12, width=cw-70, height=15,
-                                borderWidth=0, fontSize=10, fontName='Helvetica')
-
 
 # ============================================================================
 # MODERN UI HELPER - Rounded rectangle drawing
@@ -1230,11 +918,19 @@ class MainApplication:
         if sys.platform == 'darwin':
             os.system('''/usr/bin/osascript -e 'tell app "Finder" to set frontmost of process "Python" to true' ''')
 
-        # Check connection status
-        self.connection_ok = ConnectionChecker.is_output_path_available()
-        self.pending_orders = ConnectionChecker.get_pending_orders()
+        # Last known connection status right away; the share is probed in the background
+        self.connection_ok = ConnectionChecker.last_known_status()
+        self.connection_probe = ConnectionChecker.probe_in_background()
+        self.pending_count = ConnectionChecker.count_pending_orders()
+        self.pending_orders = ConnectionChecker.get_pending_orders(limit=2)
+        self.publisher = get_publisher()
+        self.sync = get_sync()
+        self._retry_requested = False
 
         self.setup_ui()
+        self._watch_probe()
+        if self.pending_count:
+            self.root.after(1000, self._watch_sync)
 
     def setup_ui(self):
         # Main container with white background
@@ -1262,53 +958,12 @@ class MainApplication:
                 bg=AXKAN_COLORS['white']).pack(anchor="w", pady=(5, 0))
 
         # ====== CONNECTION STATUS - Pill Style ======
-        status_container = tk.Frame(main_container, bg=AXKAN_COLORS['white'])
-        status_container.pack(fill=tk.X, padx=25, pady=(20, 0))
-
-        if self.connection_ok:
-            status_pill = tk.Frame(status_container, bg=AXKAN_COLORS['success_soft'],
-                                  padx=16, pady=10)
-            status_pill.pack(fill=tk.X)
-
-            status_inner = tk.Frame(status_pill, bg=AXKAN_COLORS['success_soft'])
-            status_inner.pack(fill=tk.X)
-
-            tk.Label(status_inner, text="●", font=("SF Pro Display", 12),
-                    fg=AXKAN_COLORS['success'], bg=AXKAN_COLORS['success_soft']).pack(side=tk.LEFT)
-            tk.Label(status_inner, text=" Connected", font=("SF Pro Display", 13, "bold"),
-                    fg=AXKAN_COLORS['success'], bg=AXKAN_COLORS['success_soft']).pack(side=tk.LEFT)
-            tk.Label(status_inner, text=" — Network ready", font=("SF Pro Display", 12),
-                    fg=AXKAN_COLORS['gray'], bg=AXKAN_COLORS['success_soft']).pack(side=tk.LEFT)
-
-            # Refresh button
-            refresh_btn = tk.Button(status_inner, text="⟳", font=("SF Pro Display", 14),
-                                   command=self.refresh_connection, bg=AXKAN_COLORS['success_soft'],
-                                   fg=AXKAN_COLORS['success'], relief=tk.FLAT, cursor="hand2",
-                                   borderwidth=0, activebackground=AXKAN_COLORS['success_soft'])
-            refresh_btn.pack(side=tk.RIGHT)
-        else:
-            status_pill = tk.Frame(status_container, bg=AXKAN_COLORS['error_soft'],
-                                  padx=16, pady=10)
-            status_pill.pack(fill=tk.X)
-
-            status_inner = tk.Frame(status_pill, bg=AXKAN_COLORS['error_soft'])
-            status_inner.pack(fill=tk.X)
-
-            tk.Label(status_inner, text="●", font=("SF Pro Display", 12),
-                    fg=AXKAN_COLORS['error'], bg=AXKAN_COLORS['error_soft']).pack(side=tk.LEFT)
-            tk.Label(status_inner, text=" Offline", font=("SF Pro Display", 13, "bold"),
-                    fg=AXKAN_COLORS['error'], bg=AXKAN_COLORS['error_soft']).pack(side=tk.LEFT)
-            tk.Label(status_inner, text=" — Saves locally", font=("SF Pro Display", 12),
-                    fg=AXKAN_COLORS['gray'], bg=AXKAN_COLORS['error_soft']).pack(side=tk.LEFT)
-
-            refresh_btn = tk.Button(status_inner, text="⟳", font=("SF Pro Display", 14),
-                                   command=self.refresh_connection, bg=AXKAN_COLORS['error_soft'],
-                                   fg=AXKAN_COLORS['error'], relief=tk.FLAT, cursor="hand2",
-                                   borderwidth=0, activebackground=AXKAN_COLORS['error_soft'])
-            refresh_btn.pack(side=tk.RIGHT)
+        self.status_container = tk.Frame(main_container, bg=AXKAN_COLORS['white'])
+        self.status_container.pack(fill=tk.X, padx=25, pady=(20, 0))
+        self._draw_status()
 
         # ====== PENDING ORDERS CARD ======
-        if self.pending_orders:
+        if self.pending_count:
             pending_container = tk.Frame(main_container, bg=AXKAN_COLORS['white'])
             pending_container.pack(fill=tk.X, padx=25, pady=(15, 0))
 
@@ -1320,7 +975,7 @@ class MainApplication:
             pending_header = tk.Frame(pending_card, bg=AXKAN_COLORS['warning_soft'])
             pending_header.pack(fill=tk.X)
 
-            tk.Label(pending_header, text=f"📦 {len(self.pending_orders)} pending",
+            tk.Label(pending_header, text=f"📦 {self.pending_count} pending",
                     font=("SF Pro Display", 13, "bold"), fg=AXKAN_COLORS['dark'],
                     bg=AXKAN_COLORS['warning_soft']).pack(side=tk.LEFT)
 
@@ -1332,7 +987,7 @@ class MainApplication:
             retry_btn.pack(side=tk.RIGHT)
 
             # Order list
-            for order in self.pending_orders[:2]:
+            for order in self.pending_orders:
                 tk.Label(pending_card, text=f"• {order['name']}",
                         font=("SF Pro Display", 11), fg=AXKAN_COLORS['gray'],
                         bg=AXKAN_COLORS['warning_soft'], anchor="w").pack(fill=tk.X, pady=(5, 0))
@@ -1432,61 +1087,118 @@ class MainApplication:
                 font=("SF Pro Display", 11), fg=AXKAN_COLORS['gray_light'],
                 bg=AXKAN_COLORS['white']).pack()
 
-    def refresh_connection(self):
-        """Re-check the connection status"""
-        self.connection_ok = ConnectionChecker.is_output_path_available()
-        self.pending_orders = ConnectionChecker.get_pending_orders()
-        # Rebuild UI
-        for widget in self.root.winfo_children():
+    def _draw_status(self):
+        """The connection pill: last known status, marked while a probe is running"""
+        for widget in self.status_container.winfo_children():
             widget.destroy()
-        self.setup_ui()
-        if self.connection_ok:
+
+        checking = self.connection_probe is not None
+        if self.connection_ok is None:
+            color, soft, title, detail = AXKAN_COLORS['gray'], AXKAN_COLORS['light'], " Checking network", ""
+        elif self.connection_ok:
+            color, soft, title, detail = AXKAN_COLORS['success'], AXKAN_COLORS['success_soft'], \
+                " Connected", " — Network ready"
+        else:
+            color, soft, title, detail = AXKAN_COLORS['error'], AXKAN_COLORS['error_soft'], \
+                " Offline", " — Saves locally"
+        if checking and self.connection_ok is not None:
+            detail = " — checking..."
+
+        status_pill = tk.Frame(self.status_container, bg=soft, padx=16, pady=10)
+        status_pill.pack(fill=tk.X)
+
+        status_inner = tk.Frame(status_pill, bg=soft)
+        status_inner.pack(fill=tk.X)
+
+        tk.Label(status_inner, text="○" if checking else "●", font=("SF Pro Display", 12),
+                fg=color, bg=soft).pack(side=tk.LEFT)
+        tk.Label(status_inner, text=title, font=("SF Pro Display", 13, "bold"),
+                fg=color, bg=soft).pack(side=tk.LEFT)
+        tk.Label(status_inner, text=detail, font=("SF Pro Display", 12),
+                fg=AXKAN_COLORS['gray'], bg=soft).pack(side=tk.LEFT)
+
+        # Refresh button
+        refresh_btn = tk.Button(status_inner, text="⟳", font=("SF Pro Display", 14),
+                               command=self.refresh_connection, bg=soft,
+                               fg=color, relief=tk.FLAT, cursor="hand2",
+                               borderwidth=0, activebackground=soft,
+                               state=tk.DISABLED if checking else tk.NORMAL)
+        refresh_btn.pack(side=tk.RIGHT)
+
+        uploading = len(self.publisher.pending())
+        if uploading:
+            tk.Label(self.status_container, text=f"⇪ {uploading} PDF(s) waiting to copy to the network",
+                    font=("SF Pro Display", 11), fg=AXKAN_COLORS['gray'],
+                    bg=AXKAN_COLORS['white'], anchor="w").pack(fill=tk.X, pady=(6, 0))
+
+    def _watch_probe(self, announce=False):
+        """Update the status pill as soon as the background probe has an answer"""
+        if self.connection_probe is None:
+            return
+        online = self.connection_probe.result()
+        if online is None:
+            self.root.after(200, lambda: self._watch_probe(announce))
+            return
+        self.connection_probe = None
+        self.connection_ok = online
+        try:
+            self._draw_status()
+        except tk.TclError:
+            return
+        if not announce:
+            return
+        if online:
+            self.publisher.retry_now()
             messagebox.showinfo("Connected", "Network connection is now available!")
         else:
             messagebox.showwarning("Still Offline", "Network path still not available.\n\nMake sure the server is connected.")
 
-    def retry_pending_orders(self):
-        """Retry submitting all pending orders"""
-        if not ConnectionChecker.is_output_path_available():
-            messagebox.showerror("No Connection",
-                "Cannot retry - network path is still not available.\n\n"
-                "Please connect to the network first and click 'Check Connection'.")
+    def refresh_connection(self):
+        """Re-check the connection status (in the background)"""
+        if self.connection_probe is not None:
             return
-
-        success_count = 0
-        fail_count = 0
-
-        for order in self.pending_orders:
-            try:
-                data = ConnectionChecker.load_pending_order(order['folder'])
-                if data:
-                    pdf_gen = AxkanPDFGenerator()
-                    pdf_path = pdf_gen.generate_pdf(
-                        data['order_name'],
-                        data['instructions'],
-                        data['designs']
-                    )
-                    # Delete the pending order after success
-                    ConnectionChecker.delete_pending_order(order['folder'])
-                    success_count += 1
-                    print(f"[Retry] Successfully saved: {data['order_name']}")
-            except Exception as e:
-                fail_count += 1
-                print(f"[Retry] Failed: {order['name']} - {e}")
-
-        # Refresh the UI
-        self.pending_orders = ConnectionChecker.get_pending_orders()
+        self.connection_probe = ConnectionChecker.probe_in_background()
+        self.pending_count = ConnectionChecker.count_pending_orders()
+        self.pending_orders = ConnectionChecker.get_pending_orders(limit=2)
+        # Rebuild UI
         for widget in self.root.winfo_children():
             widget.destroy()
         self.setup_ui()
+        self._watch_probe(announce=True)
 
-        if success_count > 0 and fail_count == 0:
-            messagebox.showinfo("Success!", f"All {success_count} pending order(s) have been saved!")
-        elif success_count > 0:
-            messagebox.showwarning("Partial Success",
-                f"Saved {success_count} order(s), but {fail_count} failed.\n\nFailed orders remain in pending list.")
-        else:
-            messagebox.showerror("Failed", "Could not save any pending orders.")
+    def retry_pending_orders(self):
+        """Ask the background sync to retry all pending orders now"""
+        self._retry_requested = True
+        self.sync.retry_now()
+        self._watch_sync()
+
+    def _watch_sync(self):
+        """Refresh the pending card while the background sync works through it"""
+        try:
+            status = self.sync.status()
+        except tk.TclError:
+            return
+        count = ConnectionChecker.count_pending_orders()
+        # The sync hasn't probed yet (None) or a probe of our own is still running: keep what we show
+        online = self.connection_ok if status['online'] is None or self.connection_probe else bool(status['online'])
+        if count != self.pending_count or online != self.connection_ok:
+            self.pending_count = count
+            self.pending_orders = ConnectionChecker.get_pending_orders(limit=2)
+            self.connection_ok = online
+            for widget in self.root.winfo_children():
+                widget.destroy()
+            self.setup_ui()
+
+        if status['pending'] or status['working']:
+            self.root.after(1000, self._watch_sync)
+        elif self._retry_requested:
+            self._retry_requested = False
+            if status['failed']:
+                messagebox.showwarning("Partial Success",
+                    f"Saved {status['saved']} order(s), but {len(status['failed'])} failed.\n\n"
+                    f"Failed orders remain in pending list.")
+            elif status['saved']:
+                messagebox.showinfo("Success!", f"All {status['saved']} pending order(s) have been saved!")
 
     def start_manual_mode(self):
         self.root.destroy()
@@ -1650,6 +1362,7 @@ class AutoCropGUI:
         self.order_image = img
         analyzer = OrderImageAnalyzer(img)
         self.grid_rows, self.grid_cols = analyzer.detect_grid_layout()
+        confidence = analyzer.layout.confidence
 
         preview = img.copy()
         preview.thumbnail((800, 500))
@@ -1662,7 +1375,8 @@ class AutoCropGUI:
         pending.mkdir(exist_ok=True)
         self.order_image.save(str(pending / "order_image.png"), "PNG")
 
-        messagebox.showinfo("Loaded", f"Detected: {self.grid_rows}x{self.grid_cols} grid")
+        messagebox.showinfo("Loaded", f"Detected: {self.grid_rows}x{self.grid_cols} grid "
+                                      f"({confidence:.0%} confidence)")
 
     def setup_step2(self):
         """Step 2: Confirm grid and preview crops"""
@@ -1901,63 +1615,20 @@ def generate_output(order_name, instructions, designs, pending_folder=None):
         pending_folder: If retrying, the folder path to delete on success
     """
     num = len(designs)
-    total_steps = 3
+    total_steps = 2
     progress = ProgressWindow("Creating Order", total_steps)
 
     pdf_path = None
     backup_folder = None
 
     try:
-        # Step 1: Check connection
-        progress.update(1, "Checking connection...")
-        connection_ok = ConnectionChecker.is_output_path_available()
-
-        if not connection_ok:
-            progress.close()
-            # Save order locally for later
-            backup_folder = ConnectionChecker.save_pending_order(order_name, instructions, designs)
-
-            result = messagebox.askquestion("No Connection",
-                f"Network path is not available!\n\n"
-                f"Your order '{order_name}' has been saved locally.\n"
-                f"Backup location:\n{backup_folder}\n\n"
-                f"Would you like to save a local copy of the PDF?",
-                icon='warning')
-
-            if result == 'yes':
-                # Generate PDF to local backup folder
-                try:
-                    local_pdf_gen = AxkanPDFGenerator()
-                    # Temporarily change output path
-                    original_output = OUTPUT_PATH
-                    local_pdf_path = Path(backup_folder) / f"{order_name}.pdf"
-
-                    # Generate directly to backup folder
-                    c = canvas.Canvas(str(local_pdf_path), pagesize=(local_pdf_gen.page_width, local_pdf_gen.page_height))
-                    local_pdf_gen._draw_header(c, order_name, instructions, len(designs))
-                    local_pdf_gen._draw_designs(c, designs)
-                    c.save()
-
-                    messagebox.showinfo("Local Copy Saved",
-                        f"Local PDF saved to:\n{local_pdf_path}\n\n"
-                        f"When you're connected again, open the app to retry saving to the network.")
-                    open_file(str(local_pdf_path))
-                except Exception as e:
-                    messagebox.showwarning("Local Save Failed",
-                        f"Could not create local PDF: {e}\n\n"
-                        f"Your order data is still saved for retry.")
-            else:
-                messagebox.showinfo("Order Saved",
-                    f"Your order has been saved locally.\n\n"
-                    f"When you're connected again, open the app and click 'Retry All Now' to submit pending orders.")
-
-            return
-
-        # Step 2: Generate PDF to network
-        progress.update(2, "Generating PDF...")
+        # Step 1: Render on local disk - never waits on the network share
+        progress.update(1, "Generating PDF...")
         pdf_gen = AxkanPDFGenerator()
         pdf_path = pdf_gen.generate_pdf(order_name, instructions, designs)
-        progress.update(3, "PDF created!")
+
+        # The copy to OUTPUT_PATH continues in the background
+        progress.update(2, "PDF created!")
 
         progress.close()
 
@@ -1965,7 +1636,8 @@ def generate_output(order_name, instructions, designs, pending_folder=None):
         if pending_folder:
             ConnectionChecker.delete_pending_order(pending_folder)
 
-        msg = f"PDF saved to:\n{pdf_path}"
+        msg = (f"PDF saved to:\n{pdf_path}\n\n"
+               f"Copying to the network folder in the background:\n{OUTPUT_PATH}")
         messagebox.showinfo("Success!", msg)
 
         if pdf_path:
@@ -2048,11 +1720,7 @@ def show_retry_dialog(order_name, instructions, designs, backup_folder, error_ms
         root.destroy()
         try:
             local_path = Path.home() / "Documents" / f"{order_name}.pdf"
-            local_gen = AxkanPDFGenerator()
-            c = canvas.Canvas(str(local_path), pagesize=(local_gen.page_width, local_gen.page_height))
-            local_gen._draw_header(c, order_name, instructions, len(designs))
-            local_gen._draw_designs(c, designs)
-            c.save()
+            AxkanPDFGenerator().sheet.render(local_path, order_name, instructions, designs)
             messagebox.showinfo("Saved", f"PDF saved to:\n{local_path}")
             open_file(str(local_path))
         except Exception as e:
@@ -2116,6 +1784,13 @@ def main():
     app = MainApplication()
     app.run()
 
+    # Give background work a moment; anything left is retried on next start
+    if _sync is not None and _sync.status()['online']:
+        _sync.wait(timeout=PUBLISH_EXIT_WAIT)
+    if _publisher is not None and not _publisher.wait(timeout=PUBLISH_EXIT_WAIT):
+        print(f"[Publish] {len(_publisher.pending())} PDF(s) not copied yet - "
+              f"they will be copied next time the app starts")
+
 
 if __name__ == '__main__':
     main()
@@ -1,9 +1,13 @@
 /**
  * AXKAN Order Generator Local Proxy
  * Runs on localhost:3002 — receives order data from design portal,
- * runs generate_axkan.py, opens the PDF automatically.
+ * renders it, opens the PDF automatically.
  *
- * Start:  node order-proxy.js
+ * Orders go to render_service.py (warm Python process, no startup cost per
+ * order) when it is running; otherwise generate_axkan.py is started for the
+ * order as before.
+ *
+ * Start:  python render_service.py &  node order-proxy.js
  * Keep running in background while using the design portal.
  */
 
@@ -17,6 +21,34 @@ const PORT = 3002;
 const PYTHON_PATH = '/Library/Frameworks/Python.framework/Versions/3.13/bin/python3';
 const SCRIPT_PATH = '/Users/ivanvalenciaperez/Desktop/CLAUDE/READY/ORDERS_GENERATOR/generate_axkan.py';
 const SCRIPT_DIR = '/Users/ivanvalenciaperez/Desktop/CLAUDE/READY/ORDERS_GENERATOR';
+const RENDER_URL = process.env.RENDER_URL || 'http://127.0.0.1:3003/generate';
+
+// Render through render_service.py. Returns null when the service isn't running.
+async function renderWarm(body) {
+  let response;
+  try {
+    response = await fetch(RENDER_URL, {
+      method: 'POST',
+      headers: { 'Content-Type': 'application/json' },
+      body,
+      signal: AbortSignal.timeout(120000)
+    });
+  } catch (e) {
+    if (e.cause && e.cause.code === 'ECONNREFUSED') return null;
+    throw e;
+  }
+  const result = await response.json();
+  if (!response.ok) {
+    throw new Error(result.details || result.error || `HTTP ${response.status}`);
+  }
+  return result;
+}
+
+function openPdf(pdfPath) {
+  if (pdfPath) {
+    execFile('open', [pdfPath], () => {});
+  }
+}
 
 const server = http.createServer(async (req, res) => {
   // CORS headers for the frontend
@@ -38,7 +70,24 @@ const server = http.createServer(async (req, res) => {
         const payload = JSON.parse(body);
         console.log(`\n[Order] Generating: ${payload.order_number || payload.order_id}`);
 
-        // Write temp JSON
+        let warm;
+        try {
+          warm = await renderWarm(body);
+        } catch (e) {
+          console.error('[Error]', e.message);
+          res.writeHead(500, { 'Content-Type': 'application/json' });
+          res.end(JSON.stringify({ error: 'Generation failed', details: e.message }));
+          return;
+        }
+        if (warm) {
+          console.log(`[OK] PDF (${warm.render_ms} ms):`, warm.pdfPath);
+          openPdf(warm.pdfPath);
+          res.writeHead(200, { 'Content-Type': 'application/json' });
+          res.end(JSON.stringify({ success: true, pdfPath: warm.pdfPath, render_ms: warm.render_ms }));
+          return;
+        }
+
+        // render_service.py not running: one Python process for this order
         const tmpFile = path.join(os.tmpdir(), `axkan-order-${Date.now()}.json`);
         await writeFile(tmpFile, JSON.stringify(payload, null, 2));
 
@@ -62,11 +111,7 @@ const server = http.createServer(async (req, res) => {
           const pdfPath = match ? match[1].trim() : '';
 
           console.log('[OK] PDF:', pdfPath);
-
-          // Open the PDF
-          if (pdfPath) {
-            execFile('open', [pdfPath], () => {});
-          }
+          openPdf(pdfPath);
 
           res.writeHead(200, { 'Content-Type': 'application/json' });
           res.end(JSON.stringify({ success: true, pdfPath, output: stdout }));
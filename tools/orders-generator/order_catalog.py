@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+Order Catalog - SQLite index of pending orders
+==============================================
+Listing pending orders used to mean opening and parsing every
+pending_orders/*/order_data.json on each start. PendingOrderCatalog keeps
+one row per order folder (name, timestamp, design count, state) in
+pending_orders.db next to the folders:
+
+  - add() / remove() / set_state() keep it current as orders are saved,
+    retried and deleted
+  - the folder's modification time is stored with the index; if it differs
+    (folders added or removed by hand, or the .db is missing) the index is
+    rebuilt from disk once
+  - list() pages through orders newest first; count() is a single query
+
+Usage:
+    catalog = PendingOrderCatalog(BACKUP_PATH / "pending_orders.db", PENDING_ORDERS_PATH)
+    catalog.count()
+    catalog.list(limit=20, offset=40)
+"""
+
+import json
+import sqlite3
+import threading
+from pathlib import Path
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS orders (
+    id         TEXT PRIMARY KEY,
+    folder     TEXT NOT NULL,
+    name       TEXT NOT NULL,
+    timestamp  TEXT NOT NULL,
+    designs    INTEGER NOT NULL,
+    state      TEXT NOT NULL DEFAULT 'pending',
+    last_error TEXT
+);
+CREATE INDEX IF NOT EXISTS orders_by_time ON orders (timestamp DESC);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+"""
+
+
+class PendingOrderCatalog:
+    """Index of pending_orders/ folders; one connection per thread"""
+
+    def __init__(self, db_path, pending_dir):
+        self.path = Path(db_path)
+        self.pending_dir = Path(pending_dir)
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn().executescript(_SCHEMA)
+        if self.is_stale():
+            self.rebuild()
+
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.path), timeout=10)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _dir_mtime(self):
+        try:
+            return str(self.pending_dir.stat().st_mtime_ns)
+        except OSError:
+            return '0'
+
+    def _stamp(self, conn):
+        """Record the folder's mtime after our own change, so it doesn't look stale."""
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('dir_mtime', ?)", (self._dir_mtime(),))
+
+    def is_stale(self):
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'dir_mtime'").fetchone()
+        return row is None or row['value'] != self._dir_mtime()
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def rebuild(self):
+        """Re-read every order_data.json. Returns the number of orders found."""
+        rows = []
+        if self.pending_dir.exists():
+            for folder in self.pending_dir.iterdir():
+                order_file = folder / "order_data.json"
+                if not order_file.exists():
+                    continue
+                try:
+                    with open(order_file, 'r', encoding='utf-8') as f:
+                        data = json.load(f)
+                except (OSError, ValueError):
+                    continue
+                rows.append(self._row(folder, data))
+
+        conn = self._conn()
+        with self._write_lock, conn:
+            # Keep states and errors of orders that are still there
+            known = {r['id']: (r['state'], r['last_error'])
+                     for r in conn.execute("SELECT id, state, last_error FROM orders")}
+            conn.execute("DELETE FROM orders")
+            conn.executemany("INSERT INTO orders VALUES (?, ?, ?, ?, ?, ?, ?)",
+                             [row[:5] + known.get(row[0], ('pending', None)) for row in rows])
+            self._stamp(conn)
+        print(f"[Catalog] Indexed {len(rows)} pending order(s)")
+        return len(rows)
+
+    @staticmethod
+    def _row(folder, data):
+        folder = Path(folder)
+        return (folder.name, str(folder), data.get('order_name', 'Unknown'),
+                data.get('timestamp', ''), len(data.get('designs', [])))
+
+    def add(self, folder, order_data):
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.execute("INSERT OR REPLACE INTO orders VALUES (?, ?, ?, ?, ?, 'pending', NULL)",
+                         self._row(folder, order_data))
+            self._stamp(conn)
+
+    def remove(self, folder):
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.execute("DELETE FROM orders WHERE id = ?", (Path(folder).name,))
+            self._stamp(conn)
+
+    def set_state(self, folder, state, error=None):
+        conn = self._conn()
+        with self._write_lock, conn:
+            conn.execute("UPDATE orders SET state = ?, last_error = ? WHERE id = ?",
+                         (state, error, Path(folder).name))
+
+    # ------------------------------------------------------------------
+    # Reads
+    # ------------------------------------------------------------------
+    def count(self, state=None):
+        if self.is_stale():
+            self.rebuild()
+        sql, args = "SELECT COUNT(*) FROM orders", ()
+        if state:
+            sql, args = sql + " WHERE state = ?", (state,)
+        return self._conn().execute(sql, args).fetchone()[0]
+
+    def list(self, limit=None, offset=0):
+        """Pending orders newest first, in the shape get_pending_orders() returns:
+        [{'folder', 'name', 'timestamp', 'designs_count', 'state', 'last_error'}]"""
+        if self.is_stale():
+            self.rebuild()
+        rows = self._conn().execute(
+            "SELECT folder, name, timestamp, designs, state, last_error FROM orders "
+            "ORDER BY timestamp DESC LIMIT ? OFFSET ?",
+            (-1 if limit is None else limit, offset))
+        return [{'folder': r['folder'], 'name': r['name'], 'timestamp': r['timestamp'],
+                 'designs_count': r['designs'], 'state': r['state'], 'last_error': r['last_error']}
+                for r in rows]
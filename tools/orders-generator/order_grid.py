@@ -0,0 +1,701 @@
+#!/usr/bin/env python3
+"""
+AXKAN Order Grid Analyzer
+=========================
+Detects the rows x columns grid of an order screenshot and crops each design.
+Shared by notion_quick.py and axkan_order_system.py.
+
+Detection is coarse-to-fine:
+  1. the strategies (text labels, brightness stripes, edge lines, whitespace
+     gaps) run on a ~480 px grayscale pyramid level, not the full screenshot
+  2. each (rows, cols) hypothesis gets a 0..1 confidence from the same
+     evidence: how strongly the cut lines look like separators (white gutters
+     or drawn rules) and how alike the resulting cells are; the first
+     hypothesis above CONFIDENCE_THRESHOLD wins, the rest never run
+  3. only strips around the chosen cuts and the content edges are read at
+     full resolution, giving the real pixel span of every row and column, so
+     crop_designs() follows the gutters instead of dividing the image equally
+
+Every profile (row/column brightness, edge strength) is computed with NumPy
+instead of pixel by pixel with getpixel():
+  - only the sampled rows/columns the strategies look at are converted to
+    grayscale (GraySampler), not the whole 12 MP screenshot
+  - sampled row/column means are those lines summed along one axis
+  - edge profiles are |neighbour difference| over the same sampled lines
+  - moving averages come from a cumulative sum (O(n) for any window)
+  - periodicity uses an FFT autocorrelation (all lags in one pass)
+The sampling steps and thresholds inside each strategy are the same as in the
+old per-pixel loops.
+
+Usage:
+    from order_grid import OrderImageAnalyzer
+    analyzer = OrderImageAnalyzer(pil_image)
+    rows, cols = analyzer.detect_grid_layout()
+    designs = analyzer.crop_designs(rows, cols)
+
+    layout = analyzer.analyze()      # GridLayout: confidence, strategy, cell spans
+    for row, col, box in layout.cells(): ...
+"""
+
+import numpy as np
+from PIL import Image as PILImage
+
+
+# ============================================================================
+# PROFILE ENGINE - array primitives used by every detection strategy
+# ============================================================================
+# Modes Image.transform() samples exactly like convert('L') on the whole image
+_SAMPLED_MODES = ("1", "L", "P", "RGB", "RGBA", "RGBX")
+
+
+class GraySampler:
+    """Grayscale pixels of every `step`-th row or column, converted on demand.
+
+    rows(step) is what gray[::step, :] would be and cols(step) is gray[:, ::step]
+    for gray = image.convert('L'). A NEAREST affine transform picks exactly
+    those lines, so only they get converted. For the strategies here that is
+    a few hundred lines instead of 12 million pixels.
+    """
+
+    def __init__(self, image):
+        self.image = image
+        self.width, self.height = image.size
+        self.shape = (self.height, self.width)
+        self._full = None if image.mode in _SAMPLED_MODES else np.asarray(image.convert('L'))
+        self._rows = {}
+        self._cols = {}
+
+    def rows(self, step):
+        if self._full is not None:
+            return self._full[::step, :]
+        if step not in self._rows:
+            n = len(range(0, self.height, step))
+            lines = self.image.transform((self.width, n), PILImage.AFFINE,
+                                         (1, 0, 0, 0, step, -step / 2), PILImage.NEAREST)
+            self._rows[step] = np.asarray(lines.convert('L'))
+        return self._rows[step]
+
+    def cols(self, step):
+        if self._full is not None:
+            return self._full[:, ::step]
+        if step not in self._cols:
+            n = len(range(0, self.width, step))
+            lines = self.image.transform((n, self.height), PILImage.AFFINE,
+                                         (step, 0, -step / 2, 0, 1, 0), PILImage.NEAREST)
+            self._cols[step] = np.asarray(lines.convert('L'))
+        return self._cols[step]
+
+
+def row_means(gray, step, divisor=None):
+    """Per-row mean of every `step`-th pixel. `divisor` replaces the sample
+    count where the original code divided by width // step."""
+    samples = gray.cols(step)
+    return samples.sum(axis=1, dtype=np.int64) / (divisor or samples.shape[1])
+
+
+def col_means(gray, step, divisor=None):
+    """Per-column mean of every `step`-th pixel (see row_means)."""
+    samples = gray.rows(step)
+    return samples.sum(axis=0, dtype=np.int64) / (divisor or samples.shape[0])
+
+
+def vertical_edges(gray, step):
+    """Edge strength at x = 1..w-2: sum of |g[y, x+1] - g[y, x-1]| over every
+    `step`-th row."""
+    rows = gray.rows(step).astype(np.int16)
+    return np.abs(rows[:, 2:] - rows[:, :-2]).sum(axis=0, dtype=np.int64)
+
+
+def horizontal_edges(gray, step):
+    """Edge strength at y = 1..h-2, sampled every `step`-th column."""
+    cols = gray.cols(step).astype(np.int16)
+    return np.abs(cols[2:, :] - cols[:-2, :]).sum(axis=1, dtype=np.int64)
+
+
+def smooth(profile, window=5):
+    """Centered moving average of half-width window // 2, truncated at the
+    edges, via a cumulative sum."""
+    p = np.asarray(profile, dtype=np.float64)
+    n = len(p)
+    half_w = max(1, window) // 2
+    csum = np.concatenate(([0.0], np.cumsum(p)))
+    idx = np.arange(n)
+    start = np.maximum(0, idx - half_w)
+    end = np.minimum(n, idx + half_w + 1)
+    return (csum[end] - csum[start]) / (end - start)
+
+
+def autocorrelation(profile):
+    """Mean-removed autocorrelation r[lag] = sum(x[i] * x[i + lag]) for every
+    lag, via zero-padded FFT."""
+    x = np.asarray(profile, dtype=np.float64)
+    x = x - x.mean()
+    n = len(x)
+    size = 1 << (2 * n - 1).bit_length()
+    f = np.fft.rfft(x, size)
+    return np.fft.irfft(f * np.conj(f), size)[:n]
+
+
+def runs(mask):
+    """(starts, ends) of the True runs in a boolean array, ends exclusive."""
+    d = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(d == 1), np.flatnonzero(d == -1)
+
+
+def run_peaks(values, mask):
+    """Position of the first maximum inside each True run of `mask`."""
+    starts, ends = runs(mask)
+    return np.array([s + int(np.argmax(values[s:e])) for s, e in zip(starts, ends)], dtype=np.int64)
+
+
+# ============================================================================
+# COARSE-TO-FINE - pyramid level, separator evidence, confidence scores
+# ============================================================================
+COARSE_SIDE = 480            # long side of the pyramid level the strategies run on
+CONFIDENCE_THRESHOLD = 0.5   # first hypothesis at or above this wins
+MIN_CONFIDENCE = 0.1         # below this the aspect-ratio fallback is used
+MAX_ROWS, MAX_COLS = 8, 6
+LINE_TOLERANCE = 24          # gray levels from a line's median that still count as "same"
+CONTENT_SEP = 0.98           # lines below this uniformity hold content (not page margin)
+CUT_TOLERANCE = 0.15         # a cut may move this fraction of a cell from equal spacing
+MIN_CUT_CONTRAST = 0.25      # weaker cuts keep the equal-division position
+GUTTER_SLACK = 0.1           # a gutter line is within this share of (peak - typical) of the peak
+
+
+def pyramid_level(image, max_side=COARSE_SIDE):
+    """Grayscale copy of `image` with its long side at most `max_side`.
+    NEAREST-samples at twice the target size and box-reduces by 2, which costs
+    a few ms on a 12 MP screenshot (a full convert('L') alone costs ~15 ms)."""
+    width, height = image.size
+    factor = max(width, height) / max_side
+    if factor <= 1:
+        return image.convert('L')
+    size = (max(1, round(width / factor)), max(1, round(height / factor)))
+    sampled = image.resize((size[0] * 2, size[1] * 2), PILImage.NEAREST)
+    return sampled.convert('L').reduce(2)
+
+
+def line_uniformity(lines):
+    """Fraction of each line's pixels within LINE_TOLERANCE of that line's
+    median. ~1.0 for white gutters and drawn rules, lower across content.
+    Long lines are subsampled (the median from ~64 pixels, the fraction from
+    ~1000); neither estimate moves enough to matter."""
+    px = lines[:, ::max(1, lines.shape[1] // 1000)].astype(np.int16)
+    median = np.median(px[:, ::max(1, px.shape[1] // 64)], axis=1, keepdims=True)
+    return (np.abs(px - median) <= LINE_TOLERANCE).mean(axis=1)
+
+
+class AxisEvidence:
+    """Separator and brightness profiles along one axis of the pyramid level,
+    and the score of splitting that axis into n cells."""
+
+    def __init__(self, lines):
+        self.sep = line_uniformity(lines)
+        self.profile = lines.mean(axis=1)
+        self.length = len(self.sep)
+        content = np.flatnonzero(self.sep < CONTENT_SEP)
+        self.lo, self.hi = (int(content[0]), int(content[-1]) + 1) if content.size else (0, self.length)
+        inside = self.sep[self.lo:self.hi]
+        self.typical = float(np.median(inside)) if inside.size else 1.0
+        self._scores = {}
+
+    def contrast(self, pos):
+        """How much line `pos` stands out as a separator, 0..1."""
+        return float(np.clip((self.sep[pos] - self.typical) / (1.0 - self.typical + 1e-6), 0, 1))
+
+    def cuts(self, n):
+        """Best separator line near each of the n - 1 equal-division cuts."""
+        cell = (self.hi - self.lo) / n
+        tol = max(1, int(cell * CUT_TOLERANCE))
+        cuts = []
+        for k in range(1, n):
+            expected = self.lo + k * cell
+            a = max(self.lo + 1, int(expected) - tol)
+            b = min(self.hi - 1, int(expected) + tol + 1)
+            if b <= a:
+                cuts.append(int(expected))
+                continue
+            window = self.sep[a:b] - 1e-6 * np.abs(np.arange(a, b) - expected)  # ties -> nearest
+            cuts.append(a + int(np.argmax(window)))
+        return cuts
+
+    def score(self, n):
+        """Support for exactly n cells: separator contrast at the cuts (less
+        the further they sit from equal spacing) times the similarity of the
+        cells' brightness profiles. 0..1."""
+        if n not in self._scores:
+            cell = (self.hi - self.lo) / n
+            if n == 1:
+                self._scores[n] = 1.0
+            elif cell < 8:
+                self._scores[n] = 0.0
+            else:
+                cuts = self.cuts(n)
+                tol = max(1, int(cell * CUT_TOLERANCE))
+                offsets = [abs(c - (self.lo + k * cell)) / tol for k, c in enumerate(cuts, start=1)]
+                support = np.mean([self.contrast(c) * max(0.0, 1 - o * o) for c, o in zip(cuts, offsets)])
+                edges = [self.lo] + cuts + [self.hi]
+                grid = np.arange(self.length)
+                cells = np.array([np.interp(np.linspace(a, max(a, b - 1), 32), grid, self.profile)
+                                  for a, b in zip(edges[:-1], edges[1:])])
+                cells -= cells.mean(axis=1, keepdims=True)
+                mean = cells.mean(axis=0)
+                norms = np.linalg.norm(cells, axis=1) * np.linalg.norm(mean)
+                ncc = np.where(norms > 1e-6, cells @ mean / np.maximum(norms, 1e-6), 0.0)
+                self._scores[n] = float(support * np.clip(ncc.mean(), 0, 1))
+        return self._scores[n]
+
+    def confidence(self, n, max_cells):
+        """score(n), discounted when a finer grid (a multiple of n) also fits,
+        since 2 cells of 2 rows each look just as regular as 4 rows."""
+        finer = [self.score(m) for m in range(2 * n, max_cells + 1, n)]
+        if n == 1:
+            # One cell is only "no split fits": squared so that a split scoring
+            # ~0.4 (a real grid with varied designs) beats it
+            return (1.0 - max(finer, default=0.0)) ** 2
+        return self.score(n) * (1.0 - max(finer, default=0.0))
+
+    def best(self, max_cells):
+        return max(range(1, max_cells + 1), key=lambda n: self.confidence(n, max_cells))
+
+
+class GridLayout:
+    """Detected grid: counts, confidence, the strategy that found it, and the
+    full-resolution (start, end) pixel span of every row and column."""
+
+    def __init__(self, rows, cols, confidence, strategy, row_bounds, col_bounds):
+        self.rows, self.cols = rows, cols
+        self.confidence = confidence
+        self.strategy = strategy
+        self.row_bounds, self.col_bounds = row_bounds, col_bounds
+
+    def cells(self):
+        """(row, col, (x1, y1, x2, y2)) for every cell, row by row."""
+        for row, (y1, y2) in enumerate(self.row_bounds):
+            for col, (x1, x2) in enumerate(self.col_bounds):
+                yield row, col, (x1, y1, x2, y2)
+
+    def __repr__(self):
+        return f"GridLayout({self.rows}x{self.cols}, {self.strategy}, confidence={self.confidence:.2f})"
+
+
+# ============================================================================
+# ORDER IMAGE ANALYZER - For auto-crop mode (Improved grid detection)
+# ============================================================================
+STRATEGY_NAMES = {
+    'labels': "Text label method",
+    'stripes': "Brightness stripe method",
+    'edges': "Edge method",
+    'gutters': "Whitespace gap method",
+    'scan': "Separator scan",
+    'aspect': "Aspect ratio fallback",
+    'manual': "Manual grid",
+}
+
+
+class OrderImageAnalyzer:
+    """Analyzes order images and extracts design cells"""
+
+    # Tried in this order on the pyramid level until one is confident enough.
+    # 'scan' scores every row/column count directly and always proposes one.
+    STRATEGIES = ('labels', 'stripes', 'edges', 'gutters', 'scan')
+
+    def __init__(self, image):
+        self.image = image
+        self.width, self.height = image.size
+        self.layout = None
+        self._coarse = None
+
+    def _pyramid(self):
+        """(GraySampler, row evidence, column evidence) of the pyramid level."""
+        if self._coarse is None:
+            small = pyramid_level(self.image)
+            gray = np.asarray(small)
+            self._coarse = (GraySampler(small), AxisEvidence(gray), AxisEvidence(gray.T))
+        return self._coarse
+
+    # -- strategies: (rows, cols) hypothesis on the pyramid level, or None ----
+    def _strategy_labels(self, gray, row_ev, col_ev):
+        rows, cols = self._detect_by_text_labels(gray)
+        return (rows, cols) if rows >= 2 and cols >= 2 else None
+
+    def _strategy_stripes(self, gray, row_ev, col_ev):
+        rows, cols = self._detect_by_brightness_stripes(gray)
+        return (rows, cols) if rows >= 2 and cols >= 2 else None
+
+    def _strategy_edges(self, gray, row_ev, col_ev):
+        cols, rows = self._detect_grid_lines(gray)
+        return (rows, cols) if 2 <= cols <= 6 and 2 <= rows <= 8 else None
+
+    def _strategy_gutters(self, gray, row_ev, col_ev):
+        cols, rows = self._detect_by_regularity(gray)
+        return (rows, cols) if 1 <= cols <= 6 and 1 <= rows <= 6 else None
+
+    def _strategy_scan(self, gray, row_ev, col_ev):
+        return (row_ev.best(MAX_ROWS), col_ev.best(MAX_COLS))
+
+    def _detect_by_text_labels(self, gray):
+        """
+        Detect grid by finding repeating text label patterns (like "Tipo:").
+        Order documents typically have labels at consistent positions in each cell.
+        """
+        height, width = gray.shape
+
+        row_brightness = row_means(gray, max(1, width // 100))
+        brightness_changes = np.abs(np.diff(row_brightness))
+        threshold = brightness_changes.max() * 0.3 if brightness_changes.size else 10
+
+        change_positions = np.flatnonzero(brightness_changes > threshold)
+        if len(change_positions) < 2:
+            return (1, 1)
+
+        # Consecutive change positions closer than height // 20 form one cluster
+        breaks = np.flatnonzero(np.diff(change_positions) >= height // 20) + 1
+        clusters = [int(c.sum()) // len(c) for c in np.split(change_positions, breaks)]
+
+        if len(clusters) >= 2:
+            avg_spacing = (clusters[-1] - clusters[0]) / (len(clusters) - 1)
+
+            if avg_spacing > 0:
+                estimated_rows = int(round(height / avg_spacing))
+                if estimated_rows >= 2 and estimated_rows <= 8:
+                    cols = self._detect_columns_by_symmetry(gray)
+                    if cols >= 2:
+                        return (estimated_rows, cols)
+
+        return (1, 1)
+
+    def _detect_columns_by_symmetry(self, gray):
+        """Detect columns by finding vertical symmetry in brightness"""
+        height, width = gray.shape
+
+        sample_step = max(1, height // 50)
+        col_brightness = col_means(gray, sample_step, divisor=height // sample_step)
+        smoothed = smooth(col_brightness, window=width // 100)
+
+        best_cols = 1
+        best_score = float('inf')
+
+        for num_cols in range(2, 7):
+            col_width = width // num_cols
+            if col_width < 50:
+                continue
+
+            # One row per column strip; variance across strips at each offset
+            patterns = smoothed[:num_cols * col_width].reshape(num_cols, col_width)
+            avg_variance = patterns.var(axis=0).mean()
+            if avg_variance < best_score:
+                best_score = avg_variance
+                best_cols = num_cols
+
+        return best_cols
+
+    def _detect_by_brightness_stripes(self, gray):
+        """Detect grid by analyzing periodic brightness patterns."""
+        height, width = gray.shape
+
+        step_x = max(1, width // 50)
+        row_profile = row_means(gray, step_x, divisor=width // step_x)
+        step_y = max(1, height // 50)
+        col_profile = col_means(gray, step_y, divisor=height // step_y)
+
+        rows = self._find_periodicity(row_profile, height)
+        cols = self._find_periodicity(col_profile, width)
+
+        return (rows, cols)
+
+    def _find_periodicity(self, profile, total_size):
+        """Find the number of repeating units in a brightness profile using autocorrelation"""
+        n = len(profile)
+        if n < 20:
+            return 1
+
+        acf = autocorrelation(profile)
+
+        best_cells = 1
+        best_correlation = 0
+
+        for num_cells in range(2, 8):
+            period = n // num_cells
+            if period < 20:
+                continue
+
+            correlation = acf[period] / (n - period)
+            if correlation > best_correlation:
+                best_correlation = correlation
+                best_cells = num_cells
+
+        if best_correlation > 0:
+            return best_cells
+        return 1
+
+    def detect_grid_layout(self):
+        """Detect the grid layout using multiple methods. Returns (rows, cols) tuple.
+        See analyze() for the confidence and the cell boundaries."""
+        layout = self.analyze()
+        print(f"[Grid] {STRATEGY_NAMES[layout.strategy]}: {layout.rows}x{layout.cols} "
+              f"(confidence {layout.confidence:.2f})")
+        return (layout.rows, layout.cols)
+
+    def analyze(self):
+        """Coarse-to-fine detection. Returns a GridLayout and keeps it in self.layout."""
+        gray, row_ev, col_ev = self._pyramid()
+
+        best = None
+        tried = set()
+        for strategy in self.STRATEGIES:
+            hypothesis = getattr(self, f"_strategy_{strategy}")(gray, row_ev, col_ev)
+            if hypothesis is None or hypothesis in tried:
+                continue
+            tried.add(hypothesis)
+            confidence = self._confidence(*hypothesis)
+            if best is None or confidence > best[0]:
+                best = (confidence, strategy, hypothesis)
+            if confidence >= CONFIDENCE_THRESHOLD:
+                break
+
+        if best is None or best[0] < MIN_CONFIDENCE:
+            best = (best[0] if best else 0.0, 'aspect', self._fallback_aspect_ratio_detection())
+
+        confidence, strategy, (rows, cols) = best
+        self.layout = self._layout(rows, cols, confidence, strategy)
+        return self.layout
+
+    def cell_bounds(self, rows, cols):
+        """GridLayout for a given grid, e.g. one corrected by hand in the GUI."""
+        if self.layout is not None and (self.layout.rows, self.layout.cols) == (rows, cols):
+            return self.layout
+        return self._layout(rows, cols, self._confidence(rows, cols), 'manual')
+
+    def _confidence(self, rows, cols):
+        _, row_ev, col_ev = self._pyramid()
+        return min(row_ev.confidence(rows, MAX_ROWS), col_ev.confidence(cols, MAX_COLS))
+
+    def _layout(self, rows, cols, confidence, strategy):
+        _, row_ev, col_ev = self._pyramid()
+        return GridLayout(rows, cols, confidence, strategy,
+                          self._refine(row_ev, rows, axis=0), self._refine(col_ev, cols, axis=1))
+
+    def _refine(self, ev, n, axis):
+        """Full-resolution (start, end) of each of n cells along one axis
+        (0 = rows, 1 = columns). Reads only strips around the content edges
+        and the coarse cut positions."""
+        full = self.height if axis == 0 else self.width
+        scale = full / ev.length
+
+        def strip(p0, p1):
+            p0, p1 = max(0, int(p0)), min(full, int(np.ceil(p1)))
+            box = (0, p0, self.width, p1) if axis == 0 else (p0, 0, p1, self.height)
+            lines = np.asarray(self.image.crop(box).convert('L'))
+            return p0, line_uniformity(lines if axis == 0 else lines.T)
+
+        # Content edges (skip uniform page margins)
+        lo, hi = 0, full
+        if ev.lo > 0:
+            p0, sep = strip((ev.lo - 1) * scale, (ev.lo + 1) * scale)
+            content = np.flatnonzero(sep < CONTENT_SEP)
+            lo = p0 + int(content[0]) if content.size else round(ev.lo * scale)
+        if ev.hi < ev.length:
+            p0, sep = strip((ev.hi - 1) * scale, (ev.hi + 1) * scale)
+            content = np.flatnonzero(sep < CONTENT_SEP)
+            hi = p0 + int(content[-1]) + 1 if content.size else round(ev.hi * scale)
+
+        # Separator span around each cut; weak cuts stay at equal division
+        gaps = []
+        for k, c in enumerate(ev.cuts(n), start=1):
+            if ev.contrast(c) < MIN_CUT_CONTRAST:
+                mid = round(lo + k * (hi - lo) / n)
+                gaps.append((mid, mid))
+                continue
+            # Near the peak: white margins inside cells (crossed only by the
+            # header bars) must not count as gutter
+            threshold = ev.sep[c] - max(0.02, GUTTER_SLACK * (ev.sep[c] - ev.typical))
+            a, b = c, c + 1
+            while a > ev.lo and ev.sep[a - 1] >= threshold:
+                a -= 1
+            while b < ev.hi and ev.sep[b] >= threshold:
+                b += 1
+            p0, sep = strip((a - 1) * scale, (b + 1) * scale)
+            starts, ends = runs(sep >= threshold)
+            if not starts.size:
+                mid = round((c + 0.5) * scale)
+                gaps.append((mid, mid))
+                continue
+            center = (c + 0.5) * scale - p0
+            nearest = int(np.argmin(np.maximum(0, np.maximum(starts - center, center - ends))))
+            gaps.append((p0 + int(starts[nearest]), p0 + int(ends[nearest])))
+
+        bounds = list(zip([lo] + [g[1] for g in gaps], [g[0] for g in gaps] + [hi]))
+        if any(end <= start for start, end in bounds) or any(
+                bounds[i][1] > bounds[i + 1][0] for i in range(len(bounds) - 1)):
+            edges = [round(lo + k * (hi - lo) / n) for k in range(n + 1)]
+            bounds = list(zip(edges[:-1], edges[1:]))
+        return bounds
+
+    def _detect_grid_lines(self, gray):
+        """Detect grid by finding vertical and horizontal lines using edge detection."""
+        height, width = gray.shape
+
+        v_edges = vertical_edges(gray, max(1, height // 40))
+        h_edges = horizontal_edges(gray, max(1, width // 40))
+
+        cols = self._find_grid_lines_from_edges(v_edges, width)
+        rows = self._find_grid_lines_from_edges(h_edges, height)
+
+        return cols, rows
+
+    def _find_grid_lines_from_edges(self, edges, total_size):
+        """Find evenly-spaced grid lines from edge strength profile"""
+        if len(edges) == 0 or total_size < 10:
+            return 1
+
+        smoothed = smooth(edges, window=max(5, total_size // 50))
+
+        max_edge = smoothed.max()
+        if max_edge < 100:
+            return 1
+
+        edge_threshold = max_edge * 0.4
+        margin = total_size // 15
+
+        peaks = run_peaks(smoothed, smoothed >= edge_threshold)
+        interior_peaks = peaks[(peaks > margin) & (peaks < total_size - margin)]
+
+        if len(interior_peaks) == 0:
+            return 1
+
+        best_cells = 1
+        best_score = float('inf')
+
+        for num_cells in range(2, 8):
+            expected_spacing = total_size / num_cells
+            expected_lines = [int(i * expected_spacing) for i in range(1, num_cells)]
+
+            total_error = 0
+            matched = 0
+            for exp_pos in expected_lines:
+                min_dist = int(np.abs(interior_peaks - exp_pos).min())
+                if min_dist < expected_spacing * 0.15:
+                    matched += 1
+                    total_error += min_dist
+                else:
+                    total_error += expected_spacing
+
+            if matched > 0:
+                score = total_error / matched
+                score = score / (matched / len(expected_lines))
+
+                if score < best_score and matched >= len(expected_lines) * 0.6:
+                    best_score = score
+                    best_cells = num_cells
+
+        return best_cells
+
+    def _smooth_profile(self, profile, window=5):
+        """Apply simple moving average smoothing"""
+        return smooth(profile, window)
+
+    def _fallback_aspect_ratio_detection(self):
+        """Fallback detection based on aspect ratio"""
+        aspect = self.width / self.height
+
+        if aspect > 1.8:
+            return (1, 3)
+        elif aspect > 1.3:
+            return (2, 3)
+        elif aspect > 0.9:
+            if self.width > 1000:
+                return (3, 3)
+            else:
+                return (2, 2)
+        else:
+            return (3, 2)
+
+    def crop_designs(self, rows, cols, padding_top_pct=0.12, padding_bottom_pct=0.08):
+        """
+        Crop individual designs from the grid.
+
+        Args:
+            rows: Number of rows in grid
+            cols: Number of columns in grid
+            padding_top_pct: Percentage of cell height to skip from top (for "Tipo:" label)
+            padding_bottom_pct: Percentage of cell height to skip from bottom (for "Requeridos:")
+
+        Returns:
+            List of dicts with the cropped PIL image, row, col, index, the
+            cell's full box (x1, y1, x2, y2) and the cropped rectangle
+        """
+        designs = []
+        for row, col, (x1, y1, x2, y2) in self.cell_bounds(rows, cols).cells():
+            padding_top = int((y2 - y1) * padding_top_pct)
+            padding_bottom = int((y2 - y1) * padding_bottom_pct)
+            margin = min(10, (x2 - x1) // 4)
+            crop = (x1 + margin, y1 + padding_top, x2 - margin, y2 - padding_bottom)
+            designs.append({'image': self.image.crop(crop), 'row': row, 'col': col,
+                            'index': row * cols + col, 'box': (x1, y1, x2, y2), 'crop': crop})
+        return designs
+
+    def _detect_by_regularity(self, gray):
+        """
+        Detect grid by finding whitespace gaps between content regions.
+        Looks for consistent vertical and horizontal white/light strips.
+        """
+        height, width = gray.shape
+
+        step_y = max(1, height // 50)
+        col_brightness = col_means(gray, step_y, divisor=height // step_y)
+        step_x = max(1, width // 50)
+        row_brightness = row_means(gray, step_x, divisor=width // step_x)
+
+        cols = self._count_regions_by_brightness(col_brightness, width)
+        rows = self._count_regions_by_brightness(row_brightness, height)
+
+        return cols, rows
+
+    def _count_regions_by_brightness(self, brightness, total_size):
+        """Count content regions by finding whitespace gaps"""
+        if len(brightness) == 0 or total_size < 10:
+            return 1
+
+        # Light smoothing to reduce noise, but preserve structure
+        smoothed = smooth(brightness, max(3, total_size // 200))
+        n = len(smoothed)
+
+        max_brightness = smoothed.max()
+        min_brightness = smoothed.min()
+        brightness_range = max_brightness - min_brightness
+
+        if brightness_range < 20:
+            # Very uniform image, can't detect gaps
+            return 1
+
+        # Whitespace: within the top 10% of the range. Content: anything below
+        # 85% (lenient, to catch light-colored content like yellow).
+        whitespace_threshold = min_brightness + brightness_range * 0.90
+        content_threshold = min_brightness + brightness_range * 0.85
+
+        min_gap_size = max(2, total_size // 200)
+        min_content_size = total_size // 20
+
+        starts, ends = runs(smoothed >= whitespace_threshold)
+        keep = (ends - starts >= min_gap_size) & (starts >= min_gap_size) & (ends <= total_size - min_gap_size)
+        starts, ends = starts[keep], ends[keep]
+
+        # Interior gaps need content within min_content_size on both sides
+        content = np.concatenate(([0], np.cumsum(smoothed < content_threshold)))
+        before = content[starts] - content[np.maximum(0, starts - min_content_size)]
+        after = content[np.minimum(n, ends + min_content_size)] - content[ends]
+        interior_gaps = int(np.count_nonzero((before > 0) & (after > 0)))
+
+        # Number of content regions = number of interior gaps + 1
+        return max(1, min(8, interior_gaps + 1))
+
+
+# ============================================================================
+# WHITESPACE-GAP ANALYZER - axkan_order_system.py's detection
+# ============================================================================
+class WhitespaceGapAnalyzer(OrderImageAnalyzer):
+    """Trusts the whitespace gaps between content regions first instead of the
+    label / stripe / edge strategies. Same evidence, refinement and crops."""
+
+    STRATEGIES = ('gutters', 'scan')
@@ -0,0 +1,416 @@
+#!/usr/bin/env python3
+"""
+Order PDF - shared renderer for order sheets
+============================================
+notion_quick, axkan_order_system, generate_axkan and generate_quick all
+draw the same sheet: logo, ORDEN DE COMPRA, the order box, instructions,
+CAJAS TOTALES and the color stripes, then a grid of cells with a Tipo bar,
+the design image and the Requeridos / Contados boxes. OrderSheet draws it
+for all of them; a style dict holds what actually differs between them
+(AXKAN colors or the VT blues, logo, which fields are editable).
+
+Everything that is the same in every order with the same number of designs
+is a form XObject (FormTemplates):
+
+  - the header artwork and the frame of every cell (border, Tipo bar,
+    labels, empty field boxes) are one form per page layout, placed with
+    a single doForm
+  - the PDF operators of each form are recorded the first time it is drawn;
+    later PDFs rendered by the same process copy them instead of running
+    the canvas calls again
+
+Per order only the order text, the AcroForm fields and the images are drawn.
+
+Usage:
+    sheet = OrderSheet(AXKAN_STYLE, config)
+    sheet.render("out.pdf", "Hotel Playa", "Entregar el viernes", [
+        {'type': 'Imanes chicos', 'quantity': 50, 'image_path': 'design_0.jpg'},
+        ...])
+    sheet.render_combined("batch.pdf", [(order_name, instructions, designs), ...])
+"""
+
+import hashlib
+import os
+import threading
+from datetime import datetime
+
+from PIL import Image as PILImage
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from pdf_images import DesignImages
+
+# AXKAN Brand Colors
+AXKAN_COLORS = {
+    'pink': '#E91E63',
+    'green': '#7CB342',
+    'orange': '#FF9800',
+    'cyan': '#00BCD4',
+    'red': '#F44336',
+    'dark': '#333333',
+    'light': '#F5F5F5',
+    'white': '#FFFFFF'
+}
+
+# Fonts template artwork may use. They are registered in this order before a
+# form is drawn, so a recorded form refers to them by the same names in every PDF.
+FONTS = ('Helvetica', 'Helvetica-Bold')
+
+COLUMNS = 3
+SPACING = 10            # between cells
+HEADER_HEIGHT = 230     # grid starts this far below the top of the first page
+
+_AX = {k: colors.HexColor(v) for k, v in AXKAN_COLORS.items()}
+_RAINBOW = [_AX['pink'], _AX['green'], _AX['orange'], _AX['cyan'], _AX['red']]
+
+AXKAN_STYLE = {
+    'logo_letters': list(zip("AXKAN", _RAINBOW)),
+    'logo_image': None,             # (path, width, height) at the top-left corner
+    'title_size': 18,
+    'text': _AX['dark'],            # title, order info and labels
+    'field_bg': _AX['light'],
+    'info_border': _AX['pink'],
+    'instructions_border': _AX['cyan'],
+    'cajas_border': _AX['orange'],
+    'stripes': _RAINBOW,
+    'accents': _RAINBOW,            # Tipo bar and field borders, cycling per design
+    'frame': None,                  # (color, width) of the cell border; None = accent, 2 pt
+    'type_fill': None,              # Tipo field background; None = on the accent bar
+    'type_color': colors.white,
+    'editable_type': False,         # Tipo as a field instead of printed text
+    'editable_quantity': False,     # Requeridos as a field instead of printed text
+    'placeholder': False,           # grey box in cells without an image
+    'always_instructions': False,   # instructions box even when there are none
+    'per_page': 9,
+    'max_cell_height': None,
+}
+
+_NAVY = colors.HexColor('#1B4F72')
+_BLUE = colors.HexColor('#2E86C1')
+_LIGHT_BLUE = colors.HexColor('#EBF5FB')
+
+VT_STYLE = dict(
+    AXKAN_STYLE,
+    logo_letters=[],
+    logo_image=('vt1.png', 70, 60),
+    title_size=20,
+    text=_NAVY,
+    field_bg=_LIGHT_BLUE,
+    info_border=_NAVY,
+    instructions_border=_BLUE,
+    cajas_border=_BLUE,
+    stripes=[_BLUE],
+    accents=[_BLUE],
+    frame=(colors.black, 1),
+    type_fill=_LIGHT_BLUE,
+    type_color=colors.black,
+    editable_type=True,
+    editable_quantity=True,
+    placeholder=True,
+    always_instructions=True,
+)
+
+
+class FormTemplates:
+    """Static artwork as form XObjects: drawn once per PDF, recorded once per process"""
+
+    def __init__(self, record=True):
+        self.record = record
+        self._lock = threading.Lock()
+        self._names = {}        # key -> form name
+        self._recorded = {}     # key -> (internal font names, PDF operators)
+        self.drawn = 0          # forms drawn with canvas calls
+        self.copied = 0         # forms copied from a recording
+
+    def place(self, c, key, draw, bbox, x=0, y=0):
+        """Show form `key` with its origin at (x, y). The first time in this PDF
+        it is defined by draw(c), in form coordinates, clipped to bbox
+        (x0, y0, x1, y1). Artwork must only use FONTS and no images."""
+        with self._lock:
+            name = self._names.setdefault(key, f"Tpl{len(self._names)}")
+        if not c.hasForm(name):
+            self._define(c, name, key, draw, bbox)
+        c.saveState()
+        c.translate(x, y)
+        c.doForm(name)
+        c.restoreState()
+
+    def _define(self, c, name, key, draw, bbox):
+        doc = c._doc
+        fonts = tuple(doc.getInternalFontName(f) for f in FONTS)
+        with self._lock:
+            recorded = self._recorded.get(key)
+
+        c.beginForm(name, *bbox)
+        if recorded is not None and recorded[0] == fonts:
+            c._code.extend(recorded[1])
+            self.copied += 1
+        else:
+            known_fonts = len(doc.fontMapping)
+            draw(c)
+            self.drawn += 1
+            code = list(c._code)
+            # Only self-contained artwork can be copied into another PDF
+            if self.record and len(doc.fontMapping) == known_fonts and not any(op.endswith(' Do') for op in code):
+                with self._lock:
+                    self._recorded.setdefault(key, (fonts, code))
+        c.endForm()
+
+
+# One cache for the whole process: every sheet rendered reuses the recordings
+TEMPLATES = FormTemplates()
+
+
+class OrderSheet:
+    """The order sheet PDF: header plus a paginated 3-column grid of designs"""
+
+    def __init__(self, style=AXKAN_STYLE, config=None, templates=TEMPLATES):
+        self.style = style
+        self.config = config or {}
+        self.templates = templates
+        self.page_width, self.page_height = A4
+        self.margin = self.config.get('layout', {}).get('margin', 20) * mm
+        self.counted_field = self.config.get('form_fields', {}).get('enable_editable', True)
+        # Forms differ between styles and settings; the key keeps their recordings apart
+        self._key = hashlib.sha1(repr((sorted(style.items()), self.margin, self.counted_field))
+                                 .encode()).hexdigest()[:12]
+        self.images = None
+
+    def render(self, output_path, order_name, instructions, designs, date=None):
+        """Write the sheet for designs ([{'type', 'quantity', 'image_path'}]) to
+        output_path. Returns the path as a string."""
+        return self.render_combined(output_path, [(order_name, instructions, designs)], date)
+
+    def render_combined(self, output_path, orders, date=None):
+        """Write several orders ([(order_name, instructions, designs)]) into one
+        PDF for printing, each starting on a new page. Forms and images are
+        shared between the orders; from the second order on, field names get
+        an 'o<n>_' prefix so every order keeps its own fields."""
+        self.images = DesignImages.from_config(self.config)
+        c = canvas.Canvas(str(output_path), pagesize=(self.page_width, self.page_height))
+        for n, (order_name, instructions, designs) in enumerate(orders):
+            if n:
+                c.showPage()
+            self._draw_order(c, order_name, instructions, designs, date or datetime.now(),
+                             f"o{n}_" if n else '')
+        c.save()
+        print(self.images.summary())
+        return str(output_path)
+
+    def _draw_order(self, c, order_name, instructions, designs, date, prefix):
+        accents = self.style['accents']
+        with_instructions = bool(instructions) or self.style['always_instructions']
+        for first, cells in self._pages(len(designs)):
+            if first:
+                c.showPage()
+            # Header (first page only) and cell frames: one form per page layout
+            header = with_instructions if first == 0 else None
+            self.templates.place(c, ('page', self._key, header, first % len(accents), len(cells)),
+                                 lambda c: self._page_art(c, header, cells),
+                                 (0, 0, self.page_width, self.page_height))
+            if first == 0:
+                self._draw_header(c, order_name, instructions, len(designs), date, with_instructions, prefix)
+            for i, x, y, cw, ch in cells:
+                self._draw_cell(c, i, designs[i], x, y, cw, ch, accents[i % len(accents)], prefix)
+
+    def _page_art(self, c, header, cells):
+        """Form contents: the header artwork (unless header is None) and every cell frame."""
+        accents = self.style['accents']
+        if header is not None:
+            self._header_art(c, header)
+        for i, x, y, cw, ch in cells:
+            c.saveState()
+            c.translate(x, y - ch)
+            self._cell_art(c, cw, ch, accents[i % len(accents)])
+            c.restoreState()
+
+    # ------------------------------------------------------------------
+    # Header
+    # ------------------------------------------------------------------
+    def _header_rows(self, with_instructions):
+        """y of the order box, instructions row and CAJAS TOTALES row."""
+        info_y = self.page_height - 90
+        instructions_y = info_y - 35 if with_instructions else info_y
+        return info_y, instructions_y, instructions_y - 50
+
+    def _draw_header(self, c, order_name, instructions, num_designs, date, with_instructions, prefix=''):
+        s = self.style
+        info_y, instructions_y, cajas_y = self._header_rows(with_instructions)
+
+        if s['logo_image'] and os.path.exists(s['logo_image'][0]):
+            path, w, h = s['logo_image']
+            try:
+                c.drawImage(str(path), self.margin, self.page_height - h - 15, width=w, height=h,
+                            preserveAspectRatio=True, mask='auto')
+            except Exception as e:
+                print(f"Warning: Could not draw logo {path}: {e}")
+
+        c.setFillColor(s['text'])
+        c.setFont("Helvetica-Bold", 10)
+        c.drawString(self.margin + 10, info_y - 17,
+                     f"Order: {order_name} | Designs: {num_designs} | Date: {date.strftime('%Y-%m-%d')}")
+
+        if instructions:
+            c.setFillColor(colors.black)
+            c.setFont("Helvetica", 10)
+            c.drawString(self.margin + 85, instructions_y - 10, instructions)
+
+        c.acroForm.textfield(name=f"{prefix}cajas_totales", x=self.margin + 130, y=cajas_y - 15,
+                             width=150, height=35, borderWidth=0,
+                             fontSize=16, fontName='Helvetica-Bold')
+
+    def _header_art(self, c, with_instructions):
+        s = self.style
+        m, width = self.margin, self.page_width - 2 * self.margin
+        info_y, instructions_y, cajas_y = self._header_rows(with_instructions)
+
+        c.setFont("Helvetica-Bold", 36)
+        for i, (letter, color) in enumerate(s['logo_letters']):
+            c.setFillColor(color)
+            c.drawString(m + i * 28, self.page_height - 50, letter)
+
+        c.setFillColor(s['text'])
+        c.setFont("Helvetica-Bold", s['title_size'])
+        c.drawCentredString(self.page_width / 2, self.page_height - 50, "ORDEN DE COMPRA")
+
+        c.setFillColor(colors.white)
+        c.setStrokeColor(s['info_border'])
+        c.setLineWidth(2)
+        c.roundRect(m, info_y - 25, width, 25, 5, fill=True, stroke=True)
+
+        if with_instructions:
+            c.setFillColor(s['text'])
+            c.setFont("Helvetica-Bold", 10)
+            c.drawString(m, instructions_y, "Instructions:")
+            c.setFillColor(s['field_bg'])
+            c.setStrokeColor(s['instructions_border'])
+            c.roundRect(m + 80, instructions_y - 20, width - 80, 25, 3, fill=True, stroke=True)
+
+        c.setFillColor(s['text'])
+        c.setFont("Helvetica-Bold", 14)
+        c.drawString(m, cajas_y + 5, "CAJAS TOTALES:")
+        c.setFillColor(s['field_bg'])
+        c.setStrokeColor(s['cajas_border'])
+        c.setLineWidth(3)
+        c.roundRect(m + 130, cajas_y - 15, 150, 35, 5, fill=True, stroke=True)
+
+        stripe_y = cajas_y - 30
+        segment = width / len(s['stripes'])
+        for i, color in enumerate(s['stripes']):
+            c.setStrokeColor(color)
+            c.line(m + i * segment, stripe_y, m + (i + 1) * segment, stripe_y)
+
+    # ------------------------------------------------------------------
+    # Design grid
+    # ------------------------------------------------------------------
+    def _pages(self, num):
+        """(index of its first design, [(design index, x, top y, width, height)]) per page."""
+        per_page = self.style['per_page']
+        available_width = self.page_width - 2 * self.margin
+        available_height = self.page_height - self.margin - HEADER_HEIGHT
+        cell_width = (available_width - (COLUMNS - 1) * SPACING) / COLUMNS
+
+        pages = []
+        for first in range(0, max(num, 1), per_page):
+            on_page = min(num - first, per_page)
+            rows = max(1, (on_page + COLUMNS - 1) // COLUMNS)
+            cell_height = (available_height - (rows - 1) * SPACING) / rows
+            if self.style['max_cell_height']:
+                cell_height = min(cell_height, self.style['max_cell_height'])
+            top = self.page_height - (HEADER_HEIGHT if first == 0 else self.margin)
+            cells = []
+            for k in range(on_page):
+                row, col = divmod(k, COLUMNS)
+                cells.append((first + k, self.margin + col * (cell_width + SPACING),
+                              top - row * (cell_height + SPACING), cell_width, cell_height))
+            pages.append((first, cells))
+        return pages
+
+    def _cell_art(self, c, cw, ch, accent):
+        """Everything in a cell that doesn't depend on the design, origin at its bottom-left."""
+        s = self.style
+        frame_color, frame_width = s['frame'] or (accent, 2)
+        c.setStrokeColor(frame_color)
+        c.setLineWidth(frame_width)
+        c.rect(0, 0, cw, ch)
+
+        c.setFillColor(accent)
+        c.rect(0, ch - 18, cw, 18, fill=True, stroke=False)
+        c.setFillColor(colors.white)
+        c.setFont("Helvetica-Bold", 9)
+        c.drawString(5, ch - 13, "Tipo:")
+        if s['type_fill']:
+            c.setFillColor(s['type_fill'])
+            c.rect(35, ch - 16, cw - 45, 14, fill=True, stroke=False)
+
+        rows = [(40, "Requeridos:")] + ([(20, "Contados:")] if self.counted_field else [])
+        c.setStrokeColor(accent)
+        c.setLineWidth(1)
+        for label_y, label in rows:
+            c.setFillColor(s['text'])
+            c.setFont("Helvetica-Bold", 9)
+            c.drawString(5, label_y, label)
+            c.setFillColor(s['field_bg'])
+            c.rect(60, label_y - 12, cw - 70, 15, fill=True, stroke=True)
+
+    def _draw_cell(self, c, i, design, x, y, cw, ch, accent, prefix=''):
+        s = self.style
+        form = c.acroForm
+        bottom = y - ch
+
+        product_type = str(design.get('type') or '')
+        if s['editable_type']:
+            type_fill = s['type_fill'] or accent
+            form.textfield(name=f"{prefix}tipo_{i}", x=x + 35, y=y - 16, width=cw - 45, height=14,
+                           value=product_type, borderWidth=0, fontSize=9,
+                           fontName='Helvetica-Bold', textColor=s['type_color'],
+                           fillColor=type_fill, borderColor=type_fill)
+        else:
+            c.setFillColor(s['type_color'])
+            c.setFont("Helvetica-Bold", 9)
+            c.drawString(x + 35, y - 13, product_type)
+
+        # Image zone: between the Tipo bar and the Requeridos row
+        zone_top, zone_bottom = y - 20, bottom + 50
+        img_path = design.get('image_path')
+        if img_path and os.path.exists(img_path):
+            self._draw_image(c, img_path, x + 5, zone_bottom, cw - 10, zone_top - zone_bottom)
+        elif s['placeholder']:
+            c.setStrokeColor(colors.grey)
+            c.setLineWidth(0.5)
+            c.rect(x + 5, zone_bottom + 5, cw - 10, zone_top - zone_bottom - 10)
+            c.setFillColor(colors.lightgrey)
+            c.setFont("Helvetica", 10)
+            c.drawCentredString(x + cw / 2, (zone_top + zone_bottom) / 2, "[Image placeholder]")
+
+        quantity = design.get('quantity', '')
+        quantity = '' if quantity is None else str(quantity)
+        if s['editable_quantity']:
+            form.textfield(name=f"{prefix}requeridos_{i}", x=x + 60, y=bottom + 28, width=cw - 70, height=15,
+                           value=quantity, borderWidth=0, fontSize=10, fontName='Helvetica')
+        else:
+            c.setFillColor(colors.black)
+            c.setFont("Helvetica", 10)
+            c.drawString(x + 65, bottom + 32, quantity)
+
+        if self.counted_field:
+            form.textfield(name=f"{prefix}contados_{i}", x=x + 60, y=bottom + 8, width=cw - 70, height=15,
+                           borderWidth=0, fontSize=10, fontName='Helvetica')
+
+    def _draw_image(self, c, image_path, x, y, max_w, max_h):
+        """Fit the image in the box, centered."""
+        try:
+            with PILImage.open(image_path) as img:
+                iw, ih = img.size
+            scale = min(max_w / iw, max_h / ih)
+            dw, dh = iw * scale, ih * scale
+            c.drawImage(self.images.prepare(image_path, dw, dh), x + (max_w - dw) / 2, y + (max_h - dh) / 2,
+                        width=dw, height=dh, preserveAspectRatio=True, mask='auto')
+        except Exception as e:
+            print(f"Warning: Could not load image {image_path}: {e}")
+            c.setFillColor(colors.lightgrey)
+            c.setFont("Helvetica", 10)
+            c.drawCentredString(x + max_w / 2, y + max_h / 2, "[Image not found]")
+
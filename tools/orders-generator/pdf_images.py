@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+PDF Images - design images prepared for embedding in order PDFs
+================================================================
+canvas.drawImage() embeds whatever file it is given: a 4000 px phone photo
+ends up at full resolution inside a 60 mm cell. DesignImages sits between
+the generators and drawImage and, per image:
+
+  - resamples it to `dpi` for the size it is actually drawn at
+  - recompresses photos as JPEG (embedded by reportlab as-is, DCTDecode)
+  - keeps line art and transparent images lossless (PNG -> FlateDecode + SMask)
+  - hands identical images (same pixels, any file name) the same prepared
+    file, so reportlab writes one image XObject and references it again
+
+Prepared files live in a cache folder named by content hash, so the same
+design in the next PDF is not resampled again.
+
+Usage (one DesignImages per PDF):
+    images = DesignImages(dpi=200)
+    c.drawImage(images.prepare(path, width, height), x, y, width=width, height=height, mask='auto')
+    c.save()
+    print(images.summary())
+"""
+
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+
+from PIL import Image as PILImage
+from reportlab import rl_config
+
+DEFAULT_DPI = 200           # print resolution of design images
+JPEG_QUALITY = 85
+LINE_ART_COLORS = 256       # images with at most this many colors are kept lossless
+RESAMPLE_SLACK = 1.25       # images at most this much larger than needed are left alone
+CACHE_DIR = Path(tempfile.gettempdir()) / 'axkan_pdf_images'
+
+# ASCII85 only matters for 7-bit transports and makes every image stream 25% larger
+rl_config.useA85 = 0
+
+
+def file_digest(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def is_line_art(img):
+    """Few flat colors (logos, text, vector exports) - JPEG would smear the edges."""
+    sample = img.convert('RGB')
+    sample.thumbnail((256, 256), PILImage.NEAREST)   # NEAREST keeps the original colors
+    return sample.getcolors(LINE_ART_COLORS) is not None
+
+
+def has_transparency(img):
+    if img.mode in ('RGBA', 'LA') or (img.mode == 'P' and 'transparency' in img.info):
+        alpha = img.convert('RGBA').getchannel('A')
+        return alpha.getextrema()[0] < 255
+    return False
+
+
+class DesignImages:
+    """Prepared design images for one PDF, with the bytes saved"""
+
+    def __init__(self, dpi=DEFAULT_DPI, quality=JPEG_QUALITY, cache_dir=CACHE_DIR):
+        self.dpi = dpi
+        self.quality = quality
+        self.cache_dir = Path(cache_dir)
+        self._digests = {}      # source path -> content digest
+        self._by_digest = {}    # content digest -> first source path (unchanged images)
+        self._prepared = {}     # (digest, width px, height px) -> prepared path
+        self.placed = 0
+        self.source_bytes = {}  # what drawImage(source) would have embedded, per source
+        self.embedded_bytes = {}
+
+    @classmethod
+    def from_config(cls, config):
+        """Settings from the 'image' section of config.yaml (print_dpi, jpeg_quality)."""
+        image = (config or {}).get('image', {})
+        return cls(dpi=image.get('print_dpi', DEFAULT_DPI), quality=image.get('jpeg_quality', JPEG_QUALITY))
+
+    def prepare(self, image_path, width, height):
+        """Path to pass to drawImage for an image drawn at width x height points.
+        Falls back to the original path if it can't be prepared."""
+        image_path = str(image_path)
+        self.placed += 1
+        try:
+            self.source_bytes.setdefault(image_path, os.path.getsize(image_path))
+            digest = self._digests.get(image_path)
+            if digest is None:
+                digest = self._digests[image_path] = file_digest(image_path)
+            target = (max(1, round(width / 72 * self.dpi)), max(1, round(height / 72 * self.dpi)))
+            key = (digest, *target)
+            if key not in self._prepared:
+                self._prepared[key] = self._prepare(image_path, digest, target)
+        except (OSError, ValueError) as e:
+            print(f"Warning: Could not prepare image {image_path}: {e}")
+            if image_path in self.source_bytes:   # embedded unchanged
+                self.embedded_bytes.setdefault(image_path, self.source_bytes[image_path])
+            return image_path
+        prepared = self._prepared[key]
+        self.embedded_bytes.setdefault(prepared, os.path.getsize(prepared))
+        return prepared
+
+    def _prepare(self, image_path, digest, target):
+        with PILImage.open(image_path) as img:
+            if img.width <= target[0] * RESAMPLE_SLACK and img.height <= target[1] * RESAMPLE_SLACK:
+                # Already small enough: re-encoding would only lose quality
+                return self._by_digest.setdefault(digest, image_path)
+
+            if img.format == 'JPEG':   # let the decoder skip detail that is thrown away anyway
+                img.draft('RGB', (target[0] * 2, target[1] * 2))
+            transparent = has_transparency(img)
+            lossless = transparent or is_line_art(img)
+            out = self.cache_dir / f"{digest[:20]}_{target[0]}x{target[1]}_{self.dpi}_{self.quality}" \
+                                   f"{'.png' if lossless else '.jpg'}"
+            if out.exists():
+                return str(out)
+
+            img = img.convert('RGBA' if transparent else 'RGB')
+            scale = min(target[0] / img.width, target[1] / img.height)
+            size = (max(1, round(img.width * scale)), max(1, round(img.height * scale)))
+            img = img.resize(size, PILImage.LANCZOS, reducing_gap=3.0)
+
+            # Write then rename: batch workers may prepare the same design at once
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.cache_dir, suffix=out.suffix)
+            with os.fdopen(fd, 'wb') as f:
+                if lossless:
+                    img.save(f, 'PNG')
+                else:
+                    img.save(f, 'JPEG', quality=self.quality, optimize=True)
+            os.replace(tmp, out)
+            return str(out)
+
+    @property
+    def saved_bytes(self):
+        return sum(self.source_bytes.values()) - sum(self.embedded_bytes.values())
+
+    def summary(self):
+        before = sum(self.source_bytes.values())
+        after = sum(self.embedded_bytes.values())
+        mb = lambda n: f"{n / 1024 / 1024:.1f} MB"
+        pct = 100 * (before - after) / before if before else 0
+        return (f"🖼️  Images: {self.placed} placed, {len(self.embedded_bytes)} embedded, "
+                f"{mb(before)} -> {mb(after)} (saved {mb(before - after)}, {pct:.0f}%)")
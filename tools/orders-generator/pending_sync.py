@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+Pending Sync - background retry of orders that could not be saved
+=================================================================
+Orders that fail are backed up to pending_orders/<name>_<timestamp>/ by
+ConnectionChecker.save_pending_order. PendingOrderSync retries them without
+anyone clicking "Retry All":
+
+  - an append-only journal (pending_journal.jsonl) records every order added,
+    every attempt and every completion; it is replayed on start and compacted
+    (completed entries dropped) once enough of them pile up
+  - while orders are pending it probes the share with exponential backoff
+    (2 s, 4 s, ... capped at 20 s); a probe that hangs on a stalled mount
+    counts as offline
+  - as soon as a probe succeeds, pending orders are regenerated in parallel
+    and queued copies in the SharePublisher are retried immediately
+  - status() reports the queue, the last probe and the failures
+
+Usage:
+    python pending_sync.py --status      # journal state, no network access
+    python pending_sync.py --run         # drain the backlog headless, then exit
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+
+PROBE_DELAYS = (2, 4, 8, 16, 20)    # seconds between probes while offline; the last one repeats
+PROBE_TIMEOUT = 10                  # a probe still running after this counts as offline
+IDLE_CHECK = 60                     # with nothing pending, look at the publisher this often
+MAX_WORKERS = 4
+MAX_ATTEMPTS = 5                    # regeneration errors (not network) before an order is parked
+COMPACT_AFTER = 50                  # completed entries in the journal before it is rewritten
+
+
+class OrderJournal:
+    """Append-only JSON-lines log of pending orders, replayed into {id: entry}"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.entries = {}
+        self.completed = 0
+        self.exists = self.path.exists()
+        if self.exists:
+            self._replay()
+
+    def _replay(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    self._apply(json.loads(line))
+                except ValueError:   # torn last line after a crash
+                    continue
+
+    def _apply(self, event):
+        op, order_id = event['op'], event['id']
+        if op == 'add':
+            self.entries[order_id] = {k: v for k, v in event.items() if k != 'op'}
+            self.entries[order_id].setdefault('state', 'pending')
+            self.entries[order_id].setdefault('attempts', 0)
+        elif order_id not in self.entries:
+            return
+        elif op == 'attempt':
+            entry = self.entries[order_id]
+            entry['attempts'] += 1
+            entry['last_error'] = event.get('error')
+            entry['last_attempt'] = event.get('at')
+            entry['state'] = 'failed' if entry['attempts'] >= MAX_ATTEMPTS else 'pending'
+        elif op == 'retry':
+            self.entries[order_id].update(state='pending', attempts=0)
+        elif op == 'done':
+            del self.entries[order_id]
+            self.completed += 1
+
+    def record(self, op, order_id, **fields):
+        """Append one event (flushed and fsynced) and apply it."""
+        event = {'op': op, 'id': order_id, 'at': datetime.now().isoformat(timespec='seconds'), **fields}
+        with self._lock:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(event, ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            self._apply(event)
+            if self.completed >= COMPACT_AFTER:
+                self._compact()
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the journal with one 'add' line per live order."""
+        tmp = self.path.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for entry in self.entries.values():
+                f.write(json.dumps({'op': 'add', **entry}, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.completed = 0
+
+    def live(self):
+        with self._lock:
+            return [dict(e) for e in self.entries.values()]
+
+
+class PendingOrderSync:
+    """Background service that regenerates pending orders once the share is back"""
+
+    def __init__(self, pending_dir, journal_file, regenerate, probe, publisher=None,
+                 catalog=None, delete=None, max_workers=MAX_WORKERS):
+        """
+        Args:
+            pending_dir: Folder with one <order>/order_data.json per pending order
+            journal_file: Path of the JSON-lines journal
+            regenerate: Callable(order_data) that writes the order's PDF; raises on failure
+            probe: Callable() -> bool, True when the share is writable
+            publisher: Optional SharePublisher to kick when the share comes back
+            catalog: Optional PendingOrderCatalog to keep states and removals in
+            delete: Optional Callable(folder) that removes a saved order (default:
+                    delete the folder and its catalog row)
+        """
+        self.pending_dir = Path(pending_dir)
+        self.journal = OrderJournal(journal_file)
+        self.regenerate = regenerate
+        self.probe = probe
+        self.publisher = publisher
+        self.catalog = catalog
+        self.delete = delete or self._delete
+        self.max_workers = max_workers
+        self._wake = threading.Event()
+        self._stop = False
+        self._thread = None
+        self._probe_thread = None
+        self._working = set()
+        self.online = None
+        self.last_probe = None
+        self.next_probe = None
+        self.saved = 0
+
+        if not self.journal.exists:
+            self._bootstrap()
+        self._reconcile()
+
+    # ------------------------------------------------------------------
+    # Journal bookkeeping
+    # ------------------------------------------------------------------
+    def _bootstrap(self):
+        """First run with a journal: adopt order folders saved before it existed."""
+        if not self.pending_dir.exists():
+            return
+        for folder in sorted(self.pending_dir.iterdir()):
+            order_file = folder / "order_data.json"
+            if order_file.exists():
+                try:
+                    with open(order_file, 'r', encoding='utf-8') as f:
+                        self.add(folder, json.load(f), wake=False)
+                except (OSError, ValueError):
+                    continue
+
+    def _reconcile(self):
+        """Forget entries whose folder was removed by hand; start compact."""
+        for entry in self.journal.live():
+            if not (Path(entry['folder']) / "order_data.json").exists():
+                self.journal.record('done', entry['id'], note='folder missing')
+        self.journal.compact()
+
+    def add(self, folder, order_data, wake=True):
+        """Record a pending order saved in `folder`."""
+        folder = Path(folder)
+        self.journal.record('add', folder.name, folder=str(folder),
+                            name=order_data.get('order_name', 'Unknown'),
+                            timestamp=order_data.get('timestamp', ''),
+                            designs=len(order_data.get('designs', [])))
+        if wake:
+            self._wake.set()
+
+    def forget(self, folder):
+        """Record that a pending order was handled elsewhere (e.g. deleted from the UI)."""
+        order_id = Path(folder).name
+        if order_id in self.journal.entries:
+            self.journal.record('done', order_id)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="pending-sync", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop = True
+        self._wake.set()
+
+    def retry_now(self):
+        """Probe right away and give parked (failed) orders another round."""
+        for entry in self.journal.live():
+            if entry['state'] == 'failed':
+                self.journal.record('retry', entry['id'])
+                if self.catalog:
+                    self.catalog.set_state(entry['folder'], 'pending')
+        self._wake.set()
+
+    def status(self):
+        entries = self.journal.live()
+        for entry in entries:
+            if entry['id'] in self._working:
+                entry['state'] = 'working'
+        entries.sort(key=lambda e: e.get('timestamp', ''), reverse=True)
+        return {
+            'online': self.online,
+            'last_probe': self.last_probe,
+            'next_probe': self.next_probe,
+            'pending': [e for e in entries if e['state'] == 'pending'],
+            'working': [e for e in entries if e['state'] == 'working'],
+            'failed': [e for e in entries if e['state'] == 'failed'],
+            'saved': self.saved,
+            'uploads': len(self.publisher.pending()) if self.publisher else 0,
+        }
+
+    def busy(self):
+        return any(e['state'] != 'failed' for e in self.journal.live())
+
+    def wait(self, timeout=None):
+        """Block until nothing is pending or working (failed orders don't count)."""
+        deadline = None if timeout is None else time.time() + timeout
+        while self.busy():
+            if deadline is not None and time.time() >= deadline:
+                return False
+            time.sleep(0.2)
+        return True
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    def _probe(self):
+        """probe() in a helper thread; a hung probe is reported offline and not
+        started again until it returns."""
+        if self._probe_thread is not None and self._probe_thread.is_alive():
+            return False
+        result = []
+        self._probe_thread = threading.Thread(target=lambda: result.append(self.probe()),
+                                              name="pending-sync-probe", daemon=True)
+        self._probe_thread.start()
+        self._probe_thread.join(PROBE_TIMEOUT)
+        return bool(result and result[0])
+
+    def _run(self):
+        failures = 0
+        while not self._stop:
+            due = [e for e in self.journal.live() if e['state'] == 'pending']
+            uploads = self.publisher.pending() if self.publisher else []
+            if not due and not uploads:
+                self.next_probe = None
+                self._wake.wait(IDLE_CHECK)
+                self._wake.clear()
+                continue
+
+            was_online = self.online
+            self.online = self._probe()
+            self.last_probe = datetime.now().isoformat(timespec='seconds')
+            if self.online:
+                failures = 0
+                if uploads and was_online is not True:
+                    self.publisher.retry_now()
+                if due and self._drain(due) == 0:
+                    continue
+                # Some orders failed to regenerate: back off before the next round
+                delay = PROBE_DELAYS[-1] if due else IDLE_CHECK
+            else:
+                delay = PROBE_DELAYS[min(failures, len(PROBE_DELAYS) - 1)]
+                failures += 1
+            self.next_probe = datetime.fromtimestamp(time.time() + delay).isoformat(timespec='seconds')
+            self._wake.wait(delay)
+            self._wake.clear()
+
+    def _drain(self, entries):
+        """Regenerate entries in parallel. Returns the number that failed."""
+        print(f"[Sync] Share is reachable - regenerating {len(entries)} pending order(s)")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            return sum(not ok for ok in pool.map(self._regenerate_one, entries))
+
+    def _delete(self, folder):
+        shutil.rmtree(folder, ignore_errors=True)
+        if self.catalog:
+            self.catalog.remove(folder)
+
+    def _regenerate_one(self, entry):
+        self._working.add(entry['id'])
+        try:
+            folder = Path(entry['folder'])
+            with open(folder / "order_data.json", 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            self.regenerate(data)
+        except Exception as e:
+            self.journal.record('attempt', entry['id'], error=str(e))
+            if self.catalog:
+                state = self.journal.entries.get(entry['id'], {}).get('state', 'pending')
+                self.catalog.set_state(entry['folder'], state, str(e))
+            print(f"[Sync] Failed: {entry['name']} - {e}")
+            return False
+        finally:
+            self._working.discard(entry['id'])
+
+        self.delete(folder)
+        self.forget(folder)
+        self.saved += 1
+        print(f"[Sync] Saved pending order: {entry['name']}")
+        return True
+
+
+def print_status(journal_file):
+    entries = OrderJournal(journal_file).live()
+    if not entries:
+        print("✅ No pending orders")
+        return
+    print(f"{'order':36} {'saved':16} {'designs':>7} {'tries':>5}  state / last error")
+    for e in sorted(entries, key=lambda e: e.get('timestamp', ''), reverse=True):
+        detail = e['state'] + (f" - {e['last_error']}" if e.get('last_error') else '')
+        print(f"{e['name'][:36]:36} {e.get('timestamp', ''):16} {e.get('designs', 0):7} "
+              f"{e['attempts']:5}  {detail[:80]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Status and headless retry of pending orders')
+    parser.add_argument('--status', action='store_true', help='Show the pending-order journal')
+    parser.add_argument('--run', action='store_true', help='Retry pending orders until done (Ctrl+C to stop)')
+    args = parser.parse_args()
+
+    import notion_quick   # the app's paths and PDF generator
+
+    if args.run:
+        sync = notion_quick.get_sync()
+        while sync.busy():
+            s = sync.status()
+            print(f"  online={s['online']} pending={len(s['pending'])} working={len(s['working'])} "
+                  f"failed={len(s['failed'])} next probe {s['next_probe'] or '-'}")
+            sync.wait(timeout=10)
+        publisher = notion_quick.get_publisher()
+        publisher.wait(timeout=notion_quick.PUBLISH_EXIT_WAIT)
+        print(f"✅ Saved {sync.saved} order(s), {len(publisher.pending())} copy(ies) still queued")
+    print_status(notion_quick.PENDING_JOURNAL_FILE)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -34,17 +34,18 @@ sys.path.insert(0, str(Path(__file__).parent))
 from generate_axkan import AxkanPDFGenerator, open_file
 
 
-def process_order(data):
+def process_order(data, generator=None):
     """
     Process order data and generate PDF
 
     Args:
         data: dict with order_name, instructions, and designs list
+        generator: optional AxkanPDFGenerator to reuse between orders
 
     Returns:
         Path to generated PDF
     """
-    generator = AxkanPDFGenerator()
+    generator = generator or AxkanPDFGenerator()
 
     order_name = data.get('order_name', 'Untitled Order')
     instructions = data.get('instructions', '')
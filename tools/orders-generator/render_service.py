@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+Render Service - warm HTTP endpoint for order PDFs
+==================================================
+order-proxy.js used to write every order from the design portal to a temp
+file and run generate_axkan.py --auto on it, paying for a new interpreter,
+the reportlab/PIL/yaml/tkinter imports and config.yaml on each order. This
+service keeps all of that loaded and renders with generate_from_json:
+
+  POST /generate        order JSON (what generate_axkan.py --auto reads)
+                        -> {"success": true, "pdfPath", "queue_ms", "render_ms"}
+  POST /generate?format=pdf   (or Accept: application/pdf)
+                        -> the PDF itself, streamed
+  GET  /health          queue and render counters
+
+Concurrency is bounded: --concurrency warm generators render at a time and
+further requests wait for one to come free. At most --max-queue requests
+wait, each up to --queue-timeout seconds; past that the answer is 503 with
+Retry-After, so a burst from the portal can't pile up without limit.
+
+order-proxy.js forwards to this service when it is running and falls back
+to starting generate_axkan.py when it isn't.
+
+Usage:
+    python render_service.py                        # http://127.0.0.1:3003
+    python render_service.py --port 3003 --concurrency 2 --output ~/Desktop/ORDERS
+"""
+
+import argparse
+import json
+import os
+import queue
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from generate_axkan import AxkanPDFGenerator, generate_from_json
+
+MAX_BODY = 10 * 1024 * 1024     # order JSON only; images travel as paths or URLs
+CHUNK_SIZE = 1 << 16
+
+
+class ServiceBusy(Exception):
+    """Too many requests waiting, or none of the generators came free in time"""
+
+
+class RenderPool:
+    """Warm AxkanPDFGenerators; each renders one order at a time"""
+
+    def __init__(self, size=1, output=None, max_queue=32, queue_timeout=120):
+        self.size = size
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._idle = queue.Queue()
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.stats = {'rendered': 0, 'failed': 0, 'rejected': 0, 'render_ms': 0.0}
+        for _ in range(size):
+            generator = AxkanPDFGenerator()
+            if output:
+                generator.config['output_path'] = output
+            self._warm_up(generator)
+            self._idle.put(generator)
+
+    @staticmethod
+    def _warm_up(generator):
+        """Render a throwaway order so lazily imported modules and the form
+        recordings are ready before the first real one."""
+        output_path = generator.config['output_path']
+        with tempfile.TemporaryDirectory(prefix='axkan_warmup_') as tmp:
+            generator.config['output_path'] = tmp
+            try:
+                generate_from_json({'order_name': 'warmup', 'designs': [{'type': '', 'quantity': 0}]},
+                                   generator)
+            finally:
+                generator.config['output_path'] = output_path
+
+    def render(self, order):
+        """Render order JSON. Returns (pdf path, ms waited, ms rendering)."""
+        with self._lock:
+            if self.waiting >= self.max_queue:
+                self.stats['rejected'] += 1
+                raise ServiceBusy(f"{self.waiting} orders already waiting")
+            self.waiting += 1
+        start = time.perf_counter()
+        try:
+            generator = self._idle.get(timeout=self.queue_timeout)
+        except queue.Empty:
+            with self._lock:
+                self.stats['rejected'] += 1
+            raise ServiceBusy(f"no renderer free after {self.queue_timeout}s")
+        finally:
+            with self._lock:
+                self.waiting -= 1
+
+        rendering = time.perf_counter()
+        try:
+            pdf_path = generate_from_json(order, generator)
+        except Exception:
+            with self._lock:
+                self.stats['failed'] += 1
+            raise
+        finally:
+            self._idle.put(generator)
+        done = time.perf_counter()
+        with self._lock:
+            self.stats['rendered'] += 1
+            self.stats['render_ms'] += (done - rendering) * 1000
+        return pdf_path, (rendering - start) * 1000, (done - rendering) * 1000
+
+    def health(self):
+        with self._lock:
+            stats, busy, waiting = dict(self.stats), self.size - self._idle.qsize(), self.waiting
+        render_ms = stats.pop('render_ms')
+        return {'status': 'ok', 'service': 'axkan-render-service', 'concurrency': self.size,
+                'busy': busy, 'waiting': waiting, **stats,
+                'avg_render_ms': round(render_ms / stats['rendered'], 1) if stats['rendered'] else None}
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    pool = None     # set by serve()
+
+    def _cors(self):
+        # Same headers order-proxy.js sends, for the portal calling it directly
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Headers', 'Content-Type, Authorization')
+
+    def _json(self, status, body, headers=None):
+        data = json.dumps(body, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self._cors()
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_OPTIONS(self):
+        self.send_response(204)
+        self._cors()
+        self.end_headers()
+
+    def do_GET(self):
+        if urlparse(self.path).path == '/health':
+            self._json(200, self.pool.health())
+        else:
+            self._json(404, {'error': 'Not found'})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != '/generate':
+            self._json(404, {'error': 'Not found'})
+            return
+
+        length = int(self.headers.get('Content-Length') or 0)
+        if length <= 0 or length > MAX_BODY:
+            self._json(413 if length > MAX_BODY else 400, {'error': 'Order JSON body required (max 10 MB)'})
+            return
+        try:
+            order = json.loads(self.rfile.read(length))
+            if not isinstance(order, dict) or not isinstance(order.get('designs', []), list):
+                raise ValueError("expected an object with a 'designs' list")
+        except ValueError as e:
+            self._json(400, {'error': f"Invalid order JSON: {e}"})
+            return
+
+        label = order.get('order_number') or order.get('order_id') or order.get('order_name')
+        print(f"[Render] Generating: {label}")
+        try:
+            pdf_path, queue_ms, render_ms = self.pool.render(order)
+        except ServiceBusy as e:
+            print(f"[Render] Busy: {e}")
+            self._json(503, {'error': 'Render service busy', 'details': str(e)}, {'Retry-After': '5'})
+            return
+        except Exception as e:
+            print(f"[Render] Error: {type(e).__name__}: {e}")
+            self._json(500, {'error': 'Generation failed', 'details': f"{type(e).__name__}: {e}"})
+            return
+        print(f"[Render] OK in {render_ms:.0f}ms (+{queue_ms:.0f}ms queued): {pdf_path}")
+
+        wants_pdf = parse_qs(url.query).get('format') == ['pdf'] or \
+            'application/pdf' in self.headers.get('Accept', '')
+        if not wants_pdf:
+            self._json(200, {'success': True, 'pdfPath': pdf_path,
+                             'queue_ms': round(queue_ms, 1), 'render_ms': round(render_ms, 1)})
+            return
+
+        self.send_response(200)
+        self._cors()
+        self.send_header('Content-Type', 'application/pdf')
+        self.send_header('Content-Length', str(os.path.getsize(pdf_path)))
+        self.send_header('Content-Disposition', f'inline; filename="{os.path.basename(pdf_path)}"')
+        self.send_header('X-PDF-Path', pdf_path.encode('ascii', 'replace').decode('ascii'))
+        self.send_header('X-Render-Ms', f"{render_ms:.1f}")
+        self.end_headers()
+        with open(pdf_path, 'rb') as f:
+            shutil.copyfileobj(f, self.wfile, CHUNK_SIZE)
+
+    def log_message(self, format, *args):
+        pass    # one [Render] line per order is enough
+
+
+def serve(host, port, pool):
+    RenderHandler.pool = pool
+    server = ThreadingHTTPServer((host, port), RenderHandler)
+    server.daemon_threads = True
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Warm HTTP service that renders order PDFs')
+    parser.add_argument('--host', default='127.0.0.1', help='Interface to listen on (default 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=3003, help='Port (default 3003)')
+    parser.add_argument('--concurrency', type=int, default=2, help='Orders rendered at once (default 2)')
+    parser.add_argument('--max-queue', type=int, default=32, help='Requests allowed to wait (default 32)')
+    parser.add_argument('--queue-timeout', type=float, default=120,
+                        help='Seconds a request waits for a renderer (default 120)')
+    parser.add_argument('--output', help='PDF folder (default: output_path in config.yaml)')
+    args = parser.parse_args()
+
+    print("=" * 50)
+    print("AXKAN Render Service")
+    start = time.perf_counter()
+    pool = RenderPool(max(1, args.concurrency), os.path.expanduser(args.output) if args.output else None,
+                      args.max_queue, args.queue_timeout)
+    server = serve(args.host, args.port, pool)
+    print(f"{pool.size} renderers ready in {(time.perf_counter() - start) * 1000:.0f}ms")
+    print(f"Running on http://{args.host}:{args.port}")
+    print("=" * 50)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
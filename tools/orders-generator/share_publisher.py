@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+Share Publisher - background copy of finished PDFs to the network share
+=======================================================================
+PDFs are rendered on local disk and handed to a SharePublisher, which copies
+them to the SMB share from a worker thread so a slow or stalled mount never
+blocks the Tk app:
+
+  - copy to a hidden temp name next to the target, fsync, read it back and
+    compare SHA-256, then rename into place (readers never see half a PDF)
+  - failed copies are retried with backoff (5 s, 15 s, 1 min, 5 min, ...)
+  - the queue is a JSON file, so copies still pending when the app quits
+    are picked up again on the next start
+  - with prune_dir set, local files there older than keep_days that are not
+    waiting to be copied are deleted (checked at start, then hourly): the
+    share has the verified copy
+
+Usage:
+    publisher = SharePublisher(queue_file).start()
+    publisher.publish(local_pdf, "/Volumes/TRABAJOS/2026/ORDERS")
+    ...
+    publisher.wait(timeout=30)    # before exiting
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+
+RETRY_DELAYS = (5, 15, 60, 300, 900)   # seconds; the last one repeats
+PRUNE_INTERVAL = 3600                  # seconds between sweeps of prune_dir
+CHUNK_SIZE = 1 << 20
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def copy_atomic(src, dest):
+    """Copy src to dest via a temp file in dest's folder, verified before the rename.
+    Returns the SHA-256 of the copy."""
+    src, dest = Path(src), Path(dest)
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    tmp = dest.parent / f".{dest.name}.part"
+    expected = hashlib.sha256()
+    try:
+        with open(src, 'rb') as fin, open(tmp, 'wb') as fout:
+            for block in iter(lambda: fin.read(CHUNK_SIZE), b''):
+                expected.update(block)
+                fout.write(block)
+            fout.flush()
+            os.fsync(fout.fileno())
+        if sha256_file(tmp) != expected.hexdigest():
+            raise IOError(f"checksum mismatch after copying to {dest.parent}")
+        os.replace(tmp, dest)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+    return expected.hexdigest()
+
+
+class SharePublisher:
+    """Persistent queue of local files to copy to the network share"""
+
+    def __init__(self, queue_file, retry_delays=RETRY_DELAYS, on_change=None, prune_dir=None, keep_days=7):
+        self.queue_file = Path(queue_file)
+        self.retry_delays = retry_delays
+        self.on_change = on_change          # called (from the worker thread) after every attempt
+        self.prune_dir = Path(prune_dir) if prune_dir else None
+        self.keep_days = keep_days
+        self._pruned_at = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._idle = threading.Event()
+        self._stop = False
+        self._thread = None
+        self._jobs = self._load()
+
+    # ------------------------------------------------------------------
+    # Queue file
+    # ------------------------------------------------------------------
+    def _load(self):
+        try:
+            with open(self.queue_file, 'r', encoding='utf-8') as f:
+                jobs = json.load(f)
+        except (OSError, ValueError):
+            return []
+        for job in jobs:   # resumed jobs are due right away
+            job['next_try'] = 0
+        return jobs
+
+    def _save(self):
+        self.queue_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.queue_file.with_suffix('.tmp')
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self._jobs, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, self.queue_file)
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="share-publisher", daemon=True)
+            self._thread.start()
+        return self
+
+    def publish(self, local_path, dest_dir, name=None):
+        """Queue local_path to be copied to dest_dir (as `name`, default the same
+        file name). A file already queued for the same target is replaced."""
+        target = str(Path(dest_dir).expanduser() / (name or Path(local_path).name))
+        job = {'id': uuid.uuid4().hex[:12], 'source': str(local_path), 'target': target,
+               'queued': datetime.now().isoformat(timespec='seconds'),
+               'attempts': 0, 'next_try': 0, 'last_error': None}
+        with self._lock:
+            self._jobs = [j for j in self._jobs if j['target'] != target] + [job]
+            self._save()
+            self._idle.clear()
+        self._wake.set()
+        return job['id']
+
+    def pending(self):
+        """Copies not yet on the share: [{'source', 'target', 'attempts', 'last_error', ...}]"""
+        with self._lock:
+            return [dict(j) for j in self._jobs]
+
+    def retry_now(self):
+        """Try every pending copy again without waiting out its backoff."""
+        with self._lock:
+            for job in self._jobs:
+                job['next_try'] = 0
+        self._wake.set()
+
+    def wait(self, timeout=None):
+        """Block until the queue is empty or timeout seconds passed. Returns True if empty."""
+        with self._lock:
+            if not self._jobs:
+                return True
+        return self._idle.wait(timeout)
+
+    def stop(self):
+        self._stop = True
+        self._wake.set()
+
+    # ------------------------------------------------------------------
+    # Worker
+    # ------------------------------------------------------------------
+    def prune(self):
+        """Delete files in prune_dir older than keep_days that no pending copy
+        still needs. Returns how many were deleted."""
+        if self.prune_dir is None:
+            return 0
+        cutoff = time.time() - self.keep_days * 86400
+        with self._lock:
+            queued = {os.path.abspath(j['source']) for j in self._jobs}
+        removed = 0
+        try:
+            entries = list(os.scandir(self.prune_dir))
+        except OSError:
+            return 0
+        for entry in entries:
+            try:
+                if (not entry.is_file() or os.path.abspath(entry.path) in queued
+                        or entry.stat().st_mtime >= cutoff):
+                    continue
+                os.unlink(entry.path)
+                removed += 1
+            except OSError:
+                continue
+        if removed:
+            print(f"[Publish] Pruned {removed} local copies older than {self.keep_days} days")
+        return removed
+
+    def _run(self):
+        while not self._stop:
+            if self.prune_dir is not None and time.time() - self._pruned_at > PRUNE_INTERVAL:
+                self._pruned_at = time.time()
+                self.prune()
+            with self._lock:
+                now = time.time()
+                due = [j for j in self._jobs if j['next_try'] <= now]
+                upcoming = [j['next_try'] for j in self._jobs if j['next_try'] > now]
+                if not self._jobs:
+                    self._idle.set()
+            for job in due:
+                if self._stop:
+                    return
+                self._attempt(job)
+            if not due:
+                wake_at = upcoming + ([self._pruned_at + PRUNE_INTERVAL] if self.prune_dir else [])
+                self._wake.wait(max(0, min(wake_at) - time.time()) if wake_at else None)
+                self._wake.clear()
+
+    def _attempt(self, job):
+        gone = not os.path.exists(job['source'])
+        error = None
+        try:
+            if gone:
+                raise FileNotFoundError(f"local file is gone, dropping: {job['source']}")
+            copy_atomic(job['source'], job['target'])
+            print(f"[Publish] Copied to network: {job['target']}")
+        except Exception as e:
+            error = str(e)
+            print(f"[Publish] Copy failed ({job['attempts'] + 1}x): {e}")
+
+        with self._lock:
+            current = next((j for j in self._jobs if j['id'] == job['id']), None)
+            if current is not None:
+                if error is None or gone:
+                    self._jobs.remove(current)
+                else:
+                    current['attempts'] += 1
+                    current['last_error'] = error
+                    delay = self.retry_delays[min(current['attempts'], len(self.retry_delays)) - 1]
+                    current['next_try'] = time.time() + delay
+                self._save()
+        if self.on_change:
+            self.on_change()
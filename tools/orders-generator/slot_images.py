@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Slot Images - design images prepared off the Tk thread
+======================================================
+The slot editors (generate_axkan, generate_quick, notion_quick) used to
+shrink, flatten and JPEG-encode every pasted or browsed image inside the
+click handler, so a large screenshot froze the window until it was done.
+SlotImageLoader runs that work on worker threads instead:
+
+  worker threads    decode, resize and normalize the image, write the JPEG
+                    (to a .part file), make the preview thumbnail
+  Tk thread         polled with root.after(): moves the .part file to
+                    temp_images/slot_<n>.jpg, wraps the thumbnail in a
+                    PhotoImage (Tk objects must be made on its own thread)
+                    and calls done(slot_num, path, photo)
+
+Pasting into a slot again before the first image is ready drops the older
+result. flush() waits for everything still in flight, for the Generate
+button.
+
+Usage:
+    self.slot_images = SlotImageLoader(self.root, prepare_slot_image, self._slot_image_ready,
+                                       failed=self._slot_image_failed, preview_size=(130, 100))
+    self.slot_images.submit(slot_num, PILImage.open(path))
+"""
+
+import itertools
+import os
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from PIL import Image as PILImage, ImageTk
+
+POLL_MS = 30
+
+
+def flatten(img):
+    """RGB (or L) for JPEG: transparent areas become white."""
+    if img.mode == 'RGBA':
+        background = PILImage.new('RGB', img.size, (255, 255, 255))
+        background.paste(img, mask=img.split()[3])
+        return background
+    if img.mode not in ('RGB', 'L'):
+        return img.convert('RGB')
+    return img
+
+
+def prepare_slot_image(img, path, max_size=2000, quality=85):
+    """The editors' normalization: at most max_size px, flattened, saved as JPEG.
+    Returns the image that was saved."""
+    if img.width > max_size or img.height > max_size:
+        img.thumbnail((max_size, max_size), PILImage.Resampling.LANCZOS)
+    img = flatten(img)
+    img.save(str(path), "JPEG", quality=quality, optimize=True)
+    return img
+
+
+class SlotImageLoader:
+    """Prepares slot images on worker threads and hands them back to the Tk thread"""
+
+    def __init__(self, root, prepare, done, failed=None, preview_size=(130, 100),
+                 temp_dir="temp_images", workers=2):
+        """
+        Args:
+            root: the editor's Tk root (results are delivered from its event loop)
+            prepare: prepare(img, path) -> PIL image; runs on a worker thread
+            done: done(slot_num, path, photo) on the Tk thread
+            failed: failed(slot_num, error) on the Tk thread
+        """
+        self.root = root
+        self.prepare = prepare
+        self.done = done
+        self.failed = failed
+        self.preview_size = preview_size
+        self.temp_dir = Path(temp_dir)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="slot-image")
+        self._results = queue.Queue()
+        self._tokens = itertools.count(1)
+        self._latest = {}       # slot -> token of the newest submission
+        self._futures = set()
+        self._lock = threading.Lock()
+        self._polling = False
+
+    def submit(self, slot_num, img):
+        """Prepare img for slot_num in the background."""
+        token = next(self._tokens)
+        self._latest[slot_num] = token
+        future = self._pool.submit(self._work, slot_num, token, img)
+        with self._lock:
+            self._futures.add(future)
+        future.add_done_callback(self._forget)
+        if not self._polling:
+            self._polling = True
+            self.root.after(POLL_MS, self._poll)
+
+    def cancel(self, slot_num):
+        """Drop whatever is still being prepared for slot_num."""
+        self._latest[slot_num] = next(self._tokens)
+
+    def busy(self):
+        with self._lock:
+            return bool(self._futures)
+
+    def _forget(self, future):
+        with self._lock:
+            self._futures.discard(future)
+
+    def _work(self, slot_num, token, img):
+        part = self.temp_dir / f"slot_{slot_num}.{token}.part"
+        try:
+            self.temp_dir.mkdir(exist_ok=True)
+            img = self.prepare(img, part)
+            preview = img.copy()
+            preview.thumbnail(self.preview_size)
+            preview.load()
+            self._results.put((slot_num, token, part, preview, None))
+        except Exception as e:
+            self._results.put((slot_num, token, part, None, e))
+
+    def _deliver(self):
+        """Hand finished results to the callbacks (Tk thread)."""
+        while True:
+            try:
+                slot_num, token, part, preview, error = self._results.get_nowait()
+            except queue.Empty:
+                return
+            if token != self._latest.get(slot_num):     # pasted again since, or removed
+                if part.exists():
+                    os.unlink(part)
+                continue
+            if error is not None:
+                if part.exists():
+                    os.unlink(part)
+                if self.failed:
+                    self.failed(slot_num, error)
+                continue
+            path = self.temp_dir / f"slot_{slot_num}.jpg"
+            os.replace(part, path)
+            self.done(slot_num, str(path), ImageTk.PhotoImage(preview))
+
+    def _poll(self):
+        try:
+            self._deliver()
+            if self.busy() or not self._results.empty():
+                self.root.after(POLL_MS, self._poll)
+                return
+        except tk.TclError:     # the editor window was closed meanwhile
+            pass
+        self._polling = False
+
+    def flush(self):
+        """Wait for every image still being prepared and deliver it now."""
+        with self._lock:
+            futures = list(self._futures)
+        for future in futures:
+            future.result()
+        self._deliver()
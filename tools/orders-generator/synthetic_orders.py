@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Synthetic Order Sheets - regression data for auto-crop
+======================================================
+Renders order sheets laid out like order_pdf.OrderSheet (accent
+outline, "Tipo:" header bar, centered design, "Requeridos:" / "Contados:"
+fields, 10 pt gutters) straight to pixels, with the ground truth that a real
+screenshot never comes with: rows, cols and every cell and design box.
+
+Each sheet varies:
+  - grid size          1x1 .. 8x6
+  - resolution         800 .. 4000 px wide
+  - page margin        none (cropped screenshot) or 4-30 pt
+  - scaling            0.5-1.0x after rendering (downscaled screenshots)
+  - noise              Gaussian, sigma 0-6 gray levels
+  - JPEG quality       lossless PNG or 35-95
+Designs come from test_images/ when it exists, otherwise random shapes.
+
+Usage:
+    python synthetic_orders.py corpus/ --count 200 --seed 1
+    -> corpus/sheet_0001.png|jpg ... and corpus/manifest.json
+
+    from synthetic_orders import generate_sheet
+    sheet = generate_sheet(random.Random(1))
+    sheet['image'], sheet['rows'], sheet['cols'], sheet['cells']
+"""
+
+import argparse
+import io
+import json
+import random
+import sys
+from pathlib import Path
+
+import numpy as np
+from PIL import Image as PILImage, ImageDraw, ImageFont
+
+SCRIPT_DIR = Path(__file__).parent
+DESIGNS_DIR = SCRIPT_DIR / 'test_images'
+
+# Same accents, in the same order, as order_pdf.AXKAN_STYLE
+ACCENTS = ['#E91E63', '#7CB342', '#FF9800', '#00BCD4', '#F44336']
+DARK, LIGHT = '#333333', '#F5F5F5'
+
+GRID_WIDTH_PT = 595.28 - 2 * 56.69    # A4 minus the generator's 20 mm margins
+GUTTER_PT = 10
+TYPES = ['Imanes', 'Llaveros', 'Destapadores', 'Portallaves', 'Imanes 3D']
+
+_design_cache = []
+_font_cache = {}
+
+
+def _font(size_px, bold=False):
+    size_px = max(6, int(size_px))
+    key = (size_px, bold)
+    if key not in _font_cache:
+        names = ['Helvetica-Bold.ttf', 'Arial Bold.ttf', 'DejaVuSans-Bold.ttf'] if bold else \
+                ['Helvetica.ttf', 'Arial.ttf', 'DejaVuSans.ttf']
+        font = None
+        for name in names:
+            try:
+                font = ImageFont.truetype(name, size_px)
+                break
+            except OSError:
+                continue
+        if font is None:
+            try:
+                font = ImageFont.load_default(size_px)
+            except TypeError:  # Pillow < 10.1
+                font = ImageFont.load_default()
+        _font_cache[key] = font
+    return _font_cache[key]
+
+
+def _designs():
+    """Design images from test_images/ (loaded once)."""
+    if not _design_cache and DESIGNS_DIR.is_dir():
+        for path in sorted(DESIGNS_DIR.iterdir()):
+            if path.suffix.lower() in ('.png', '.jpg', '.jpeg'):
+                with PILImage.open(path) as img:
+                    _design_cache.append(img.convert('RGBA'))
+    return _design_cache
+
+
+def _random_design(rnd):
+    """A design-like image: colored background with a few shapes."""
+    w, h = rnd.randint(300, 600), rnd.randint(300, 600)
+    img = PILImage.new('RGBA', (w, h), tuple(rnd.randrange(256) for _ in range(3)) + (255,))
+    draw = ImageDraw.Draw(img)
+    for _ in range(rnd.randint(3, 8)):
+        x, y = rnd.randrange(w), rnd.randrange(h)
+        r = rnd.randint(20, min(w, h) // 3)
+        fill = tuple(rnd.randrange(256) for _ in range(3))
+        if rnd.random() < 0.5:
+            draw.ellipse([x - r, y - r, x + r, y + r], fill=fill)
+        else:
+            draw.rectangle([x - r, y - r, x + r, y + r], fill=fill)
+    return img
+
+
+def _pick_design(rnd):
+    designs = _designs()
+    if designs and rnd.random() < 0.8:
+        img = rnd.choice(designs)
+        if rnd.random() < 0.5:  # vary the aspect ratio like real uploads
+            img = img.resize((img.width, int(img.height * rnd.uniform(0.6, 1.6))))
+        return img
+    return _random_design(rnd)
+
+
+def generate_sheet(rnd, rows=None, cols=None, width=None, margin_pt=None,
+                   scale=None, noise=None, jpeg_quality=None):
+    """Render one sheet. Any parameter left as None is drawn from `rnd`.
+
+    Returns a dict with 'image' (RGB), 'rows', 'cols', 'params' and 'cells':
+    [{'row', 'col', 'box': (x1, y1, x2, y2), 'design_box': (...)}] in pixels
+    of the returned image.
+    """
+    rows = rows or rnd.randint(1, 8)
+    cols = cols or rnd.randint(1, 6)
+    width = width or rnd.choice([800, 1200, 1600, 2400, 3200, 4000])
+    if margin_pt is None:
+        margin_pt = 0 if rnd.random() < 0.3 else rnd.uniform(4, 30)
+    if scale is None:
+        scale = 1.0 if rnd.random() < 0.6 else rnd.uniform(0.5, 0.95)
+    if noise is None:
+        noise = 0 if rnd.random() < 0.5 else rnd.uniform(1, 6)
+    if jpeg_quality is None:
+        jpeg_quality = None if rnd.random() < 0.4 else rnd.randint(35, 95)
+
+    u = width / (GRID_WIDTH_PT + 2 * margin_pt)   # pixels per point
+    cw = (GRID_WIDTH_PT - (cols - 1) * GUTTER_PT) / cols
+    ch = rnd.uniform(120, 200)                     # notion_quick caps cells at 200 pt
+    height = int(round((2 * margin_pt + rows * ch + (rows - 1) * GUTTER_PT) * u))
+
+    img = PILImage.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(img)
+    label_font, value_font = _font(9 * u, bold=True), _font(10 * u)
+    cells = []
+
+    for i in range(rows * cols):
+        row, col = divmod(i, cols)
+        x = (margin_pt + col * (cw + GUTTER_PT)) * u
+        top = (margin_pt + row * (ch + GUTTER_PT)) * u
+        w, h = cw * u, ch * u
+        accent = ACCENTS[i % 5]
+
+        draw.rectangle([x, top, x + w, top + h], outline=accent, width=max(1, round(2 * u)))
+        draw.rectangle([x, top, x + w, top + 18 * u], fill=accent)
+        draw.text((x + 5 * u, top + 5 * u), "Tipo:", fill='white', font=label_font)
+        draw.text((x + 35 * u, top + 5 * u), rnd.choice(TYPES), fill='white', font=label_font)
+
+        design = _pick_design(rnd)
+        mw, mh = (cw - 10) * u, (ch - 80) * u
+        s = min(mw / design.width, mh / design.height)
+        dw, dh = max(1, int(design.width * s)), max(1, int(design.height * s))
+        dx, dy = int(x + (w - dw) / 2), int(top + 25 * u + (mh - dh) / 2)
+        resized = design.resize((dw, dh), PILImage.BILINEAR)
+        img.paste(resized, (dx, dy), resized)
+
+        qy = top + h - 40 * u
+        draw.text((x + 5 * u, qy - 9 * u), "Requeridos:", fill=DARK, font=label_font)
+        draw.rectangle([x + 60 * u, qy - 3 * u, x + w - 10 * u, qy + 12 * u], fill=LIGHT,
+                       outline=accent, width=max(1, round(u)))
+        draw.text((x + 65 * u, qy), str(rnd.choice([25, 50, 100, 150])), fill='black', font=value_font)
+        cy = qy + 20 * u
+        draw.text((x + 5 * u, cy - 9 * u), "Contados:", fill=DARK, font=label_font)
+        draw.rectangle([x + 60 * u, cy - 3 * u, x + w - 10 * u, cy + 12 * u], fill=LIGHT,
+                       outline=accent, width=max(1, round(u)))
+
+        cells.append({'row': row, 'col': col, 'box': (x, top, x + w, top + h),
+                      'design_box': (dx, dy, dx + dw, dy + dh)})
+
+    if scale != 1.0:
+        img = img.resize((max(1, int(width * scale)), max(1, int(height * scale))), PILImage.BILINEAR)
+        for cell in cells:
+            cell['box'] = tuple(v * scale for v in cell['box'])
+            cell['design_box'] = tuple(v * scale for v in cell['design_box'])
+    if noise:
+        rng = np.random.default_rng(rnd.randrange(2 ** 32))
+        px = np.asarray(img, dtype=np.int16)
+        px = px + (rng.standard_normal(px.shape, dtype=np.float32) * noise).astype(np.int16)
+        img = PILImage.fromarray(np.clip(px, 0, 255).astype(np.uint8))
+    if jpeg_quality:
+        buf = io.BytesIO()
+        img.save(buf, 'JPEG', quality=jpeg_quality)
+        img = PILImage.open(io.BytesIO(buf.getvalue())).convert('RGB')
+
+    for cell in cells:
+        cell['box'] = tuple(round(v, 1) for v in cell['box'])
+        cell['design_box'] = tuple(round(v, 1) for v in cell['design_box'])
+
+    return {
+        'image': img, 'rows': rows, 'cols': cols, 'cells': cells,
+        'params': {'width': width, 'margin_pt': round(margin_pt, 1), 'scale': round(scale, 3),
+                   'noise': round(noise, 2), 'jpeg_quality': jpeg_quality},
+    }
+
+
+def generate_corpus(count, seed=1):
+    """Yield `count` sheets, reproducible for a given seed."""
+    rnd = random.Random(seed)
+    for _ in range(count):
+        yield generate_sheet(rnd)
+
+
+def load_corpus(folder):
+    """Yield sheets saved by write_corpus(), images loaded."""
+    folder = Path(folder)
+    manifest = json.loads((folder / 'manifest.json').read_text(encoding='utf-8'))
+    for entry in manifest['sheets']:
+        with PILImage.open(folder / entry['file']) as img:
+            yield {**entry, 'image': img.convert('RGB')}
+
+
+def write_corpus(folder, count, seed=1):
+    folder = Path(folder)
+    folder.mkdir(parents=True, exist_ok=True)
+    sheets = []
+    for n, sheet in enumerate(generate_corpus(count, seed), start=1):
+        quality = sheet['params']['jpeg_quality']
+        name = f"sheet_{n:04d}.{'jpg' if quality else 'png'}"
+        if quality:
+            sheet['image'].save(folder / name, 'JPEG', quality=quality)
+        else:
+            sheet['image'].save(folder / name, 'PNG')
+        sheets.append({'file': name, **{k: v for k, v in sheet.items() if k != 'image'}})
+        print(f"  {name}  {sheet['rows']}x{sheet['cols']}  {sheet['image'].size[0]}x{sheet['image'].size[1]}")
+    (folder / 'manifest.json').write_text(
+        json.dumps({'seed': seed, 'count': count, 'sheets': sheets}, indent=1), encoding='utf-8')
+    return sheets
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic order sheets with ground truth')
+    parser.add_argument('folder', help='Output folder (gets sheet images + manifest.json)')
+    parser.add_argument('--count', type=int, default=200, help='Number of sheets (default 200)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default 1)')
+    args = parser.parse_args()
+
+    print(f"Generating {args.count} sheets (seed {args.seed}) in {args.folder}")
+    write_corpus(args.folder, args.count, args.seed)
+    print(f"✅ Wrote {args.count} sheets + manifest.json")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())